@@ -10,6 +10,7 @@ from shared.utils.cursor_rules import CursorRules
 from shared.components.charts import ChartComponents
 from shared.utils.alerts import AlertManager
 from modules.comercial import render_comercial_module
+from modules.comercial.services.warmup import start_background_warmup
 
 # Configuração de logging
 logging.basicConfig(level=logging.DEBUG)
@@ -42,6 +43,9 @@ def check_css():
             logger.error(f"Arquivo CSS não encontrado em: {css_path}")
             st.error(f"Erro ao carregar estilos CSS de {css_path}")
 
+# Aquece os caches do módulo comercial (uma vez por processo, em segundo plano)
+start_background_warmup()
+
 # Carrega os estilos personalizados globais
 logger.debug("Iniciando carregamento dos estilos CSS")
 check_css()
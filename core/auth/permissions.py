@@ -46,6 +46,11 @@ class PermissionManager:
             return None
         return ModulePermission(self.permissions[username]["modules"][module])
 
+    def is_admin(self, username: str) -> bool:
+        """Verifica se o usuário tem papel de administrador (seção users do YAML)"""
+        usuario = self.permissions.get("users", {}).get(username) or {}
+        return usuario.get("role") == UserRole.ADMIN.value
+
 class Permissions:
     @staticmethod
     def get_allowed_kpis(role: UserRole) -> dict:
@@ -1,12 +1,13 @@
 import requests
 from typing import Dict, Any
 from config.settings import API_BASE_URL, API_TIMEOUT
+from shared.services.http_client import http_client
 
 class APIClient:
     def __init__(self):
         self.base_url = API_BASE_URL
         self.timeout = API_TIMEOUT
-        self.session = requests.Session()
+        self.session = http_client
     
     def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
         """Faz requisição à API"""
@@ -1,22 +1,28 @@
 import plotly.graph_objects as go
 import pandas as pd
 import logging
+from typing import Optional, Sequence
 from shared.utils.formatters import format_currency, format_number, format_percentage
+from modules.comercial.services.rollups import consultar_faturamento
 
 # Configuração do logger
 logger = logging.getLogger(__name__)
 
-def criar_analise_conversao_vendedor(df: pd.DataFrame) -> go.Figure:
+def criar_analise_conversao_vendedor(df: pd.DataFrame, anos: Optional[Sequence[int]] = None) -> go.Figure:
     """
     Cria gráfico de análise de conversão por vendedor com escalas ajustadas
+    
+    Args:
+        df: Faturamento completo (as métricas vêm do cubo de agregados)
+        anos: Anos considerados (padrão: todos)
     """
     try:
-        # Agrupa dados por vendedor
-        metricas_vendedor = df.groupby('vendedor').agg({
-            'codcli': 'nunique',  # Número de clientes únicos
-            'nota': 'count',      # Número total de vendas
-            'valorfaturado': 'sum'  # Soma total
-        }).reset_index()
+        # Métricas por vendedor: clientes únicos, número total de vendas e soma total
+        metricas_vendedor = consultar_faturamento(
+            df, ['vendedor'],
+            where={'ano': list(anos)} if anos else None,
+            measures=['clientes', 'itens', 'valorfaturado']
+        ).dropna(subset=['vendedor']).rename(columns={'clientes': 'codcli', 'itens': 'nota'})
         
         # Calcula valor médio por venda e vendas por cliente
         metricas_vendedor['valor_medio'] = (
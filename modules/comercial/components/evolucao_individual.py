@@ -1,22 +1,31 @@
 import plotly.graph_objects as go
 import pandas as pd
+from typing import Optional, Sequence
 from shared.utils.formatters import format_currency
+from modules.comercial.services.rollups import consultar_faturamento
 import logging
 
 logger = logging.getLogger(__name__)
 
-def criar_evolucao_individual(df: pd.DataFrame) -> go.Figure:
+def criar_evolucao_individual(df: pd.DataFrame, anos: Optional[Sequence[int]] = None) -> go.Figure:
     """
     Cria gráfico de evolução de vendas por vendedor ao longo do tempo
+    
+    Args:
+        df: Faturamento completo (os totais vêm do cubo de agregados)
+        anos: Anos a exibir (padrão: todos)
     """
     try:
-        # Prepara os dados
-        df = df.copy()
-        df['emissao'] = pd.to_datetime(df['emissao'])
-        df['mes_ano'] = df['emissao'].dt.strftime('%Y-%m')
-        
-        # Agrupa dados por mês e vendedor
-        evolucao = df.groupby(['mes_ano', 'vendedor'])['valorfaturado'].sum().reset_index()
+        # Totais por mês e vendedor, lidos do cubo
+        evolucao = consultar_faturamento(
+            df, ['ano', 'mes', 'vendedor'],
+            where={'ano': list(anos)} if anos else None,
+            measures=['valorfaturado']
+        ).dropna(subset=['ano', 'mes', 'vendedor'])
+        evolucao['mes_ano'] = (
+            evolucao['ano'].astype(int).astype(str) + '-' +
+            evolucao['mes'].astype(int).astype(str).str.zfill(2)
+        )
         
         # Pivota a tabela para ter vendedores como colunas
         evolucao_pivot = evolucao.pivot(
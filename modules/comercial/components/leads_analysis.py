@@ -55,7 +55,7 @@ class LeadsAnalysis:
         """Cria gráfico de distribuição de leads por UF"""
         try:
             # Usa uf_x que vem da tabela CLIENTE
-            leads_by_uf = df.groupby('uf_x').size().reset_index(name='total')
+            leads_by_uf = df.groupby('uf_x', observed=True).size().reset_index(name='total')
             leads_by_uf = leads_by_uf.sort_values('total', ascending=True)  # Ordena por quantidade
             
             fig = go.Figure(data=[
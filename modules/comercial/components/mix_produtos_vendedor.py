@@ -1,6 +1,6 @@
 import plotly.graph_objects as go
 import pandas as pd
-from shared.utils.formatters import format_currency
+from shared.utils.hierarchy import build_hierarchy
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,57 +26,17 @@ def criar_mix_produtos_vendedor(df: pd.DataFrame) -> go.Figure:
     💡 Dica: Identifique a especialidade de cada vendedor e oportunidades de diversificação do mix de produtos.
     """
     try:
-        print("\n=== DEBUG MIX PRODUTOS ===")
-        print(f"1. DataFrame original: {df.shape} registros")
-        print(f"Colunas disponíveis: {df.columns.tolist()}")
-        print(f"Amostra dos dados originais:")
-        print(df[['vendedor', 'grupo', 'subGrupo', 'valorfaturado']].head())
-        
-        # Limpeza dos dados
-        df_clean = df.dropna(subset=['vendedor', 'grupo', 'subGrupo', 'valorfaturado'])
-        print(f"\n2. Após limpeza: {df_clean.shape} registros")
-        
-        # Agrupamento dos dados
-        df_mix = (df_clean.groupby(['vendedor', 'grupo', 'subGrupo'])
-                 .agg({'valorfaturado': 'sum'})
-                 .round(2)
-                 .reset_index())
-        
-        print(f"\n3. Após agrupamento: {df_mix.shape} registros")
-        print("Amostra dos dados agrupados:")
-        print(df_mix.head())
-        
-        # Prepara as listas para o Treemap
-        ids = []
-        labels = []
-        parents = []
-        values = []
+        # Nós de vendedor > grupo > subgrupo a partir de um único agrupamento
+        nos = build_hierarchy(
+            df, ['vendedor', 'grupo', 'subGrupo'], 'valorfaturado',
+            prefixes=['v', 'g', 's']
+        )
+        logger.debug(f"Mix de produtos: {len(df)} registros, {len(nos)} nós")
         
-        # Adiciona vendedores (nível 1)
-        for vendedor in df_mix['vendedor'].unique():
-            valor_vendedor = df_mix[df_mix['vendedor'] == vendedor]['valorfaturado'].sum()
-            ids.append(f"v_{vendedor}")
-            labels.append(f"{vendedor}<br>{format_currency(valor_vendedor)}")
-            parents.append("")
-            values.append(valor_vendedor)
-            
-            # Adiciona grupos (nível 2)
-            for grupo in df_mix[df_mix['vendedor'] == vendedor]['grupo'].unique():
-                valor_grupo = df_mix[(df_mix['vendedor'] == vendedor) & 
-                                   (df_mix['grupo'] == grupo)]['valorfaturado'].sum()
-                ids.append(f"g_{vendedor}_{grupo}")
-                labels.append(f"{grupo}<br>{format_currency(valor_grupo)}")
-                parents.append(f"v_{vendedor}")
-                values.append(valor_grupo)
-                
-                # Adiciona subgrupos (nível 3)
-                subgrupos = df_mix[(df_mix['vendedor'] == vendedor) & 
-                                 (df_mix['grupo'] == grupo)]
-                for _, row in subgrupos.iterrows():
-                    ids.append(f"s_{vendedor}_{grupo}_{row['subGrupo']}")
-                    labels.append(f"{row['subGrupo']}<br>{format_currency(row['valorfaturado'])}")
-                    parents.append(f"g_{vendedor}_{grupo}")
-                    values.append(row['valorfaturado'])
+        ids = nos['ids']
+        labels = nos['labels']
+        parents = nos['parents']
+        values = nos['values']
         
         # Cria o Treemap
         fig = go.Figure(go.Treemap(
@@ -104,8 +64,6 @@ def criar_mix_produtos_vendedor(df: pd.DataFrame) -> go.Figure:
             ),
         ))
         
-        print("\n5. Figura criada com sucesso")
-        
         # Atualiza o layout
         fig.update_layout(
             title=dict(
@@ -123,12 +81,8 @@ def criar_mix_produtos_vendedor(df: pd.DataFrame) -> go.Figure:
             plot_bgcolor="#111111",
         )
         
-        print("6. Layout atualizado")
-        print("=== FIM DEBUG ===\n")
-        
         return fig
         
     except Exception as e:
-        print(f"Erro: {str(e)}")
         logger.error(f"Erro ao criar gráfico de mix de produtos: {str(e)}")
         return None 
\ No newline at end of file
@@ -1,6 +1,7 @@
 import plotly.graph_objects as go
 import pandas as pd
-from shared.utils.formatters import format_currency
+from shared.utils.formatters import format_currency_series
+from shared.utils.hierarchy import build_hierarchy
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,9 +32,6 @@ def criar_treemap_territorial(df: pd.DataFrame, metrica: str = "Valor Faturado",
         nivel_detalhe: Nível de detalhe ("Região > Estado", "Estado > Cidade", "Região > Estado > Cidade")
     """
     try:
-        # Debug prints
-        print(f"Recebido - Métrica: {metrica}, Nível: {nivel_detalhe}")
-        
         # Mapeia a métrica para a coluna correspondente
         colunas = {
             "Valor Faturado": "valorfaturado",
@@ -44,8 +42,6 @@ def criar_treemap_territorial(df: pd.DataFrame, metrica: str = "Valor Faturado",
         coluna_valor = colunas.get(metrica)
         if not coluna_valor:
             raise ValueError(f"Métrica não reconhecida: {metrica}")
-            
-        print(f"Coluna valor mapeada: {coluna_valor}")  # Debug
         
         # Define os níveis baseado na seleção
         niveis = {
@@ -54,92 +50,35 @@ def criar_treemap_territorial(df: pd.DataFrame, metrica: str = "Valor Faturado",
             "Região > Estado > Cidade": ['regiao', 'uf', 'cidade']
         }[nivel_detalhe]
         
-        print(f"Níveis selecionados: {niveis}")  # Debug
+        logger.debug(f"Treemap territorial - métrica: {coluna_valor}, níveis: {niveis}")
         
         # Verifica se as colunas existem no DataFrame
         colunas_necessarias = niveis + [coluna_valor]
         colunas_faltantes = [col for col in colunas_necessarias if col not in df.columns]
         if colunas_faltantes:
             raise ValueError(f"Colunas faltantes no DataFrame: {colunas_faltantes}")
-            
-        # Mostra as colunas disponíveis para debug
-        print(f"Colunas disponíveis no DataFrame: {df.columns.tolist()}")
-        
-        # Limpeza e preparação dos dados
-        df_clean = df.dropna(subset=niveis + [coluna_valor])
-        
-        # Agrupamento dos dados
-        df_geo = (df_clean.groupby(niveis)
-                 .agg({coluna_valor: 'nunique' if coluna_valor == 'codcli' else 'sum'})
-                 .round(2)
-                 .reset_index())
         
-        # Prepara as listas para o Treemap
-        ids = []
-        labels = []
-        parents = []
-        values = []
-        
-        # Função para formatar o valor baseado na métrica
-        def format_value(value):
+        # Função para formatar os valores de cada nível, coluna a coluna
+        def format_values(valores: pd.Series) -> pd.Series:
             if coluna_valor == 'valorfaturado':
-                return format_currency(value)
+                return format_currency_series(valores)
             elif coluna_valor == 'codcli':
-                return f"{int(value)} clientes"
+                return valores.astype('int64').astype(str) + " clientes"
             else:
-                return f"{int(value)} un"
-        
-        # Adiciona níveis conforme selecionado
-        if nivel_detalhe == "Estado > Cidade":
-            # Começa pelo estado
-            for uf in df_geo['uf'].unique():
-                valor_uf = df_geo[df_geo['uf'] == uf][coluna_valor].sum()
-                ids.append(f"u_{uf}")
-                labels.append(f"{uf}<br>{format_value(valor_uf)}")
-                parents.append("")
-                values.append(valor_uf)
-                
-                # Adiciona cidades
-                for _, row in df_geo[df_geo['uf'] == uf].iterrows():
-                    ids.append(f"c_{uf}_{row['cidade']}")
-                    labels.append(f"{row['cidade']}<br>{format_value(row[coluna_valor])}")
-                    parents.append(f"u_{uf}")
-                    values.append(row[coluna_valor])
-        else:
-            # Adiciona regiões (se aplicável)
-            if 'regiao' in niveis:
-                for regiao in df_geo['regiao'].unique():
-                    valor_regiao = df_geo[df_geo['regiao'] == regiao][coluna_valor].sum()
-                    ids.append(f"r_{regiao}")
-                    labels.append(f"{regiao}<br>{format_value(valor_regiao)}")
-                    parents.append("")
-                    values.append(valor_regiao)
-                    
-                    # Adiciona estados
-                    for uf in df_geo[df_geo['regiao'] == regiao]['uf'].unique():
-                        valor_uf = df_geo[
-                            (df_geo['regiao'] == regiao) & 
-                            (df_geo['uf'] == uf)
-                        ][coluna_valor].sum()
-                        ids.append(f"u_{regiao}_{uf}")
-                        labels.append(f"{uf}<br>{format_value(valor_uf)}")
-                        parents.append(f"r_{regiao}")
-                        values.append(valor_uf)
-                        
-                        # Adiciona cidades se necessário
-                        if 'cidade' in niveis:
-                            cidades = df_geo[
-                                (df_geo['regiao'] == regiao) & 
-                                (df_geo['uf'] == uf)
-                            ]
-                            for _, row in cidades.iterrows():
-                                ids.append(f"c_{regiao}_{uf}_{row['cidade']}")
-                                labels.append(f"{row['cidade']}<br>{format_value(row[coluna_valor])}")
-                                parents.append(f"u_{regiao}_{uf}")
-                                values.append(row[coluna_valor])
+                return valores.astype('int64').astype(str) + " un"
         
-        # Limpa qualquer figura anterior
-        go.Figure().data = []
+        # Nós de todos os níveis a partir de um único agrupamento pelas folhas
+        prefixos = {'regiao': 'r', 'uf': 'u', 'cidade': 'c'}
+        nos = build_hierarchy(
+            df, niveis, coluna_valor,
+            agg='nunique' if coluna_valor == 'codcli' else 'sum',
+            prefixes=[prefixos[nivel] for nivel in niveis],
+            formatter=format_values
+        )
+        ids = nos['ids']
+        labels = nos['labels']
+        parents = nos['parents']
+        values = nos['values']
         
         # Cria o Treemap
         fig = go.Figure(go.Treemap(
@@ -1,27 +1,23 @@
 import plotly.graph_objects as go
 import pandas as pd
-from shared.utils.formatters import format_currency
+from shared.utils.formatters import format_currency_series
 import logging
 
 logger = logging.getLogger(__name__)
 
 class VendasPorRegiao:
     @staticmethod
-    def create_sales_region_chart(df: pd.DataFrame) -> go.Figure:
-        """Cria gráfico de vendas por região (top 10)"""
+    def create_sales_region_chart(locais: pd.DataFrame) -> go.Figure:
+        """
+        Cria gráfico de vendas por região (top 10)
+
+        Args:
+            locais: Locais do agregado territorial (agregado_territorial(...).locations);
+                local é a UF ou, para vendas externas, o país
+        """
         try:
-            # Cria coluna de região considerando UF e países
-            df['location_name'] = df.apply(
-                lambda row: row['pais'] if row['uf'] == 'EX' else row['uf'], 
-                axis=1
-            )
-            
-            # Agrupa dados apenas por região (soma total do período)
-            vendas_regiao = df.groupby('location_name')['valorfaturado'].sum().reset_index()
-            
-            # Seleciona top 10 e ordena (decrescente para visualização)
-            vendas_regiao = vendas_regiao.nlargest(10, 'valorfaturado')
-            vendas_regiao = vendas_regiao.sort_values('valorfaturado', ascending=False)
+            # Top 10 (decrescente para visualização)
+            vendas_regiao = locais.nlargest(10, 'valorfaturado')
             
             # Cria o gráfico
             fig = go.Figure()
@@ -29,9 +25,9 @@ class VendasPorRegiao:
             # Adiciona uma única barra por região
             fig.add_trace(go.Bar(
                 x=vendas_regiao['valorfaturado'],
-                y=vendas_regiao['location_name'],
+                y=vendas_regiao['local'],
                 orientation='h',
-                text=vendas_regiao['valorfaturado'].apply(format_currency),
+                text=format_currency_series(vendas_regiao['valorfaturado']),
                 textposition='auto',
                 marker=dict(color='#1f77b4', opacity=0.7),
                 hoverinfo='none'
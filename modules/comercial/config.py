@@ -12,4 +12,57 @@ API_CONFIG = {
         'ID': os.getenv('VITE_API_ID', 'XIOPMANA'),
         'VIEW': os.getenv('VITE_API_VIEW', 'CUBO_FATURAMENTO')
     }
-} 
\ No newline at end of file
+}
+
+# Carregamento concorrente das views do POWERBI
+LOADER_CONFIG = {
+    'MAX_WORKERS': int(os.getenv('API_MAX_WORKERS', '3')),
+    'VIEW_TIMEOUT': float(os.getenv('API_VIEW_TIMEOUT', '60'))
+}
+
+# Retentativas e circuit breaker das chamadas ao POWERBI
+RETRY_CONFIG = {
+    'MAX_ATTEMPTS': int(os.getenv('API_RETRY_MAX_ATTEMPTS', '3')),
+    'BASE_DELAY': float(os.getenv('API_RETRY_BASE_DELAY', '0.5')),
+    'MAX_DELAY': float(os.getenv('API_RETRY_MAX_DELAY', '10')),
+    'FAILURE_THRESHOLD': int(os.getenv('API_CIRCUIT_FAILURE_THRESHOLD', '5')),
+    'RESET_TIMEOUT': float(os.getenv('API_CIRCUIT_RESET_TIMEOUT', '60')),
+    'BUDGET_RATIO': float(os.getenv('API_RETRY_BUDGET_RATIO', '0.2'))
+}
+
+# Sincronização incremental (delta) das views com cópia local
+DELTA_SYNC_CONFIG = {
+    'ENABLED': os.getenv('API_DELTA_SYNC', '0') == '1',
+    'VIEWS': [v for v in os.getenv('API_DELTA_SYNC_VIEWS', 'CUBO_FATURAMENTO').split(',') if v],
+    'DIR': os.getenv('API_DELTA_SYNC_DIR', os.path.join(os.getenv('CACHE_DIR', '.cache'), 'delta')),
+    'DATE_COLUMN': os.getenv('API_DELTA_DATE_COLUMN', 'emissao'),
+    'KEY_COLUMNS': os.getenv('API_DELTA_KEY_COLUMNS', 'nota,codcli,item').split(','),
+    'RECHECK_DAYS': int(os.getenv('API_DELTA_RECHECK_DAYS', '7')),
+    'RECONCILE_HOURS': float(os.getenv('API_DELTA_RECONCILE_HOURS', '24')),
+    # Parâmetro de data aceito pelo backend (ex.: DATA_INICIAL); vazio se não houver filtro
+    'FILTER_PARAM': os.getenv('API_DELTA_FILTER_PARAM', '')
+}
+
+# Atualização dos datasets em segundo plano (stale-while-revalidate)
+REFRESH_CONFIG = {
+    'ENABLED': os.getenv('DATASET_REFRESH_SCHEDULER', '1') == '1',
+    # Intervalo por view em segundos, no formato VIEW=SEGUNDOS,...; as demais usam DATASET_TTL_SECONDS
+    'INTERVALS': {
+        view: float(segundos)
+        for view, segundos in (
+            item.split('=') for item in
+            os.getenv('DATASET_REFRESH_INTERVALS', 'OS=600,ORCAMENTO=900,CLIENTE=3600').split(',') if item
+        )
+    }
+}
+
+# Aquecimento dos caches na inicialização do app
+WARMUP_CONFIG = {
+    'ON_START': os.getenv('WARMUP_ON_START', '1') == '1',
+    'VIEWS': [v for v in os.getenv('WARMUP_VIEWS', 'CUBO_FATURAMENTO,ORCAMENTO,OS,CLIENTE').split(',') if v]
+}
+
+# Datasets compartilhados entre processos (Arrow IPC mapeado em memória)
+SHARED_DATASET_CONFIG = {
+    'ENABLED': os.getenv('SHARED_DATASETS', '0') == '1'
+}
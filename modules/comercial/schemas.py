@@ -0,0 +1,44 @@
+"""
+Esquemas das views do POWERBI usadas pelo módulo comercial
+"""
+from shared.services.schema import SchemaRegistry, ViewSchema
+
+CUBO_FATURAMENTO = ViewSchema(
+    name='CUBO_FATURAMENTO',
+    required=('emissao', 'valorfaturado', 'codcli'),
+    dates={'emissao': None, 'data': '%Y-%m-%d'},
+    categories=('uf', 'pais', 'vendedor', 'grupo', 'subGrupo', 'regiao', 'cidade'),
+    integers=('codcli', 'nota', 'sequencial', 'item', 'os'),
+    floats=('valorfaturado',),
+    small_floats=('quant',),
+    partition_by='emissao'
+)
+
+ORCAMENTO = ViewSchema(
+    name='ORCAMENTO',
+    required=('data', 'os', 'status'),
+    dates={'data': '%Y-%m-%d'},
+    categories=('vendedor',),
+    integers=('os', 'status', 'codcli'),
+    floats=('valor',),
+    partition_by='data'
+)
+
+OS = ViewSchema(
+    name='OS',
+    required=('data', 'os', 'status'),
+    dates={'data': '%Y-%m-%d'},
+    categories=('vendedor',),
+    integers=('os', 'status', 'codcli'),
+    partition_by='data'
+)
+
+CLIENTE = ViewSchema(
+    name='CLIENTE',
+    required=('codcli',),
+    categories=('uf', 'pais', 'cidade', 'regiao', 'vendedor'),
+    integers=('codcli', 'ativo')
+)
+
+# Registro consultado na ingestão de todas as views
+view_schemas = SchemaRegistry([CUBO_FATURAMENTO, ORCAMENTO, OS, CLIENTE])
@@ -0,0 +1,71 @@
+"""
+Agregados comuns do faturamento, compartilhados entre sessões
+
+As funções recebem o CUBO_FATURAMENTO completo (referência do dataset_store):
+a chave do cache é a versão do dataset, então o resultado é calculado uma vez
+por carga e reaproveitado por todos os dashboards e pelo aquecimento. Os
+valores saem do cubo de agregados (rollups), não das notas.
+"""
+import logging
+from typing import Any, Dict
+import pandas as pd
+from shared.utils.cache_manager import cache_data
+from .rollups import consultar_faturamento, cubo_faturamento
+from .territorial import agregado_territorial
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = 'comercial.agregados'
+
+@cache_data(ttl_seconds=3600, namespace=NAMESPACE)
+def totais_por_ano(df: pd.DataFrame) -> pd.DataFrame:
+    """Faturamento, notas e clientes por ano de emissão"""
+    try:
+        totais = consultar_faturamento(df, ['ano'], measures=['valorfaturado', 'notas', 'clientes'])
+        return totais.dropna(subset=['ano']).reset_index(drop=True)
+    except Exception as e:
+        logger.error(f"Erro ao calcular totais por ano: {str(e)}")
+        return pd.DataFrame()
+
+
+@cache_data(ttl_seconds=3600, namespace=NAMESPACE)
+def totais_por_uf(df: pd.DataFrame) -> pd.DataFrame:
+    """Faturamento, notas e clientes por UF, do maior para o menor faturamento"""
+    try:
+        totais = consultar_faturamento(df, ['uf'], measures=['valorfaturado', 'notas', 'clientes'])
+        return (totais.dropna(subset=['uf'])
+                .sort_values('valorfaturado', ascending=False)
+                .reset_index(drop=True))
+    except Exception as e:
+        logger.error(f"Erro ao calcular totais por UF: {str(e)}")
+        return pd.DataFrame()
+
+
+def resumo_territorial(df: pd.DataFrame) -> Dict[str, Any]:
+    """Clientes, estados e países atendidos (cards da Análise Territorial), do agregado territorial"""
+    return agregado_territorial(df).summary()
+
+
+@cache_data(ttl_seconds=3600, namespace=NAMESPACE)
+def resumo_vendas(df: pd.DataFrame) -> Dict[str, Any]:
+    """Faturamento total, vendedores e ticket médio (cards da Performance de Vendedores)"""
+    cubo = cubo_faturamento(df)
+    total = cubo.query(measures=['valorfaturado', 'notas']).iloc[0]
+    faturamento = float(total['valorfaturado'])
+    notas = int(total['notas'])
+    vendedores = cubo.query(['vendedor'], measures=['itens'])['vendedor']
+    return {
+        'faturamento_total': faturamento,
+        'total_vendedores': int(vendedores.notna().sum()),
+        'ticket_medio': faturamento / notas if notas else 0,
+    }
+
+
+# Agregados calculados no aquecimento, a partir do CUBO_FATURAMENTO (o cubo primeiro)
+FATURAMENTO_AGGREGATES = {
+    'cubo_faturamento': cubo_faturamento,
+    'totais_por_ano': totais_por_ano,
+    'totais_por_uf': totais_por_uf,
+    'resumo_territorial': resumo_territorial,
+    'resumo_vendas': resumo_vendas,
+}
@@ -4,181 +4,360 @@ Serviço para API do módulo comercial
 import os
 import pandas as pd
 import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union, Iterable, Optional
 import plotly.graph_objects as go
 from shared.utils.formatters import format_number, format_percentage
-from datetime import datetime, timedelta
-import random
 from config import settings
 import streamlit as st  # Adicionar importação do streamlit
 import time
+import threading
+from urllib.parse import urlencode
+from modules.comercial.config import (
+    API_CONFIG, LOADER_CONFIG, RETRY_CONFIG, DELTA_SYNC_CONFIG, REFRESH_CONFIG, SHARED_DATASET_CONFIG
+)
+from shared.services.retry import RetryEngine, RetryPolicy
+from shared.services.fingerprint import FingerprintRegistry
+from shared.services.http_client import http_client
+from shared.cache.dataset_store import dataset_store
+from shared.cache.refresh_scheduler import refresh_scheduler
+from shared.cache.shared_datasets import shared_datasets
+from shared.cache.stats import register_cache
+from shared.exceptions.api_exceptions import APICircuitOpenError, APIDataError, APISchemaError, APISessionConflictError
+from modules.comercial.schemas import view_schemas
+from .view_loader import ConcurrentViewLoader, ViewLoadResult
+from .delta_sync import DeltaSync
+from .rfv import calcular_rfv, rfv_state
+from .synthetic_data import SyntheticDataGenerator
 
 logger = logging.getLogger(__name__)
 
+# Erro do PowerBI quando a sessão anterior não foi liberada
+DM_SESSION_ERROR = "A component named DM already exists"
+
+# Última resposta de cada requisição, para detectar conteúdo inalterado
+powerbi_fingerprints = FingerprintRegistry()
+register_cache('http', powerbi_fingerprints.info)
+
+# Motor de retentativas compartilhado: circuit breaker e estatísticas por view
+powerbi_retry = RetryEngine(
+    policy=RetryPolicy(
+        max_attempts=RETRY_CONFIG['MAX_ATTEMPTS'],
+        base_delay=RETRY_CONFIG['BASE_DELAY'],
+        max_delay=RETRY_CONFIG['MAX_DELAY']
+    ),
+    failure_threshold=RETRY_CONFIG['FAILURE_THRESHOLD'],
+    reset_timeout=RETRY_CONFIG['RESET_TIMEOUT'],
+    budget_ratio=RETRY_CONFIG['BUDGET_RATIO']
+)
+
+# Sincronizadores incrementais por cliente e view: a cópia local em memória
+# é reaproveitada entre chamadas e pelo refresh em segundo plano
+_delta_syncs: Dict[str, DeltaSync] = {}
+_delta_syncs_lock = threading.Lock()
+
+# Intervalo de atualização em segundo plano de cada view
+for _view, _segundos in REFRESH_CONFIG['INTERVALS'].items():
+    dataset_store.set_refresh_interval(_view, _segundos)
+
+def shared_loader(tenant: str, view: str, loader):
+    """
+    Com SHARED_DATASETS=1, a view publicada por outro processo é mapeada em
+    vez de buscada; só um processo por vez vai ao backend
+    """
+    if not SHARED_DATASET_CONFIG['ENABLED']:
+        return loader
+    return shared_datasets.shared_loader(tenant, view, loader, max_age=dataset_store.refresh_interval(view))
+
 class APIService:
+    # Views utilizadas pela Análise de Produção
+    PRODUCAO_VIEWS = {
+        'faturamento': 'CUBO_FATURAMENTO',
+        'orcamento': 'ORCAMENTO',
+        'os': 'OS'
+    }
+
     def __init__(self):
         self.base_url = settings.API_BASE_URL
         self.cliente = settings.API_CLIENTE
         self.id = settings.API_ID
+        self.last_load_report: Dict[str, ViewLoadResult] = {}
         
+    def _fetch_view(self, view: str, timeout: Optional[float] = None) -> pd.DataFrame:
+        """
+        Busca uma view, propagando erros de rede e de parse
+
+        Resposta inalterada (304 ou mesmo hash do corpo): retorna o mesmo objeto
+        da leitura anterior, sem novo parse, e a versão do dataset é mantida.
+        """
+        url = f"{self.base_url}/POWERBI/?CLIENTE={self.cliente}&ID={self.id}&VIEW={view}"
+        response = http_client.get(
+            url,
+            timeout=timeout or settings.API_TIMEOUT,
+            stream=True,
+            headers=powerbi_fingerprints.conditional_headers(url)
+        )
+        # Fechada também nos erros: a conexão volta ao pool
+        with response:
+            response.raise_for_status()
+            df, _ = powerbi_fingerprints.read_frame(
+                url, response, transform=lambda frame: view_schemas.apply(view, frame)
+            )
+            return df
+
     def get_data(self, view: str) -> pd.DataFrame:
         try:
-            url = f"{self.base_url}/POWERBI/?CLIENTE={self.cliente}&ID={self.id}&VIEW={view}"
-            response = requests.get(url, timeout=settings.API_TIMEOUT)
-            response.raise_for_status()
-            data = response.json()
-            return pd.DataFrame(data)
+            return self._fetch_view(view)
         except Exception as e:
             logger.error(f"Erro ao obter dados da API {view}: {str(e)}")
             return pd.DataFrame()
 
+    def get_views(self,
+                  views: Union[Dict[str, str], Iterable[str]],
+                  max_workers: Optional[int] = None,
+                  timeout: Optional[float] = None) -> Dict[str, ViewLoadResult]:
+        """
+        Busca várias views em paralelo
+        
+        Args:
+            views: Dicionário {chave: view} ou lista de views
+            max_workers: Limite de views simultâneas (padrão: LOADER_CONFIG['MAX_WORKERS'])
+            timeout: Timeout por view em segundos (padrão: LOADER_CONFIG['VIEW_TIMEOUT'])
+            
+        Returns:
+            Dict[str, ViewLoadResult]: Dados, status, erro e tempo de cada view
+        """
+        loader = ConcurrentViewLoader(
+            self._fetch_view,
+            max_workers=max_workers or LOADER_CONFIG['MAX_WORKERS'],
+            timeout=timeout or LOADER_CONFIG['VIEW_TIMEOUT']
+        )
+        self.last_load_report = loader.load(views)
+        return self.last_load_report
+
     def get_all_data(self) -> Dict[str, pd.DataFrame]:
-        """Obtém dados de todas as APIs necessárias"""
-        views = {
-            'faturamento': 'CUBO_FATURAMENTO',
-            'orcamento': 'ORCAMENTO',
-            'os': 'OS'
-        }
+        """
+        Obtém dados de todas as APIs necessárias
         
-        dataframes = {}
-        for key, view in views.items():
-            try:
-                dataframes[key] = self.get_data(view)
-            except Exception as e:
-                raise Exception(f"Erro ao carregar {key}: {str(e)}")
-                
-        return dataframes
+        As views são buscadas em paralelo pelo armazenamento compartilhado.
+        Uma view com erro ou timeout retorna DataFrame vazio sem impedir o
+        carregamento das demais; o detalhe fica em self.last_load_report.
+        """
+        loader = ConcurrentViewLoader(
+            self._get_dataset,
+            max_workers=LOADER_CONFIG['MAX_WORKERS'],
+            timeout=LOADER_CONFIG['VIEW_TIMEOUT']
+        )
+        self.last_load_report = loader.load(self.PRODUCAO_VIEWS)
+        return {key: result.data for key, result in self.last_load_report.items()}
+
+    def _get_dataset(self, view: str, timeout: Optional[float] = None) -> pd.DataFrame:
+        """
+        Busca a view pelo armazenamento compartilhado do processo
+
+        Depois da primeira carga, o dataset é atualizado em segundo plano e a
+        leitura não espera pelo backend.
+        """
+        fetch = shared_loader(self.cliente, view, lambda: self._fetch_view(view, timeout))
+        df = dataset_store.get(self.cliente, view, fetch)
+        if REFRESH_CONFIG['ENABLED']:
+            refresh_scheduler.register(self.cliente, view, fetch)
+        return df
+
+    def freshness(self) -> Dict[str, Dict[str, Any]]:
+        """Situação de atualização de cada view da Análise de Produção"""
+        return {key: dataset_store.freshness(self.cliente, view) for key, view in self.PRODUCAO_VIEWS.items()}
 
 class ComercialAPIService:
     def __init__(self):
         logger.debug("=== Iniciando ComercialAPIService ===")
         
-        # URL base correta
-        self.base_url = 'http://tecnolife.empresamix.info:8077'
-        self.client = 'TECNOLIFE'
-        self.api_id = 'XIOPMANA'
+        # URL base (sem o sufixo /POWERBI) e credenciais vêm de API_CONFIG (.env)
+        self.base_url = API_CONFIG['BASE_URL'].rstrip('/').removesuffix('/POWERBI')
+        self.client = API_CONFIG['PARAMS']['CLIENTE']
+        self.api_id = API_CONFIG['PARAMS']['ID']
         self.view = None
         
-        # Configuração de session com headers específicos
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
-            'Connection': 'keep-alive'
-        })
+        # Session compartilhada do processo (pool de conexões e headers padrão)
+        self.session = http_client
     
-    def get_data(self, cube: str = None) -> pd.DataFrame:
-        max_attempts = 3
-        attempt = 0
+    def get_data(self, cube: str = None, params: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """
+        Obtém os dados de uma view do POWERBI
         
-        while attempt < max_attempts:
-            try:
-                attempt += 1
-                self.view = cube or self.view
-                
-                # Primeiro, tenta limpar a sessão existente
-                clear_url = f"{self.base_url}/POWERBI/clear-session"
-                try:
-                    self.session.get(clear_url, timeout=5)
-                except:
-                    pass  # Ignora erros na limpeza
-                
-                # Aguarda um pouco antes da próxima requisição
-                time.sleep(2)
-                
-                # URL principal
-                url = f"{self.base_url}/POWERBI/?CLIENTE={self.client}&ID={self.api_id}&VIEW={self.view}"
-                logger.info(f"Tentativa {attempt} de {max_attempts} para {self.view}")
-                
-                # Adiciona um parâmetro timestamp para evitar cache
-                timestamp = int(time.time())
-                url = f"{url}&_={timestamp}"
-                
-                response = self.session.get(url, timeout=30)
-                
-                if response.status_code == 500:
-                    error_text = response.text
-                    logger.error(f"Erro 500 recebido. Conteúdo: {error_text}")
-                    
-                    if "A component named DM already exists" in error_text:
-                        logger.warning("Erro do PowerBI detectado, aguardando...")
-                        # Aguarda mais tempo entre tentativas
-                        time.sleep(10)  # Aumentado para 10 segundos
-                        
-                        # Tenta limpar o cache do PowerBI
-                        try:
-                            clear_cache_url = f"{self.base_url}/POWERBI/refresh"
-                            self.session.get(clear_cache_url, timeout=5)
-                        except:
-                            pass
-                        
-                        continue
-                    
-                    if attempt < max_attempts:
-                        time.sleep(5 * attempt)
-                        continue
-                    else:
-                        return pd.DataFrame()
-                
-                response.raise_for_status()
-                data = response.json()
-                
-                if not data:
-                    logger.warning("Dados vazios recebidos")
-                    if attempt < max_attempts:
-                        time.sleep(5)
-                        continue
-                    return pd.DataFrame()
-                
-                df = pd.DataFrame(data)
-                logger.info(f"Dados recebidos com sucesso: {len(df)} registros")
-                return df
-                
-            except Exception as e:
-                logger.error(f"Erro na tentativa {attempt}: {str(e)}")
-                if attempt == max_attempts:
-                    return pd.DataFrame()
-                time.sleep(5 * attempt)
+        Falhas são retentadas com backoff exponencial; a limpeza da sessão do
+        PowerBI só é feita quando o erro de componente DM aparece.
+        
+        Args:
+            cube: Nome da view
+            params: Parâmetros adicionais da consulta (ex.: filtro de data)
+        """
+        self.view = cube or self.view
+        view = self.view
         
+        try:
+            return self._fetch(view, params)
+        except APICircuitOpenError as e:
+            logger.warning(f"{str(e)}. Requisição não enviada")
+        except Exception as e:
+            logger.error(f"Erro ao obter dados de {view}: {str(e)}")
         return pd.DataFrame()
 
-    def get_dados_rfv(self, anos_selecionados: List[int]) -> pd.DataFrame:
+    def _fetch(self, view: str, params: Optional[Dict[str, str]] = None, allow_empty: bool = False) -> pd.DataFrame:
+        """Busca a view com retentativas, propagando o erro final"""
+        return powerbi_retry.call(
+            view,
+            lambda: self._request_view(view, params, allow_empty),
+            retryable=self._is_retryable,
+            on_retry=self._before_retry
+        )
+
+    def get_dataset(self, view: str, force: bool = False) -> pd.DataFrame:
+        """
+        Obtém a view pelo armazenamento compartilhado do processo
+        
+        Todas as sessões recebem referências ao mesmo DataFrame e buscas
+        simultâneas da mesma view resultam em uma única requisição ao backend.
+        Vencido o intervalo da view, o último dataset é servido enquanto a
+        atualização roda em segundo plano. Não altere valores no lugar; crie
+        ou substitua colunas.
+        
+        Args:
+            view: Nome da view (ex.: 'CUBO_FATURAMENTO')
+            force: Ignora o dataset em memória e busca novamente
+        """
+        loader = self._dataset_loader(view)
+        df = dataset_store.get(self.client, view, loader, force=force)
+        # Após a primeira carga bem-sucedida, a view é mantida atualizada em segundo plano
+        if REFRESH_CONFIG['ENABLED'] and not df.empty:
+            refresh_scheduler.register(self.client, view, loader)
+        return df
+
+    def freshness(self, view: str) -> Dict[str, Any]:
+        """Situação de atualização da view (idade, atualização em andamento, último erro)"""
+        return dataset_store.freshness(self.client, view)
+
+    def _dataset_loader(self, view: str):
+        """Carga completa ou sincronização incremental, conforme DELTA_SYNC_CONFIG"""
+        if DELTA_SYNC_CONFIG['ENABLED'] and view in DELTA_SYNC_CONFIG['VIEWS']:
+            sync = self.get_delta_sync(view)
+            return shared_loader(self.client, view, sync.sync)
+        return shared_loader(self.client, view, lambda: self.get_data(view))
+
+    def get_delta_sync(self, view: str) -> DeltaSync:
+        """Sincronizador incremental da view, criado na primeira chamada"""
+        nome = f"{self.client}_{view}"
+        with _delta_syncs_lock:
+            sync = _delta_syncs.get(nome)
+            if sync is None:
+                sync = _delta_syncs[nome] = self._create_delta_sync(nome, view)
+        return sync
+
+    def _create_delta_sync(self, nome: str, view: str) -> DeltaSync:
+        filtro = DELTA_SYNC_CONFIG['FILTER_PARAM']
+        fetch_since = None
+        if filtro:
+            # Sem tratamento de erro aqui: uma falha não pode ser confundida com "nada mudou"
+            fetch_since = lambda desde: self._fetch(view, {filtro: desde.strftime('%Y-%m-%d')}, allow_empty=True)
+        
+        return DeltaSync(
+            name=nome,
+            fetch_full=lambda: self.get_data(view),
+            fetch_since=fetch_since,
+            storage_dir=DELTA_SYNC_CONFIG['DIR'],
+            date_column=DELTA_SYNC_CONFIG['DATE_COLUMN'],
+            key_columns=DELTA_SYNC_CONFIG['KEY_COLUMNS'],
+            recheck_days=DELTA_SYNC_CONFIG['RECHECK_DAYS'],
+            reconcile_hours=DELTA_SYNC_CONFIG['RECONCILE_HOURS'],
+            # A mescla com o delta pode desfazer categorias: o esquema é reaplicado
+            transform=lambda df: view_schemas.apply(view, df)
+        )
+
+    def _request_view(self, view: str, params: Optional[Dict[str, str]] = None,
+                      allow_empty: bool = False) -> pd.DataFrame:
+        """Faz uma única requisição à view"""
+        url = f"{self.base_url}/POWERBI/?CLIENTE={self.client}&ID={self.api_id}&VIEW={view}"
+        # Uma entrada por view e nomes de parâmetros: o delta de uma nova marca
+        # d'água substitui o anterior em vez de acumular uma entrada por data
+        chave = url
+        if params:
+            chave = f"{url}&{'&'.join(sorted(params))}"
+            url = f"{url}&{urlencode(params)}"
+        
+        # Sem parâmetro de timestamp: a mudança é detectada por ETag/Last-Modified
+        # ou pelo hash do corpo. stream=True: o corpo é lido em pedaços. Com
+        # parâmetros a entrada pode ser de outra data: só o hash do corpo vale.
+        response = self.session.get(
+            url,
+            stream=True,
+            headers={} if params else powerbi_fingerprints.conditional_headers(chave)
+        )
+        
+        # Fechada também nos erros: a conexão volta ao pool
+        with response:
+            if response.status_code == 500 and DM_SESSION_ERROR in response.text:
+                raise APISessionConflictError(f"Erro do PowerBI em {view}: {DM_SESSION_ERROR}")
+            
+            response.raise_for_status()
+            df, changed = powerbi_fingerprints.read_frame(
+                chave, response, transform=lambda frame: view_schemas.apply(view, frame)
+            )
+        
+        if df.empty and not allow_empty:
+            raise APIDataError(f"Dados vazios recebidos para {view}")
+        
+        # Sem alteração, df é o mesmo objeto da leitura anterior: a versão do dataset é mantida
+        logger.info(f"Dados de {view} recebidos: {len(df)} registros (alterados: {changed})")
+        return df
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Erros 4xx e de esquema não mudam com nova tentativa"""
+        if isinstance(error, APISchemaError):
+            return False
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            return error.response.status_code >= 500
+        return True
+
+    def _before_retry(self, view: str, error: Exception, attempt: int) -> None:
+        """Libera a sessão do PowerBI apenas quando o conflito de DM ocorreu"""
+        if isinstance(error, APISessionConflictError):
+            self._reset_powerbi_session()
+
+    def _reset_powerbi_session(self) -> None:
+        """Limpa a sessão e o cache do PowerBI, ignorando erros"""
+        for endpoint in ('clear-session', 'refresh'):
+            try:
+                self.session.get(f"{self.base_url}/POWERBI/{endpoint}", timeout=5)
+            except Exception as e:
+                logger.debug(f"Falha ao chamar {endpoint}: {str(e)}")
+
+    @staticmethod
+    def get_retry_stats() -> Dict[str, Dict[str, Any]]:
+        """Estatísticas de retentativas, latência e circuit breaker por view"""
+        return powerbi_retry.stats()
+
+    def get_dados_rfv(self, anos_selecionados: Optional[List[int]]) -> pd.DataFrame:
         """
         Obtém os dados para análise RFV
+        
+        Returns:
+            pd.DataFrame: Por cliente: recencia (dias), frequencia (notas), valor,
+            notas r_score/f_score/v_score (1 a 5), rfv e segmento
         """
         try:
-            # Usa o método get_data() que já está funcionando
-            df = self.get_data("CUBO_FATURAMENTO")
+            # Usa o dataset compartilhado entre as sessões
+            df = self.get_dataset("CUBO_FATURAMENTO")
             
             if df.empty:
                 logger.warning("Nenhum dado retornado da API")
                 return pd.DataFrame()
             
-            # Converte datas com tratamento de erros
-            df['data'] = pd.to_datetime(df['data'], errors='coerce')
-            df = df.dropna(subset=['data'])  # Remove linhas com datas inválidas
-            
-            # Filtra por anos selecionados
-            df['ano'] = df['data'].dt.year
-            df = df[df['ano'].isin(anos_selecionados)]
+            # Parciais por cliente e ano reaproveitadas entre chamadas e versões do dataset
+            rfv = calcular_rfv(rfv_state(df), anos_selecionados)
             
-            # Calcula métricas RFV
-            if not df.empty:
-                df = df.groupby('codcli').agg({
-                    'data': lambda x: (pd.Timestamp.now() - x.max()).days,  # Recência
-                    'nota': 'count',  # Frequência (contagem de notas fiscais)
-                    'valorfaturado': 'sum'  # Valor total
-                }).reset_index()
-                
-                # Renomeia as colunas
-                df.columns = ['cliente_id', 'recencia', 'frequencia', 'valor']
-            
-            logger.info(f"Dados RFV processados: {len(df)} registros")
-            return df
+            logger.info(f"Dados RFV processados: {len(rfv)} registros")
+            return rfv
             
         except Exception as e:
             logger.error(f"Erro ao processar dados RFV: {str(e)}")
@@ -188,10 +367,10 @@ class ComercialAPIService:
         """Obtém dados combinados de leads e faturamento"""
         try:
             # Busca dados do faturamento
-            df_faturamento = self.get_data("CUBO_FATURAMENTO")
+            df_faturamento = self.get_dataset("CUBO_FATURAMENTO")
             
             # Busca dados de clientes
-            df_clientes = self.get_data("CLIENTE")
+            df_clientes = self.get_dataset("CLIENTE")
             
             # Merge dos dataframes
             df_combined = pd.merge(
@@ -222,39 +401,10 @@ class ComercialAPIService:
         Simulação de dados para desenvolvimento
         """
         try:
-            # Lista de status possíveis
-            status_list = ['Prospecção', 'Proposta', 'Negociação', 'Fechamento']
-            vendedores = ['João Silva', 'Maria Santos', 'Pedro Oliveira', 'Ana Costa']
-            
-            # Gera dados simulados
-            data = []
-            for _ in range(100):  # 100 oportunidades
-                status = random.choice(status_list)
-                vendedor = random.choice(vendedores)
-                
-                # Data de criação entre 90 dias atrás e hoje
-                dias_atras = random.randint(0, 90)
-                data_criacao = datetime.now() - timedelta(days=dias_atras)
-                
-                # Valor entre 10k e 500k
-                valor = random.uniform(10000, 500000)
-                
-                # Tempo na etapa atual (dias)
-                tempo_etapa = random.randint(1, 30)
-                
-                data.append({
-                    'status': status,
-                    'vendedor': vendedor,
-                    'data_criacao': data_criacao,
-                    'valor': valor,
-                    'tempo_etapa': tempo_etapa
-                })
-            
-            # Cria DataFrame
-            df = pd.DataFrame(data)
-            
-            return df
+            df = SyntheticDataGenerator().pipeline(n=100)
+            # Texto simples: os gráficos agrupam por status e vendedor
+            return df.astype({'status': object, 'vendedor': object})
             
         except Exception as e:
-            print(f"Erro ao obter dados do pipeline: {str(e)}")
-            return pd.DataFrame()  # Retorna DataFrame vazio em caso de erro 
\ No newline at end of file
+            logger.error(f"Erro ao obter dados do pipeline: {str(e)}")
+            return pd.DataFrame()  # Retorna DataFrame vazio em caso de erro
\ No newline at end of file
@@ -1,44 +1,52 @@
 import pandas as pd
 import numpy as np
+from .synthetic_data import SyntheticDataGenerator
+
+SEED = 42
 
 def get_sales_data():
     """
     Função temporária para gerar dados de exemplo.
     Substitua por sua lógica real de dados.
     """
-    # Dados de exemplo
+    # Notas sintéticas de 2023 agregadas por dia
+    fat = SyntheticDataGenerator(seed=SEED, end='2023-12-31', years=1).generate(20_000)['CUBO_FATURAMENTO']
     dates = pd.date_range(start='2023-01-01', end='2023-12-31', freq='D')
-    data = {
-        'date': dates,
-        'sales': np.random.randint(1000, 5000, size=len(dates)),
-        'revenue': np.random.uniform(10000, 50000, size=len(dates)),
-        'customers': np.random.randint(10, 100, size=len(dates))
-    }
-    return pd.DataFrame(data)
+    diario = fat.groupby('emissao').agg(
+        sales=('sequencial', 'nunique'),
+        revenue=('valorfaturado', 'sum'),
+        customers=('codcli', 'nunique')
+    ).reindex(dates, fill_value=0)
+    return diario.rename_axis('date').reset_index()
 
 def get_pipeline_data():
     """Dados do pipeline de vendas."""
+    rng = np.random.default_rng(SEED)
     stages = ['Lead', 'Qualificação', 'Proposta', 'Negociação', 'Fechado']
+    # Funil: cada etapa retém parte das oportunidades da anterior
+    count = np.round(100 * np.cumprod([1.0, 0.7, 0.6, 0.5, 0.4])).astype(int)
     data = {
         'stage': stages,
-        'count': np.random.randint(10, 100, size=len(stages)),
-        'value': np.random.uniform(10000, 100000, size=len(stages))
+        'count': count,
+        'value': count * rng.uniform(1000, 2000, size=len(stages))
     }
     return pd.DataFrame(data)
 
 def get_leads_data():
     """Dados de leads/oportunidades."""
+    rng = np.random.default_rng(SEED)
     return pd.DataFrame({
-        'lead': np.random.choice(['A', 'B', 'C'], 100),
-        'status': np.random.choice(['Novo', 'Em Progresso', 'Convertido'], 100),
-        'value': np.random.uniform(1000, 10000, 100)
+        'lead': rng.choice(['A', 'B', 'C'], 100),
+        'status': rng.choice(['Novo', 'Em Progresso', 'Convertido'], 100, p=[0.5, 0.3, 0.2]),
+        'value': rng.uniform(1000, 10000, 100)
     })
 
 def get_territory_data():
     """Dados de território de vendas."""
-    regions = ['Norte', 'Sul', 'Leste', 'Oeste', 'Centro']
+    fat = SyntheticDataGenerator(seed=SEED).generate(20_000)['CUBO_FATURAMENTO']
+    regioes = fat.groupby('regiao', observed=True)['valorfaturado'].sum()
     return pd.DataFrame({
-        'region': regions,
-        'sales': np.random.randint(10000, 50000, size=len(regions)),
-        'market_share': np.random.uniform(0.1, 0.3, size=len(regions))
-    }) 
\ No newline at end of file
+        'region': regioes.index.astype(str),
+        'sales': regioes.to_numpy().round(2),
+        'market_share': (regioes / regioes.sum()).to_numpy().round(3)
+    })
@@ -0,0 +1,284 @@
+"""
+Sincronização incremental de views do POWERBI com cópia local colunar
+"""
+import os
+import json
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Atributo (df.attrs) com as chaves alteradas pela última sincronização incremental,
+# relativas ao resultado da anterior: {coluna: frozenset(valores)}. Ausente após
+# uma carga completa, quando tudo deve ser considerado alterado.
+DELTA_ATTR = 'delta_changes'
+
+
+class DeltaSync:
+    """
+    Mantém uma cópia local (Parquet) de uma view e busca apenas as linhas
+    novas a partir de uma marca d'água de data.
+
+    Em cada sincronização as linhas a partir de (marca d'água - janela de
+    reverificação) são buscadas novamente e substituem as locais do mesmo
+    período; linhas cuja chave reaparece no delta também são substituídas.
+    Quando o backend não aceita filtro de data, a cópia local é servida e
+    uma reconciliação completa roda no intervalo configurado.
+
+    A cópia local fica também em memória: sem alteração (cópia local servida
+    ou delta vazio), sync() retorna o mesmo objeto da sincronização anterior,
+    e a versão do dataset no dataset_store é mantida.
+    """
+
+    def __init__(self,
+                 name: str,
+                 fetch_full: Callable[[], pd.DataFrame],
+                 fetch_since: Optional[Callable[[datetime], pd.DataFrame]] = None,
+                 storage_dir: str = '.cache/delta',
+                 date_column: str = 'emissao',
+                 key_columns: Iterable[str] = ('nota', 'codcli', 'item'),
+                 recheck_days: int = 7,
+                 reconcile_hours: float = 24.0,
+                 transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None):
+        """
+        Args:
+            name: Identificador da cópia local (ex.: 'TECNOLIFE_CUBO_FATURAMENTO')
+            fetch_full: Busca a view completa
+            fetch_since: Busca as linhas com data >= informada (None se o backend não filtra).
+                Deve lançar exceção em caso de falha; um DataFrame vazio significa "nada mudou"
+            storage_dir: Diretório da cópia local
+            date_column: Coluna de data usada como marca d'água
+            key_columns: Chave de uma linha (nota, cliente e item)
+            recheck_days: Janela de reverificação antes da marca d'água
+            reconcile_hours: Intervalo entre reconciliações completas
+            transform: Aplicada ao dataset retornado (ex.: esquema da view); sem
+                alteração, o resultado anterior é retornado sem transformar de novo
+        """
+        self.name = name
+        self.fetch_full = fetch_full
+        self.fetch_since = fetch_since
+        self.storage_dir = storage_dir
+        self.date_column = date_column
+        self.key_columns = list(key_columns)
+        self.recheck = timedelta(days=recheck_days)
+        self.reconcile_interval = timedelta(hours=reconcile_hours)
+        self.transform = transform
+        self.last_sync_stats = {}
+
+        # Cópia local em memória (com o mtime do arquivo) e último resultado de sync()
+        self._local: Optional[pd.DataFrame] = None
+        self._meta: dict = {}
+        self._local_mtime: Optional[int] = None
+        self._frame: Optional[pd.DataFrame] = None
+
+        os.makedirs(self.storage_dir, exist_ok=True)
+
+    @property
+    def data_path(self) -> str:
+        return os.path.join(self.storage_dir, f"{self.name}.parquet")
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.storage_dir, f"{self.name}.meta.json")
+
+    def sync(self, force_full: bool = False) -> pd.DataFrame:
+        """
+        Atualiza a cópia local e retorna o dataset completo
+
+        Args:
+            force_full: Força uma reconciliação completa
+        """
+        inicio = time.perf_counter()
+        local, meta = self._load_local()
+
+        if local is None or force_full or self._reconcile_due(meta):
+            df = self._full(local)
+        elif self.fetch_since is None:
+            # Backend sem filtro de data: serve a cópia local até a próxima reconciliação
+            self.last_sync_stats = {'mode': 'local', 'rows': len(local), 'changed_rows': 0}
+            return self._unchanged(local)
+        else:
+            df = self._incremental(local, meta)
+
+        self.last_sync_stats['elapsed'] = time.perf_counter() - inicio
+        logger.info(f"Sincronização de {self.name}: {self.last_sync_stats}")
+        return df
+
+    def _full(self, local: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """Baixa a view completa e substitui a cópia local"""
+        df = self.fetch_full()
+        if df is None or df.empty:
+            if local is not None:
+                logger.warning(f"Reconciliação de {self.name} sem dados; mantendo cópia local")
+                self.last_sync_stats = {'mode': 'local', 'rows': len(local), 'changed_rows': 0}
+                return self._unchanged(local)
+            return pd.DataFrame()
+
+        agora = datetime.now()
+        self._save_local(df, {
+            'watermark': self._max_date(df),
+            'last_full_sync': agora.isoformat(),
+            'last_sync': agora.isoformat(),
+        })
+        self.last_sync_stats = {'mode': 'full', 'rows': len(df), 'changed_rows': len(df)}
+        # Sem DELTA_ATTR: após a carga completa tudo é considerado alterado
+        return self._result(df)
+
+    def _incremental(self, local: pd.DataFrame, meta: dict) -> pd.DataFrame:
+        """Busca as linhas a partir da janela de reverificação e mescla na cópia local"""
+        watermark = meta.get('watermark')
+        if not watermark or self.date_column not in local.columns:
+            return self._full(local)
+
+        corte = datetime.fromisoformat(watermark) - self.recheck
+        try:
+            delta = self.fetch_since(corte)
+        except Exception as e:
+            # Sem o delta a janela não pode ser substituída: serve a cópia local
+            logger.error(f"Falha ao buscar delta de {self.name}: {str(e)}")
+            self.last_sync_stats = {'mode': 'local', 'rows': len(local), 'changed_rows': 0}
+            return self._unchanged(local)
+        if delta is None:
+            delta = pd.DataFrame()
+
+        manter = self._kept(local, delta, corte)
+        if self._same_rows(local[~manter], delta):
+            # Delta igual às linhas que substituiria: nada mudou
+            self._save_meta({**meta, 'last_sync': datetime.now().isoformat()})
+            self.last_sync_stats = {'mode': 'delta', 'rows': len(local), 'changed_rows': 0}
+            return self._unchanged(local)
+
+        merged = self._join(local[manter], delta)
+        novo_watermark = self._max_date(delta) if not delta.empty else None
+        if novo_watermark is None or novo_watermark < watermark:
+            novo_watermark = watermark
+
+        self._save_local(merged, {
+            **meta,
+            'watermark': novo_watermark,
+            'last_sync': datetime.now().isoformat(),
+        })
+        self.last_sync_stats = {'mode': 'delta', 'rows': len(merged), 'changed_rows': len(delta)}
+        # Alteradas: linhas locais substituídas e linhas do delta
+        return self._result(merged, [local[~manter], delta])
+
+    def _same_rows(self, antigas: pd.DataFrame, delta: pd.DataFrame) -> bool:
+        """Se as linhas substituídas e as do delta são as mesmas, em qualquer ordem"""
+        if antigas.empty or delta.empty:
+            return antigas.empty and delta.empty
+        if len(antigas) != len(delta) or set(antigas.columns) != set(delta.columns):
+            return False
+        chaves = [c for c in self.key_columns if c in antigas.columns] or list(antigas.columns)
+        antigas = antigas.sort_values(chaves, kind='stable', ignore_index=True)
+        delta = delta[antigas.columns].sort_values(chaves, kind='stable', ignore_index=True)
+        return antigas.equals(delta)
+
+    def _result(self, df: pd.DataFrame, alteradas: Optional[List[pd.DataFrame]] = None) -> pd.DataFrame:
+        """Aplica a transformação, registra as alterações e guarda o resultado"""
+        frame = self.transform(df) if self.transform else df
+        if alteradas is not None:
+            self._mark_changes(frame, alteradas)
+        self._frame = frame
+        return frame
+
+    def _unchanged(self, local: pd.DataFrame) -> pd.DataFrame:
+        """Resultado anterior (mesmo objeto) ou, na primeira sincronização, a cópia local"""
+        if self._frame is not None:
+            return self._frame
+        return self._result(local, [])
+
+    @staticmethod
+    def _join(antigas: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+        if delta.empty:
+            return antigas.reset_index(drop=True)
+        return pd.concat([antigas, delta], ignore_index=True)
+
+    def _kept(self, local: pd.DataFrame, delta: pd.DataFrame, corte: datetime) -> np.ndarray:
+        """Máscara das linhas locais mantidas na mescla com o delta"""
+        datas = self._dates(local)
+        # Linhas sem data válida ficam fora da janela e são mantidas
+        manter = ~(datas >= pd.Timestamp(corte)).to_numpy()
+
+        chaves = self._available_keys(local, delta)
+        if chaves and not delta.empty:
+            chaves_delta = pd.MultiIndex.from_frame(delta[chaves])
+            manter &= ~pd.MultiIndex.from_frame(local[chaves]).isin(chaves_delta)
+        return manter
+
+    def _mark_changes(self, df: pd.DataFrame, alteradas: List[pd.DataFrame]) -> pd.DataFrame:
+        """Registra em df.attrs (DELTA_ATTR) os valores das chaves das linhas alteradas"""
+        df.attrs[DELTA_ATTR] = {
+            coluna: frozenset(valor for parte in alteradas if coluna in parte.columns
+                              for valor in pd.unique(parte[coluna].dropna()))
+            for coluna in self.key_columns
+        }
+        return df
+
+    def _available_keys(self, local: pd.DataFrame, delta: pd.DataFrame) -> List[str]:
+        faltantes = [c for c in self.key_columns if c not in local.columns or c not in delta.columns]
+        if faltantes and not delta.empty:
+            logger.warning(f"Colunas de chave ausentes em {self.name}: {faltantes}. "
+                           f"Mesclando apenas pela janela de datas")
+            return []
+        return self.key_columns
+
+    def _dates(self, df: pd.DataFrame) -> pd.Series:
+        return pd.to_datetime(df[self.date_column], errors='coerce')
+
+    def _max_date(self, df: pd.DataFrame) -> Optional[str]:
+        if self.date_column not in df.columns:
+            return None
+        maximo = self._dates(df).max()
+        return None if pd.isna(maximo) else maximo.to_pydatetime().isoformat()
+
+    def _reconcile_due(self, meta: dict) -> bool:
+        ultima = meta.get('last_full_sync')
+        if not ultima:
+            return True
+        return datetime.now() - datetime.fromisoformat(ultima) >= self.reconcile_interval
+
+    def _load_local(self):
+        """
+        Carrega a cópia local e seus metadados (None se não houver)
+
+        O Parquet só é relido se o arquivo mudou desde a última leitura ou gravação.
+        """
+        if not (os.path.exists(self.data_path) and os.path.exists(self.meta_path)):
+            return None, {}
+        try:
+            mtime = os.stat(self.data_path).st_mtime_ns
+            if self._local is not None and mtime == self._local_mtime:
+                return self._local, self._meta
+            with open(self.meta_path, 'r') as f:
+                meta = json.load(f)
+            local = pd.read_parquet(self.data_path)
+        except Exception as e:
+            logger.error(f"Cópia local de {self.name} ilegível, refazendo: {str(e)}")
+            return None, {}
+        # Arquivo alterado fora desta instância: o resultado anterior não vale mais
+        self._local, self._meta, self._local_mtime, self._frame = local, meta, mtime, None
+        return local, meta
+
+    def _save_local(self, df: pd.DataFrame, meta: dict) -> None:
+        """Grava dados e metadados de forma atômica (arquivo temporário + rename)"""
+        tmp_data = f"{self.data_path}.tmp"
+        tmp_meta = f"{self.meta_path}.tmp"
+        df.to_parquet(tmp_data, index=False, compression='zstd')
+        with open(tmp_meta, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_data, self.data_path)
+        os.replace(tmp_meta, self.meta_path)
+        self._local, self._meta = df, meta
+        self._local_mtime = os.stat(self.data_path).st_mtime_ns
+
+    def _save_meta(self, meta: dict) -> None:
+        """Grava apenas os metadados (dados inalterados)"""
+        tmp_meta = f"{self.meta_path}.tmp"
+        with open(tmp_meta, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, self.meta_path)
+        self._meta = meta
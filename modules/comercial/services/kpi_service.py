@@ -1,112 +1,233 @@
+"""
+KPIs de produção (orçamento → OS → faturamento)
+
+O ProducaoIndex liga orçamentos e linhas de faturamento às OS pelo número
+da OS (índice, sem merge) e guarda parciais por ano: contagens e somas por
+ano de cada view e somas de dias por par de anos (orçamento/OS e
+OS/faturamento). É montado uma vez por versão dos datasets; os KPIs de
+qualquer conjunto de anos, e o detalhamento ano a ano, saem das parciais.
+
+    kpis = calcular_kpis_producao(dataframes, anos=[2023, 2024])
+    por_ano = kpis_producao_por_ano(dataframes)
+"""
+import logging
+from typing import Any, Dict, Optional, Sequence
+import numpy as np
 import pandas as pd
-from typing import Dict, Any
-from datetime import datetime, timedelta
-from shared.utils.formatters import format_date
-
-class KPIService:
-    def __init__(self, dataframes: Dict[str, pd.DataFrame]):
-        # Define o período de 5 anos
-        hoje = datetime.now()
-        inicio_ano_atual = datetime(hoje.year, 1, 1)
-        self.data_inicial = inicio_ano_atual - timedelta(days=365*4)  # 5 anos (4 anos anteriores + ano atual)
-        
-        # Converte e filtra os dataframes pelo período
-        self.df_faturamento = self._filtrar_periodo(dataframes['faturamento'])
-        self.df_orcamento = self._filtrar_periodo(dataframes['orcamento'])
-        self.df_os = self._filtrar_periodo(dataframes['os'])
-        
-        print(f"Período de análise: {self.data_inicial.strftime('%d/%m/%Y')} até hoje")
-        
-    def _filtrar_periodo(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Filtra o dataframe pelo período de 5 anos"""
-        df = df.copy()
-        df['data'] = pd.to_datetime(df['data'], errors='coerce')
-        return df[df['data'] >= self.data_inicial]
-        
-    def calcular_kpis_producao(self) -> Dict[str, Any]:
-        """Calcula KPIs para o dashboard de Análise de Produção"""
-        try:
-            print(f"Total registros após filtro - Faturamento: {len(self.df_faturamento)}")
-            print(f"Total registros após filtro - Orçamento: {len(self.df_orcamento)}")
-            print(f"Total registros após filtro - OS: {len(self.df_os)}")
-            
-            # 1. Taxa de aprovação de orçamentos
-            # Total de orçamentos excluindo os que ainda estão em análise (status 0)
-            orcamentos_finalizados = self.df_orcamento[self.df_orcamento['status'] != 0]
-            total_orcamentos = len(orcamentos_finalizados)
-            
-            # Orçamentos não cancelados (todos exceto status 5)
-            orcamentos_aprovados = len(orcamentos_finalizados[orcamentos_finalizados['status'] != 5])
-            
-            print(f"Total orçamentos finalizados: {total_orcamentos}")
-            print(f"Orçamentos aprovados (não cancelados): {orcamentos_aprovados}")
-            
-            taxa_conversao = (orcamentos_aprovados / total_orcamentos * 100) if total_orcamentos > 0 else 0
-            
-            # 2. Tempo médio entre orçamento e OS
-            df_orc_com_os = self.df_orcamento[self.df_orcamento['os'] != 0].copy()
-            print(f"Orçamentos com OS: {len(df_orc_com_os)}")
-            
-            if not df_orc_com_os.empty:
-                df_os_merge = self.df_os[['os', 'data']].copy()
-                
-                df_merge = pd.merge(
-                    df_orc_com_os[['os', 'data']],
-                    df_os_merge,
-                    on='os',
-                    suffixes=('_orc', '_os')
-                )
-                
-                df_merge = df_merge.dropna()
-                tempo_medio_orc_os = (df_merge['data_os'] - df_merge['data_orc']).dt.days.mean()
-            else:
-                tempo_medio_orc_os = 0
-            
-            # 3. Tempo médio entre OS e faturamento
-            df_os_fat = self.df_os[self.df_os['status'] == 4].copy()
-            print(f"OS Faturadas: {len(df_os_fat)}")
-            if not df_os_fat.empty:
-                df_merge = pd.merge(
-                    df_os_fat[['os', 'data']],
-                    self.df_faturamento[['os', 'data']],
-                    on='os',
-                    suffixes=('_os', '_fat')
-                )
-                tempo_medio_os_fat = (df_merge['data_fat'] - df_merge['data_os']).dt.days.mean()
+from shared.utils.cache_manager import cache_data
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = 'comercial.kpis_producao'
+
+KPIS = ['taxa_conversao', 'tempo_medio_orc_os', 'tempo_medio_os_fat',
+        'valor_medio_aprovados', 'perc_faturamento_os']
+
+# Status do orçamento em análise e cancelado; status da OS faturada
+ORCAMENTO_EM_ANALISE = 0
+ORCAMENTO_CANCELADO = 5
+OS_FATURADA = 4
+
+_UM_DIA = np.timedelta64(1, 'D')
+
+
+def _com_data(df: pd.DataFrame, colunas: Sequence[str]) -> pd.DataFrame:
+    """Colunas informadas e ano, das linhas com data válida"""
+    datas = pd.to_datetime(df['data'], errors='coerce')
+    validas = datas.notna().to_numpy()
+    linhas = pd.DataFrame({coluna: df[coluna].to_numpy()[validas] for coluna in colunas})
+    linhas['data'] = datas.to_numpy()[validas]
+    linhas['ano'] = datas.dt.year.to_numpy()[validas].astype('int64')
+    return linhas
+
+
+def _numero_os(serie: pd.Series) -> np.ndarray:
+    """Número da OS com 0 para 'sem OS' (inclusive nulos)"""
+    return pd.to_numeric(serie, errors='coerce').fillna(0).to_numpy()
+
+
+def _pares(ano_a: np.ndarray, ano_b: np.ndarray, dias: np.ndarray) -> pd.DataFrame:
+    """Soma de dias e número de pares por (ano de origem, ano de destino)"""
+    pares = pd.DataFrame({'ano_a': ano_a, 'ano_b': ano_b, 'dias': dias, 'pares': 1})
+    return pares.groupby(['ano_a', 'ano_b']).sum()
+
+
+class ProducaoIndex:
+    """Parciais do fluxo orçamento → OS → faturamento por ano"""
+
+    def __init__(self,
+                 orcamentos: pd.DataFrame,
+                 faturamento: pd.DataFrame,
+                 orc_os: pd.DataFrame,
+                 os_fat: pd.DataFrame):
+        """
+        Args:
+            orcamentos: Por ano: finalizados, aprovados, valor_os, com_valor
+            faturamento: Por ano: total, via_os
+            orc_os: Por (ano do orçamento, ano da OS): dias, pares
+            os_fat: Por (ano da OS, ano do faturamento): dias, pares
+        """
+        self.orcamentos = orcamentos
+        self.faturamento = faturamento
+        self.orc_os = orc_os
+        self.os_fat = os_fat
+
+    @classmethod
+    def build(cls, dataframes: Dict[str, pd.DataFrame]) -> 'ProducaoIndex':
+        """Monta as parciais a partir de 'orcamento', 'os' e 'faturamento' completos"""
+        os_ = _com_data(dataframes['os'], ['os', 'status'])
+        if not os_['os'].is_unique:
+            logger.warning("Números de OS repetidos na view OS; usando a primeira ocorrência")
+            os_ = os_.drop_duplicates('os', ignore_index=True)
+        indice = pd.Index(os_['os'])
+        data_os = os_['data'].to_numpy()
+        ano_os = os_['ano'].to_numpy()
+        faturada = (os_['status'] == OS_FATURADA).to_numpy()
+
+        # Orçamentos: contagens por ano e ligação com a OS
+        orc = _com_data(dataframes['orcamento'], ['os', 'status', 'valor'])
+        numero = _numero_os(orc['os'])
+        com_os = numero != 0
+        status = orc['status'].to_numpy()
+        valor = pd.to_numeric(orc['valor'], errors='coerce').to_numpy(dtype='float64')
+        orcamentos = pd.DataFrame({
+            'ano': orc['ano'].to_numpy(),
+            'finalizados': status != ORCAMENTO_EM_ANALISE,
+            'aprovados': (status != ORCAMENTO_EM_ANALISE) & (status != ORCAMENTO_CANCELADO),
+            'valor_os': np.where(com_os, np.nan_to_num(valor), 0.0),
+            'com_valor': com_os & ~np.isnan(valor),
+        }).groupby('ano').sum()
+
+        posicao = indice.get_indexer(numero)
+        ligados = com_os & (posicao >= 0)
+        orc_os = _pares(
+            orc['ano'].to_numpy()[ligados], ano_os[posicao[ligados]],
+            (data_os[posicao[ligados]] - orc['data'].to_numpy()[ligados]) // _UM_DIA
+        )
+
+        # Faturamento: totais por ano e ligação com as OS faturadas
+        fat = _com_data(dataframes['faturamento'], ['os', 'valorfaturado'])
+        numero = _numero_os(fat['os'])
+        valores = pd.to_numeric(fat['valorfaturado'], errors='coerce').to_numpy(dtype='float64')
+        faturamento = pd.DataFrame({
+            'ano': fat['ano'].to_numpy(),
+            'total': np.nan_to_num(valores),
+            'via_os': np.where(numero != 0, np.nan_to_num(valores), 0.0),
+        }).groupby('ano').sum()
+
+        posicao = indice.get_indexer(numero)
+        ligados = posicao >= 0
+        ligados[ligados] = faturada[posicao[ligados]]
+        os_fat = _pares(
+            ano_os[posicao[ligados]], fat['ano'].to_numpy()[ligados],
+            (fat['data'].to_numpy()[ligados] - data_os[posicao[ligados]]) // _UM_DIA
+        )
+        return cls(orcamentos, faturamento, orc_os, os_fat)
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(parte.memory_usage(deep=True).sum()
+                       for parte in (self.orcamentos, self.faturamento, self.orc_os, self.os_fat)))
+
+    @property
+    def years(self):
+        """Anos com orçamentos ou faturamento"""
+        return sorted(set(self.orcamentos.index) | set(self.faturamento.index))
+
+    def kpis(self, anos: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+        """
+        Os cinco KPIs de produção para um conjunto de anos
+
+        Cada view é filtrada pelo ano da própria data; os tempos médios
+        consideram os pares cujos dois anos estão no conjunto.
+        """
+        partes = self._slice(anos)
+        soma = pd.DataFrame([{
+            **partes['orcamentos'].sum(),
+            **partes['faturamento'].sum(),
+            **partes['orc_os'].sum().add_suffix('_orc_os'),
+            **partes['os_fat'].sum().add_suffix('_os_fat'),
+        }])
+        return {kpi: float(valor) for kpi, valor in self._kpis(soma).iloc[0].items()}
+
+    def kpis_by_year(self, anos: Optional[Sequence[int]] = None) -> pd.DataFrame:
+        """KPIs de cada ano isoladamente (linhas: anos; colunas: KPIS)"""
+        partes = self._slice(anos)
+        diagonal = {}
+        for nome in ('orc_os', 'os_fat'):
+            pares = partes[nome]
+            mesmo_ano = pares.index.get_level_values(0) == pares.index.get_level_values(1)
+            diagonal[nome] = pares[mesmo_ano].droplevel(1).add_suffix(f'_{nome}')
+        por_ano = pd.concat(
+            [partes['orcamentos'], partes['faturamento'], diagonal['orc_os'], diagonal['os_fat']],
+            axis=1
+        ).fillna(0).sort_index()
+        por_ano.index.name = 'ano'
+        return self._kpis(por_ano)
+
+    def _slice(self, anos: Optional[Sequence[int]]) -> Dict[str, pd.DataFrame]:
+        partes = {'orcamentos': self.orcamentos, 'faturamento': self.faturamento,
+                  'orc_os': self.orc_os, 'os_fat': self.os_fat}
+        if anos is None:
+            return partes
+        anos = list(anos)
+        fatiadas = {}
+        for nome, parte in partes.items():
+            if parte.index.nlevels == 1:
+                fatiadas[nome] = parte[parte.index.isin(anos)]
             else:
-                tempo_medio_os_fat = 0
-            
-            # 4. Valor médio de orçamentos aprovados
-            df_orc_aprov = self.df_orcamento[self.df_orcamento['os'] != 0]
-            print(f"Orçamentos aprovados para média: {len(df_orc_aprov)}")
-            valor_medio_aprovados = df_orc_aprov['valor'].mean() if not df_orc_aprov.empty else 0
-            
-            # 5. Percentual de faturamento via OS
-            faturamento_total = self.df_faturamento['valorfaturado'].sum()
-            faturamento_os = self.df_faturamento[
-                self.df_faturamento['os'] != 0
-            ]['valorfaturado'].sum()
-            
-            print(f"Faturamento total: {faturamento_total}")
-            print(f"Faturamento via OS: {faturamento_os}")
-            perc_faturamento_os = (faturamento_os / faturamento_total * 100) if faturamento_total > 0 else 0
-            
-            result = {
-                'taxa_conversao': taxa_conversao,
-                'tempo_medio_orc_os': tempo_medio_orc_os if not pd.isna(tempo_medio_orc_os) else 0,
-                'tempo_medio_os_fat': tempo_medio_os_fat if not pd.isna(tempo_medio_os_fat) else 0,
-                'valor_medio_aprovados': valor_medio_aprovados if not pd.isna(valor_medio_aprovados) else 0,
-                'perc_faturamento_os': perc_faturamento_os
-            }
-            print("Valores finais:", result)
-            return result
-            
-        except Exception as e:
-            print(f"Erro no cálculo dos KPIs: {str(e)}")
-            return {
-                'taxa_conversao': 0,
-                'tempo_medio_orc_os': 0,
-                'tempo_medio_os_fat': 0,
-                'valor_medio_aprovados': 0,
-                'perc_faturamento_os': 0
-            } 
\ No newline at end of file
+                fatiadas[nome] = parte[parte.index.get_level_values(0).isin(anos)
+                                       & parte.index.get_level_values(1).isin(anos)]
+        return fatiadas
+
+    @staticmethod
+    def _kpis(somas: pd.DataFrame) -> pd.DataFrame:
+        """KPIs a partir das somas (uma linha por recorte); divisões por zero resultam em 0"""
+        def razao(numerador: str, denominador: str) -> pd.Series:
+            num = somas.get(numerador, pd.Series(0.0, index=somas.index)).astype('float64')
+            den = somas.get(denominador, pd.Series(0.0, index=somas.index)).astype('float64')
+            return (num / den.where(den > 0)).fillna(0.0)
+
+        return pd.DataFrame({
+            'taxa_conversao': razao('aprovados', 'finalizados') * 100,
+            'tempo_medio_orc_os': razao('dias_orc_os', 'pares_orc_os'),
+            'tempo_medio_os_fat': razao('dias_os_fat', 'pares_os_fat'),
+            'valor_medio_aprovados': razao('valor_os', 'com_valor'),
+            'perc_faturamento_os': razao('via_os', 'total') * 100,
+        }, index=somas.index)
+
+
+@cache_data(ttl_seconds=3600, namespace=NAMESPACE)
+def indice_producao(dataframes: Dict[str, pd.DataFrame]) -> ProducaoIndex:
+    """
+    Índice de produção compartilhado entre sessões
+
+    Sai do cache quando muda a versão de OS, ORCAMENTO ou CUBO_FATURAMENTO.
+    """
+    return ProducaoIndex.build(dataframes)
+
+
+def calcular_kpis_producao(dataframes: Dict[str, pd.DataFrame],
+                           anos: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+    """
+    KPIs de produção para os anos informados (padrão: todos)
+
+    Args:
+        dataframes: 'orcamento', 'os' e 'faturamento' completos (referências do dataset_store)
+        anos: Anos considerados
+    """
+    try:
+        return indice_producao(dataframes).kpis(anos)
+    except Exception as e:
+        logger.error(f"Erro no cálculo dos KPIs: {str(e)}")
+        return {kpi: 0 for kpi in KPIS}
+
+
+def kpis_producao_por_ano(dataframes: Dict[str, pd.DataFrame],
+                          anos: Optional[Sequence[int]] = None) -> pd.DataFrame:
+    """KPIs de produção de cada ano (linhas: anos; colunas: KPIS)"""
+    try:
+        return indice_producao(dataframes).kpis_by_year(anos)
+    except Exception as e:
+        logger.error(f"Erro no cálculo dos KPIs por ano: {str(e)}")
+        return pd.DataFrame(columns=KPIS)
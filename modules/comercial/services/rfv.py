@@ -0,0 +1,226 @@
+"""
+Motor RFV (Recência, Frequência e Valor)
+
+O estado guarda parciais por cliente e ano (última compra, notas e valor),
+calculadas com um único agrupamento do faturamento. As métricas de um
+conjunto de anos saem das parciais, sem voltar às notas; notas novas ou
+janelas substituídas pela sincronização incremental atualizam apenas os
+clientes afetados.
+
+    estado = rfv_state(df)                  # reaproveitado por versão do dataset
+    rfv = calcular_rfv(estado, [2023, 2024])
+    rfv.groupby('segmento', observed=True).size()
+"""
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from shared.cache.dataset_store import dataset_store
+from .delta_sync import DELTA_ATTR
+
+logger = logging.getLogger(__name__)
+
+CLIENTE = 'codcli'
+NOTA = 'nota'
+DATA = 'data'
+VALOR = 'valorfaturado'
+
+# Segmentos pela nota de recência (linhas) e pela média de frequência e valor (colunas)
+SEGMENTOS = [
+    'Campeões', 'Clientes fiéis', 'Potenciais fiéis', 'Novos clientes', 'Promissores',
+    'Precisam de atenção', 'Quase dormindo', 'Em risco', 'Não pode perder', 'Hibernando',
+]
+_GRADE_SEGMENTOS = np.array([
+    # FV:  1  2  3  4  5
+    [9, 9, 7, 7, 8],  # R1
+    [9, 9, 7, 7, 8],  # R2
+    [6, 6, 5, 1, 1],  # R3
+    [4, 2, 2, 1, 1],  # R4
+    [3, 2, 2, 0, 0],  # R5
+])
+
+
+def _parciais(df: pd.DataFrame) -> pd.DataFrame:
+    """Última compra, notas distintas e valor por cliente e ano"""
+    datas = pd.to_datetime(df[DATA], errors='coerce')
+    validas = (datas.notna() & df[CLIENTE].notna()).to_numpy()
+    datas = datas[validas]
+    linhas = pd.DataFrame({
+        CLIENTE: df[CLIENTE][validas],
+        'ano': datas.dt.year,
+        DATA: datas,
+        VALOR: df[VALOR][validas],
+    })
+    # Uma nota tem um único cliente e uma única data: a primeira linha de cada
+    # nota do cliente conta uma compra, e as notas por cliente e ano somam entre os anos
+    linhas[NOTA] = ~df.loc[validas, [CLIENTE, NOTA]].duplicated().to_numpy()
+    return linhas.groupby([CLIENTE, 'ano'], observed=True, sort=False).agg(
+        ultima_compra=(DATA, 'max'),
+        notas=(NOTA, 'sum'),
+        valor=(VALOR, 'sum'),
+    )
+
+
+def _nota(valores: pd.Series, maior_melhor: bool = True) -> np.ndarray:
+    """Nota de 1 a 5 por quintil (empates divididos pela ordem)"""
+    posicao = valores.rank(method='first', ascending=maior_melhor, pct=True).to_numpy()
+    return np.clip(np.ceil(posicao * 5), 1, 5).astype('int8')
+
+
+class RFVState:
+    """Parciais RFV por cliente e ano; imutável (atualizações retornam um novo estado)"""
+
+    def __init__(self, partials: pd.DataFrame):
+        self.partials = partials
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> 'RFVState':
+        """Calcula as parciais a partir do faturamento completo"""
+        return cls(_parciais(df))
+
+    @property
+    def clients(self) -> int:
+        return self.partials.index.get_level_values(0).nunique()
+
+    @property
+    def years(self) -> List[int]:
+        """Anos com compras (filtro de anos do dashboard), sem percorrer as notas"""
+        return sorted(int(ano) for ano in self.partials.index.get_level_values('ano').unique())
+
+    def update(self, novas: pd.DataFrame) -> 'RFVState':
+        """
+        Acrescenta notas novas (ainda não contadas no estado)
+
+        Apenas as parciais dos clientes e anos presentes em novas são
+        recalculadas. Para linhas que substituem outras já contadas, use refresh.
+        """
+        novos = _parciais(novas)
+        if novos.empty:
+            return self
+        atuais = self.partials.reindex(novos.index)
+        combinado = pd.DataFrame({
+            'ultima_compra': novos['ultima_compra'].where(
+                atuais['ultima_compra'].isna() | (novos['ultima_compra'] >= atuais['ultima_compra']),
+                atuais['ultima_compra']
+            ),
+            'notas': novos['notas'] + atuais['notas'].fillna(0).astype('int64'),
+            'valor': novos['valor'] + atuais['valor'].fillna(0),
+        })
+        mantidas = self.partials[~self.partials.index.isin(novos.index)]
+        return RFVState(pd.concat([mantidas, combinado]))
+
+    def refresh(self, df: pd.DataFrame, clients: Iterable) -> 'RFVState':
+        """Recalcula, a partir do faturamento completo, apenas os clientes informados"""
+        clientes = pd.Index(list(clients))
+        if clientes.empty:
+            return self
+        linhas = df[df[CLIENTE].isin(clientes)]
+        mantidas = self.partials[~self.partials.index.get_level_values(0).isin(clientes)]
+        return RFVState(pd.concat([mantidas, _parciais(linhas)]))
+
+    def metrics(self,
+                anos: Optional[Sequence[int]] = None,
+                referencia: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Recência (dias), frequência (notas) e valor por cliente
+
+        Args:
+            anos: Anos considerados (None: todos)
+            referencia: Data de referência da recência (padrão: agora)
+        """
+        parciais = self.partials
+        if anos is not None:
+            parciais = parciais[parciais.index.get_level_values('ano').isin(list(anos))]
+        por_cliente = parciais.groupby(level=0, observed=True, sort=False).agg(
+            ultima_compra=('ultima_compra', 'max'),
+            frequencia=('notas', 'sum'),
+            valor=('valor', 'sum'),
+        )
+        referencia = pd.Timestamp.now() if referencia is None else pd.Timestamp(referencia)
+        return pd.DataFrame({
+            'cliente_id': por_cliente.index.to_numpy(),
+            'recencia': (referencia - por_cliente['ultima_compra']).dt.days.to_numpy(),
+            'frequencia': por_cliente['frequencia'].to_numpy(),
+            'valor': por_cliente['valor'].to_numpy(),
+        })
+
+
+def score_rfv(metricas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Acrescenta as notas R, F e V (quintis de 1 a 5) e o segmento de cada cliente
+
+    Recência menor, frequência maior e valor maior recebem notas maiores.
+    """
+    resultado = metricas.copy()
+    resultado['r_score'] = _nota(resultado['recencia'], maior_melhor=False)
+    resultado['f_score'] = _nota(resultado['frequencia'])
+    resultado['v_score'] = _nota(resultado['valor'])
+    notas = resultado[['r_score', 'f_score', 'v_score']].astype('int16')
+    resultado['rfv'] = notas['r_score'] * 100 + notas['f_score'] * 10 + notas['v_score']
+
+    fv = np.floor((resultado['f_score'].to_numpy() + resultado['v_score'].to_numpy()) / 2 + 0.5).astype(int)
+    codigos = _GRADE_SEGMENTOS[resultado['r_score'].to_numpy() - 1, fv - 1]
+    resultado['segmento'] = pd.Categorical.from_codes(codigos, SEGMENTOS)
+    return resultado
+
+
+def calcular_rfv(estado: RFVState,
+                 anos: Optional[Sequence[int]] = None,
+                 referencia: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """Métricas, notas e segmentos RFV dos clientes com compras nos anos informados"""
+    return score_rfv(estado.metrics(anos, referencia))
+
+
+class _RFVStates:
+    """Último estado RFV de cada dataset, reaproveitado entre versões"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, Tuple[int, RFVState]] = {}
+
+    def get(self, df: pd.DataFrame) -> RFVState:
+        referencia = dataset_store.fingerprint(df)
+        if referencia is None:
+            # DataFrame derivado (filtrado ou com colunas novas): nada a reaproveitar
+            return RFVState.build(df)
+        nome, versao = referencia.rsplit('@v', 1)
+        versao = int(versao)
+
+        with self._lock:
+            anterior = self._states.get(nome)
+        if anterior is not None and anterior[0] == versao:
+            return anterior[1]
+
+        alteracoes = df.attrs.get(DELTA_ATTR) or {}
+        if anterior is not None and anterior[0] == versao - 1 and CLIENTE in alteracoes:
+            # Versão seguinte, vinda da sincronização incremental: só os clientes alterados
+            estado = anterior[1].refresh(df, alteracoes[CLIENTE])
+            logger.info(f"RFV de {nome} atualizado: {len(alteracoes[CLIENTE])} clientes alterados")
+        else:
+            estado = RFVState.build(df)
+            logger.info(f"RFV de {nome} calculado: {estado.clients} clientes")
+
+        with self._lock:
+            atual = self._states.get(nome)
+            if atual is None or atual[0] <= versao:
+                self._states[nome] = (versao, estado)
+        return estado
+
+    def clear(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+
+rfv_states = _RFVStates()
+
+
+def rfv_state(df: pd.DataFrame) -> RFVState:
+    """
+    Estado RFV do faturamento
+
+    Para a referência do dataset_store, o estado é reaproveitado enquanto a
+    versão for a mesma; na versão seguinte vinda da sincronização incremental,
+    apenas os clientes alterados são recalculados.
+    """
+    return rfv_states.get(df)
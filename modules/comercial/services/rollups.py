@@ -0,0 +1,90 @@
+"""
+Cubo de agregados do faturamento (CUBO_FATURAMENTO)
+
+Materializado uma vez por versão do dataset, com as combinações de dimensões
+usadas pelos dashboards comerciais. Os gráficos consultam o cubo em vez de
+agrupar as notas: o custo passa a depender do número de grupos.
+
+    cubo = cubo_faturamento(df)
+    cubo.query(['uf'], where={'ano': 2024}, measures=['valorfaturado', 'clientes'])
+
+consultar_faturamento faz o mesmo e, quando o cubo não responde de forma
+exata (ex.: clientes distintos somados em vários anos), agrega as linhas.
+"""
+import logging
+from typing import Any, Mapping, Optional, Sequence
+import pandas as pd
+from shared.services.rollup import RollupCube, RollupMiss, RollupSpec
+from shared.utils.cache_manager import cache_data
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = 'comercial.rollups'
+
+FATURAMENTO_ROLLUP = RollupSpec(
+    measures={
+        'valorfaturado': ('valorfaturado', 'sum'),
+        'quant': ('quant', 'sum'),
+        'itens': ('nota', 'count'),       # linhas (itens de nota)
+        'notas': ('nota', 'nunique'),
+        'clientes': ('codcli', 'nunique'),
+    },
+    derived={
+        'ano': lambda df: df['emissao'].dt.year.astype('Int16'),
+        'mes': lambda df: df['emissao'].dt.month.astype('Int8'),
+    },
+    grouping_sets=[
+        (),
+        ('ano',),
+        ('ano', 'mes'),
+        ('uf',),
+        ('ano', 'uf'),
+        ('uf', 'pais'),
+        ('ano', 'uf', 'pais'),
+        ('regiao',),
+        ('regiao', 'uf'),
+        ('uf', 'cidade'),
+        ('regiao', 'uf', 'cidade'),
+        ('vendedor',),
+        ('ano', 'vendedor'),
+        ('ano', 'mes', 'vendedor'),
+        ('grupo', 'subGrupo'),
+        ('vendedor', 'grupo', 'subGrupo'),
+    ]
+)
+
+
+@cache_data(ttl_seconds=3600, namespace=NAMESPACE)
+def cubo_faturamento(df: pd.DataFrame) -> RollupCube:
+    """Cubo do CUBO_FATURAMENTO, calculado uma vez por versão do dataset"""
+    cubo = FATURAMENTO_ROLLUP.build(df)
+    logger.info(f"Cubo do faturamento: {len(cubo.grouping_sets)} combinações, "
+                f"{cubo.nbytes / 1e6:.1f} MB")
+    return cubo
+
+
+def consultar_faturamento(df: pd.DataFrame,
+                          by: Sequence[str] = (),
+                          where: Optional[Mapping[str, Any]] = None,
+                          measures: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Medidas do faturamento por dimensão, a partir do cubo
+
+    Args:
+        df: CUBO_FATURAMENTO completo (referência do dataset_store)
+        by: Dimensões do resultado (vazio: uma linha com os totais)
+        where: Dimensão -> valor ou lista de valores (ex.: {'ano': [2023, 2024]})
+        measures: valorfaturado, quant, itens, notas, clientes (padrão: todas)
+
+    Returns:
+        pd.DataFrame: Uma linha por grupo, ordenado por by
+    """
+    try:
+        try:
+            return cubo_faturamento(df).query(by, where, measures)
+        except RollupMiss as e:
+            logger.debug(f"Consulta agregada a partir das notas: {str(e)}")
+            return FATURAMENTO_ROLLUP.aggregate(df, by, where, measures)
+    except Exception as e:
+        logger.error(f"Erro ao consultar o cubo do faturamento: {str(e)}")
+        return pd.DataFrame()
@@ -0,0 +1,398 @@
+"""
+Gerador vetorizado de dados sintéticos das views do POWERBI
+
+Produz CUBO_FATURAMENTO, ORCAMENTO, OS e CLIENTE referencialmente
+consistentes (cliente -> orçamento -> OS -> nota) em escala de produção,
+com a mesma semente gerando sempre os mesmos dados.
+
+Uso:
+    python -m modules.comercial.services.synthetic_data --rows 1000000 --dest .cache/fixtures
+"""
+import os
+import sys
+import time
+import argparse
+import logging
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Participação aproximada de cada UF no faturamento
+UF_PESOS = {
+    'SP': 30.0, 'RJ': 10.0, 'MG': 9.0, 'PR': 6.5, 'RS': 6.5, 'SC': 4.5, 'BA': 4.0,
+    'DF': 3.5, 'GO': 3.0, 'PE': 2.5, 'CE': 2.0, 'ES': 2.0, 'PA': 2.0, 'MT': 2.0,
+    'MS': 1.5, 'AM': 1.5, 'MA': 1.0, 'PB': 0.7, 'RN': 0.7, 'AL': 0.6, 'PI': 0.6,
+    'SE': 0.5, 'RO': 0.5, 'TO': 0.5, 'AC': 0.2, 'AP': 0.2, 'RR': 0.2
+}
+
+REGIOES = {
+    'Norte': ['AC', 'AM', 'AP', 'PA', 'RO', 'RR', 'TO'],
+    'Nordeste': ['AL', 'BA', 'CE', 'MA', 'PB', 'PE', 'PI', 'RN', 'SE'],
+    'Centro-Oeste': ['DF', 'GO', 'MS', 'MT'],
+    'Sudeste': ['ES', 'MG', 'RJ', 'SP'],
+    'Sul': ['PR', 'RS', 'SC']
+}
+
+CIDADES = {
+    'SP': ['SAO PAULO', 'CAMPINAS', 'RIBEIRAO PRETO', 'SOROCABA', 'SAO JOSE DOS CAMPOS', 'SANTOS'],
+    'RJ': ['RIO DE JANEIRO', 'NITEROI', 'DUQUE DE CAXIAS', 'PETROPOLIS'],
+    'MG': ['BELO HORIZONTE', 'UBERLANDIA', 'CONTAGEM', 'JUIZ DE FORA'],
+    'PR': ['CURITIBA', 'LONDRINA', 'MARINGA', 'CASCAVEL'],
+    'RS': ['PORTO ALEGRE', 'CAXIAS DO SUL', 'PELOTAS', 'SANTA MARIA'],
+    'SC': ['FLORIANOPOLIS', 'JOINVILLE', 'BLUMENAU', 'CHAPECO'],
+    'BA': ['SALVADOR', 'FEIRA DE SANTANA', 'VITORIA DA CONQUISTA'],
+    'GO': ['GOIANIA', 'ANAPOLIS', 'RIO VERDE'],
+    'DF': ['BRASILIA'], 'PE': ['RECIFE', 'CARUARU'], 'CE': ['FORTALEZA', 'JUAZEIRO DO NORTE'],
+    'ES': ['VITORIA', 'VILA VELHA'], 'PA': ['BELEM', 'SANTAREM'], 'MT': ['CUIABA', 'RONDONOPOLIS'],
+    'MS': ['CAMPO GRANDE', 'DOURADOS'], 'AM': ['MANAUS'], 'MA': ['SAO LUIS'], 'PB': ['JOAO PESSOA'],
+    'RN': ['NATAL'], 'AL': ['MACEIO'], 'PI': ['TERESINA'], 'SE': ['ARACAJU'], 'RO': ['PORTO VELHO'],
+    'TO': ['PALMAS'], 'AC': ['RIO BRANCO'], 'AP': ['MACAPA'], 'RR': ['BOA VISTA']
+}
+
+# Exportação: uf = 'EX', país e cidade do cliente no exterior
+PAISES_PESOS = {
+    'ARGENTINA': 30.0, 'PARAGUAI': 18.0, 'URUGUAI': 14.0, 'CHILE': 12.0, 'BOLIVIA': 8.0,
+    'PERU': 6.0, 'COLOMBIA': 5.0, 'MEXICO': 4.0, 'ESTADOS UNIDOS': 3.0
+}
+CAPITAIS_EXTERIOR = {
+    'ARGENTINA': 'BUENOS AIRES', 'PARAGUAI': 'ASSUNCAO', 'URUGUAI': 'MONTEVIDEU', 'CHILE': 'SANTIAGO',
+    'BOLIVIA': 'LA PAZ', 'PERU': 'LIMA', 'COLOMBIA': 'BOGOTA', 'MEXICO': 'CIDADE DO MEXICO',
+    'ESTADOS UNIDOS': 'MIAMI'
+}
+PERCENTUAL_EXPORTACAO = 0.06
+
+# Grupos de produto e seus subgrupos
+GRUPOS = {
+    'MAQUINAS': ['ENVASADORAS', 'SELADORAS', 'ROTULADORAS', 'ESTEIRAS'],
+    'PECAS': ['ROLAMENTOS', 'CORREIAS', 'ENGRENAGENS', 'VEDACOES', 'SENSORES'],
+    'SERVICOS': ['MANUTENCAO', 'INSTALACAO', 'TREINAMENTO'],
+    'AUTOMACAO': ['CLP', 'INVERSORES', 'PAINEIS'],
+    'INSUMOS': ['LUBRIFICANTES', 'FILMES', 'ETIQUETAS', 'ADESIVOS'],
+    'FERRAMENTAS': ['MANUAIS', 'ELETRICAS']
+}
+# Preço unitário mediano por grupo (R$)
+PRECO_GRUPO = {
+    'MAQUINAS': 45000.0, 'PECAS': 350.0, 'SERVICOS': 2500.0,
+    'AUTOMACAO': 6000.0, 'INSUMOS': 120.0, 'FERRAMENTAS': 600.0
+}
+
+# Ciclo de vida: status de OS (os_status_chart) e de orçamento (kpi_service)
+OS_ABERTA, OS_PARA_FABRICAR, OS_FABRICADA, OS_PARA_FATURAR, OS_FATURADA, OS_CANCELADA = range(6)
+ORC_PENDENTE, ORC_APROVADO, ORC_RECUSADO = 0, 1, 5
+
+PIPELINE_ETAPAS = ['Prospecção', 'Proposta', 'Negociação', 'Fechamento']
+
+SCALES = {'100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+
+class SyntheticDataGenerator:
+    """
+    Gera as views do POWERBI com distribuições realistas
+
+    - Clientes com peso de compra de cauda longa (poucos clientes concentram o faturamento)
+    - UF/país e cidade por cliente; vendedor responsável por carteira regional
+    - Sazonalidade anual, crescimento e vendas concentradas em dias úteis
+    - Orçamento aprovado -> OS -> nota, com datas sempre em ordem; OS sem nota
+      estão em andamento (recentes) ou canceladas
+    """
+
+    def __init__(self, seed: int = 42, end: Optional[str] = None, years: int = 5):
+        """
+        Args:
+            seed: Semente do gerador
+            end: Última data de emissão (padrão: hoje)
+            years: Anos de histórico
+        """
+        self.seed = seed
+        self.end = pd.Timestamp(end).normalize() if end else pd.Timestamp.today().normalize()
+        self.start = self.end - pd.DateOffset(years=years) + pd.Timedelta(days=1)
+
+    def generate(self, rows: int) -> Dict[str, pd.DataFrame]:
+        """
+        Gera as quatro views
+
+        Args:
+            rows: Linhas do CUBO_FATURAMENTO (itens de nota)
+
+        Returns:
+            Dict[str, pd.DataFrame]: {'CUBO_FATURAMENTO', 'ORCAMENTO', 'OS', 'CLIENTE'}
+        """
+        inicio = time.perf_counter()
+        rng = np.random.default_rng(self.seed)
+
+        clientes = self._clientes(rng, n=int(np.clip(rows // 25, 50, 500_000)))
+        notas = self._notas(rng, rows, clientes)
+        itens = self._itens(rng, rows, notas)
+        os_view, orcamento = self._ciclo_producao(rng, notas, clientes)
+        faturamento = self._faturamento(notas, itens, clientes)
+
+        ultima_compra = pd.Series(notas['emissao']).groupby(notas['cliente']).max()
+        ativo = np.zeros(len(clientes['codcli']), dtype=np.int8)
+        recentes = ultima_compra[ultima_compra >= self.end - pd.Timedelta(days=365)].index.to_numpy()
+        ativo[recentes] = 1
+
+        cliente = pd.DataFrame({
+            'codcli': clientes['codcli'],
+            'nome': pd.Categorical.from_codes(np.arange(len(clientes['codcli'])),
+                                              [f"CLIENTE {c:06d}" for c in clientes['codcli']]),
+            'uf': clientes['uf'],
+            'pais': clientes['pais'],
+            'cidade': clientes['cidade'],
+            'regiao': clientes['regiao'],
+            'vendedor': clientes['vendedor'],
+            'ativo': ativo
+        })
+
+        logger.info(f"Dados sintéticos gerados em {time.perf_counter() - inicio:.1f}s: "
+                    f"{len(faturamento)} itens, {len(orcamento)} orçamentos, {len(os_view)} OS, "
+                    f"{len(cliente)} clientes")
+        return {'CUBO_FATURAMENTO': faturamento, 'ORCAMENTO': orcamento, 'OS': os_view, 'CLIENTE': cliente}
+
+    def _clientes(self, rng: np.random.Generator, n: int) -> Dict[str, object]:
+        """Clientes com localização, vendedor e peso de compra"""
+        ufs = np.array(list(UF_PESOS) + ['EX'])
+        pesos_uf = np.array(list(UF_PESOS.values()))
+        pesos_uf = np.append(pesos_uf / pesos_uf.sum() * (1 - PERCENTUAL_EXPORTACAO), PERCENTUAL_EXPORTACAO)
+        uf_idx = rng.choice(len(ufs), size=n, p=pesos_uf)
+        uf = ufs[uf_idx]
+
+        paises = np.array(list(PAISES_PESOS))
+        pesos_pais = np.array(list(PAISES_PESOS.values()))
+        pais_ext = paises[rng.choice(len(paises), size=n, p=pesos_pais / pesos_pais.sum())]
+        pais = np.where(uf == 'EX', pais_ext, 'BRASIL')
+
+        # Cidade: a capital concentra metade dos clientes da UF
+        cidade = np.empty(n, dtype=object)
+        for sigla in np.unique(uf):
+            mascara = uf == sigla
+            if sigla == 'EX':
+                cidade[mascara] = pd.Series(pais[mascara]).map(CAPITAIS_EXTERIOR).to_numpy()
+                continue
+            opcoes = np.array(CIDADES[sigla])
+            pesos = np.full(len(opcoes), 0.5 / max(len(opcoes) - 1, 1))
+            pesos[0] = 0.5 if len(opcoes) > 1 else 1.0
+            cidade[mascara] = opcoes[rng.choice(len(opcoes), size=mascara.sum(), p=pesos)]
+
+        regiao_uf = {sigla: nome for nome, siglas in REGIOES.items() for sigla in siglas}
+        regiao_uf['EX'] = 'Exportação'
+        regiao = pd.Series(uf).map(regiao_uf).to_numpy()
+
+        # Carteiras regionais: cada região tem seus vendedores
+        n_vendedores = int(np.clip(n // 400, 6, 60))
+        vendedores = np.array([f"VENDEDOR {i:02d}" for i in range(1, n_vendedores + 1)])
+        regioes = np.array(list(REGIOES) + ['Exportação'])
+        regiao_idx = pd.Series(regiao).map({r: i for i, r in enumerate(regioes)}).to_numpy()
+        carteira = rng.integers(0, max(n_vendedores // len(regioes), 1), size=n)
+        vendedor_idx = (regiao_idx + carteira * len(regioes)) % n_vendedores
+
+        return {
+            'codcli': np.arange(1, n + 1, dtype=np.int32),
+            'uf': pd.Categorical(uf),
+            'pais': pd.Categorical(pais),
+            'cidade': pd.Categorical(cidade),
+            'regiao': pd.Categorical(regiao),
+            'vendedor': pd.Categorical.from_codes(vendedor_idx, vendedores),
+            # Cauda longa: poucos clientes concentram as compras
+            'peso': rng.lognormal(mean=0.0, sigma=1.3, size=n)
+        }
+
+    def _notas(self, rng: np.random.Generator, rows: int, clientes: Dict[str, object]) -> Dict[str, np.ndarray]:
+        """Notas fiscais: cliente, emissão e quantidade de itens"""
+        # Itens por nota ~ geométrica com média 3; sobra ajustada na última nota
+        itens = rng.geometric(1 / 3, size=rows)
+        acumulado = np.cumsum(itens)
+        n_notas = int(np.searchsorted(acumulado, rows) + 1)
+        itens = itens[:n_notas]
+        itens[-1] -= acumulado[n_notas - 1] - rows
+
+        dias = pd.date_range(self.start, self.end, freq='D')
+        t = np.arange(len(dias)) / 365.0
+        sazonalidade = 1 + 0.25 * np.sin(2 * np.pi * (dias.dayofyear.to_numpy() - 80) / 365)
+        crescimento = 1.08 ** t
+        dia_util = np.where(dias.dayofweek.to_numpy() >= 5, 0.08, 1.0)
+        pesos_dia = sazonalidade * crescimento * dia_util
+        emissao = dias.to_numpy()[rng.choice(len(dias), size=n_notas, p=pesos_dia / pesos_dia.sum())]
+        emissao.sort()  # numeração das notas acompanha a data
+
+        peso = clientes['peso']
+        cliente = rng.choice(len(peso), size=n_notas, p=peso / peso.sum())
+
+        return {
+            'sequencial': np.arange(1, n_notas + 1, dtype=np.int32),
+            'emissao': emissao,
+            'cliente': cliente,
+            'itens': itens
+        }
+
+    def _itens(self, rng: np.random.Generator, rows: int, notas: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Itens das notas: produto, quantidade e valor"""
+        subgrupos = [(g, s) for g, lista in GRUPOS.items() for s in lista]
+        # Popularidade de Zipf entre os subgrupos
+        popularidade = 1 / np.arange(1, len(subgrupos) + 1) ** 0.8
+        sub_idx = rng.permutation(len(subgrupos))[rng.choice(len(subgrupos), size=rows,
+                                                              p=popularidade / popularidade.sum())]
+
+        grupos = list(GRUPOS)
+        grupo_do_sub = np.array([grupos.index(g) for g, _ in subgrupos])
+        grupo_idx = grupo_do_sub[sub_idx]
+        preco_base = np.array([PRECO_GRUPO[g] for g in grupos])[grupo_idx]
+
+        # Itens caros saem em quantidades menores
+        quant = np.where(preco_base > 5000, rng.geometric(0.7, size=rows), rng.geometric(0.15, size=rows))
+        preco = preco_base * rng.lognormal(0.0, 0.35, size=rows)
+
+        inicio_nota = np.repeat(np.cumsum(notas['itens']) - notas['itens'], notas['itens'])
+        return {
+            'item': (np.arange(rows) - inicio_nota + 1).astype(np.int16),
+            'grupo': pd.Categorical.from_codes(grupo_idx, grupos),
+            'subGrupo': pd.Categorical.from_codes(sub_idx, [s for _, s in subgrupos]),
+            'quant': quant.astype(np.float32),
+            'valorfaturado': np.round(quant * preco, 2)
+        }
+
+    def _ciclo_producao(self, rng: np.random.Generator, notas: Dict[str, np.ndarray],
+                        clientes: Dict[str, object]):
+        """Orçamentos e OS consistentes com as notas faturadas"""
+        n_notas = len(notas['sequencial'])
+        um_dia = np.timedelta64(1, 'D')
+
+        # 70% das notas vêm de uma OS faturada; a OS abre antes da nota
+        com_os = rng.random(n_notas) < 0.7
+        n_faturadas = int(com_os.sum())
+        data_os_fat = notas['emissao'][com_os] - rng.gamma(2.0, 8.0, n_faturadas).astype(int) * um_dia - um_dia
+        cliente_os_fat = notas['cliente'][com_os]
+
+        # OS sem nota: canceladas ao longo do período ou em andamento (recentes)
+        n_extra = max(int(n_faturadas * 0.15), 1)
+        canceladas = rng.random(n_extra) < 0.35
+        inicio, fim = np.datetime64(self.start, 'D'), np.datetime64(self.end, 'D')
+        periodo = int((fim - inicio) / um_dia)
+        idade = np.where(canceladas,
+                         rng.integers(0, periodo, n_extra),
+                         rng.gamma(1.5, 12.0, n_extra).astype(int))
+        data_os_extra = fim - np.minimum(idade, periodo) * um_dia
+        # Quanto mais antiga, mais avançada no processo
+        andamento = np.minimum(idade // 10, OS_PARA_FATURAR)
+        status_extra = np.where(canceladas, OS_CANCELADA, andamento)
+        cliente_os_extra = rng.choice(len(clientes['peso']), size=n_extra,
+                                      p=clientes['peso'] / clientes['peso'].sum())
+
+        data_os = np.concatenate([data_os_fat, data_os_extra])
+        ordem = np.argsort(data_os, kind='stable')
+        n_os = len(data_os)
+        numero_os = np.empty(n_os, dtype=np.int32)
+        numero_os[ordem] = np.arange(1, n_os + 1, dtype=np.int32)  # numeração segue a data
+        status_os = np.concatenate([np.full(n_faturadas, OS_FATURADA), status_extra]).astype(np.int8)
+        cliente_os = np.concatenate([cliente_os_fat, cliente_os_extra])
+
+        os_nota = np.zeros(n_notas, dtype=np.int32)
+        os_nota[com_os] = numero_os[:n_faturadas]
+        notas['os'] = os_nota
+
+        os_view = pd.DataFrame({
+            'os': numero_os,
+            'data': data_os,
+            'status': status_os,
+            'codcli': clientes['codcli'][cliente_os],
+            'vendedor': clientes['vendedor'][cliente_os]
+        }).sort_values('os', ignore_index=True)
+
+        # Orçamentos: um aprovado por OS (não cancelada) e recusados/pendentes sem OS
+        aprovados = status_os != OS_CANCELADA
+        data_orc_aprov = data_os[aprovados] - rng.gamma(2.0, 5.0, int(aprovados.sum())).astype(int) * um_dia
+        n_sem_os = int(aprovados.sum() * 0.8)
+        pendentes = rng.random(n_sem_os) < 0.1
+        idade_sem_os = np.where(pendentes, rng.integers(0, 30, n_sem_os), rng.integers(0, periodo, n_sem_os))
+        data_orc_sem_os = fim - idade_sem_os * um_dia
+        cliente_sem_os = rng.choice(len(clientes['peso']), size=n_sem_os,
+                                    p=clientes['peso'] / clientes['peso'].sum())
+
+        cliente_orc = np.concatenate([cliente_os[aprovados], cliente_sem_os])
+        orcamento = pd.DataFrame({
+            'data': np.concatenate([data_orc_aprov, data_orc_sem_os]),
+            'os': np.concatenate([numero_os[aprovados], np.zeros(n_sem_os, dtype=np.int32)]),
+            'status': np.concatenate([np.full(int(aprovados.sum()), ORC_APROVADO),
+                                      np.where(pendentes, ORC_PENDENTE, ORC_RECUSADO)]).astype(np.int8),
+            'codcli': clientes['codcli'][cliente_orc],
+            'vendedor': clientes['vendedor'][cliente_orc],
+            'valor': np.round(rng.lognormal(8.5, 1.2, len(cliente_orc)), 2)
+        }).sort_values('data', kind='stable', ignore_index=True)
+
+        return os_view, orcamento
+
+    def _faturamento(self, notas: Dict[str, np.ndarray], itens: Dict[str, np.ndarray],
+                     clientes: Dict[str, object]) -> pd.DataFrame:
+        """Expande os atributos das notas para os itens"""
+        repetir = notas['itens']
+        cliente = np.repeat(notas['cliente'], repetir)
+        emissao = np.repeat(notas['emissao'], repetir)
+        sequencial = np.repeat(notas['sequencial'], repetir)
+
+        return pd.DataFrame({
+            'emissao': emissao,
+            'data': emissao,
+            'sequencial': sequencial,
+            'nota': sequencial + np.int32(100_000),
+            'item': itens['item'],
+            'codcli': clientes['codcli'][cliente],
+            'uf': clientes['uf'][cliente],
+            'pais': clientes['pais'][cliente],
+            'cidade': clientes['cidade'][cliente],
+            'regiao': clientes['regiao'][cliente],
+            'vendedor': clientes['vendedor'][cliente],
+            'grupo': itens['grupo'],
+            'subGrupo': itens['subGrupo'],
+            'quant': itens['quant'],
+            'valorfaturado': itens['valorfaturado'],
+            'os': np.repeat(notas['os'], repetir)
+        })
+
+    def pipeline(self, n: int = 100) -> pd.DataFrame:
+        """Oportunidades do pipeline de vendas (status, vendedor, data, valor, tempo na etapa)"""
+        rng = np.random.default_rng(self.seed)
+        # Funil: cada etapa tem menos oportunidades que a anterior
+        pesos = np.array([0.4, 0.3, 0.2, 0.1])
+        vendedores = [f"VENDEDOR {i:02d}" for i in range(1, 7)]
+        return pd.DataFrame({
+            'status': pd.Categorical.from_codes(rng.choice(len(PIPELINE_ETAPAS), size=n, p=pesos),
+                                                PIPELINE_ETAPAS),
+            'vendedor': pd.Categorical.from_codes(rng.integers(0, len(vendedores), n), vendedores),
+            'data_criacao': self.end - pd.to_timedelta(rng.integers(0, 91, n), unit='D'),
+            'valor': rng.uniform(10_000, 500_000, n),
+            'tempo_etapa': rng.integers(1, 31, n)
+        })
+
+
+def write_parquet(frames: Dict[str, pd.DataFrame], dest: str) -> Dict[str, str]:
+    """Grava cada view em <dest>/<VIEW>.parquet (formato lido por tools.powerbi_stub)"""
+    os.makedirs(dest, exist_ok=True)
+    caminhos = {}
+    for view, df in frames.items():
+        caminho = os.path.join(dest, f"{view}.parquet")
+        df.to_parquet(f"{caminho}.tmp", index=False, compression='zstd')
+        os.replace(f"{caminho}.tmp", caminho)
+        caminhos[view] = caminho
+    return caminhos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gera as views do POWERBI em Parquet')
+    parser.add_argument('--rows', default='100k',
+                        help=f"Linhas do CUBO_FATURAMENTO: número ou {', '.join(SCALES)}")
+    parser.add_argument('--dest', default='.cache/fixtures')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end', help='Última data de emissão (AAAA-MM-DD)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    rows = SCALES.get(str(args.rows).lower()) or int(args.rows)
+    frames = SyntheticDataGenerator(seed=args.seed, end=args.end).generate(rows)
+    for view, caminho in write_parquet(frames, args.dest).items():
+        print(f"{view}: {len(frames[view])} linhas -> {caminho} ({os.path.getsize(caminho) / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+Agregado territorial do faturamento (mapa, rankings, distribuição e cards)
+
+Uma linha por local de venda: a UF para clientes no Brasil e o país para
+clientes no exterior (uf = 'EX'), com faturamento, clientes distintos,
+notas, tipo de venda (INTERNO/EXTERNO) e coordenadas. Calculado uma vez
+por versão do dataset e período, a partir do cubo de agregados; períodos
+que o cubo não responde de forma exata (clientes distintos em vários anos)
+são agregados a partir das partições do período.
+
+    territorio = agregado_territorial(df, anos=[2023, 2024])
+    territorio.locations.nlargest(5, 'valorfaturado')
+    territorio.summary()
+"""
+import logging
+import time
+import unicodedata
+from typing import Any, Dict, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from shared.cache.partitions import available_years, has_null_dates, select_period
+from shared.services.rollup import RollupMiss
+from shared.utils.cache_manager import cache_data
+from .rollups import FATURAMENTO_ROLLUP, cubo_faturamento
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = 'comercial.territorial'
+
+# Marcador de UF dos clientes no exterior
+UF_EXTERIOR = 'EX'
+
+INTERNO = 'INTERNO'
+EXTERNO = 'EXTERNO'
+
+# Tempo até uma consulta de coordenadas sem resultado ser repetida
+FALHA_COORDENADAS_TTL = 3600
+
+MEDIDAS = ['valorfaturado', 'clientes', 'notas']
+LOCATION_COLUMNS = ['local', 'tipo_venda', 'valorfaturado', 'clientes', 'notas', 'lat', 'lon']
+
+# Coordenadas das UFs
+COORDENADAS_UF = {
+    'AC': {'lat': -9.0238, 'lon': -70.812},
+    'AL': {'lat': -9.5713, 'lon': -36.782},
+    'AM': {'lat': -3.4168, 'lon': -65.8561},
+    'AP': {'lat': 1.4099, 'lon': -51.7695},
+    'BA': {'lat': -12.2846, 'lon': -41.6809},
+    'CE': {'lat': -5.4984, 'lon': -39.3206},
+    'DF': {'lat': -15.7801, 'lon': -47.9292},
+    'ES': {'lat': -19.1834, 'lon': -40.3089},
+    'GO': {'lat': -15.827, 'lon': -49.8362},
+    'MA': {'lat': -4.9609, 'lon': -45.2744},
+    'MG': {'lat': -18.5122, 'lon': -44.555},
+    'MS': {'lat': -20.7722, 'lon': -54.7852},
+    'MT': {'lat': -12.6819, 'lon': -56.9211},
+    'PA': {'lat': -5.5305, 'lon': -52.2907},
+    'PB': {'lat': -7.24, 'lon': -36.782},
+    'PE': {'lat': -8.8137, 'lon': -36.9541},
+    'PI': {'lat': -7.7183, 'lon': -42.7289},
+    'PR': {'lat': -25.2521, 'lon': -52.0215},
+    'RJ': {'lat': -22.9099, 'lon': -43.2095},
+    'RN': {'lat': -5.4026, 'lon': -36.9541},
+    'RO': {'lat': -11.5057, 'lon': -63.5806},
+    'RR': {'lat': 2.7376, 'lon': -62.0751},
+    'RS': {'lat': -30.0346, 'lon': -51.2177},
+    'SC': {'lat': -27.2423, 'lon': -50.2189},
+    'SE': {'lat': -10.9091, 'lon': -37.0677},
+    'SP': {'lat': -23.5505, 'lon': -46.6333},
+    'TO': {'lat': -10.1753, 'lon': -48.2982},
+}
+
+# Coordenadas dos destinos de exportação mais comuns (sem consulta ao OpenStreetMap)
+COORDENADAS_PAIS = {
+    'ARGENTINA': {'lat': -34.9965, 'lon': -64.9673},
+    'PARAGUAI': {'lat': -23.3166, 'lon': -58.1693},
+    'URUGUAI': {'lat': -32.8755, 'lon': -56.0201},
+    'CHILE': {'lat': -31.7614, 'lon': -71.3187},
+    'BOLIVIA': {'lat': -17.0568, 'lon': -64.9912},
+    'PERU': {'lat': -6.8699, 'lon': -75.0459},
+    'COLOMBIA': {'lat': 4.0999, 'lon': -72.9088},
+    'VENEZUELA': {'lat': 8.0018, 'lon': -66.1109},
+    'EQUADOR': {'lat': -1.3398, 'lon': -79.3666},
+    'MEXICO': {'lat': 23.6585, 'lon': -102.0077},
+    'ESTADOS UNIDOS': {'lat': 39.7837, 'lon': -100.4459},
+    'CANADA': {'lat': 61.0666, 'lon': -107.9917},
+    'PORTUGAL': {'lat': 39.6621, 'lon': -8.1353},
+    'ESPANHA': {'lat': 39.3261, 'lon': -4.838},
+    'FRANCA': {'lat': 46.6033, 'lon': 1.8883},
+    'ITALIA': {'lat': 42.6384, 'lon': 12.6743},
+    'ALEMANHA': {'lat': 51.1638, 'lon': 10.4478},
+    'ANGOLA': {'lat': -11.8776, 'lon': 17.5692},
+    'MOCAMBIQUE': {'lat': -19.302, 'lon': 34.9145},
+    'CHINA': {'lat': 35.0001, 'lon': 105.0},
+}
+
+
+def _normalizar(nome: str) -> str:
+    """Nome em maiúsculas e sem acentos (ex.: 'México' -> 'MEXICO')"""
+    sem_acentos = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode()
+    return sem_acentos.strip().upper()
+
+
+def get_country_coordinates(country_name: str) -> Optional[dict]:
+    """
+    Obtém as coordenadas de um país: da tabela COORDENADAS_PAIS ou, para os
+    demais, da API do OpenStreetMap. Consultas bem-sucedidas ficam em memória;
+    consultas sem resultado (ou com erro) só são repetidas após FALHA_COORDENADAS_TTL
+    """
+    import requests
+
+    conhecido = COORDENADAS_PAIS.get(_normalizar(country_name))
+    if conhecido is not None:
+        return conhecido
+
+    # Cache para coordenadas já consultadas e para as consultas que falharam
+    if not hasattr(get_country_coordinates, 'cache'):
+        get_country_coordinates.cache = {}
+        get_country_coordinates.failures = {}
+    if country_name in get_country_coordinates.cache:
+        return get_country_coordinates.cache[country_name]
+    falha = get_country_coordinates.failures.get(country_name)
+    if falha is not None and time.time() - falha < FALHA_COORDENADAS_TTL:
+        return None
+
+    try:
+        # Consulta a API do Nominatim (OpenStreetMap)
+        url = f"https://nominatim.openstreetmap.org/search?country={country_name}&format=json"
+        response = requests.get(url, headers={'User-Agent': 'MixBI/1.0'}, timeout=10)
+        time.sleep(1)  # Respeita o limite de requisições
+
+        if response.status_code == 200:
+            data = response.json()
+            if data:
+                coords = {
+                    'lat': float(data[0]['lat']),
+                    'lon': float(data[0]['lon'])
+                }
+                get_country_coordinates.cache[country_name] = coords
+                return coords
+
+    except Exception as e:
+        logger.error(f"Erro ao obter coordenadas do país {country_name}: {str(e)}")
+
+    get_country_coordinates.failures[country_name] = time.time()
+    return None
+
+
+class TerritorialAggregate:
+    """Faturamento, clientes e notas por local de venda, com os totais do período"""
+
+    def __init__(self, locations: pd.DataFrame, totals: Dict[str, float]):
+        """
+        Args:
+            locations: Uma linha por local (LOCATION_COLUMNS), do maior para o menor faturamento
+            totals: valorfaturado, clientes, notas e clientes_externos do período
+        """
+        self.locations = locations
+        self.totals = totals
+
+    @classmethod
+    def build(cls,
+              por_uf: pd.DataFrame,
+              por_pais: pd.DataFrame,
+              totais: pd.DataFrame) -> 'TerritorialAggregate':
+        """
+        Monta os locais a partir das medidas por UF, por país (clientes no
+        exterior) e do total do período
+        """
+        por_uf = por_uf.dropna(subset=['uf'])
+        uf = por_uf['uf'].astype(str)
+        internos = por_uf[(uf != UF_EXTERIOR).to_numpy()]
+        externos = por_pais.dropna(subset=['pais'])
+
+        locais = pd.concat([
+            pd.DataFrame({'local': internos['uf'].astype(str).to_numpy(), 'tipo_venda': INTERNO,
+                          **{m: internos[m].to_numpy() for m in MEDIDAS}}),
+            pd.DataFrame({'local': externos['pais'].astype(str).to_numpy(), 'tipo_venda': EXTERNO,
+                          **{m: externos[m].to_numpy() for m in MEDIDAS}}),
+        ], ignore_index=True)
+
+        # Coordenadas: tabela das UFs; países pela tabela ou pelo OpenStreetMap (um por local)
+        coordenadas = [COORDENADAS_UF.get(local) if tipo == INTERNO else get_country_coordinates(local)
+                       for local, tipo in zip(locais['local'], locais['tipo_venda'])]
+        locais['lat'] = [c['lat'] if c else np.nan for c in coordenadas]
+        locais['lon'] = [c['lon'] if c else np.nan for c in coordenadas]
+        locais['tipo_venda'] = pd.Categorical(locais['tipo_venda'], categories=[INTERNO, EXTERNO])
+        locais = locais.sort_values('valorfaturado', ascending=False, kind='stable', ignore_index=True)
+
+        total = totais.iloc[0] if not totais.empty else pd.Series(0, index=MEDIDAS)
+        exterior = por_uf.loc[(uf == UF_EXTERIOR).to_numpy(), 'clientes']
+        return cls(locais[LOCATION_COLUMNS], {
+            'valorfaturado': float(total['valorfaturado']),
+            'clientes': int(total['clientes']),
+            'notas': int(total['notas']),
+            'clientes_externos': int(exterior.sum()),
+        })
+
+    @classmethod
+    def empty(cls) -> 'TerritorialAggregate':
+        """Agregado sem locais (dataset vazio ou erro no cálculo)"""
+        return cls(pd.DataFrame(columns=LOCATION_COLUMNS),
+                   {'valorfaturado': 0.0, 'clientes': 0, 'notas': 0, 'clientes_externos': 0})
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.locations.memory_usage(deep=True).sum())
+
+    def summary(self) -> Dict[str, Any]:
+        """Clientes, estados e países atendidos (cards da Análise Territorial)"""
+        tipos = self.locations['tipo_venda']
+        return {
+            'total_clientes': self.totals['clientes'],
+            'estados_atendidos': int((tipos == INTERNO).sum()),
+            'paises_atendidos': int((tipos == EXTERNO).sum()),
+            'clientes_externos': self.totals['clientes_externos'],
+        }
+
+
+def _consultar(df: pd.DataFrame,
+               by: Sequence[str],
+               where: Dict[str, Any],
+               anos: Optional[Tuple[int, ...]]) -> pd.DataFrame:
+    """Medidas do período pelo cubo ou, se o cubo não responde, das partições do período"""
+    filtro = dict(where)
+    if anos is not None:
+        filtro['ano'] = anos[0] if len(anos) == 1 else list(anos)
+    try:
+        return cubo_faturamento(df).query(by, filtro, MEDIDAS)
+    except RollupMiss:
+        pass
+    except Exception as e:
+        logger.error(f"Erro ao consultar o cubo do faturamento; agregando as notas: {str(e)}")
+    linhas = df if anos is None else select_period(df, 'emissao', anos=anos)
+    return FATURAMENTO_ROLLUP.aggregate(linhas, by, where, MEDIDAS)
+
+
+@cache_data(ttl_seconds=3600, namespace=NAMESPACE)
+def _agregado(df: pd.DataFrame, anos: Optional[Tuple[int, ...]]) -> TerritorialAggregate:
+    return TerritorialAggregate.build(
+        _consultar(df, ['uf'], {}, anos),
+        _consultar(df, ['pais'], {'uf': UF_EXTERIOR}, anos),
+        _consultar(df, [], {}, anos),
+    )
+
+
+def agregado_territorial(df: pd.DataFrame,
+                         anos: Optional[Sequence[int]] = None) -> TerritorialAggregate:
+    """
+    Agregado territorial do período, compartilhado entre sessões
+
+    Args:
+        df: CUBO_FATURAMENTO completo (referência do dataset_store)
+        anos: Anos de emissão (None: todos)
+    """
+    try:
+        if anos is not None:
+            anos = tuple(sorted({int(ano) for ano in anos}))
+            # Todos os anos dos dados: mesmo agregado (e mesma entrada de cache) de anos=None,
+            # exceto se há emissões nulas, que anos=None inclui e o filtro por anos não
+            if set(available_years(df, 'emissao')) <= set(anos) and not has_null_dates(df, 'emissao'):
+                anos = None
+        return _agregado(df, anos)
+    except Exception as e:
+        logger.error(f"Erro ao calcular o agregado territorial: {str(e)}")
+        return TerritorialAggregate.empty()
+
@@ -0,0 +1,140 @@
+"""
+Carregamento concorrente de views do POWERBI
+"""
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Optional, Union
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+STATUS_TIMEOUT = 'timeout'
+
+
+@dataclass
+class ViewLoadResult:
+    """Resultado do carregamento de uma view"""
+    view: str
+    data: pd.DataFrame = field(default_factory=pd.DataFrame)
+    status: str = STATUS_OK
+    error: Optional[str] = None
+    elapsed: float = 0.0  # segundos
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+
+class ConcurrentViewLoader:
+    """
+    Busca várias views em paralelo, com limite de concorrência e timeout por view.
+
+    Uma view lenta ou com erro não bloqueia as demais: o resultado é parcial e
+    cada view traz seu próprio status e tempo de carregamento.
+    """
+
+    def __init__(self,
+                 fetch: Callable[[str, float], pd.DataFrame],
+                 max_workers: int = 3,
+                 timeout: float = 60.0,
+                 poll_interval: float = 0.1):
+        """
+        Args:
+            fetch: Função que recebe (view, timeout) e retorna o DataFrame da view
+            max_workers: Número máximo de views buscadas ao mesmo tempo
+            timeout: Tempo máximo (segundos) de cada view, contado a partir do início da busca
+            poll_interval: Intervalo de verificação dos timeouts
+        """
+        self.fetch = fetch
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.last_report: Dict[str, ViewLoadResult] = {}
+
+    def load(self, views: Union[Dict[str, str], Iterable[str]]) -> Dict[str, ViewLoadResult]:
+        """
+        Carrega as views informadas
+
+        Args:
+            views: Dicionário {chave: view} ou lista de views (a chave é o próprio nome da view)
+
+        Returns:
+            Dict[str, ViewLoadResult]: Resultado por chave, na mesma ordem da entrada
+        """
+        if not isinstance(views, dict):
+            views = {view: view for view in views}
+        if not views:
+            return {}
+
+        started: Dict[str, float] = {}
+        abandoned = set()
+        lock = threading.Lock()
+        slots = threading.Semaphore(self.max_workers)
+
+        def run(key: str, view: str) -> pd.DataFrame:
+            slots.acquire()
+            with lock:
+                started[key] = time.perf_counter()
+            try:
+                return self.fetch(view, self.timeout)
+            finally:
+                with lock:
+                    # Se a view foi abandonada por timeout, a vaga já foi liberada
+                    if key not in abandoned:
+                        slots.release()
+
+        results: Dict[str, ViewLoadResult] = {}
+        executor = ThreadPoolExecutor(max_workers=len(views), thread_name_prefix='powerbi-loader')
+        try:
+            pending = {executor.submit(run, key, view): key for key, view in views.items()}
+
+            while pending:
+                done, _ = wait(list(pending), timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                now = time.perf_counter()
+
+                for future in done:
+                    key = pending.pop(future)
+                    elapsed = now - started.get(key, now)
+                    try:
+                        data = future.result()
+                        results[key] = ViewLoadResult(views[key], data if data is not None else pd.DataFrame(),
+                                                      elapsed=elapsed)
+                    except Exception as e:
+                        results[key] = ViewLoadResult(views[key], status=STATUS_ERROR, error=str(e), elapsed=elapsed)
+
+                # Views em execução há mais tempo que o limite são abandonadas
+                # e liberam a vaga para as views que ainda estão na fila
+                for future, key in list(pending.items()):
+                    with lock:
+                        inicio = started.get(key)
+                        expirou = inicio is not None and now - inicio > self.timeout and not future.done()
+                        if expirou:
+                            abandoned.add(key)
+                            slots.release()
+                    if expirou:
+                        pending.pop(future)
+                        results[key] = ViewLoadResult(views[key], status=STATUS_TIMEOUT,
+                                                      error=f"Timeout após {self.timeout:.0f}s",
+                                                      elapsed=now - inicio)
+        finally:
+            # Não espera threads abandonadas por timeout
+            executor.shutdown(wait=False)
+
+        ordered = {key: results[key] for key in views}
+        self.last_report = ordered
+        self._log_report(ordered)
+        return ordered
+
+    @staticmethod
+    def _log_report(results: Dict[str, ViewLoadResult]) -> None:
+        """Registra o tempo de cada view, da mais lenta para a mais rápida"""
+        for key, result in sorted(results.items(), key=lambda item: item[1].elapsed, reverse=True):
+            if result.ok:
+                logger.info(f"View {result.view} ({key}): {len(result.data)} registros em {result.elapsed:.2f}s")
+            else:
+                logger.warning(f"View {result.view} ({key}): {result.status} em {result.elapsed:.2f}s - {result.error}")
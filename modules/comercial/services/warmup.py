@@ -0,0 +1,120 @@
+"""
+Aquecimento dos caches do módulo comercial
+
+Busca as views mais usadas e calcula os agregados comuns antes do primeiro
+acesso, para que o primeiro usuário após um deploy não pague a carga fria.
+Roda em segundo plano na inicialização do app (start_background_warmup) ou
+pela linha de comando, que mede e relata o tempo de cada etapa:
+
+    python -m tools.warmup
+"""
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+from modules.comercial.config import LOADER_CONFIG, WARMUP_CONFIG
+from .aggregates import FATURAMENTO_AGGREGATES
+from .api_service import ComercialAPIService
+from .view_loader import ConcurrentViewLoader, ViewLoadResult
+
+logger = logging.getLogger(__name__)
+
+# View de onde saem os agregados comuns
+FATURAMENTO_VIEW = 'CUBO_FATURAMENTO'
+
+
+@dataclass
+class WarmupReport:
+    """Tempos do aquecimento: views, agregados e total (segundos)"""
+    views: Dict[str, ViewLoadResult] = field(default_factory=dict)
+    aggregates: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    total: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and all(result.ok and not result.data.empty for result in self.views.values())
+
+    def summary(self) -> str:
+        """Relatório legível, uma linha por etapa"""
+        linhas = [f"Aquecimento concluído em {self.total:.2f}s"]
+        for view, result in self.views.items():
+            situacao = f"{len(result.data)} registros" if result.ok and not result.data.empty else (result.error or 'vazia')
+            linhas.append(f"  view     {view:<20} {result.elapsed:7.2f}s  {situacao}")
+        for nome, segundos in self.aggregates.items():
+            linhas.append(f"  agregado {nome:<20} {segundos:7.2f}s")
+        for nome, erro in self.errors.items():
+            linhas.append(f"  erro {nome}: {erro}")
+        return "\n".join(linhas)
+
+
+def warm_up(views: Optional[Iterable[str]] = None,
+            service: Optional[ComercialAPIService] = None) -> WarmupReport:
+    """
+    Carrega as views no dataset_store e calcula os agregados compartilhados
+
+    Args:
+        views: Views a buscar (padrão: WARMUP_CONFIG['VIEWS'])
+        service: Serviço usado nas buscas (padrão: novo ComercialAPIService)
+
+    Returns:
+        WarmupReport: Tempo de cada view, de cada agregado e total
+    """
+    inicio = time.perf_counter()
+    service = service or ComercialAPIService()
+    report = WarmupReport()
+
+    loader = ConcurrentViewLoader(
+        lambda view, timeout: service.get_dataset(view),
+        max_workers=LOADER_CONFIG['MAX_WORKERS'],
+        timeout=LOADER_CONFIG['VIEW_TIMEOUT']
+    )
+    report.views = loader.load(list(views or WARMUP_CONFIG['VIEWS']))
+
+    faturamento = report.views.get(FATURAMENTO_VIEW)
+    if faturamento is not None and faturamento.ok and not faturamento.data.empty:
+        for nome, agregado in FATURAMENTO_AGGREGATES.items():
+            etapa = time.perf_counter()
+            try:
+                agregado(faturamento.data)
+            except Exception as e:
+                report.errors[nome] = str(e)
+            report.aggregates[nome] = time.perf_counter() - etapa
+
+    report.total = time.perf_counter() - inicio
+    logger.info(report.summary())
+    return report
+
+
+_warmup_lock = threading.Lock()
+_warmup_thread: Optional[threading.Thread] = None
+
+
+def start_background_warmup() -> bool:
+    """
+    Inicia o aquecimento em segundo plano, uma vez por processo
+
+    Chamado a cada execução do script do Streamlit: só a primeira inicia a
+    thread. Sessões que chegam durante o aquecimento aguardam a mesma busca
+    no dataset_store em vez de abrir outra.
+
+    Returns:
+        bool: True se o aquecimento foi iniciado nesta chamada
+    """
+    global _warmup_thread
+    if not WARMUP_CONFIG['ON_START']:
+        return False
+    with _warmup_lock:
+        if _warmup_thread is not None:
+            return False
+        _warmup_thread = threading.Thread(target=_run_warmup, name='cache-warmup', daemon=True)
+        _warmup_thread.start()
+    return True
+
+
+def _run_warmup() -> None:
+    try:
+        warm_up()
+    except Exception as e:
+        logger.error(f"Erro no aquecimento dos caches: {str(e)}")
@@ -1,8 +1,13 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 from datetime import datetime
-import requests
+from shared.services.http_client import http_client
+from modules.comercial.schemas import view_schemas
+from modules.comercial.config import API_CONFIG
+from shared.utils.formatters import format_percentage_series
+from shared.utils.timeline import GRAIN_LABELS, timeline_hover, timeline_matrix, year_colors
 import sys
 from pathlib import Path
 import locale
@@ -21,24 +26,22 @@ def load_data():
     """Carrega dados da API"""
     try:
         # Configuração da API
-        api_url = "http://tecnolife.empresamix.info:8077/POWERBI"
+        api_url = API_CONFIG['BASE_URL']
         params = {
-            "CLIENTE": "TECNOLIFE",
-            "ID": "XIOPMANA",
+            "CLIENTE": API_CONFIG['PARAMS']['CLIENTE'],
+            "ID": API_CONFIG['PARAMS']['ID'],
             "VIEW": "CUBO_FATURAMENTO"
         }
         
-        response = requests.get(api_url, params=params)
+        response = http_client.get(api_url, params=params)
         
         if response.status_code != 200:
             st.error(f"Erro na API. Status code: {response.status_code}")
             return None
             
         data = response.json()
-        df = pd.DataFrame(data)
-        
-        # Converter datas com tratamento de erros
-        df['data'] = pd.to_datetime(df['data'], format='%Y-%m-%d', errors='coerce')
+        # Datas e tipos convertidos pelo esquema da view (datas inválidas viram NaT)
+        df = view_schemas.apply("CUBO_FATURAMENTO", pd.DataFrame(data))
         
         # Remover registros com datas inválidas
         df = df.dropna(subset=['data'])
@@ -49,84 +52,88 @@ def load_data():
         st.error(f"Erro ao carregar dados da API: {str(e)}")
         return None
 
-def create_timeline(df, selected_years):
-    """Cria o gráfico de timeline com os anos selecionados"""
+# Variantes do gráfico: (acumulado, variação sobre o ano anterior, título, rótulo do hover)
+VARIANTES = {
+    'Mensal': (False, None, 'Evolução do Faturamento por Ano', 'Faturamento'),
+    'Acumulado': (True, None, 'Faturamento Acumulado por Ano', 'Acumulado'),
+    'Variação anual (R$)': (False, 'abs', 'Variação sobre o Ano Anterior', 'Variação'),
+    'Variação anual (%)': (False, 'pct', 'Variação sobre o Ano Anterior (%)', 'Variação'),
+}
+
+MESES = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+
+def eixo_milhoes(minimo, maximo):
+    """Marcas do eixo Y em milhões (de 1 em 1 milhão, até 12 marcas)"""
+    passo = 1000000 * max(1, int(np.ceil((maximo - min(minimo, 0)) / 1000000 / 12)))
+    inicio = (min(minimo, 0) // passo) * passo
+    fim = ((max(maximo, 0) // passo) + 1) * passo
+    y_ticks = list(np.arange(inicio, fim + passo, passo))
+    ticktext = [f'R$ {int(val/1000000)} Milhões' if val != 0 else 'R$ 0' for val in y_ticks]
+    return [inicio, fim], y_ticks, ticktext
+
+def create_timeline(df, selected_years, variante='Mensal', grain='month'):
+    """
+    Cria o gráfico de timeline com os anos selecionados
+
+    A matriz ano × período sai de uma única agregação (timeline_matrix),
+    para qualquer número de anos; uma linha por ano.
+    """
     try:
-        # Extrair ano e mês se ainda não existirem
-        if 'ano' not in df.columns:
-            df['ano'] = df['data'].dt.year
-        if 'mes' not in df.columns:
-            df['mes'] = df['data'].dt.month
-        
-        # Filtra dados pelos anos selecionados
-        df_filtered = df[df['ano'].isin(selected_years)]
-        
-        # Calcula o valor máximo mensal
-        df_mensal = df_filtered.groupby(['ano', 'mes'])['valorfaturado'].sum().reset_index()
-        max_value = df_mensal['valorfaturado'].max()
-        
-        # Arredonda para o próximo milhão
-        y_max = ((max_value // 1000000) + 1) * 1000000
-        
-        # Calcula os valores intermediários (de 1 em 1 milhão)
-        y_ticks = []
-        current_value = 0
-        while current_value <= y_max:
-            y_ticks.append(current_value)
-            current_value += 1000000  # Incremento de 1 milhão
-        
-        # Cores para cada ano
-        year_colors = {
-            2021: '#1f77b4',  # Azul
-            2022: '#ff7f0e',  # Laranja
-            2023: '#2ca02c',  # Verde
-            2024: '#d62728',  # Vermelho
-            2025: '#9467bd',  # Roxo
-        }
+        cumulative, delta, titulo, rotulo = VARIANTES[variante]
+        matriz = timeline_matrix(df, 'data', 'valorfaturado', selected_years,
+                                 grain=grain, cumulative=cumulative, delta=delta)
+        
+        # Textos do hover formatados de uma vez para toda a matriz
+        formatter = format_percentage_series if delta == 'pct' else None
+        hover = timeline_hover(matriz, rotulo, formatter)
+        
+        # Cores atribuídas pela ordem dos anos (sem limite de anos)
+        cores = year_colors(matriz.index)
         
         # Cria o gráfico
         fig = go.Figure()
         
-        # Para cada ano selecionado
-        for year in selected_years:
-            df_year = df_filtered[df_filtered['ano'] == year]
-            
-            # Agrupa por mês (soma todo faturamento)
-            df_mensal = df_year.groupby('mes')['valorfaturado'].sum().reindex(range(1,13), fill_value=0)
-            
-            # Formata os valores para o hover
-            hover_text = [f"Mês: {mes}<br>Faturamento: {format_currency(valor)}" 
-                         for mes, valor in zip(range(1, 13), df_mensal.values)]
-            
-            # Adiciona linha ao gráfico
+        periodos = list(matriz.columns)
+        for year, valores, hover_text in zip(matriz.index, matriz.to_numpy(), hover):
             fig.add_trace(go.Scatter(
-                x=list(range(1, 13)),
-                y=df_mensal.values,
+                x=periodos,
+                y=valores,
                 name=str(year),
                 line=dict(
-                    color=year_colors.get(year),
+                    color=cores[year],
                     dash='solid'
                 ),
                 hovertext=hover_text,
                 hoverinfo='text'
             ))
         
-        # Configura o layout
-        fig.update_layout(
-            title='Evolução do Faturamento por Ano',
-            xaxis=dict(
-                title='Mês',
-                tickmode='array',
-                ticktext=['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 
-                         'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez'],
-                tickvals=list(range(1, 13))
-            ),
-            yaxis=dict(
+        # Eixo Y: percentual na variação %, milhões nos demais
+        if delta == 'pct':
+            yaxis = dict(title='Variação', ticksuffix='%')
+        else:
+            valores = matriz.to_numpy()
+            maximo = np.nanmax(valores) if valores.size else 0
+            minimo = np.nanmin(valores) if valores.size else 0
+            y_range, y_ticks, ticktext = eixo_milhoes(minimo, maximo)
+            yaxis = dict(
                 title='Faturamento',
-                range=[0, y_max],
+                range=y_range,
                 tickmode='array',
                 tickvals=y_ticks,
-                ticktext=[f'R$ {int(val/1000000)} Milhões' if val > 0 else 'R$ 0' for val in y_ticks],
+                ticktext=ticktext
+            )
+        
+        if grain == 'month':
+            xaxis = dict(title='Mês', tickmode='array', ticktext=MESES, tickvals=list(range(1, 13)))
+        else:
+            xaxis = dict(title=GRAIN_LABELS[grain])
+        
+        # Configura o layout
+        fig.update_layout(
+            title=titulo,
+            xaxis=xaxis,
+            yaxis=dict(
+                **yaxis,
                 tickfont=dict(
                     color='white',
                     size=12
@@ -163,10 +170,11 @@ if __name__ == "__main__":
     df = load_data()
     
     if df is not None:
-        # Para teste, usando todos os anos disponíveis
-        available_years = sorted(df['data'].dt.year.unique(), reverse=True)[-5:]
+        # Todos os anos com dados (a matriz não tem limite de anos)
+        available_years = sorted(df['data'].dt.year.unique())
+        variante = st.radio('Visualização', list(VARIANTES), horizontal=True)
         
-        fig = create_timeline(df, available_years)
+        fig = create_timeline(df, available_years, variante)
         
         if fig:
             st.plotly_chart(
@@ -177,4 +185,4 @@ if __name__ == "__main__":
                     'displaylogo': False,
                     'modeBarButtonsToAdd': ['fullscreen']
                 }
-            ) 
\ No newline at end of file
+            ) 
@@ -1,12 +1,12 @@
 import streamlit as st
 from ...services.api_service import APIService
-from ...services.kpi_service import KPIService
+from ...services.kpi_service import calcular_kpis_producao, kpis_producao_por_ano
 from shared.utils.visualizations.insights_cards import render_metrics_section
+from shared.components.freshness import render_freshness
+from shared.cache.partitions import available_years, select_period
 from .os_status_chart import create_os_status_chart
 from .os_tempo_medio_chart import create_os_tempo_medio_chart
 from .os_gargalos_chart import create_os_gargalos_chart
-import pandas as pd
-from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,47 +30,16 @@ def render_producao():
         """)
     
     try:
-        # Carrega dados uma única vez e mantém em cache
-        @st.cache_data(ttl=3600)
-        def load_initial_data():
-            api_service = APIService()
-            return api_service.get_all_data()
+        # Datasets compartilhados entre as sessões e atualizados em segundo plano
+        api_service = APIService()
+        dataframes = api_service.get_all_data()
+        render_freshness(api_service.freshness().values())
         
-        # Carrega dados iniciais
-        dataframes = load_initial_data()
-        
-        # Prepara todos os dataframes necessários
-        df_os = dataframes['os'].copy()
-        df_orcamento = dataframes['orcamento'].copy()
-        df_faturamento = dataframes['faturamento'].copy()
-        
-        # Converte datas em todos os dataframes
-        df_os['data'] = pd.to_datetime(df_os['data'], format='%Y-%m-%d', errors='coerce')
-        df_orcamento['data'] = pd.to_datetime(df_orcamento['data'], format='%Y-%m-%d', errors='coerce')
-        df_faturamento['data'] = pd.to_datetime(df_faturamento['data'], format='%Y-%m-%d', errors='coerce')
-        
-        # Remove registros sem data
-        df_os = df_os.dropna(subset=['data'])
-        df_orcamento = df_orcamento.dropna(subset=['data'])
-        df_faturamento = df_faturamento.dropna(subset=['data'])
-        
-        # Calcula o intervalo dos últimos 5 anos
-        ano_atual = datetime.now().year
-        data_inicial = datetime(ano_atual - 4, 1, 1)
-        
-        # Adiciona coluna de ano em todos os dataframes
-        df_os['ano'] = df_os['data'].dt.year
-        df_orcamento['ano'] = df_orcamento['data'].dt.year
-        df_faturamento['ano'] = df_faturamento['data'].dt.year
-        
-        # Filtra os dados para os últimos 5 anos
-        df_os_filtrado = df_os[df_os['data'] >= data_inicial].copy()
-        df_orcamento_filtrado = df_orcamento[df_orcamento['data'] >= data_inicial].copy()
-        df_faturamento_filtrado = df_faturamento[df_faturamento['data'] >= data_inicial].copy()
-        
-        # Expander com filtros
+        # Datas já convertidas pelo esquema das views, que ordena as linhas por data:
+        # os anos vêm das partições e o filtro resulta em fatias, sem cópias
+        anos_selecionados = []
         with st.expander("🔍 Filtros de Análise"):
-            anos_disponiveis = sorted(df_os_filtrado['ano'].unique())
+            anos_disponiveis = available_years(dataframes['os'], 'data')
             if anos_disponiveis:
                 opcoes_anos = ['Todos'] + [str(ano) for ano in anos_disponiveis]
                 anos_selecionados = st.multiselect(
@@ -88,20 +57,11 @@ def render_producao():
             else:
                 anos_numericos = [int(ano) for ano in anos_selecionados]
             
-            df_os_filtrado = df_os_filtrado[df_os_filtrado['ano'].isin(anos_numericos)]
-            df_orcamento_filtrado = df_orcamento_filtrado[df_orcamento_filtrado['ano'].isin(anos_numericos)]
-            df_faturamento_filtrado = df_faturamento_filtrado[df_faturamento_filtrado['ano'].isin(anos_numericos)]
+            df_os_filtrado = select_period(dataframes['os'], 'data', anos=anos_numericos)
             
-            # Atualiza todos os dataframes filtrados
-            dataframes_filtrados = {
-                'os': df_os_filtrado,
-                'orcamento': df_orcamento_filtrado,
-                'faturamento': df_faturamento_filtrado
-            }
-            
-            # Calcula KPIs com os dados filtrados
-            kpi_service = KPIService(dataframes_filtrados)
-            kpis = kpi_service.calcular_kpis_producao()
+            # KPIs dos anos selecionados, a partir do índice de produção montado
+            # uma vez por versão dos datasets (recebe as referências completas)
+            kpis = calcular_kpis_producao(dataframes, anos_numericos)
             
             # Renderiza cards de métricas
             metrics = {
@@ -148,6 +108,20 @@ def render_producao():
             
             render_metrics_section("Indicadores de Produção", metrics, columns=5)
             
+            if len(anos_numericos) > 1:
+                with st.expander("📅 Indicadores por ano"):
+                    por_ano = kpis_producao_por_ano(dataframes, anos_numericos)
+                    st.dataframe(
+                        por_ano.rename(columns={
+                            'taxa_conversao': 'Taxa de Aprovação (%)',
+                            'tempo_medio_orc_os': 'Orç → OS (dias)',
+                            'tempo_medio_os_fat': 'OS → Fat (dias)',
+                            'valor_medio_aprovados': 'Valor Médio Aprovados',
+                            'perc_faturamento_os': '% Faturamento via OS',
+                        }).round(1),
+                        use_container_width=True
+                    )
+            
             # Cria e exibe o gráfico de status
             st.markdown("### Status das Ordens de Serviço")
             fig_status = create_os_status_chart(df_os_filtrado)
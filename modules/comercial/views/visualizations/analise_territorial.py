@@ -3,9 +3,11 @@ Dashboard de Análise Territorial
 """
 import streamlit as st
 import logging
-import pandas as pd
 from modules.comercial.services import comercial_service, ComercialAPIService
+from modules.comercial.services.aggregates import resumo_territorial
+from modules.comercial.services.territorial import agregado_territorial
 from shared.components.filters import DateFilters
+from shared.cache.partitions import available_years, select_period
 from shared.utils.visualizations.insights_cards import render_metrics_section
 from .territory_map import create_territory_map
 from .region_ranking import create_region_ranking
@@ -26,7 +28,7 @@ def render_analise_territorial():
         api_service = ComercialAPIService()
         logger.debug("ComercialAPIService instanciado")
         
-        df = api_service.get_data("CUBO_FATURAMENTO")
+        df = api_service.get_dataset("CUBO_FATURAMENTO")
         logger.debug(f"Dados recebidos. DataFrame vazio? {df.empty}")
         
         if df.empty:
@@ -49,34 +51,35 @@ def render_analise_territorial():
         TOTAL_ESTADOS_BR = 27
         TOTAL_PAISES_MUNDO = 195
         
-        # Configuração das métricas para os cards
+        # Configuração das métricas para os cards (agregado compartilhado entre sessões)
+        resumo = resumo_territorial(df)
         metrics = {
             'total_clientes': {
                 'title': 'Total de Clientes',
-                'value': df['codcli'].nunique(),
+                'value': resumo['total_clientes'],
                 'formatter': 'number',
                 'delta': 15.5,  # percentual de crescimento
                 'help_text': 'Número total de clientes únicos atendidos no período'
             },
             'estados_atendidos': {
                 'title': 'Estados Atendidos',
-                'value': df[df['uf'] != 'EX']['uf'].nunique(),
+                'value': resumo['estados_atendidos'],
                 'formatter': 'number',
-                'delta': round((df[df['uf'] != 'EX']['uf'].nunique() / TOTAL_ESTADOS_BR * 100), 1),
+                'delta': round((resumo['estados_atendidos'] / TOTAL_ESTADOS_BR * 100), 1),
                 'help_text': 'Número e percentual de estados brasileiros com clientes ativos'
             },
             'paises_atendidos': {
                 'title': 'Países Atendidos',
-                'value': df[df['uf'] == 'EX']['pais'].nunique(),
+                'value': resumo['paises_atendidos'],
                 'formatter': 'number',
-                'delta': round((df[df['uf'] == 'EX']['pais'].nunique() / TOTAL_PAISES_MUNDO * 100), 1),
+                'delta': round((resumo['paises_atendidos'] / TOTAL_PAISES_MUNDO * 100), 1),
                 'help_text': 'Número e percentual de países estrangeiros com clientes ativos'
             },
             'clientes_externos': {
                 'title': 'Clientes Externos',
-                'value': df[df['uf'] == 'EX']['codcli'].nunique(),
+                'value': resumo['clientes_externos'],
                 'formatter': 'number',
-                'delta': round((df[df['uf'] == 'EX']['codcli'].nunique() / df['codcli'].nunique() * 100), 1),
+                'delta': round((resumo['clientes_externos'] / resumo['total_clientes'] * 100), 1),
                 'help_text': 'Número e percentual de clientes em outros países'
             }
         }
@@ -85,17 +88,22 @@ def render_analise_territorial():
         render_metrics_section('', metrics, columns=4)
         
         # Filtros após as métricas
+        anos_selecionados = None
+        df_completo = df
         with st.expander("🔍 Filtros de Análise"):
             if 'emissao' in df.columns:
-                df['emissao'] = pd.to_datetime(df['emissao'])
-                df['ano'] = df['emissao'].dt.year
-                
-                anos_disponiveis = sorted(df['ano'].unique())
+                anos_disponiveis = available_years(df, 'emissao')
                 if anos_disponiveis:
-                    anos_selecionados = DateFilters.year_filter("analise_territorial")
+                    anos_selecionados = DateFilters.year_filter("analise_territorial", anos_disponiveis)
                     
                     if anos_selecionados and len(anos_selecionados) > 0:
-                        df = df[df['ano'].isin(anos_selecionados)]
+                        df = select_period(df, 'emissao', anos=anos_selecionados)
+                    else:
+                        anos_selecionados = None
+        
+        # Agregado por local do período, compartilhado pelo mapa, ranking,
+        # distribuição de clientes e vendas por região (recebe o dataset completo)
+        locais = agregado_territorial(df_completo, anos_selecionados).locations
         
         # Separador visual
         st.markdown("---")
@@ -105,7 +113,7 @@ def render_analise_territorial():
         
         with col_map:
             try:
-                territory_map = create_territory_map(df)
+                territory_map = create_territory_map(locais)
                 if territory_map:
                     st.plotly_chart(territory_map, use_container_width=True)
                 else:
@@ -116,7 +124,7 @@ def render_analise_territorial():
         
         with col_rank:
             try:
-                region_ranking = create_region_ranking(df)
+                region_ranking = create_region_ranking(locais)
                 if region_ranking:
                     st.plotly_chart(region_ranking, use_container_width=True)
                 else:
@@ -128,7 +136,7 @@ def render_analise_territorial():
         # Adiciona o novo gráfico de distribuição de clientes
         st.markdown("---")  # Separador visual
         try:
-            client_dist = create_client_distribution(df)
+            client_dist = create_client_distribution(locais)
             if client_dist:
                 st.plotly_chart(client_dist, use_container_width=True)
             else:
@@ -140,7 +148,7 @@ def render_analise_territorial():
         # Após o último gráfico existente, adicionamos apenas:
         st.markdown("---")  # Separador visual
         try:
-            vendas_regiao = VendasPorRegiao.create_sales_region_chart(df)
+            vendas_regiao = VendasPorRegiao.create_sales_region_chart(locais)
             if vendas_regiao:
                 st.plotly_chart(vendas_regiao, use_container_width=True)
             else:
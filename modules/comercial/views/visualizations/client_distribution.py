@@ -7,29 +7,22 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def create_client_distribution(df: pd.DataFrame) -> go.Figure:
-    """Cria o gráfico de distribuição de clientes por região"""
+def create_client_distribution(locais: pd.DataFrame) -> go.Figure:
+    """
+    Cria o gráfico de distribuição de clientes por região
+
+    Args:
+        locais: Locais do agregado territorial (agregado_territorial(...).locations)
+    """
     try:
-        # Cria cópia do DataFrame
-        df_clientes = df.copy()
-        
-        # Separa clientes internos e externos
-        df_interno = df_clientes[df_clientes['uf'] != 'EX'].groupby('uf')['codcli'].nunique().reset_index()
-        df_interno['tipo'] = 'INTERNO'
-        
-        df_externo = df_clientes[df_clientes['uf'] == 'EX'].groupby('pais')['codcli'].nunique().reset_index()
-        df_externo['tipo'] = 'EXTERNO'
-        df_externo['uf'] = df_externo['pais']
-        
-        # Combina os DataFrames
-        distribution_data = pd.concat([df_interno, df_externo])
-        
-        # Ordena e pega top 10
-        distribution_data = distribution_data.nlargest(10, 'codcli')
+        # Top 10 por número de clientes
+        distribution_data = locais.nlargest(10, 'clientes')
         
         # Calcula percentuais
-        total_clientes = distribution_data['codcli'].sum()
-        distribution_data['percentual'] = (distribution_data['codcli'] / total_clientes * 100).round(1)
+        total_clientes = distribution_data['clientes'].sum()
+        percentual = (distribution_data['clientes'] / total_clientes * 100).round(1)
+        textos = (distribution_data['clientes'].astype(int).astype(str) + ' clientes ('
+                  + percentual.astype(str) + '%)')
         
         # Cria gráfico
         fig = go.Figure()
@@ -39,19 +32,16 @@ def create_client_distribution(df: pd.DataFrame) -> go.Figure:
         
         # Adiciona barras para cada tipo
         for tipo in ['INTERNO', 'EXTERNO']:
-            df_tipo = distribution_data[distribution_data['tipo'] == tipo]
+            do_tipo = (distribution_data['tipo_venda'] == tipo).to_numpy()
             
-            if not df_tipo.empty:
+            if do_tipo.any():
                 fig.add_trace(go.Bar(
-                    x=df_tipo['codcli'],
-                    y=df_tipo['uf'],
+                    x=distribution_data['clientes'][do_tipo],
+                    y=distribution_data['local'][do_tipo],
                     orientation='h',
                     name=tipo,
                     marker_color=colors[tipo],
-                    text=df_tipo.apply(
-                        lambda x: f"{int(x['codcli'])} clientes ({x['percentual']}%)",
-                        axis=1
-                    ),
+                    text=textos[do_tipo],
                     textposition='auto',
                     hoverinfo='text'
                 ))
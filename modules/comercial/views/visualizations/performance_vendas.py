@@ -5,6 +5,7 @@ import streamlit as st
 import pandas as pd
 import logging
 from datetime import datetime
+from typing import List, Optional
 from shared.utils.cursor_rules import CursorRules
 from shared.components.layouts import DashboardLayout
 from shared.components.filters import DateFilters
@@ -15,8 +16,13 @@ import locale
 import calendar
 from modules.comercial.components import TendenciaVendas
 from modules.comercial.services import comercial_service
+from shared.cache.partitions import available_years, select_period
+from modules.comercial.services.rollups import consultar_faturamento
 import plotly.graph_objects as go
 from shared.utils.formatters import format_currency, format_number
+from shared.utils.cache_manager import cache_data
+from shared.cache.figure_cache import cached_figure
+from shared.components.freshness import render_freshness
 
 logger = logging.getLogger(__name__)
 
@@ -29,12 +35,8 @@ def calcular_meta_anual(df: pd.DataFrame, percentual_aumento: float) -> float:
     """Calcula meta anual baseada no faturamento total do ano anterior + percentual"""
     ano_atual = datetime.now().year
     
-    # Extrai ano da data de emissão
-    df = df.copy()
-    df['ano'] = pd.to_datetime(df['emissao']).dt.year
-    
-    # Filtra ano anterior
-    df_ano_anterior = df[df['ano'] == ano_atual - 1]
+    # Filtra ano anterior (fatia da partição do ano)
+    df_ano_anterior = select_period(df, 'emissao', anos=[ano_atual - 1])
     
     if df_ano_anterior.empty:
         return 0
@@ -47,20 +49,16 @@ def formatar_valor_br(valor: float) -> str:
     """Formata valor monetário no padrão brasileiro"""
     return locale.currency(valor, grouping=True, symbol='R$')
 
+@cache_data(ttl_seconds=3600)
 def prepare_data_for_chart(df: pd.DataFrame, meta_percentual: float) -> pd.DataFrame:
     """
     Prepara dados para o gráfico de vendas vs meta
     """
     try:
-        df = df.copy()
         ano_atual = datetime.now().year
         
         if 'emissao' not in df.columns:
             return pd.DataFrame()
-            
-        df['emissao'] = pd.to_datetime(df['emissao'])
-        df['ano'] = df['emissao'].dt.year
-        df['mes'] = df['emissao'].dt.month
         
         # Cria DataFrame base com todos os meses de 2025
         meses = {
@@ -72,16 +70,19 @@ def prepare_data_for_chart(df: pd.DataFrame, meta_percentual: float) -> pd.DataF
         df_mensal = pd.DataFrame({'mes': range(1, 13)})
         df_mensal['Mês'] = df_mensal['mes'].map(meses)
         
-        # Pega vendas de 2025 (se houver)
-        vendas_2025 = df[df['ano'] == ano_atual].groupby('mes')['valorfaturado'].sum().reset_index()
+        # Pega vendas do ano atual (se houver), do cubo de agregados
+        vendas_ano = consultar_faturamento(df, ['mes'], where={'ano': ano_atual}, measures=['valorfaturado'])
+        vendas_ano['mes'] = vendas_ano['mes'].astype(int)
         
         # Merge com vendas (preenchendo zeros onde não há vendas)
-        df_mensal = df_mensal.merge(vendas_2025, on='mes', how='left')
+        df_mensal = df_mensal.merge(vendas_ano, on='mes', how='left')
         df_mensal['Vendas'] = df_mensal['valorfaturado'].fillna(0)
         
-        # Calcula meta baseada em 2024
+        # Calcula meta baseada no ano anterior
         ano_anterior = ano_atual - 1
-        faturamento_ano_anterior = df[df['ano'] == ano_anterior]['valorfaturado'].sum()
+        faturamento_ano_anterior = consultar_faturamento(
+            df, where={'ano': ano_anterior}, measures=['valorfaturado']
+        )['valorfaturado'].sum()
         
         if faturamento_ano_anterior > 0:
             meta_mensal = (faturamento_ano_anterior * (1 + meta_percentual/100)) / 12
@@ -95,6 +96,14 @@ def prepare_data_for_chart(df: pd.DataFrame, meta_percentual: float) -> pd.DataF
     except Exception as e:
         return pd.DataFrame()
 
+@cached_figure()
+def grafico_tendencia(df: pd.DataFrame, anos: List[int]) -> Optional[go.Figure]:
+    """Gráfico de tendência de vendas dos anos selecionados (todos, se vazio)"""
+    if anos:
+        df = select_period(df, 'emissao', anos=anos)
+        logger.debug(f"Dados filtrados por anos: {df.shape[0]} registros restantes")
+    return TendenciaVendas.create_trend_chart(df.copy())
+
 def render_performance():
     """Renderiza o dashboard de Performance de Vendas"""
     try:
@@ -104,7 +113,8 @@ def render_performance():
         
         # Carrega dados especificando a view correta
         api_service = ComercialAPIService()
-        df_vendas = api_service.get_data("CUBO_FATURAMENTO")  # Especifica a view
+        df_vendas = api_service.get_dataset("CUBO_FATURAMENTO")  # Especifica a view
+        render_freshness([api_service.freshness("CUBO_FATURAMENTO")])
         
         if df_vendas is None or df_vendas.empty:
             st.error("""
@@ -152,29 +162,23 @@ def render_performance():
         st.markdown("---")
 
         # Prepara dados para filtro de ano
+        # (df_vendas não é alterado: intacto, o cache de figuras o identifica pela versão do dataset)
+        anos_selecionados = []
         if 'emissao' in df_vendas.columns:
-            df_vendas['emissao'] = pd.to_datetime(df_vendas['emissao'])
-            df_vendas['ano'] = df_vendas['emissao'].dt.year
-            
             # Adiciona filtro de anos logo após o carregamento dos dados
             with st.expander("🔍 Filtros de Análise"):
-                anos_disponiveis = sorted(df_vendas['ano'].unique())
+                anos_disponiveis = available_years(df_vendas, 'emissao')
                 if anos_disponiveis:
-                    anos_selecionados = DateFilters.year_filter("performance_vendas")
+                    anos_selecionados = DateFilters.year_filter("performance_vendas", anos_disponiveis)
                     logger.debug(f"Anos disponíveis: {anos_disponiveis}")
                     logger.debug(f"Anos selecionados: {anos_selecionados}")
-                    
-                    # Aplica filtro apenas se houver anos selecionados
-                    if anos_selecionados and len(anos_selecionados) > 0:
-                        df_vendas = df_vendas[df_vendas['ano'].isin(anos_selecionados)]
-                        logger.debug(f"Dados filtrados por anos: {df_vendas.shape[0]} registros restantes")
 
         try:
             # Renderiza o texto de ajuda
             TendenciaVendas.render_help_text(st)
 
             # Renderiza o gráfico
-            tendencia = TendenciaVendas.create_trend_chart(df_vendas)
+            tendencia = grafico_tendencia(df_vendas, anos_selecionados)
             if tendencia:
                 st.plotly_chart(tendencia, use_container_width=True)
             else:
@@ -192,7 +196,7 @@ def render_performance_vendas():
     st.title("Performance de Vendas")
     
     # Carrega dados
-    df = comercial_service.get_data()
+    df = comercial_service.get_dataset("CUBO_FATURAMENTO")
     if df is None:
         st.error('Não foi possível carregar os dados.')
         return
@@ -200,23 +204,20 @@ def render_performance_vendas():
     try:
         # Prepara dados para filtro de ano
         if 'emissao' in df.columns:
-            df['emissao'] = pd.to_datetime(df['emissao'])
-            df['ano'] = df['emissao'].dt.year
-            
-            # Cria uma cópia do DataFrame original para o gráfico de Vendas vs Meta
-            df_vendas_meta = df.copy()
+            # DataFrame original (sem filtro) para o gráfico de Vendas vs Meta
+            df_vendas_meta = df
             
             # Adiciona filtro de anos logo após o carregamento dos dados
             with st.expander("🔍 Filtros de Análise"):
-                anos_disponiveis = sorted(df['ano'].unique())
+                anos_disponiveis = available_years(df, 'emissao')
                 if anos_disponiveis:
-                    anos_selecionados = DateFilters.year_filter("performance_vendas")
+                    anos_selecionados = DateFilters.year_filter("performance_vendas", anos_disponiveis)
                     logger.debug(f"Anos disponíveis: {anos_disponiveis}")
                     logger.debug(f"Anos selecionados: {anos_selecionados}")
                     
                     # Aplica filtro apenas se houver anos selecionados
                     if anos_selecionados and len(anos_selecionados) > 0:
-                        df = df[df['ano'].isin(anos_selecionados)]
+                        df = select_period(df, 'emissao', anos=anos_selecionados)
                         logger.debug(f"Dados filtrados por anos: {df.shape[0]} registros restantes")
         
         # Título da seção de meta
@@ -251,7 +252,7 @@ def render_performance_vendas():
             TendenciaVendas.render_help_text(st)
 
             # Renderiza o gráfico
-            tendencia = TendenciaVendas.create_trend_chart(df)
+            tendencia = TendenciaVendas.create_trend_chart(df.copy())
             if tendencia:
                 st.plotly_chart(tendencia, use_container_width=True)
             else:
@@ -269,7 +270,6 @@ def create_trend_chart(df: pd.DataFrame) -> go.Figure:
     try:
         # Prepara os dados
         df = df.copy()
-        df['emissao'] = pd.to_datetime(df['emissao'])
         df = df.sort_values('emissao')
         
         # Calcula o valor máximo para ajustar a escala
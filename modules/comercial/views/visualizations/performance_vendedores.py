@@ -2,9 +2,10 @@
 Dashboard de Performance de Vendedores
 """
 import streamlit as st
-import pandas as pd
 import logging
 from modules.comercial.services import comercial_service
+from modules.comercial.services.aggregates import resumo_vendas
+from shared.cache.partitions import available_years, select_period
 from shared.components.filters import DateFilters
 from modules.comercial.components.evolucao_individual import criar_evolucao_individual
 from modules.comercial.components.mix_produtos_vendedor import criar_mix_produtos_vendedor
@@ -20,30 +21,31 @@ def render_performance_vendedores():
         st.title("🎯 Performance de Vendedores")
         
         # Carrega dados primeiro
-        df = comercial_service.get_data()
+        df = comercial_service.get_dataset("CUBO_FATURAMENTO")
         if df is None or df.empty:
             logger.error("Dados não carregados em Performance de Vendedores")
             st.error('Não foi possível carregar os dados.')
             return
         
-        # Configuração das métricas para os cards
+        # Configuração das métricas para os cards (agregado compartilhado entre sessões)
+        resumo = resumo_vendas(df)
         metrics = {
             'faturamento_total': {
                 'title': '💰 Faturamento Total',
-                'value': df['valorfaturado'].sum(),
+                'value': resumo['faturamento_total'],
                 'formatter': 'currency',
                 'help_text': 'Valor total faturado no período',
                 'positive_is_good': True
             },
             'total_vendedores': {
                 'title': '👥 Total de Vendedores',
-                'value': len(df['vendedor'].unique()),
+                'value': resumo['total_vendedores'],
                 'formatter': 'number',
                 'help_text': 'Número de vendedores ativos no período'
             },
             'ticket_medio': {
                 'title': '🎫 Ticket Médio',
-                'value': df['valorfaturado'].sum() / len(df['nota'].unique()),
+                'value': resumo['ticket_medio'],
                 'formatter': 'currency',
                 'help_text': 'Valor médio por venda no período',
                 'positive_is_good': True
@@ -53,18 +55,18 @@ def render_performance_vendedores():
         # Renderiza os cards de métricas
         render_metrics_section('', metrics, columns=3)
         
-        # Filtros após as métricas
+        # Filtros após as métricas. O dataset completo (df_vendas) segue para os
+        # gráficos que leem o cubo de agregados; df recebe o filtro por ano
+        df_vendas = df
+        anos_selecionados = None
         with st.expander("🔍 Filtros de Análise"):
             if 'emissao' in df.columns:
-                df['emissao'] = pd.to_datetime(df['emissao'])
-                df['ano'] = df['emissao'].dt.year
-                
-                anos_disponiveis = sorted(df['ano'].unique())
+                anos_disponiveis = available_years(df_vendas, 'emissao')
                 if anos_disponiveis:
-                    anos_selecionados = DateFilters.year_filter("performance_vendedores")
+                    anos_selecionados = DateFilters.year_filter("performance_vendedores", anos_disponiveis)
                     
                     if anos_selecionados and len(anos_selecionados) > 0:
-                        df = df[df['ano'].isin(anos_selecionados)]
+                        df = select_period(df_vendas, 'emissao', anos=anos_selecionados)
         
         if not df.empty:
             # Debug: Verifica se chegou na renderização dos cards
@@ -86,7 +88,7 @@ def render_performance_vendedores():
                     elevado tendem a ser mais eficientes em relacionamento e negociação.
                 """)
             
-            fig_conversao = criar_analise_conversao_vendedor(df)
+            fig_conversao = criar_analise_conversao_vendedor(df_vendas, anos_selecionados)
             if fig_conversao:
                 st.plotly_chart(fig_conversao, use_container_width=True)
             else:
@@ -111,7 +113,7 @@ def render_performance_vendedores():
                         de cada vendedor.
                     """)
                 
-                fig_evolucao = criar_evolucao_individual(df)
+                fig_evolucao = criar_evolucao_individual(df_vendas, anos_selecionados)
                 if fig_evolucao:
                     st.plotly_chart(fig_evolucao, use_container_width=True)
                 else:
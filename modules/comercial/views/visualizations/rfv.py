@@ -6,10 +6,12 @@ import pandas as pd
 import logging
 from modules.comercial.services import comercial_service
 from shared.components.filters import DateFilters
+from modules.comercial.services.rfv import rfv_state
 from modules.comercial.components.grafico_recencia import criar_grafico_recencia
 from modules.comercial.components.grafico_frequencia import criar_grafico_frequencia
 from modules.comercial.components.grafico_valor import criar_grafico_valor
 from shared.utils.visualizations.insights_cards import render_metrics_section
+from shared.utils.formatters import format_currency
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -19,9 +21,11 @@ def render_rfv():
     try:
         st.title("💎 Análise RFV")
         
-        # Filtros de data
+        # Filtros de data (anos com compras, do estado RFV da versão do dataset)
+        faturamento = comercial_service.get_dataset("CUBO_FATURAMENTO")
+        anos_disponiveis = rfv_state(faturamento).years if not faturamento.empty else []
         date_filters = DateFilters()
-        anos_selecionados = date_filters.year_filter(key_suffix="rfv")
+        anos_selecionados = date_filters.year_filter(key_suffix="rfv", years=anos_disponiveis or None)
         
         # Carrega os dados usando a instância global
         df = comercial_service.get_dados_rfv(anos_selecionados)
@@ -90,6 +94,16 @@ def render_rfv():
             with col2:
                 st.subheader("Análise de Valor")
                 criar_grafico_valor(df)
+            
+            # Segmentos pelas notas de recência, frequência e valor
+            if 'segmento' in df.columns:
+                st.markdown("---")
+                st.subheader("Segmentos de Clientes")
+                segmentos = (df.groupby('segmento', observed=True)
+                             .agg(Clientes=('cliente_id', 'size'), Valor=('valor', 'sum'))
+                             .sort_values('Valor', ascending=False))
+                segmentos['Valor'] = segmentos['Valor'].map(format_currency)
+                st.dataframe(segmentos, use_container_width=True)
         else:
             st.warning("Nenhum dado encontrado para o período selecionado.")
             
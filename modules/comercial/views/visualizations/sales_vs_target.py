@@ -6,6 +6,7 @@ import pandas as pd
 import logging
 from typing import List
 from shared.utils.formatters import format_currency, format_number
+from shared.cache.figure_cache import cached_figure
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +21,7 @@ def criar_valores_eixo(max_valor: float) -> List[float]:
     valores = [i * step for i in range(0, int((max_valor * 1.2) / step) + 1)]
     return valores
 
+@cached_figure()
 def create_sales_vs_target_chart(df: pd.DataFrame) -> go.Figure:
     """Cria gráfico de vendas vs meta"""
     try:
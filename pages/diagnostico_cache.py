@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+# Força desabilitar sistema de páginas
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from setup_pages import disable_pages
+disable_pages()
+
+import streamlit as st
+import logging
+from core.auth.permissions import permission_manager
+from shared.components.cache_diagnostics import render_cache_diagnostics
+# Importados para que as camadas de disco e HTTP se registrem nas estatísticas
+import shared.cache.cache_manager  # noqa: F401
+import modules.comercial.services.api_service  # noqa: F401
+
+logger = logging.getLogger('streamlit_app')
+
+def load_diagnostico_cache():
+    # Configuração DEVE ser a primeira chamada Streamlit
+    st.set_page_config(
+        page_title="Diagnóstico de Cache",
+        layout="wide",
+        initial_sidebar_state="collapsed",
+        menu_items={}
+    )
+
+    username = st.session_state.get('username')
+    if not st.session_state.get('authentication_status') or not permission_manager.is_admin(username):
+        logger.warning(f"Acesso negado ao diagnóstico de cache: {username}")
+        st.error("🔒 Acesso restrito a administradores")
+        st.stop()
+
+    render_cache_diagnostics()
+
+if __name__ == "__main__":
+    load_diagnostico_cache()
@@ -1,65 +1,267 @@
 """
-Gerenciador de cache para otimização de requisições
+Gerenciador de cache em disco para otimização de requisições
+
+DataFrames são gravados em Parquet ou Arrow IPC comprimidos; outros conteúdos
+em JSON. Os metadados (validade, tamanho, último acesso) ficam em um índice
+separado, de modo que uma consulta não precisa abrir o arquivo de dados.
 """
 import os
 import json
-from datetime import datetime, timedelta
-from typing import Optional, Any
+import time
+import hashlib
 import logging
+import threading
+from typing import Any, Dict, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+from shared.cache.stats import age_summary, hit_ratio, register_cache
 
 logger = logging.getLogger(__name__)
 
+FORMATS = ('parquet', 'arrow')
+INDEX_FILE = 'index.json'
+# Intervalo mínimo entre gravações do índice só por causa de acessos (LRU)
+ACCESS_FLUSH_INTERVAL = 30.0
+
+
 class CacheManager:
-    """Gerencia o cache de dados da aplicação"""
-    
-    def __init__(self):
-        self.cache_dir = os.getenv('CACHE_DIR', '.cache')
-        self.cache_duration = timedelta(minutes=30)  # Cache de 30 minutos
-        
+    """
+    Gerencia o cache de dados da aplicação em disco
+
+    - Gravação atômica (arquivo temporário + rename), dados e índice
+    - Validade (TTL) por chave
+    - Orçamento total em bytes com descarte do item usado há mais tempo (LRU)
+    """
+
+    def __init__(self,
+                 cache_dir: Optional[str] = None,
+                 default_ttl: Optional[float] = None,
+                 max_bytes: Optional[int] = None,
+                 frame_format: Optional[str] = None):
+        """
+        Args:
+            cache_dir: Diretório do cache (padrão: CACHE_DIR/disk)
+            default_ttl: Validade padrão em segundos (padrão: CACHE_TTL_SECONDS ou 30 min)
+            max_bytes: Tamanho máximo do cache (padrão: CACHE_MAX_BYTES ou 1 GB)
+            frame_format: 'parquet' ou 'arrow' para DataFrames (padrão: CACHE_FRAME_FORMAT)
+        """
+        self.cache_dir = cache_dir or os.path.join(os.getenv('CACHE_DIR', '.cache'), 'disk')
+        self.default_ttl = float(default_ttl if default_ttl is not None else os.getenv('CACHE_TTL_SECONDS', '1800'))
+        self.max_bytes = int(max_bytes if max_bytes is not None else os.getenv('CACHE_MAX_BYTES', str(1024 ** 3)))
+        self.frame_format = frame_format or os.getenv('CACHE_FRAME_FORMAT', 'parquet')
+        if self.frame_format not in FORMATS:
+            raise ValueError(f"Formato de cache inválido: {self.frame_format}. Use {FORMATS}")
+
+        self._lock = threading.RLock()
+        self._last_flush = 0.0
+        self._dirty = False
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'writes': 0}
+
         # Cria diretório de cache se não existir
-        if not os.path.exists(self.cache_dir):
-            os.makedirs(self.cache_dir)
-    
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index: Dict[str, Dict[str, Any]] = self._load_index()
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.cache_dir, INDEX_FILE)
+
     def get(self, key: str) -> Optional[Any]:
-        """Recupera dados do cache"""
-        try:
-            cache_file = os.path.join(self.cache_dir, f"{key}.json")
-            
-            if not os.path.exists(cache_file):
+        """Recupera dados do cache (None se ausente ou expirado)"""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
                 return None
-                
-            with open(cache_file, 'r') as f:
-                data = json.load(f)
-                
-            # Verifica se o cache expirou
-            cached_time = datetime.fromisoformat(data['timestamp'])
-            if datetime.now() - cached_time > self.cache_duration:
+            if entry['expires'] <= time.time():
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                self._remove(key)
+                self._write_index()
                 return None
-                
-            return data['content']
-            
+
+        try:
+            content = self._read_payload(entry)
         except Exception as e:
-            logger.error(f"Erro ao ler cache: {str(e)}")
+            logger.error(f"Erro ao ler cache {key}: {str(e)}")
+            with self._lock:
+                self.stats['misses'] += 1
+                self._remove(key)
+                self._write_index()
             return None
-    
-    def set(self, key: str, content: Any) -> bool:
-        """Salva dados no cache"""
+
+        with self._lock:
+            self.stats['hits'] += 1
+            if key in self._index:
+                self._index[key]['last_access'] = time.time()
+                self._dirty = True
+                if time.time() - self._last_flush >= ACCESS_FLUSH_INTERVAL:
+                    self._write_index()
+        return content
+
+    def set(self, key: str, content: Any, ttl: Optional[float] = None) -> bool:
+        """
+        Salva dados no cache
+
+        Args:
+            key: Chave
+            content: DataFrame ou conteúdo serializável em JSON
+            ttl: Validade em segundos (padrão: default_ttl)
+        """
         try:
-            cache_file = os.path.join(self.cache_dir, f"{key}.json")
-            
-            data = {
-                'timestamp': datetime.now().isoformat(),
-                'content': content
-            }
-            
-            with open(cache_file, 'w') as f:
-                json.dump(data, f)
-                
+            if isinstance(content, pd.DataFrame):
+                fmt = self.frame_format
+            else:
+                fmt = 'json'
+            path = self._payload_path(key, fmt)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            rows = self._write_payload(tmp, content, fmt)
+            size = os.path.getsize(tmp)
+
+            if size > self.max_bytes:
+                os.remove(tmp)
+                logger.warning(f"Cache {key} ({size} bytes) maior que o limite de {self.max_bytes} bytes")
+                return False
+
+            agora = time.time()
+            with self._lock:
+                anterior = self._index.get(key)
+                if anterior is not None and anterior['file'] != os.path.basename(path):
+                    self._remove(key)
+                os.replace(tmp, path)
+                self._index[key] = {
+                    'file': os.path.basename(path),
+                    'format': fmt,
+                    'bytes': size,
+                    'rows': rows,
+                    'created': agora,
+                    'expires': agora + (self.default_ttl if ttl is None else ttl),
+                    'last_access': agora
+                }
+                self.stats['writes'] += 1
+                self._evict(protect=key)
+                self._write_index()
             return True
-            
+
         except Exception as e:
             logger.error(f"Erro ao salvar cache: {str(e)}")
             return False
 
+    def delete(self, key: str) -> None:
+        """Remove uma chave do cache"""
+        with self._lock:
+            if key in self._index:
+                self._remove(key)
+                self._write_index()
+
+    def clear(self) -> None:
+        """Remove todas as chaves"""
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+            self._write_index()
+
+    def flush(self) -> None:
+        """Grava no índice os últimos acessos ainda pendentes"""
+        with self._lock:
+            if self._dirty:
+                self._write_index()
+
+    def info(self) -> Dict[str, Any]:
+        """Tamanho, ocupação, contadores e idade das entradas do cache"""
+        with self._lock:
+            total = sum(e['bytes'] for e in self._index.values())
+            return {
+                'entries': len(self._index),
+                'bytes': total,
+                'max_bytes': self.max_bytes,
+                'hit_ratio': hit_ratio(self.stats['hits'], self.stats['misses']),
+                **self.stats,
+                **age_summary(e['created'] for e in self._index.values())
+            }
+
+    def _evict(self, protect: Optional[str] = None) -> None:
+        """Remove expirados e, se preciso, os menos usados até caber no orçamento"""
+        agora = time.time()
+        for key in [k for k, e in self._index.items() if e['expires'] <= agora and k != protect]:
+            self._remove(key)
+            self.stats['expired'] += 1
+
+        total = sum(e['bytes'] for e in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key in sorted(self._index, key=lambda k: self._index[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            if key == protect:
+                continue
+            total -= self._index[key]['bytes']
+            self._remove(key)
+            self.stats['evictions'] += 1
+            logger.debug(f"Cache {key} descartado (LRU)")
+
+    def _remove(self, key: str) -> None:
+        entry = self._index.pop(key, None)
+        if entry is None:
+            return
+        try:
+            os.remove(os.path.join(self.cache_dir, entry['file']))
+        except FileNotFoundError:
+            pass
+
+    def _payload_path(self, key: str, fmt: str) -> str:
+        # Nome derivado da chave: qualquer chave vira um nome de arquivo válido
+        nome = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        extensao = {'parquet': 'parquet', 'arrow': 'arrow', 'json': 'json'}[fmt]
+        return os.path.join(self.cache_dir, f"{nome}.{extensao}")
+
+    def _write_payload(self, path: str, content: Any, fmt: str) -> Optional[int]:
+        if fmt == 'parquet':
+            content.to_parquet(path, compression='zstd')
+            return len(content)
+        if fmt == 'arrow':
+            table = pa.Table.from_pandas(content)
+            options = ipc.IpcWriteOptions(compression='zstd')
+            with pa.OSFile(path, 'wb') as sink, ipc.new_file(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
+            return len(content)
+        with open(path, 'w') as f:
+            json.dump(content, f)
+        return None
+
+    def _read_payload(self, entry: Dict[str, Any]) -> Any:
+        path = os.path.join(self.cache_dir, entry['file'])
+        if entry['format'] == 'parquet':
+            return pd.read_parquet(path)
+        if entry['format'] == 'arrow':
+            with pa.memory_map(path, 'r') as source:
+                return ipc.open_file(source).read_all().to_pandas()
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """Carrega o índice, descartando entradas sem arquivo"""
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.error(f"Índice do cache ilegível, recomeçando: {str(e)}")
+            return {}
+        return {
+            key: entry for key, entry in index.items()
+            if os.path.exists(os.path.join(self.cache_dir, entry.get('file', '')))
+        }
+
+    def _write_index(self) -> None:
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self.index_path)
+        self._last_flush = time.time()
+        self._dirty = False
+
 # Instância global do cache
-cache_manager = CacheManager() 
\ No newline at end of file
+cache_manager = CacheManager()
+register_cache('disk', cache_manager.info)
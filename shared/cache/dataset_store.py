@@ -0,0 +1,374 @@
+"""
+Armazenamento compartilhado de datasets entre sessões do Streamlit
+"""
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import pandas as pd
+from shared.cache.stats import age_summary, hit_ratio, register_cache
+
+logger = logging.getLogger(__name__)
+
+DatasetKey = Tuple[str, str]  # (tenant, view)
+
+# Atributo (df.attrs) com as versões dos datasets de origem: {'tenant/view': versão}.
+# O pandas o propaga para filtros, cópias e novas colunas, de modo que recortes
+# de um dataset sabem de onde vieram. Merges e algumas agregações o descartam:
+# o resultado continua correto no cache, pois a chave é o conteúdo, mas só sai
+# por TTL ou LRU.
+LINEAGE_ATTR = 'dataset_versions'
+
+
+def dataset_name(tenant: str, view: str) -> str:
+    """Identificador do dataset usado na linhagem e nas dependências dos caches"""
+    return f"{tenant}/{view}"
+
+
+def lineage(obj: Any) -> Dict[str, int]:
+    """Versões dos datasets de origem de um DataFrame ou Series ({} se desconhecidas)"""
+    attrs = getattr(obj, 'attrs', None)
+    return dict(attrs.get(LINEAGE_ATTR, {})) if attrs else {}
+
+
+def frame_signature(frame: pd.DataFrame) -> Optional[tuple]:
+    """
+    Identifica os buffers de memória das colunas e do índice de um DataFrame
+
+    Cópias rasas compartilham os buffers e têm a mesma assinatura; filtros,
+    ordenações e conversões geram buffers novos. None se alguma coluna não
+    for baseada em numpy.
+    """
+    partes = []
+    for nome, serie in frame.items():
+        dados = getattr(serie.array, '_ndarray', None)
+        if dados is None:
+            return None
+        partes.append((nome, str(serie.dtype), len(dados), dados.__array_interface__['data'][0]))
+
+    indice = frame.index
+    if isinstance(indice, pd.RangeIndex):
+        partes.append(('__index__', indice.start, indice.stop, indice.step))
+    else:
+        dados = getattr(indice.array, '_ndarray', None)
+        if dados is None:
+            return None
+        partes.append(('__index__', str(indice.dtype), len(dados), dados.__array_interface__['data'][0]))
+    return tuple(partes)
+
+
+class _Entry:
+    """Dataset carregado, sua versão e o momento da carga"""
+
+    def __init__(self, frame: pd.DataFrame, version: int):
+        self.frame = frame
+        self.version = version
+        self.loaded_at = time.time()
+        self.signature = frame_signature(frame)
+        self.retry_at = 0.0  # após falha na atualização, não tenta de novo antes disso
+
+
+class _Flight:
+    """Busca em andamento: as requisições concorrentes aguardam o mesmo resultado"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.frame: Optional[pd.DataFrame] = None
+        self.error: Optional[BaseException] = None
+
+
+class DatasetStore:
+    """
+    Mantém um único DataFrame por (tenant, view) para todo o processo.
+
+    Requisições simultâneas da mesma view viram uma única busca no backend
+    (single-flight). Quem lê recebe uma cópia rasa (sem copiar os dados):
+    pode criar ou substituir colunas livremente, mas não deve alterar valores
+    no lugar (df.loc[...] = ...), pois os arrays são compartilhados.
+
+    Cada dataset tem uma versão que só muda quando o conteúdo muda: se o
+    loader devolver o mesmo objeto da carga anterior (resposta inalterada),
+    a versão é mantida e os caches derivados continuam válidos. A versão
+    acompanha o DataFrame em df.attrs (LINEAGE_ATTR) e cada nova versão é
+    avisada aos inscritos (subscribe), que descartam o que dela dependia.
+
+    Passado o intervalo de atualização da view, o último dataset válido
+    continua sendo servido enquanto uma nova busca roda em segundo plano
+    (stale-while-revalidate). Só há busca em primeiro plano na primeira
+    carga, com force=True ou quando o dataset passa de max_stale_seconds.
+    """
+
+    def __init__(self,
+                 ttl_seconds: Optional[float] = None,
+                 max_stale_seconds: Optional[float] = None,
+                 retry_seconds: Optional[float] = None):
+        """
+        Args:
+            ttl_seconds: Intervalo padrão de atualização (padrão: DATASET_TTL_SECONDS ou 30 min)
+            max_stale_seconds: Idade máxima servida sem busca em primeiro plano
+                (padrão: DATASET_MAX_STALE_SECONDS ou 24 h; 0 desativa)
+            retry_seconds: Espera após uma atualização em segundo plano falhar
+                (padrão: DATASET_REFRESH_RETRY_SECONDS ou 60 s)
+        """
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv('DATASET_TTL_SECONDS', '1800'))
+        if max_stale_seconds is None:
+            max_stale_seconds = float(os.getenv('DATASET_MAX_STALE_SECONDS', '86400'))
+        if retry_seconds is None:
+            retry_seconds = float(os.getenv('DATASET_REFRESH_RETRY_SECONDS', '60'))
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.retry_seconds = retry_seconds
+        self._entries: Dict[DatasetKey, _Entry] = {}
+        self._flights: Dict[DatasetKey, _Flight] = {}
+        self._versions: Dict[DatasetKey, int] = {}  # sobrevive à invalidação: versões só crescem
+        self._intervals: Dict[str, float] = {}
+        self._errors: Dict[DatasetKey, str] = {}
+        self._listeners: List[Callable[[str, Optional[int]], Any]] = []
+        self._lock = threading.Lock()
+        # hits: dentro do intervalo; stale: servido vencido enquanto atualiza;
+        # misses: busca em primeiro plano; waits: aguardou a busca de outra sessão
+        self.stats = {'hits': 0, 'stale': 0, 'misses': 0, 'waits': 0,
+                      'refreshes': 0, 'failures': 0, 'invalidated': 0}
+
+    def subscribe(self, listener: Callable[[str, Optional[int]], Any]) -> None:
+        """
+        Registra uma função chamada quando um dataset muda de versão
+
+        A função recebe o nome do dataset ('tenant/view') e a nova versão,
+        ou None se o dataset foi removido (invalidate).
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _notify(self, mudancas: List[Tuple[str, Optional[int]]]) -> None:
+        # Chamado sem self._lock: os caches derivados podem consultar o store
+        with self._lock:
+            listeners = list(self._listeners)
+        for nome, versao in mudancas:
+            for listener in listeners:
+                try:
+                    listener(nome, versao)
+                except Exception as e:
+                    logger.error(f"Erro ao notificar nova versão de {nome}: {str(e)}")
+
+    def set_refresh_interval(self, view: str, seconds: float) -> None:
+        """Define o intervalo de atualização de uma view (todas as tenants)"""
+        with self._lock:
+            self._intervals[view] = float(seconds)
+
+    def refresh_interval(self, view: str) -> float:
+        """Intervalo de atualização da view (padrão: ttl_seconds)"""
+        return self._intervals.get(view, self.ttl_seconds)
+
+    def get(self,
+            tenant: str,
+            view: str,
+            loader: Callable[[], pd.DataFrame],
+            force: bool = False) -> pd.DataFrame:
+        """
+        Retorna o dataset da view, carregando-o se necessário
+
+        Args:
+            tenant: Cliente do backend (ex.: 'TECNOLIFE')
+            view: Nome da view (ex.: 'CUBO_FATURAMENTO')
+            loader: Função que busca o DataFrame no backend
+            force: Ignora o dataset em memória e busca novamente
+
+        Returns:
+            pd.DataFrame: Referência somente leitura ao dataset compartilhado
+        """
+        key = (tenant, view)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not force:
+                idade = time.time() - entry.loaded_at
+                if idade < self.refresh_interval(view):
+                    self.stats['hits'] += 1
+                    return entry.frame.copy(deep=False)
+                if idade < self.max_stale_seconds:
+                    # Serve o último dataset válido e atualiza em segundo plano
+                    self.stats['stale'] += 1
+                    self._start_refresh(key, loader)
+                    return entry.frame.copy(deep=False)
+
+            flight = self._flights.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._flights[key] = _Flight()
+            self.stats['misses' if owner else 'waits'] += 1
+
+        if not owner:
+            logger.debug(f"Aguardando busca em andamento de {view}")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.frame.copy(deep=False)
+
+        return self._load(key, loader, flight).copy(deep=False)
+
+    def revalidate(self, tenant: str, view: str, loader: Callable[[], pd.DataFrame]) -> bool:
+        """
+        Inicia a atualização da view em segundo plano
+
+        Returns:
+            bool: False se já havia busca em andamento ou a última falhou há pouco
+        """
+        with self._lock:
+            return self._start_refresh((tenant, view), loader)
+
+    def _start_refresh(self, key: DatasetKey, loader: Callable[[], pd.DataFrame]) -> bool:
+        # Chamado com self._lock adquirido
+        entry = self._entries.get(key)
+        if key in self._flights or (entry is not None and time.time() < entry.retry_at):
+            return False
+        flight = self._flights[key] = _Flight()
+        self.stats['refreshes'] += 1
+        threading.Thread(
+            target=self._refresh,
+            args=(key, loader, flight),
+            name=f"refresh-{key[0]}-{key[1]}",
+            daemon=True
+        ).start()
+        return True
+
+    def _refresh(self, key: DatasetKey, loader: Callable[[], pd.DataFrame], flight: _Flight) -> None:
+        try:
+            self._load(key, loader, flight)
+        except Exception as e:
+            logger.warning(f"Falha ao atualizar {key[0]}/{key[1]} em segundo plano: {str(e)}")
+
+    def _load(self, key: DatasetKey, loader: Callable[[], pd.DataFrame], flight: _Flight) -> pd.DataFrame:
+        """Executa o loader e guarda o resultado; libera quem aguarda a busca"""
+        tenant, view = key
+        try:
+            frame = loader()
+            if frame is None:
+                frame = pd.DataFrame()
+            nova_versao = None
+            with self._lock:
+                atual = self._entries.get(key)
+                # Falhas (DataFrame vazio) não ficam guardadas: a próxima leitura tenta de novo
+                if frame.empty:
+                    self._failed(key, atual, 'resposta vazia')
+                else:
+                    self._errors.pop(key, None)
+                    if atual is not None and atual.frame is frame:
+                        atual.loaded_at = time.time()
+                    else:
+                        nova_versao = self._versions[key] = self._versions.get(key, 0) + 1
+                        frame.attrs[LINEAGE_ATTR] = {dataset_name(tenant, view): nova_versao}
+                        self._entries[key] = _Entry(frame, nova_versao)
+            flight.frame = frame
+            logger.info(f"Dataset {tenant}/{view} carregado: {len(frame)} registros")
+            if nova_versao is not None:
+                self._notify([(dataset_name(tenant, view), nova_versao)])
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._failed(key, self._entries.get(key), str(e))
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+        return frame
+
+    def _failed(self, key: DatasetKey, entry: Optional[_Entry], erro: str) -> None:
+        # Chamado com self._lock adquirido
+        self._errors[key] = erro
+        self.stats['failures'] += 1
+        if entry is not None:
+            entry.retry_at = time.time() + self.retry_seconds
+
+    def freshness(self, tenant: str, view: str) -> Dict[str, Any]:
+        """
+        Situação do dataset para indicadores de atualização nos dashboards
+
+        Returns:
+            Dict com loaded_at (None se não carregado), age_seconds,
+            refresh_interval, stale, refreshing, last_error e version
+        """
+        key = (tenant, view)
+        with self._lock:
+            entry = self._entries.get(key)
+            intervalo = self.refresh_interval(view)
+            idade = time.time() - entry.loaded_at if entry is not None else None
+            return {
+                'loaded_at': entry.loaded_at if entry is not None else None,
+                'age_seconds': idade,
+                'refresh_interval': intervalo,
+                'stale': idade is not None and idade >= intervalo,
+                'refreshing': key in self._flights,
+                'last_error': self._errors.get(key),
+                'version': entry.version if entry is not None else 0,
+            }
+
+    def version(self, tenant: str, view: str) -> int:
+        """Versão atual do dataset (0 se ainda não carregado)"""
+        with self._lock:
+            entry = self._entries.get((tenant, view))
+            return entry.version if entry is not None else 0
+
+    def fingerprint(self, frame: pd.DataFrame) -> Optional[str]:
+        """
+        Identificador 'tenant/view@vN' se o DataFrame for uma referência
+        intacta (cópia rasa, sem colunas novas) a um dataset em memória
+        """
+        assinatura = frame_signature(frame)
+        if assinatura is None:
+            return None
+        with self._lock:
+            for (tenant, view), entry in self._entries.items():
+                if entry.signature == assinatura:
+                    return f"{tenant}/{view}@v{entry.version}"
+        return None
+
+    def invalidate(self, tenant: Optional[str] = None, view: Optional[str] = None) -> None:
+        """Remove datasets do armazenamento (todos, se nada for informado)"""
+        removidos = []
+        with self._lock:
+            for key in list(self._entries):
+                if (tenant is None or key[0] == tenant) and (view is None or key[1] == view):
+                    del self._entries[key]
+                    removidos.append((dataset_name(*key), None))
+            self.stats['invalidated'] += len(removidos)
+        self._notify(removidos)
+
+    def info(self) -> Dict[DatasetKey, Dict[str, float]]:
+        """Registros, memória e idade de cada dataset em memória"""
+        with self._lock:
+            entries = dict(self._entries)
+        agora = time.time()
+        return {
+            key: {
+                'rows': len(entry.frame),
+                'version': entry.version,
+                'bytes': int(entry.frame.memory_usage(deep=True).sum()),
+                'age_seconds': agora - entry.loaded_at,
+            }
+            for key, entry in entries.items()
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Totais de todos os datasets e contadores de leitura"""
+        datasets = self.info()
+        with self._lock:
+            stats = dict(self.stats)
+        return {
+            'entries': len(datasets),
+            'bytes': sum(d['bytes'] for d in datasets.values()),
+            'rows': sum(d['rows'] for d in datasets.values()),
+            'hit_ratio': hit_ratio(stats['hits'] + stats['stale'], stats['misses'] + stats['waits']),
+            **stats,
+            # Idade desde a última carga, não desde a primeira
+            **age_summary(time.time() - d['age_seconds'] for d in datasets.values()),
+        }
+
+
+# Instância global do armazenamento de datasets
+dataset_store = DatasetStore()
+register_cache('datasets', dataset_store.summary)
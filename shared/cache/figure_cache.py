@@ -0,0 +1,74 @@
+"""
+Cache de figuras Plotly serializadas
+
+Cada figura é guardada como JSON, identificada pela função que a gerou, pela
+versão dos datasets recebidos e pelos parâmetros dos filtros. Em um rerun do
+Streamlit só são refeitos os gráficos cujas entradas mudaram.
+"""
+import os
+import json
+import inspect
+import logging
+from functools import wraps
+from typing import Optional
+import plotly.graph_objects as go
+from shared.cache.dataset_store import dataset_store
+from shared.cache.stats import register_cache
+from shared.utils.cache_manager import MemoryCache, UnhashableArgument, call_key, dependencies
+
+logger = logging.getLogger(__name__)
+
+# Cache próprio, para que figuras grandes não descartem resultados de dados
+figure_cache = MemoryCache(max_bytes=int(os.getenv('FIGURE_CACHE_MAX_BYTES', str(128 * 1024 ** 2))))
+dataset_store.subscribe(figure_cache.invalidate_dataset)
+register_cache('figures', figure_cache.info)
+
+
+def _to_figure(serializada: str) -> go.Figure:
+    # O JSON veio de uma figura já validada: a reconstrução dispensa nova validação
+    return go.Figure(json.loads(serializada), _validate=False)
+
+
+def cached_figure(ttl_seconds: float = 3600, cache: Optional[MemoryCache] = None):
+    """
+    Decorator para funções que retornam go.Figure
+
+    A chave segue as regras do cache_data: DataFrames do dataset_store pela
+    versão do dataset, demais argumentos por hash estável e parâmetros
+    iniciados por "_" fora da chave. Retornos None (erro) não são guardados
+    e a figura sai do cache quando um dataset de origem muda de versão.
+    Cada chamada devolve uma figura nova, que pode ser alterada livremente.
+
+    Args:
+        ttl_seconds: Validade das figuras
+        cache: Cache a usar (padrão: figure_cache)
+    """
+    def decorator(func):
+        nome = f"{func.__module__}.{func.__qualname__}"
+        assinatura = inspect.signature(func)
+        alvo = cache or figure_cache
+
+        def serializar(*args, **kwargs) -> Optional[str]:
+            fig = func(*args, **kwargs)
+            return None if fig is None else fig.to_json()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                chave = call_key(func, assinatura, args, kwargs)
+            except UnhashableArgument as e:
+                logger.debug(f"Figura {func.__qualname__} gerada sem cache: {str(e)}")
+                return func(*args, **kwargs)
+
+            serializada = alvo.get_or_compute(chave, nome, ttl_seconds, lambda: serializar(*args, **kwargs),
+                                              deps=dependencies((args, kwargs)))
+            return None if serializada is None else _to_figure(serializada)
+
+        wrapper.clear = lambda: alvo.invalidate(nome)
+        return wrapper
+    return decorator
+
+
+def clear_figures() -> int:
+    """Descarta todas as figuras em cache"""
+    return figure_cache.invalidate()
@@ -0,0 +1,252 @@
+"""
+Partições por ano e mês dos datasets ordenados por data
+
+Os esquemas das views ordenam as linhas pela coluna de data na ingestão
+(ViewSchema.partition_by, datas nulas no fim). Com as linhas em ordem, cada
+ano e cada mês ocupa um intervalo contínuo de posições: o PartitionIndex
+guarda o início de cada mês e qualquer período (anos, meses de cada ano ou
+intervalo de datas) vira um ou mais df.iloc[inicio:fim], sem varrer nem
+copiar o dataset. Seleções contínuas (um ano, anos seguidos, "Todos", um
+intervalo de datas) retornam uma fatia sem cópia.
+
+    anos = available_years(df, 'emissao')
+    df_periodo = select_period(df, 'emissao', anos=[2023, 2024])
+    df_trimestre = select_period(df, 'emissao', anos=[2024], meses=[1, 2, 3])
+    df_intervalo = select_period(df, 'emissao', inicio='2024-03-10', fim='2024-04-20')
+
+O índice é calculado na primeira consulta de cada versão do dataset e
+descartado quando a versão muda. DataFrames fora de ordem (derivados ou
+de views sem partição) são filtrados por máscara, com o mesmo resultado.
+"""
+import logging
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from shared.cache.dataset_store import dataset_store
+
+logger = logging.getLogger(__name__)
+
+DateLike = Union[str, date, pd.Timestamp]
+Range = Tuple[int, int]
+
+
+def is_partitioned(datas: pd.Series) -> bool:
+    """True se as datas estão em ordem crescente, com as nulas apenas no fim"""
+    validas = int(datas.notna().sum())
+    if validas and datas.iloc[:validas].isna().any():
+        return False
+    return datas.iloc[:validas].is_monotonic_increasing
+
+
+def _limite_final(fim: DateLike) -> Tuple[np.datetime64, str]:
+    """Limite superior inclusivo; uma data sem horário inclui o dia inteiro"""
+    fim = pd.Timestamp(fim)
+    if fim == fim.normalize():
+        return (fim + pd.Timedelta(days=1)).to_datetime64(), 'left'
+    return fim.to_datetime64(), 'right'
+
+
+def _juntar(intervalos: Iterable[Range]) -> List[Range]:
+    """Ordena e junta intervalos vazios, sobrepostos ou adjacentes"""
+    juntos: List[Range] = []
+    for inicio, fim in sorted(i for i in intervalos if i[1] > i[0]):
+        if juntos and inicio <= juntos[-1][1]:
+            juntos[-1] = (juntos[-1][0], max(juntos[-1][1], fim))
+        else:
+            juntos.append((inicio, fim))
+    return juntos
+
+
+class PartitionIndex:
+    """Posição inicial de cada mês em uma coluna de datas ordenada"""
+
+    def __init__(self, datas: pd.Series):
+        """
+        Args:
+            datas: Coluna de datas em ordem crescente, nulas no fim (is_partitioned)
+        """
+        valores = pd.to_datetime(datas).to_numpy(dtype='datetime64[ns]')
+        self.rows = len(valores)
+        self.valid = int(np.count_nonzero(~np.isnat(valores)))
+        self._datas = valores[:self.valid]
+
+        if self.valid:
+            primeiro = self._datas[0].astype('datetime64[M]')
+            ultimo = self._datas[-1].astype('datetime64[M]')
+            # Início de cada mês entre o primeiro e o último, mais o mês seguinte ao último
+            self.months = np.arange(primeiro, ultimo + 2, dtype='datetime64[M]')
+        else:
+            self.months = np.array([], dtype='datetime64[M]')
+        self.offsets = np.searchsorted(self._datas, self.months.astype('datetime64[ns]'), side='left')
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.months.nbytes + self.offsets.nbytes)
+
+    def years(self) -> List[int]:
+        """Anos com ao menos uma linha, em ordem crescente"""
+        if not self.valid:
+            return []
+        com_linhas = np.diff(self.offsets) > 0
+        anos = self.months[:-1][com_linhas].astype('datetime64[Y]').astype(int) + 1970
+        return sorted(set(anos.tolist()))
+
+    def month_range(self, ano: int, mes: int) -> Range:
+        """Posições [início, fim) das linhas de um mês"""
+        posicao = (np.datetime64(f"{ano:04d}-{mes:02d}", 'M') - self.months[0]).astype(int) if self.valid else -1
+        if posicao < 0 or posicao >= len(self.months) - 1:
+            return (0, 0)
+        return int(self.offsets[posicao]), int(self.offsets[posicao + 1])
+
+    def ranges(self,
+               anos: Optional[Iterable[int]] = None,
+               meses: Optional[Iterable[int]] = None,
+               inicio: Optional[DateLike] = None,
+               fim: Optional[DateLike] = None) -> List[Range]:
+        """
+        Intervalos de posições [início, fim) do período, em ordem e sem sobreposição
+
+        Args:
+            anos: Anos (None: todos)
+            meses: Meses de 1 a 12 de cada ano (None: todos)
+            inicio: Data inicial (inclusiva)
+            fim: Data final (inclusiva; sem horário, inclui o dia inteiro)
+        """
+        if anos is None and meses is None:
+            intervalos = [(0, self.valid)]
+        else:
+            anos = self.years() if anos is None else sorted({int(a) for a in anos})
+            meses = range(1, 13) if meses is None else sorted({int(m) for m in meses})
+            intervalos = [self.month_range(ano, mes) for ano in anos for mes in meses]
+
+        baixo, alto = 0, self.valid
+        if inicio is not None:
+            baixo = int(np.searchsorted(self._datas, pd.Timestamp(inicio).to_datetime64(), side='left'))
+        if fim is not None:
+            limite, lado = _limite_final(fim)
+            alto = int(np.searchsorted(self._datas, limite, side=lado))
+        return _juntar((max(a, baixo), min(b, alto)) for a, b in intervalos)
+
+    def select(self, df: pd.DataFrame, **periodo) -> pd.DataFrame:
+        """Linhas do período: uma fatia sem cópia se o período for contínuo"""
+        intervalos = self.ranges(**periodo)
+        if not intervalos:
+            return df.iloc[0:0]
+        if len(intervalos) == 1:
+            return df.iloc[intervalos[0][0]:intervalos[0][1]]
+        return pd.concat([df.iloc[a:b] for a, b in intervalos])
+
+
+class _PartitionRegistry:
+    """Índices por dataset do dataset_store e coluna, da versão atual"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indices: Dict[str, Tuple[int, Dict[str, Optional[PartitionIndex]]]] = {}
+        dataset_store.subscribe(self._nova_versao)
+
+    def _nova_versao(self, nome: str, versao: Optional[int]) -> None:
+        with self._lock:
+            atual = self._indices.get(nome)
+            if atual is not None and atual[0] != versao:
+                del self._indices[nome]
+
+    def get(self, df: pd.DataFrame, column: str) -> Optional[PartitionIndex]:
+        """Índice da coluna, ou None se as linhas não estão ordenadas por ela"""
+        referencia = dataset_store.fingerprint(df)
+        if referencia is None:
+            return self._build(df, column)
+
+        nome, versao = referencia.rsplit('@v', 1)
+        versao = int(versao)
+        with self._lock:
+            atual = self._indices.get(nome)
+            if atual is not None and atual[0] == versao and column in atual[1]:
+                return atual[1][column]
+
+        indice = self._build(df, column)
+        with self._lock:
+            atual = self._indices.get(nome)
+            if atual is None or atual[0] != versao:
+                atual = self._indices[nome] = (versao, {})
+            atual[1][column] = indice
+        return indice
+
+    @staticmethod
+    def _build(df: pd.DataFrame, column: str) -> Optional[PartitionIndex]:
+        datas = df[column]
+        if not pd.api.types.is_datetime64_any_dtype(datas) or not is_partitioned(datas):
+            return None
+        return PartitionIndex(datas)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indices.clear()
+
+
+partitions = _PartitionRegistry()
+
+
+def available_years(df: pd.DataFrame, column: str) -> List[int]:
+    """Anos presentes na coluna de datas, em ordem crescente"""
+    if df is None or df.empty or column not in df.columns:
+        return []
+    indice = partitions.get(df, column)
+    if indice is not None:
+        return indice.years()
+    anos = pd.to_datetime(df[column], errors='coerce').dt.year.dropna().unique()
+    return sorted(int(ano) for ano in anos)
+
+
+def has_null_dates(df: pd.DataFrame, column: str) -> bool:
+    """Se alguma linha não tem data na coluna (linhas que nenhum período seleciona)"""
+    if df is None or df.empty or column not in df.columns:
+        return False
+    indice = partitions.get(df, column)
+    if indice is not None:
+        return indice.valid < indice.rows
+    return bool(pd.to_datetime(df[column], errors='coerce').isna().any())
+
+
+def select_period(df: pd.DataFrame,
+                  column: str,
+                  anos: Optional[Iterable[int]] = None,
+                  meses: Optional[Iterable[int]] = None,
+                  inicio: Optional[DateLike] = None,
+                  fim: Optional[DateLike] = None) -> pd.DataFrame:
+    """
+    Linhas de um período pela coluna de datas
+
+    Args:
+        df: Dataset (de preferência a referência do dataset_store, ordenada)
+        column: Coluna de datas
+        anos: Anos (None: todos; lista vazia: nenhum)
+        meses: Meses de 1 a 12 de cada ano (None: todos)
+        inicio: Data inicial (inclusiva)
+        fim: Data final (inclusiva; sem horário, inclui o dia inteiro)
+
+    Returns:
+        pd.DataFrame: Linhas com data no período (linhas sem data ficam de fora)
+    """
+    periodo = {'anos': None if anos is None else list(anos),
+               'meses': None if meses is None else list(meses),
+               'inicio': inicio, 'fim': fim}
+    indice = partitions.get(df, column)
+    if indice is not None:
+        return indice.select(df, **periodo)
+
+    # Fora de ordem: filtro por máscara
+    datas = pd.to_datetime(df[column], errors='coerce')
+    mascara = datas.notna()
+    if periodo['anos'] is not None:
+        mascara &= datas.dt.year.isin(periodo['anos'])
+    if periodo['meses'] is not None:
+        mascara &= datas.dt.month.isin(periodo['meses'])
+    if inicio is not None:
+        mascara &= datas >= pd.Timestamp(inicio)
+    if fim is not None:
+        limite, lado = _limite_final(fim)
+        mascara &= (datas < limite) if lado == 'left' else (datas <= limite)
+    return df[mascara.to_numpy()]
@@ -0,0 +1,113 @@
+"""
+Agendador de atualização dos datasets em segundo plano
+"""
+import os
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+import pandas as pd
+from shared.cache.dataset_store import DatasetKey, DatasetStore, dataset_store
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """
+    Revalida os datasets registrados antes que expirem
+
+    Uma thread verifica periodicamente a idade de cada dataset e, ao atingir
+    a fração `lead_ratio` do intervalo de atualização da view, dispara a busca
+    em segundo plano no DatasetStore. Assim nenhum usuário espera pelo backend
+    depois da primeira carga.
+    """
+
+    def __init__(self,
+                 store: Optional[DatasetStore] = None,
+                 tick_seconds: Optional[float] = None,
+                 lead_ratio: Optional[float] = None):
+        """
+        Args:
+            store: Armazenamento dos datasets (padrão: dataset_store)
+            tick_seconds: Intervalo entre verificações (padrão: DATASET_REFRESH_TICK_SECONDS ou 30 s)
+            lead_ratio: Fração do intervalo da view em que a atualização começa
+                (padrão: DATASET_REFRESH_LEAD_RATIO ou 0.8)
+        """
+        self.store = store or dataset_store
+        self.tick_seconds = float(tick_seconds if tick_seconds is not None
+                                  else os.getenv('DATASET_REFRESH_TICK_SECONDS', '30'))
+        self.lead_ratio = float(lead_ratio if lead_ratio is not None
+                                else os.getenv('DATASET_REFRESH_LEAD_RATIO', '0.8'))
+        self._jobs: Dict[DatasetKey, Callable[[], pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self,
+                 tenant: str,
+                 view: str,
+                 loader: Callable[[], pd.DataFrame],
+                 interval: Optional[float] = None) -> None:
+        """
+        Mantém a view atualizada em segundo plano
+
+        Args:
+            tenant: Cliente do backend
+            view: Nome da view
+            loader: Função que busca o DataFrame no backend
+            interval: Intervalo de atualização da view (padrão: o do store)
+        """
+        if interval is not None:
+            self.store.set_refresh_interval(view, interval)
+        with self._lock:
+            novo = (tenant, view) not in self._jobs
+            self._jobs[(tenant, view)] = loader
+        if novo:
+            logger.debug(f"Atualização em segundo plano registrada para {tenant}/{view}")
+        self.start()
+
+    def unregister(self, tenant: str, view: str) -> None:
+        with self._lock:
+            self._jobs.pop((tenant, view), None)
+
+    def run_pending(self) -> List[DatasetKey]:
+        """Dispara as atualizações vencidas; retorna as views iniciadas"""
+        with self._lock:
+            jobs = list(self._jobs.items())
+
+        iniciadas = []
+        for (tenant, view), loader in jobs:
+            situacao = self.store.freshness(tenant, view)
+            idade = situacao['age_seconds']
+            if idade is not None and idade < situacao['refresh_interval'] * self.lead_ratio:
+                continue
+            if self.store.revalidate(tenant, view, loader):
+                iniciadas.append((tenant, view))
+        return iniciadas
+
+    def start(self) -> None:
+        """Inicia a thread do agendador (sem efeito se já estiver rodando)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='dataset-refresh', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Interrompe a thread do agendador"""
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=self.tick_seconds)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.tick_seconds):
+            try:
+                self.run_pending()
+            except Exception as e:
+                logger.error(f"Erro no agendador de atualização: {str(e)}")
+
+
+# Instância global do agendador
+refresh_scheduler = RefreshScheduler()
@@ -0,0 +1,255 @@
+"""
+Datasets compartilhados entre processos por arquivos Arrow IPC mapeados em memória
+
+Com vários processos do Streamlit atrás de um balanceador, cada view é buscada
+no backend por um único processo e gravada uma vez em Arrow IPC sem compressão.
+Os demais mapeiam o arquivo (mmap) e montam o DataFrame sobre as páginas do
+arquivo, sem cópia: a memória é a do cache de páginas do sistema, uma vez só,
+qualquer que seja o número de processos.
+
+Cada publicação grava um arquivo novo e depois troca o manifesto da view
+(os.replace), de modo que leitores veem a versão anterior ou a nova, nunca um
+arquivo pela metade. Os arrays mapeados são somente leitura: como no
+dataset_store, crie ou substitua colunas, nunca altere valores no lugar.
+"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = '.json'
+DATA_SUFFIX = '.arrow'
+
+
+class _Mapped:
+    """Último arquivo mapeado de uma view neste processo"""
+
+    def __init__(self, token: str, published_at: float, frame: pd.DataFrame):
+        self.token = token
+        self.published_at = published_at
+        self.frame = frame
+
+
+class SharedDatasets:
+    """
+    Publica e mapeia datasets em arquivos Arrow IPC compartilhados
+
+    - publish: grava o DataFrame e troca o manifesto atomicamente
+    - load: mapeia a versão publicada (o mesmo objeto enquanto ela não mudar)
+    - shared_loader: envolve o loader do dataset_store para que só um processo
+      busque no backend e os demais mapeiem o resultado
+    """
+
+    def __init__(self, directory: Optional[str] = None, grace_seconds: Optional[float] = None):
+        """
+        Args:
+            directory: Diretório dos arquivos (padrão: SHARED_DATASET_DIR ou CACHE_DIR/shared)
+            grace_seconds: Tempo antes de apagar arquivos substituídos
+                (padrão: SHARED_DATASET_GRACE_SECONDS ou 60 s)
+        """
+        self.directory = directory or os.getenv(
+            'SHARED_DATASET_DIR', os.path.join(os.getenv('CACHE_DIR', '.cache'), 'shared')
+        )
+        self.grace_seconds = float(grace_seconds if grace_seconds is not None
+                                   else os.getenv('SHARED_DATASET_GRACE_SECONDS', '60'))
+        self._mapped: Dict[Tuple[str, str], _Mapped] = {}
+        # Último DataFrame publicado por este processo (referência fraca: não o mantém em memória)
+        self._sources: Dict[Tuple[str, str], weakref.ref] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, tenant: str, view: str, frame: pd.DataFrame) -> str:
+        """
+        Grava o dataset e o torna a versão publicada da view
+
+        Returns:
+            str: Identificador da publicação
+        """
+        # Criado só na primeira gravação: com SHARED_DATASETS=0 nada vai para o disco
+        os.makedirs(self.directory, exist_ok=True)
+        base = self._base(tenant, view)
+        token = f"{time.time_ns()}-{os.getpid()}"
+        arquivo = f"{base}.{token}{DATA_SUFFIX}"
+        caminho = os.path.join(self.directory, arquivo)
+
+        # Sem compressão: só assim os leitores usam as páginas do arquivo sem copiar
+        table = pa.Table.from_pandas(frame)
+        with pa.OSFile(f"{caminho}.tmp", 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(f"{caminho}.tmp", caminho)
+
+        manifesto = {
+            'file': arquivo,
+            'token': token,
+            'published_at': time.time(),
+            'rows': len(frame),
+            'bytes': os.path.getsize(caminho),
+        }
+        self._write_manifest(base, manifesto)
+        self._cleanup(base, arquivo)
+        logger.info(f"Dataset {tenant}/{view} publicado: {len(frame)} registros, "
+                    f"{manifesto['bytes'] / 1e6:.1f} MB")
+        return token
+
+    def load(self, tenant: str, view: str) -> Optional[Tuple[pd.DataFrame, float]]:
+        """
+        Mapeia a versão publicada da view
+
+        Returns:
+            (DataFrame, momento da publicação) ou None se não houver publicação.
+            Enquanto a publicação não muda, o mesmo DataFrame é devolvido.
+        """
+        key = (tenant, view)
+        base = self._base(tenant, view)
+        for _ in range(2):
+            manifesto = self._read_manifest(base)
+            if manifesto is None:
+                return None
+
+            with self._lock:
+                mapeado = self._mapped.get(key)
+                if mapeado is not None and mapeado.token == manifesto['token']:
+                    mapeado.published_at = manifesto['published_at']
+                    return mapeado.frame, mapeado.published_at
+
+            try:
+                frame = self._map(os.path.join(self.directory, manifesto['file']))
+            except FileNotFoundError:
+                # Substituído e apagado entre a leitura do manifesto e o mapeamento
+                continue
+
+            with self._lock:
+                self._mapped[key] = _Mapped(manifesto['token'], manifesto['published_at'], frame)
+            return frame, manifesto['published_at']
+        return None
+
+    def shared_loader(self,
+                      tenant: str,
+                      view: str,
+                      loader: Callable[[], pd.DataFrame],
+                      max_age: float) -> Callable[[], pd.DataFrame]:
+        """
+        Loader para o dataset_store que consulta primeiro a versão publicada
+
+        Se outro processo publicou a view há menos de max_age segundos, ela é
+        mapeada sem ir ao backend. Caso contrário, a busca é feita sob uma
+        trava entre processos: quem chega depois espera e mapeia o resultado.
+        """
+        def load() -> pd.DataFrame:
+            publicado = self._recent(tenant, view, max_age)
+            if publicado is not None:
+                return publicado
+
+            with self._process_lock(tenant, view):
+                publicado = self._recent(tenant, view, max_age)
+                if publicado is not None:
+                    return publicado
+
+                frame = loader()
+                if frame is None or frame.empty:
+                    return frame
+
+                key = (tenant, view)
+                with self._lock:
+                    anterior = self._sources.get(key)
+                    inalterado = anterior is not None and anterior() is frame
+                    self._sources[key] = weakref.ref(frame)
+                if inalterado and self._touch(tenant, view):
+                    # Resposta inalterada: mantém o arquivo e renova a publicação
+                    mapeado = self.load(tenant, view)
+                    if mapeado is not None:
+                        return mapeado[0]
+
+                self.publish(tenant, view, frame)
+                mapeado = self.load(tenant, view)
+                return mapeado[0] if mapeado is not None else frame
+
+        return load
+
+    def _recent(self, tenant: str, view: str, max_age: float) -> Optional[pd.DataFrame]:
+        publicado = self.load(tenant, view)
+        if publicado is not None and time.time() - publicado[1] < max_age:
+            return publicado[0]
+        return None
+
+    def _touch(self, tenant: str, view: str) -> bool:
+        base = self._base(tenant, view)
+        manifesto = self._read_manifest(base)
+        if manifesto is None:
+            return False
+        manifesto['published_at'] = time.time()
+        self._write_manifest(base, manifesto)
+        return True
+
+    @staticmethod
+    def _map(caminho: str) -> pd.DataFrame:
+        with pa.memory_map(caminho, 'r') as source:
+            table = ipc.open_file(source).read_all()
+        # split_blocks: uma coluna por bloco, apontando para o arquivo (sem consolidar/copiar)
+        return table.to_pandas(split_blocks=True, self_destruct=False)
+
+    @contextmanager
+    def _process_lock(self, tenant: str, view: str):
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, f"{self._base(tenant, view)}.lock"), 'a') as trava:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(trava, fcntl.LOCK_UN)
+
+    def _base(self, tenant: str, view: str) -> str:
+        return re.sub(r'[^A-Za-z0-9_.-]', '_', f"{tenant}__{view}")
+
+    def _read_manifest(self, base: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.directory, f"{base}{MANIFEST_SUFFIX}"), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Manifesto de {base} ilegível: {str(e)}")
+            return None
+
+    def _write_manifest(self, base: str, manifesto: Dict) -> None:
+        caminho = os.path.join(self.directory, f"{base}{MANIFEST_SUFFIX}")
+        tmp = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(manifesto, f)
+        os.replace(tmp, caminho)
+
+    def _cleanup(self, base: str, atual: str) -> None:
+        """Apaga arquivos substituídos há mais de grace_seconds"""
+        limite = time.time() - self.grace_seconds
+        for nome in os.listdir(self.directory):
+            if not (nome.startswith(f"{base}.") and nome.endswith(DATA_SUFFIX)) or nome == atual:
+                continue
+            caminho = os.path.join(self.directory, nome)
+            try:
+                if os.path.getmtime(caminho) < limite:
+                    # Processos que ainda mapeiam o arquivo continuam lendo normalmente
+                    os.remove(caminho)
+            except OSError:
+                # Já apagado por outro processo, ou ainda aberto (Windows): fica para a próxima
+                pass
+
+
+# Instância global dos datasets compartilhados
+shared_datasets = SharedDatasets()
@@ -0,0 +1,87 @@
+"""
+Estatísticas das camadas de cache em um só lugar
+
+Cada camada (disco, memória, figuras, datasets, HTTP) registra ao ser criada
+uma função que devolve seus contadores (register_cache). cache_stats() reúne
+todas no mesmo formato, para comparar acertos, falhas, descartes, ocupação e
+idade das entradas e calibrar TTLs e orçamentos a partir de dados reais.
+"""
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Campos comuns a todas as camadas; None quando não se aplicam à camada
+LAYER_FIELDS = (
+    'entries', 'bytes', 'max_bytes', 'hits', 'misses', 'hit_ratio', 'stale',
+    'evictions', 'expired', 'oldest_age_seconds', 'mean_age_seconds',
+)
+
+_layers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+_layers_lock = threading.Lock()
+
+
+def register_cache(name: str, info: Callable[[], Dict[str, Any]]) -> None:
+    """
+    Registra uma camada de cache
+
+    Args:
+        name: Nome da camada (ex.: 'memory')
+        info: Função sem argumentos que devolve os contadores da camada
+    """
+    with _layers_lock:
+        _layers[name] = info
+
+
+def hit_ratio(hits: int, misses: int) -> Optional[float]:
+    """Fração de acertos (None se ainda não houve consultas)"""
+    total = hits + misses
+    return hits / total if total else None
+
+
+def age_summary(timestamps: Iterable[float], now: Optional[float] = None) -> Dict[str, Optional[float]]:
+    """Idade da entrada mais antiga e idade média, a partir dos momentos de criação"""
+    agora = time.time() if now is None else now
+    idades = [agora - t for t in timestamps]
+    if not idades:
+        return {'oldest_age_seconds': None, 'mean_age_seconds': None}
+    return {'oldest_age_seconds': max(idades), 'mean_age_seconds': sum(idades) / len(idades)}
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Contadores de todas as camadas registradas
+
+    Returns:
+        Dict camada -> campos de LAYER_FIELDS, seguidos dos contadores
+        próprios da camada. Camadas com erro trazem apenas 'error'.
+    """
+    with _layers_lock:
+        camadas = dict(_layers)
+
+    resultado = {}
+    for nome, info in camadas.items():
+        try:
+            dados = dict(info())
+        except Exception as e:
+            logger.error(f"Erro ao ler estatísticas do cache {nome}: {str(e)}")
+            resultado[nome] = {'error': str(e)}
+            continue
+        if dados.get('hit_ratio') is None and 'hits' in dados and 'misses' in dados:
+            dados['hit_ratio'] = hit_ratio(dados['hits'], dados['misses'])
+        comuns = {campo: dados.pop(campo, None) for campo in LAYER_FIELDS}
+        resultado[nome] = {**comuns, **dados}
+    return resultado
+
+
+def stats_frame() -> pd.DataFrame:
+    """Campos comuns de cada camada, uma linha por camada"""
+    stats = cache_stats()
+    return pd.DataFrame(
+        [{campo: dados.get(campo) for campo in LAYER_FIELDS} for dados in stats.values()],
+        index=pd.Index(list(stats), name='layer'),
+        columns=list(LAYER_FIELDS)
+    )
@@ -0,0 +1,123 @@
+"""
+Painel de diagnóstico dos caches (somente administradores)
+"""
+import streamlit as st
+import pandas as pd
+from typing import Any, Dict, Optional
+from shared.cache.dataset_store import dataset_store
+from shared.cache.figure_cache import figure_cache, clear_figures
+from shared.cache.stats import stats_frame
+from shared.utils.cache_manager import memory_cache, clear_cache
+
+LAYER_LABELS = {
+    'disk': 'Disco',
+    'memory': 'Memória',
+    'figures': 'Figuras',
+    'datasets': 'Datasets',
+    'http': 'HTTP (respostas)',
+}
+
+COLUMN_LABELS = {
+    'entries': 'Entradas',
+    'bytes': 'Ocupação',
+    'max_bytes': 'Limite',
+    'hits': 'Acertos',
+    'misses': 'Falhas',
+    'hit_ratio': 'Taxa de acerto',
+    'stale': 'Servidos vencidos',
+    'evictions': 'Descartes (LRU)',
+    'expired': 'Expirados',
+    'invalidated': 'Invalidados',
+    'oldest_age_seconds': 'Mais antiga',
+    'mean_age_seconds': 'Idade média',
+}
+
+
+def _bytes(valor: Optional[float]) -> str:
+    if valor is None or pd.isna(valor):
+        return "—"
+    for unidade in ('B', 'KB', 'MB', 'GB'):
+        if abs(valor) < 1024 or unidade == 'GB':
+            return f"{valor:.0f} {unidade}" if unidade == 'B' else f"{valor:.1f} {unidade}".replace('.', ',')
+        valor /= 1024
+
+
+def _idade(segundos: Optional[float]) -> str:
+    if segundos is None or pd.isna(segundos):
+        return "—"
+    if segundos < 60:
+        return f"{segundos:.0f} s"
+    if segundos < 3600:
+        return f"{segundos / 60:.0f} min"
+    return f"{segundos / 3600:.1f} h".replace('.', ',')
+
+
+def _taxa(valor: Optional[float]) -> str:
+    if valor is None or pd.isna(valor):
+        return "—"
+    return f"{valor * 100:.1f}%".replace('.', ',')
+
+
+def _contagem(valor: Any) -> str:
+    if valor is None or pd.isna(valor):
+        return "—"
+    return f"{int(valor):,}".replace(',', '.')
+
+
+def format_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """Formata as estatísticas (uma linha por camada ou namespace) para exibição"""
+    formatadores = {
+        'bytes': _bytes, 'max_bytes': _bytes,
+        'hit_ratio': _taxa,
+        'oldest_age_seconds': _idade, 'mean_age_seconds': _idade,
+    }
+    exibicao = pd.DataFrame(index=df.index)
+    for coluna in df.columns:
+        if coluna in COLUMN_LABELS:
+            exibicao[COLUMN_LABELS[coluna]] = df[coluna].map(formatadores.get(coluna, _contagem))
+    return exibicao
+
+
+def _namespaces(info: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    df = pd.DataFrame.from_dict(info, orient='index')
+    if df.empty:
+        return df
+    return format_stats(df.sort_values('bytes', ascending=False))
+
+
+def render_cache_diagnostics() -> None:
+    """Exibe acertos, falhas, descartes, ocupação e idade de cada camada de cache"""
+    st.title("🩺 Diagnóstico de Cache")
+    st.caption("Contadores desde o início deste processo. Cada processo do servidor tem os seus.")
+
+    camadas = stats_frame()
+    camadas.index = camadas.index.map(lambda nome: LAYER_LABELS.get(nome, nome))
+    st.dataframe(format_stats(camadas), use_container_width=True)
+
+    with st.expander("Memória por função"):
+        st.dataframe(_namespaces(memory_cache.namespace_info()), use_container_width=True)
+
+    with st.expander("Figuras por gráfico"):
+        st.dataframe(_namespaces(figure_cache.namespace_info()), use_container_width=True)
+
+    with st.expander("Datasets em memória"):
+        linhas = []
+        for (tenant, view), info in dataset_store.info().items():
+            situacao = dataset_store.freshness(tenant, view)
+            linhas.append({
+                'Cliente': tenant,
+                'View': view,
+                'Registros': _contagem(info['rows']),
+                'Versão': info['version'],
+                'Ocupação': _bytes(info['bytes']),
+                'Idade': _idade(info['age_seconds']),
+                'Intervalo': _idade(situacao['refresh_interval']),
+                'Atualizando': 'sim' if situacao['refreshing'] else 'não',
+                'Último erro': situacao['last_error'] or '',
+            })
+        st.dataframe(pd.DataFrame(linhas), use_container_width=True, hide_index=True)
+
+    if st.button("Limpar caches de resultados e figuras"):
+        clear_cache()
+        clear_figures()
+        st.rerun()
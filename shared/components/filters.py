@@ -3,7 +3,7 @@ Componentes reutilizáveis de filtros
 """
 import streamlit as st
 import logging
-from typing import List
+from typing import Iterable, List, Optional
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -12,20 +12,23 @@ class DateFilters:
     """Classe para gerenciar filtros de data"""
     
     @staticmethod
-    def year_filter(key_suffix: str = "") -> List[int]:
+    def year_filter(key_suffix: str = "", years: Optional[Iterable[int]] = None) -> List[int]:
         """
         Cria um filtro de seleção de anos
         
         Args:
             key_suffix (str): Sufixo para a chave do componente
+            years (Iterable[int]): Anos presentes nos dados (ex.: partitions.available_years);
+                sem eles, os últimos 5 anos
             
         Returns:
             List[int]: Lista de anos selecionados
         """
+        current_year = datetime.now().year
+        anos_disponiveis = list(range(current_year - 4, current_year + 1))
         try:
-            # Gera lista de anos (últimos 5 anos)
-            current_year = datetime.now().year
-            anos_disponiveis = list(range(current_year - 4, current_year + 1))
+            if years is not None:
+                anos_disponiveis = sorted({int(ano) for ano in years})
             
             # Adiciona opção "Todos"
             opcoes = ['Todos'] + [str(ano) for ano in anos_disponiveis]
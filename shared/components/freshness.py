@@ -0,0 +1,41 @@
+"""
+Indicador de atualização dos dados exibidos nos dashboards
+"""
+import streamlit as st
+from typing import Any, Dict, Iterable
+
+
+def _idade_legivel(segundos: float) -> str:
+    if segundos < 60:
+        return "menos de 1 min"
+    if segundos < 3600:
+        return f"{int(segundos // 60)} min"
+    return f"{segundos / 3600:.1f} h".replace('.', ',')
+
+
+def freshness_text(situacoes: Iterable[Dict[str, Any]]) -> str:
+    """
+    Resume a situação de um ou mais datasets (DatasetStore.freshness)
+
+    A idade exibida é a do dataset mais antigo.
+    """
+    situacoes = [s for s in situacoes if s.get('loaded_at') is not None]
+    if not situacoes:
+        return "⚪ Dados ainda não carregados"
+
+    idade = max(s['age_seconds'] for s in situacoes)
+    texto = f"Dados atualizados há {_idade_legivel(idade)}"
+
+    erros = [s['last_error'] for s in situacoes if s.get('last_error')]
+    if erros:
+        return f"🔴 {texto} · falha na última atualização: {erros[0]}"
+    if any(s['refreshing'] for s in situacoes):
+        return f"🟡 {texto} · atualizando em segundo plano"
+    if any(s['stale'] for s in situacoes):
+        return f"🟡 {texto} · atualização pendente"
+    return f"🟢 {texto}"
+
+
+def render_freshness(situacoes: Iterable[Dict[str, Any]]) -> None:
+    """Exibe o indicador de atualização como legenda discreta"""
+    st.caption(freshness_text(situacoes))
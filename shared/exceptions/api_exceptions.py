@@ -20,4 +20,16 @@ class APITimeoutError(APIError):
 
 class APICacheError(APIError):
     """Erro relacionado ao cache"""
-    pass 
\ No newline at end of file
+    pass
+
+class APICircuitOpenError(APIError):
+    """Chamada bloqueada pelo circuit breaker após falhas consecutivas"""
+    pass
+
+class APISessionConflictError(APIError):
+    """Sessão do PowerBI em conflito ("A component named DM already exists")"""
+    pass
+
+class APISchemaError(APIDataError):
+    """Resposta da view sem as colunas obrigatórias do esquema"""
+    pass
@@ -1,10 +1,10 @@
 """
 Classe base para serviços de API
 """
-import requests
 import logging
 from abc import ABC, abstractmethod
 from typing import Optional, Dict, Any
+from shared.services.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +29,7 @@ class BaseAPIService(ABC):
             url = self._build_url()
             logger.debug(f"Fazendo requisição para: {url}")
             
-            response = requests.get(url)
+            response = http_client.get(url)
             response.raise_for_status()
             
             return response.json()
@@ -0,0 +1,152 @@
+"""
+Detecção de mudança nas respostas do backend por ETag/Last-Modified e hash do conteúdo
+"""
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+import pandas as pd
+from shared.cache.stats import age_summary, hit_ratio
+from shared.services.json_stream import read_json_frame, DEFAULT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Acima deste tamanho o corpo é mantido em arquivo temporário, não em memória
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+class ResponseFingerprint:
+    """Validadores HTTP e hash da última resposta de uma requisição"""
+
+    def __init__(self, digest: str, frame: pd.DataFrame,
+                 etag: Optional[str] = None, last_modified: Optional[str] = None,
+                 changed_at: Optional[float] = None):
+        self.digest = digest
+        self.frame = frame
+        self.etag = etag
+        self.last_modified = last_modified
+        self.changed_at = time.time() if changed_at is None else changed_at  # última mudança do conteúdo
+
+
+class FingerprintRegistry:
+    """Guarda a última resposta de cada requisição (view + parâmetros)"""
+
+    def __init__(self):
+        self._fingerprints: Dict[str, ResponseFingerprint] = {}
+        self._lock = threading.Lock()
+        # not_modified: 304; unchanged: corpo recebido com o mesmo hash; changed: decodificado
+        self.stats = {'not_modified': 0, 'unchanged': 0, 'changed': 0}
+
+    def get(self, key: str) -> Optional[ResponseFingerprint]:
+        with self._lock:
+            return self._fingerprints.get(key)
+
+    def set(self, key: str, fingerprint: ResponseFingerprint) -> None:
+        with self._lock:
+            self._fingerprints[key] = fingerprint
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._fingerprints.clear()
+            else:
+                self._fingerprints.pop(key, None)
+
+    def info(self) -> Dict[str, Any]:
+        """Respostas reaproveitadas (acertos) e decodificadas (falhas), memória e idade"""
+        with self._lock:
+            fingerprints = list(self._fingerprints.values())
+            stats = dict(self.stats)
+        hits = stats['not_modified'] + stats['unchanged']
+        return {
+            'entries': len(fingerprints),
+            # Os DataFrames costumam ser os mesmos do dataset_store: não é memória adicional
+            'bytes': sum(int(f.frame.memory_usage(deep=False).sum()) for f in fingerprints),
+            'hits': hits,
+            'misses': stats['changed'],
+            'hit_ratio': hit_ratio(hits, stats['changed']),
+            **stats,
+            **age_summary(f.changed_at for f in fingerprints),
+        }
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        """Cabeçalhos If-None-Match/If-Modified-Since para a requisição"""
+        fingerprint = self.get(key)
+        headers = {}
+        if fingerprint is not None:
+            if fingerprint.etag:
+                headers['If-None-Match'] = fingerprint.etag
+            if fingerprint.last_modified:
+                headers['If-Modified-Since'] = fingerprint.last_modified
+        return headers
+
+    def read_frame(self, key: str, response, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> Tuple[pd.DataFrame, bool]:
+        """
+        Lê a resposta, reaproveitando o DataFrame anterior se nada mudou
+
+        Na primeira leitura o corpo é decodificado em streaming enquanto o hash
+        é calculado. Nas seguintes o corpo é gravado em arquivo temporário e
+        só é decodificado se o hash for diferente do anterior.
+
+        Args:
+            transform: Aplicada ao DataFrame decodificado antes de ser guardado
+                (ex.: esquema da view); respostas inalteradas não são transformadas de novo
+
+        Returns:
+            Tuple[pd.DataFrame, bool]: DataFrame e se o conteúdo mudou. Quando não
+            mudou, o DataFrame é o mesmo objeto retornado anteriormente.
+        """
+        previous = self.get(key)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+
+        try:
+            if response.status_code == 304 and previous is not None:
+                logger.debug(f"{key}: 304 Not Modified")
+                self._count('not_modified')
+                return previous.frame, False
+
+            hasher = hashlib.blake2b(digest_size=16)
+            chunks = response.iter_content(chunk_size=chunk_size)
+
+            if previous is None:
+                frame = read_json_frame(_hashing(chunks, hasher))
+            else:
+                with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+                    for chunk in _hashing(chunks, hasher):
+                        spool.write(chunk)
+
+                    if hasher.hexdigest() == previous.digest:
+                        logger.debug(f"{key}: conteúdo inalterado, parse ignorado")
+                        self.set(key, ResponseFingerprint(previous.digest, previous.frame,
+                                                          etag or previous.etag,
+                                                          last_modified or previous.last_modified,
+                                                          previous.changed_at))
+                        self._count('unchanged')
+                        return previous.frame, False
+
+                    spool.seek(0)
+                    frame = read_json_frame(iter(lambda: spool.read(chunk_size), b''))
+        finally:
+            response.close()
+
+        if transform is not None:
+            frame = transform(frame)
+        self.set(key, ResponseFingerprint(hasher.hexdigest(), frame, etag, last_modified))
+        self._count('changed')
+        return frame, True
+
+    def _count(self, contador: str) -> None:
+        with self._lock:
+            self.stats[contador] += 1
+
+
+def _hashing(chunks: Iterable[bytes], hasher) -> Iterator[bytes]:
+    """Repassa os pedaços atualizando o hash"""
+    for chunk in chunks:
+        if chunk:
+            hasher.update(chunk)
+            yield chunk
@@ -0,0 +1,129 @@
+"""
+Cliente HTTP compartilhado com pool de conexões para todos os acessos ao backend
+"""
+import os
+import logging
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger(__name__)
+
+HTTP_CONFIG = {
+    # Quantidade de hosts com pool próprio
+    'POOL_CONNECTIONS': int(os.getenv('HTTP_POOL_CONNECTIONS', '4')),
+    # Conexões simultâneas por host; acima disso as requisições aguardam
+    'POOL_MAXSIZE': int(os.getenv('HTTP_POOL_MAXSIZE', '8')),
+    # Espera máxima por uma conexão livre; depois disso a requisição falha (EmptyPoolError)
+    'POOL_TIMEOUT': float(os.getenv('HTTP_POOL_TIMEOUT', '30')),
+    'CONNECT_TIMEOUT': float(os.getenv('HTTP_CONNECT_TIMEOUT', '5')),
+    'READ_TIMEOUT': float(os.getenv('HTTP_READ_TIMEOUT', '30'))
+}
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive'
+}
+
+
+class _TimedPool:
+    """Pool que espera no máximo pool_timeout segundos por uma conexão livre"""
+    pool_timeout: Optional[float] = None
+
+    def _get_conn(self, timeout=None):
+        return super()._get_conn(timeout=self.pool_timeout if timeout is None else timeout)
+
+
+class _TimedHTTPPool(_TimedPool, HTTPConnectionPool):
+    pass
+
+
+class _TimedHTTPSPool(_TimedPool, HTTPSConnectionPool):
+    pass
+
+
+class _TimedPoolManager(PoolManager):
+    """PoolManager cujos pools aplicam pool_timeout"""
+
+    def __init__(self, *args, pool_timeout: Optional[float] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_timeout = pool_timeout
+        self.pool_classes_by_scheme = {'http': _TimedHTTPPool, 'https': _TimedHTTPSPool}
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context)
+        pool.pool_timeout = self.pool_timeout
+        return pool
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter com limite de conexões por host (pool_block=True) e espera
+    limitada por uma conexão livre: com o pool esgotado a requisição falha
+    em vez de aguardar indefinidamente
+    """
+
+    def __init__(self, pool_timeout: Optional[float] = None, **kwargs):
+        # Definido antes de super().__init__, que cria o PoolManager
+        self.pool_timeout = pool_timeout
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _TimedPoolManager(
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            pool_timeout=self.pool_timeout,
+            **pool_kwargs
+        )
+
+
+class HTTPClient(requests.Session):
+    """
+    Session com pool de conexões keep-alive, limite de conexões por host,
+    compressão negociada e timeout padrão em todas as requisições.
+
+    Retentativas não são feitas aqui (max_retries=0): ficam a cargo do
+    RetryEngine de quem chama.
+
+    Respostas abertas com stream=True devem ser fechadas (with response:)
+    também nos caminhos de erro; caso contrário a conexão não volta ao pool.
+    """
+
+    def __init__(self,
+                 pool_connections: int = HTTP_CONFIG['POOL_CONNECTIONS'],
+                 pool_maxsize: int = HTTP_CONFIG['POOL_MAXSIZE'],
+                 pool_timeout: Optional[float] = HTTP_CONFIG['POOL_TIMEOUT'],
+                 connect_timeout: float = HTTP_CONFIG['CONNECT_TIMEOUT'],
+                 read_timeout: float = HTTP_CONFIG['READ_TIMEOUT']):
+        super().__init__()
+        self.timeout = (connect_timeout, read_timeout)
+        self.headers.update(DEFAULT_HEADERS)
+
+        adapter = PooledHTTPAdapter(
+            pool_timeout=pool_timeout,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,
+            max_retries=0
+        )
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def request(self, method, url, **kwargs):
+        """Aplica o timeout padrão quando nenhum é informado"""
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().request(method, url, **kwargs)
+
+
+# Instância global: todas as requisições do processo reutilizam as mesmas conexões
+http_client = HTTPClient()
@@ -0,0 +1,269 @@
+"""
+Leitura incremental de respostas JSON do POWERBI direto para formato colunar
+
+A resposta é um array de objetos (uma linha por objeto). Em vez de carregar
+o corpo inteiro, convertê-lo em lista de dicionários e só então criar o
+DataFrame, os objetos são decodificados à medida que os bytes chegam e os
+valores vão para buffers por coluna, convertidos em arrays tipados a cada lote.
+"""
+import json
+import codecs
+import logging
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow faz parte do requirements.txt
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+DEFAULT_BATCH_SIZE = 50_000
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _NotAnArray(Exception):
+    """O documento não é um array no nível superior"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def iter_json_records(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Decodifica os elementos de um array JSON conforme os bytes chegam
+
+    Args:
+        chunks: Pedaços do corpo da resposta (ex.: response.iter_content())
+
+    Yields:
+        Cada elemento do array, assim que estiver completo
+
+    Raises:
+        _NotAnArray: Se o documento não começar com '[' (contém o texto já lido)
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    started = False
+    finished = False
+
+    def more(chunk: bytes, final: bool = False) -> str:
+        return utf8.decode(chunk, final=final)
+
+    iterator = iter(chunks)
+    eof = False
+
+    while not finished:
+        if not eof:
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                eof = True
+                chunk = b''
+            text = more(chunk, final=eof)
+            if text:
+                # Descarta o que já foi consumido antes de anexar
+                buffer = buffer[pos:] + text
+                pos = 0
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buffer):
+                break
+
+            if not started:
+                if buffer[pos] == '\ufeff':
+                    pos += 1
+                    continue
+                if buffer[pos] != '[':
+                    resto = buffer[pos:]
+                    for chunk in iterator:
+                        resto += more(chunk)
+                    raise _NotAnArray(resto + more(b'', final=True))
+                started = True
+                pos += 1
+                continue
+
+            char = buffer[pos]
+            if char == ',':
+                pos += 1
+                continue
+            if char == ']':
+                finished = True
+                break
+
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                break  # objeto incompleto: precisa de mais bytes
+
+            # Um número no fim do buffer pode estar cortado
+            if end >= len(buffer) and not eof and not isinstance(value, (dict, list)):
+                break
+
+            pos = end
+            yield value
+
+        if eof and not finished:
+            if not started:
+                return  # corpo vazio
+            raise ValueError("Resposta JSON terminou antes do fechamento do array")
+
+
+class ColumnarFrameBuilder:
+    """
+    Acumula registros em buffers por coluna e os converte em arrays tipados
+    (Arrow, ou pandas se o pyarrow não estiver disponível) a cada lote.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.columns: Dict[str, List[Any]] = {}
+        self.rows_in_batch = 0
+        self.total_rows = 0
+        self.batches: List[Any] = []
+
+    def add(self, record: Dict[str, Any]) -> Optional[Any]:
+        """Adiciona um registro; retorna o lote fechado, se houver"""
+        for name, value in record.items():
+            buffer = self.columns.get(name)
+            if buffer is None:
+                # Coluna nova: completa as linhas anteriores do lote com nulos
+                buffer = self.columns[name] = [None] * self.rows_in_batch
+            buffer.append(value)
+
+        self.rows_in_batch += 1
+        # Colunas ausentes neste registro
+        for buffer in self.columns.values():
+            if len(buffer) < self.rows_in_batch:
+                buffer.append(None)
+
+        if self.rows_in_batch >= self.batch_size:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[Any]:
+        """Converte o lote atual em arrays tipados e libera os buffers"""
+        if not self.rows_in_batch:
+            return None
+
+        if pa is not None:
+            batch = pa.table({name: self._to_arrow(values) for name, values in self.columns.items()})
+        else:
+            batch = pd.DataFrame(self.columns)
+
+        self.batches.append(batch)
+        self.total_rows += self.rows_in_batch
+        self.columns = {name: [] for name in self.columns}
+        self.rows_in_batch = 0
+        return batch
+
+    @staticmethod
+    def _to_arrow(values: List[Any]):
+        try:
+            return pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Coluna com tipos misturados: mantém como texto
+            return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+    @staticmethod
+    def _unify_batches(batches: List[Any]) -> List[Any]:
+        """
+        Converte em texto, em todos os lotes, as colunas cujos tipos não se
+        combinam entre lotes (ex.: int64 em um lote e texto em outro)
+        """
+        tipos: Dict[str, set] = {}
+        for batch in batches:
+            for field in batch.schema:
+                tipos.setdefault(field.name, set()).add(field.type)
+
+        conflitos = []
+        for name, types in tipos.items():
+            if len(types) < 2:
+                continue
+            try:
+                pa.unify_schemas([pa.schema([pa.field(name, t)]) for t in types],
+                                 promote_options='permissive')
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                conflitos.append(name)
+        if not conflitos:
+            return batches
+
+        unificados = []
+        for batch in batches:
+            for name in conflitos:
+                if name not in batch.column_names:
+                    continue
+                i = batch.schema.get_field_index(name)
+                values = batch.column(i).to_pylist()
+                texto = pa.array([None if v is None else str(v) for v in values], type=pa.string())
+                batch = batch.set_column(i, pa.field(name, pa.string()), texto)
+            unificados.append(batch)
+        return unificados
+
+    def to_frame(self) -> pd.DataFrame:
+        """Monta o DataFrame final a partir dos lotes"""
+        self.flush()
+        if not self.batches:
+            return pd.DataFrame()
+
+        if pa is None:
+            df = pd.concat(self.batches, ignore_index=True)
+            self.batches = []
+            return df
+
+        table = pa.concat_tables(self._unify_batches(self.batches), promote_options='permissive')
+        self.batches = []
+        # self_destruct libera os buffers Arrow conforme as colunas são convertidas
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def read_json_frame(chunks: Iterable[bytes],
+                    batch_size: int = DEFAULT_BATCH_SIZE,
+                    on_batch: Optional[Callable[[pd.DataFrame], None]] = None) -> pd.DataFrame:
+    """
+    Lê um array JSON de objetos em streaming e retorna o DataFrame
+
+    Args:
+        chunks: Pedaços do corpo da resposta
+        batch_size: Linhas por lote de conversão
+        on_batch: Callback opcional chamado com cada lote já convertido,
+            permitindo exibir as primeiras linhas antes do fim do download
+
+    Returns:
+        pd.DataFrame: Equivalente a pd.DataFrame(response.json())
+    """
+    builder = ColumnarFrameBuilder(batch_size)
+    try:
+        for record in iter_json_records(chunks):
+            if not isinstance(record, dict):
+                raise ValueError("Elemento do array JSON não é um objeto")
+            batch = builder.add(record)
+            if batch is not None and on_batch:
+                on_batch(batch.to_pandas() if pa is not None else batch)
+    except _NotAnArray as e:
+        # Formato alternativo (ex.: objeto com listas): mantém o comportamento antigo
+        logger.debug("Resposta não é um array JSON; usando leitura completa")
+        return pd.DataFrame(json.loads(e.text)) if e.text.strip() else pd.DataFrame()
+
+    if on_batch and builder.rows_in_batch:
+        batch = builder.flush()
+        on_batch(batch.to_pandas() if pa is not None else batch)
+
+    return builder.to_frame()
+
+
+def read_response_frame(response, chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs) -> pd.DataFrame:
+    """Lê o corpo de uma resposta requests (aberta com stream=True) em streaming"""
+    try:
+        return read_json_frame(response.iter_content(chunk_size=chunk_size), **kwargs)
+    finally:
+        response.close()
@@ -0,0 +1,251 @@
+"""
+Motor de retentativas com backoff exponencial, circuit breaker e estatísticas
+"""
+import time
+import random
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+from shared.exceptions.api_exceptions import APICircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """Define quantas tentativas fazer e quanto esperar entre elas"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 10.0):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def compute_delay(self, attempt: int) -> float:
+        """
+        Calcula a espera antes da próxima tentativa ("full jitter")
+
+        Args:
+            attempt: Número da tentativa que acabou de falhar (1, 2, ...)
+        """
+        teto = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, teto)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples: abre após falhas consecutivas e, passado o
+    tempo de espera, libera uma chamada de teste (half-open).
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Indica se uma nova chamada pode ser feita"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            # Em half-open só a chamada de teste passa
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """
+    Orçamento de retentativas: cada chamada deposita uma fração de ficha e
+    cada retentativa consome uma ficha inteira. Evita tempestades de retry
+    quando o backend está fora.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 3.0, max_tokens: float = 20.0):
+        self.ratio = ratio
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+        self.tokens = min_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class RetryStats:
+    """Contadores e latências de uma chave (ex.: uma view)"""
+
+    def __init__(self, window: int = 200):
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0  # chamadas barradas pelo circuit breaker
+        self.budget_exhausted = 0
+        self.latencies = deque(maxlen=window)  # latência total das chamadas bem-sucedidas
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordenadas = sorted(self.latencies)
+
+        def percentil(p: float) -> float:
+            if not ordenadas:
+                return 0.0
+            return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))]
+
+        return {
+            'calls': self.calls,
+            'successes': self.successes,
+            'failures': self.failures,
+            'retries': self.retries,
+            'rejected': self.rejected,
+            'budget_exhausted': self.budget_exhausted,
+            'latency_avg': sum(ordenadas) / len(ordenadas) if ordenadas else 0.0,
+            'latency_p50': percentil(0.5),
+            'latency_p95': percentil(0.95),
+        }
+
+
+class RetryEngine:
+    """
+    Executa chamadas com retentativas, mantendo circuit breaker, orçamento
+    de retry e estatísticas separados por chave.
+    """
+
+    def __init__(self,
+                 policy: Optional[RetryPolicy] = None,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 60.0,
+                 budget_ratio: float = 0.2,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.policy = policy or RetryPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.budget_ratio = budget_ratio
+        self._sleep = sleep
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._budgets: Dict[str, RetryBudget] = {}
+        self._stats: Dict[str, RetryStats] = {}
+        self._lock = threading.Lock()
+
+    def _state_for(self, key: str):
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._budgets[key] = RetryBudget(self.budget_ratio)
+                self._stats[key] = RetryStats()
+            return self._breakers[key], self._budgets[key], self._stats[key]
+
+    def call(self,
+             key: str,
+             func: Callable[[], Any],
+             retryable: Callable[[Exception], bool] = lambda e: True,
+             on_retry: Optional[Callable[[str, Exception, int], None]] = None) -> Any:
+        """
+        Executa func com retentativas
+
+        Args:
+            key: Chave do circuit breaker e das estatísticas (ex.: nome da view)
+            func: Chamada a ser executada
+            retryable: Indica se um erro justifica nova tentativa
+            on_retry: Callback chamado antes de cada retentativa com (key, erro, tentativa)
+
+        Raises:
+            APICircuitOpenError: Se o circuito da chave estiver aberto
+            Exception: O último erro, se todas as tentativas falharem
+        """
+        breaker, budget, stats = self._state_for(key)
+        stats.calls += 1
+
+        if not breaker.allow_request():
+            stats.rejected += 1
+            raise APICircuitOpenError(f"Circuito aberto para {key}")
+
+        budget.deposit()
+        inicio = time.perf_counter()
+        attempt = 0
+
+        while True:
+            attempt += 1
+            try:
+                result = func()
+            except Exception as e:
+                ultima = attempt >= self.policy.max_attempts
+                if ultima or not retryable(e):
+                    self._fail(key, breaker, stats, e, attempt)
+                    raise
+                if not budget.withdraw():
+                    stats.budget_exhausted += 1
+                    logger.warning(f"Orçamento de retentativas esgotado para {key}")
+                    self._fail(key, breaker, stats, e, attempt)
+                    raise
+
+                stats.retries += 1
+                delay = self.policy.compute_delay(attempt)
+                logger.warning(f"Tentativa {attempt} de {self.policy.max_attempts} falhou para {key}: {str(e)}. "
+                               f"Nova tentativa em {delay:.2f}s")
+                if on_retry:
+                    on_retry(key, e, attempt)
+                self._sleep(delay)
+                continue
+
+            breaker.record_success()
+            stats.successes += 1
+            stats.latencies.append(time.perf_counter() - inicio)
+            return result
+
+    @staticmethod
+    def _fail(key: str, breaker: CircuitBreaker, stats: RetryStats, error: Exception, attempt: int) -> None:
+        breaker.record_failure()
+        stats.failures += 1
+        logger.error(f"Falha definitiva para {key} após {attempt} tentativa(s): {str(error)}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna estatísticas, estado do circuito e orçamento por chave"""
+        with self._lock:
+            keys = list(self._stats)
+        result = {}
+        for key in keys:
+            breaker, budget, stats = self._state_for(key)
+            result[key] = {
+                **stats.snapshot(),
+                'circuit_state': breaker.state,
+                'retry_budget': round(budget.tokens, 2),
+            }
+        return result
+
+    def reset(self, key: Optional[str] = None) -> None:
+        """Reinicia o estado de uma chave (ou de todas)"""
+        with self._lock:
+            for store in (self._breakers, self._budgets, self._stats):
+                if key is None:
+                    store.clear()
+                else:
+                    store.pop(key, None)
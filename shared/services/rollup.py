@@ -0,0 +1,312 @@
+"""
+Cubo de agregados pré-calculados (rollup) sobre uma tabela de fatos
+
+O cubo materializa, uma vez por versão do dataset, as medidas (somas,
+contagens e contagens distintas) para um conjunto fixo de combinações de
+dimensões (grouping sets). As consultas filtram e reagregam essas tabelas
+pequenas: o custo depende do número de grupos, não do número de linhas.
+
+Somas e contagens são aditivas e podem ser reagregadas a partir de qualquer
+combinação mais detalhada. Contagens distintas não: só são respondidas por
+uma tabela cujas dimensões extras estejam fixadas em um único valor pelo
+filtro. Quando não há tabela que responda de forma exata, query() levanta
+RollupMiss e quem chama agrega as linhas (RollupSpec.aggregate).
+"""
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ADDITIVE = ('sum', 'count')
+AGGREGATIONS = ADDITIVE + ('nunique',)
+
+GroupingSet = Tuple[str, ...]
+
+
+class RollupMiss(LookupError):
+    """Consulta que o cubo não responde de forma exata"""
+
+
+def _scalar(valor: Any) -> bool:
+    return not isinstance(valor, (list, tuple, set, frozenset, np.ndarray, pd.Index, pd.Series))
+
+
+def _mask(frame: pd.DataFrame, where: Mapping[str, Any]) -> np.ndarray:
+    """Filtro de igualdade (valor único) ou pertinência (coleção) por dimensão"""
+    mascara = np.ones(len(frame), dtype=bool)
+    for dimensao, valor in where.items():
+        coluna = frame[dimensao]
+        if _scalar(valor):
+            # Dimensões anuláveis (Int16): nulo não é igual a nenhum valor
+            mascara &= (coluna == valor).to_numpy(dtype=bool, na_value=False)
+        else:
+            mascara &= coluna.isin(list(valor)).to_numpy(dtype=bool, na_value=False)
+    return mascara
+
+
+def _aggregate(frame: pd.DataFrame, by: Sequence[str], medidas: Dict[str, Tuple[str, str]]) -> pd.DataFrame:
+    """Agrega por by (indexado pelas dimensões); sem dimensões, uma linha com os totais"""
+    if not by:
+        return pd.DataFrame({nome: [frame[coluna].agg(funcao)] for nome, (coluna, funcao) in medidas.items()})
+    return frame.groupby(list(by), observed=True, dropna=False, sort=True).agg(**medidas)
+
+
+def _compact(frame: pd.DataFrame, contagens: Iterable[str]) -> pd.DataFrame:
+    """Contagens em int32; dimensões mantêm o tipo do dataset (categorias, inteiros pequenos)"""
+    for nome in contagens:
+        if nome in frame.columns:
+            frame[nome] = frame[nome].astype('int32')
+    return frame
+
+
+class RollupSpec:
+    """
+    Definição de um cubo: medidas, dimensões derivadas e combinações materializadas
+
+    Args:
+        measures: Medida -> (coluna, agregação), agregação em 'sum', 'count' ou 'nunique'
+        grouping_sets: Combinações de dimensões a materializar (() = total geral)
+        derived: Dimensões calculadas a partir das colunas (ex.: ano da emissão)
+    """
+
+    def __init__(self,
+                 measures: Dict[str, Tuple[str, str]],
+                 grouping_sets: Iterable[Sequence[str]],
+                 derived: Optional[Dict[str, Callable[[pd.DataFrame], pd.Series]]] = None):
+        invalidas = {nome: f for nome, (_, f) in measures.items() if f not in AGGREGATIONS}
+        if invalidas:
+            raise ValueError(f"Agregações inválidas: {invalidas}. Use {AGGREGATIONS}")
+        self.measures = dict(measures)
+        self.derived = dict(derived or {})
+        self.grouping_sets: List[GroupingSet] = list(dict.fromkeys(tuple(s) for s in grouping_sets))
+
+    @property
+    def dimensions(self) -> List[str]:
+        return list(dict.fromkeys(d for s in self.grouping_sets for d in s))
+
+    def prepare(self, df: pd.DataFrame, dimensions: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Colunas usadas pelo cubo, com as dimensões derivadas (sem copiar as demais)"""
+        dimensoes = list(dimensions) if dimensions is not None else self.dimensions
+        colunas = {}
+        for dimensao in dimensoes:
+            if dimensao in df.columns:
+                colunas[dimensao] = df[dimensao]
+            elif dimensao in self.derived:
+                try:
+                    colunas[dimensao] = self.derived[dimensao](df)
+                except KeyError:
+                    continue
+        for coluna, _ in self.measures.values():
+            if coluna in df.columns and coluna not in colunas:
+                colunas[coluna] = df[coluna]
+        return pd.DataFrame(colunas, index=df.index)
+
+    def aggregate(self,
+                  df: pd.DataFrame,
+                  by: Sequence[str] = (),
+                  where: Optional[Mapping[str, Any]] = None,
+                  measures: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Mesmo resultado de RollupCube.query, calculado a partir das linhas"""
+        where = dict(where or {})
+        medidas = {m: self.measures[m] for m in (measures or self.measures)}
+        base = self.prepare(df, list(by) + [d for d in where if d not in by])
+        if where:
+            base = base[_mask(base, where)]
+        resultado = _aggregate(base, by, medidas)
+        resultado = _compact(resultado.reset_index() if by else resultado,
+                             [m for m, (_, f) in medidas.items() if f != 'sum'])
+        resultado.attrs = dict(df.attrs)
+        return resultado
+
+    def build(self, df: pd.DataFrame) -> 'RollupCube':
+        """
+        Materializa as combinações
+
+        As dimensões viram códigos inteiros e cada combinação é calculada a
+        partir da mais barata já pronta que a contém (as linhas, na primeira):
+        medidas aditivas por np.bincount sobre as somas do nível de origem e
+        contagens distintas sobre os pares únicos (grupo, valor) desse nível.
+        Só as combinações máximas leem as linhas do dataset.
+        """
+        base = self.prepare(df)
+        medidas = {m: (c, f) for m, (c, f) in self.measures.items() if c in base.columns}
+        conjuntos = sorted((s for s in self.grouping_sets if set(s) <= set(base.columns)), key=len, reverse=True)
+        codigos = {d: _DimensionCodes(base[d]) for d in dict.fromkeys(d for s in conjuntos for d in s)}
+
+        # Nível de origem das combinações máximas: cada linha é um grupo
+        linhas = _Level({d: c.codes for d, c in codigos.items()}, len(base))
+        for medida, (coluna, funcao) in medidas.items():
+            if funcao == 'sum':
+                linhas.additive[medida] = np.nan_to_num(base[coluna].to_numpy(dtype='float64'))
+            elif funcao == 'count':
+                linhas.additive[medida] = base[coluna].notna().to_numpy(dtype='float64')
+            elif coluna not in linhas.pairs:
+                codigo, unicos = pd.factorize(base[coluna])
+                cardinalidade = max(len(unicos), 1)
+                validos = np.flatnonzero(codigo >= 0)
+                linhas.pairs[coluna] = (validos * cardinalidade + codigo[validos], cardinalidade)
+
+        niveis: Dict[GroupingSet, _Level] = {}
+        tabelas: Dict[GroupingSet, pd.DataFrame] = {}
+        for conjunto in conjuntos:
+            origem = min([n for s, n in niveis.items() if set(conjunto) < set(s)] + [linhas], key=_Level.cost)
+            grupos, mapa = _group_ids(conjunto, origem.dims, codigos, origem.size)
+            nivel = niveis[conjunto] = _Level(_unravel(conjunto, grupos, codigos), len(grupos))
+            for medida, somas in origem.additive.items():
+                nivel.additive[medida] = np.bincount(mapa, weights=somas, minlength=nivel.size)
+            for coluna, (chaves, cardinalidade) in origem.pairs.items():
+                chaves = pd.unique(mapa[chaves // cardinalidade] * cardinalidade + chaves % cardinalidade)
+                nivel.pairs[coluna] = (chaves, cardinalidade)
+
+            colunas = {d: codigos[d].decode(c) for d, c in nivel.dims.items()}
+            for medida, (coluna, funcao) in medidas.items():
+                if funcao == 'nunique':
+                    chaves, cardinalidade = nivel.pairs[coluna]
+                    colunas[medida] = np.bincount(chaves // cardinalidade, minlength=nivel.size)
+                else:
+                    colunas[medida] = nivel.additive[medida]
+            tabelas[conjunto] = _compact(pd.DataFrame(colunas), [m for m, (_, f) in medidas.items() if f != 'sum'])
+
+        return RollupCube(self, {s: tabelas[s] for s in self.grouping_sets if s in tabelas},
+                          list(medidas), dict(df.attrs))
+
+
+class _Level:
+    """Combinação calculada: códigos das dimensões, somas e pares distintos por grupo"""
+
+    def __init__(self, dims: Dict[str, np.ndarray], size: int):
+        self.dims = dims
+        self.size = size
+        self.additive: Dict[str, np.ndarray] = {}
+        self.pairs: Dict[str, Tuple[np.ndarray, int]] = {}  # coluna -> (grupo * cardinalidade + valor, cardinalidade)
+
+    def cost(self) -> int:
+        return self.size + sum(len(chaves) for chaves, _ in self.pairs.values())
+
+
+class _DimensionCodes:
+    """Códigos inteiros de uma dimensão, na ordem do groupby (nulos por último)"""
+
+    def __init__(self, coluna: pd.Series):
+        if isinstance(coluna.dtype, pd.CategoricalDtype):
+            self.dtype = coluna.dtype
+            self.labels = None
+            codes = coluna.cat.codes.to_numpy().astype('int64')
+            nulo = len(coluna.cat.categories)
+        else:
+            self.dtype = None
+            codes, self.labels = pd.factorize(coluna, sort=True)
+            nulo = len(self.labels)
+        self.codes = np.where(codes < 0, nulo, codes)
+        self.size = nulo + 1
+
+    def decode(self, codes: np.ndarray):
+        nulos = codes == self.size - 1
+        if self.dtype is not None:
+            return pd.Categorical.from_codes(np.where(nulos, -1, codes), dtype=self.dtype)
+        if not nulos.any():
+            return self.labels.take(codes)
+        # .array mantém tipos anuláveis (ex.: Int16 do ano de emissão com datas nulas)
+        return pd.Series(self.labels).reindex(np.where(nulos, -1, codes)).array
+
+
+def _group_ids(conjunto: GroupingSet, codes: Dict[str, np.ndarray],
+               codigos: Dict[str, _DimensionCodes], tamanho: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Grupos observados (código composto, em ordem) e o grupo de cada uma das tamanho linhas"""
+    if not conjunto:
+        return np.zeros(1, dtype='int64'), np.zeros(tamanho, dtype='int64')
+    composto = np.ravel_multi_index([codes[d] for d in conjunto], [codigos[d].size for d in conjunto])
+    inverso, grupos = pd.factorize(composto, sort=True)
+    return grupos, inverso
+
+
+def _unravel(conjunto: GroupingSet, grupos: np.ndarray,
+             codigos: Dict[str, _DimensionCodes]) -> Dict[str, np.ndarray]:
+    """Código de cada dimensão a partir do código composto dos grupos"""
+    if not conjunto:
+        return {}
+    return dict(zip(conjunto, np.unravel_index(grupos, [codigos[d].size for d in conjunto])))
+
+
+class RollupCube:
+    """Tabelas materializadas de um RollupSpec; somente leitura"""
+
+    def __init__(self,
+                 spec: RollupSpec,
+                 tables: Dict[GroupingSet, pd.DataFrame],
+                 measures: List[str],
+                 attrs: Optional[Dict[str, Any]] = None):
+        self.spec = spec
+        self.measures = measures
+        self.attrs = attrs or {}
+        self._tables = tables
+
+    @property
+    def grouping_sets(self) -> List[GroupingSet]:
+        return list(self._tables)
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(t.memory_usage(deep=True).sum() for t in self._tables.values()))
+
+    def table(self, grouping_set: Sequence[str]) -> pd.DataFrame:
+        """Tabela materializada de uma combinação (cópia rasa)"""
+        try:
+            return self._tables[tuple(grouping_set)].copy(deep=False)
+        except KeyError:
+            raise RollupMiss(f"Combinação não materializada: {tuple(grouping_set)}")
+
+    def query(self,
+              by: Sequence[str] = (),
+              where: Optional[Mapping[str, Any]] = None,
+              measures: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Medidas agregadas por by, com filtros por dimensão
+
+        Args:
+            by: Dimensões do resultado (vazio: uma linha com os totais)
+            where: Dimensão -> valor (igualdade) ou coleção de valores (pertinência)
+            measures: Medidas do resultado (padrão: todas)
+
+        Returns:
+            pd.DataFrame: Uma linha por grupo, colunas by + measures, ordenado por by
+
+        Raises:
+            RollupMiss: Se nenhuma tabela responde a consulta de forma exata
+        """
+        by = list(by)
+        where = dict(where or {})
+        medidas = list(measures or self.measures)
+        faltantes = [m for m in medidas if m not in self.measures]
+        if faltantes:
+            raise RollupMiss(f"Medidas indisponíveis no cubo: {faltantes}")
+
+        necessarias = set(by) | set(where)
+        fixas = {d for d, valor in where.items() if _scalar(valor)}
+        distintas = any(self.spec.measures[m][1] == 'nunique' for m in medidas)
+        candidatas = [
+            s for s in self._tables
+            if necessarias <= set(s) and (not distintas or set(s) - set(by) <= fixas)
+        ]
+        if not candidatas:
+            raise RollupMiss(f"Sem tabela exata para by={by}, where={sorted(where)}")
+
+        conjunto = min(candidatas, key=lambda s: len(self._tables[s]))
+        tabela = self._tables[conjunto]
+        if where:
+            tabela = tabela[_mask(tabela, where)]
+
+        if set(conjunto) == set(by):
+            resultado = tabela[by + medidas]
+            if by and by != list(conjunto)[:len(by)]:
+                resultado = resultado.sort_values(by, kind='stable')
+            resultado = resultado.reset_index(drop=True)
+        else:
+            # Linhas a reagregar: aditivas somam; distintas têm uma linha por grupo (dimensões fixadas)
+            resultado = _aggregate(tabela, by, {m: (m, 'sum') for m in medidas})
+            resultado = _compact(resultado.reset_index() if by else resultado,
+                                 [m for m in medidas if self.spec.measures[m][1] != 'sum'])
+        resultado.attrs = dict(self.attrs)
+        return resultado
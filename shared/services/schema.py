@@ -0,0 +1,119 @@
+"""
+Esquemas declarativos das views: tipos aplicados uma única vez na ingestão
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+from shared.exceptions.api_exceptions import APISchemaError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ViewSchema:
+    """
+    Tipos das colunas de uma view
+
+    Colunas declaradas que não vierem na resposta são ignoradas; apenas as
+    obrigatórias são validadas. Colunas não declaradas passam sem alteração.
+    """
+    name: str
+    required: Tuple[str, ...] = ()
+    dates: Dict[str, Optional[str]] = field(default_factory=dict)  # coluna -> formato (None: inferido)
+    categories: Tuple[str, ...] = ()
+    integers: Tuple[str, ...] = ()
+    floats: Tuple[str, ...] = ()        # float64: valores monetários não perdem precisão
+    small_floats: Tuple[str, ...] = ()  # float32: medidas como quantidade
+    max_category_ratio: float = 0.5     # acima disso (valores distintos / linhas) a coluna fica como texto
+    partition_by: Optional[str] = None  # coluna de data que ordena as linhas (partições por ano e mês)
+
+    def missing_columns(self, df: pd.DataFrame) -> List[str]:
+        return [col for col in self.required if col not in df.columns]
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Valida e converte os tipos, retornando um novo DataFrame
+
+        Raises:
+            APISchemaError: Se faltar alguma coluna obrigatória
+        """
+        if df is None or df.empty:
+            return df
+
+        faltantes = self.missing_columns(df)
+        if faltantes:
+            raise APISchemaError(f"{self.name}: colunas obrigatórias ausentes: {faltantes}")
+
+        df = df.copy(deep=False)
+
+        for col, formato in self.dates.items():
+            if col in df.columns and not is_datetime64_any_dtype(df[col]):
+                df[col] = pd.to_datetime(df[col], format=formato, errors='coerce')
+
+        for col in self.integers:
+            if col in df.columns:
+                df[col] = self._numeric(df[col], 'integer')
+
+        for col in self.floats:
+            if col in df.columns:
+                df[col] = self._numeric(df[col], None)
+
+        for col in self.small_floats:
+            if col in df.columns:
+                df[col] = self._numeric(df[col], 'float')
+
+        limite = max(1, int(len(df) * self.max_category_ratio))
+        for col in self.categories:
+            if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                if df[col].nunique(dropna=True) <= limite:
+                    df[col] = df[col].astype('category')
+
+        if self.partition_by in df.columns:
+            df = self._sort(df, self.partition_by)
+
+        return df
+
+    def _sort(self, df: pd.DataFrame, col: str) -> pd.DataFrame:
+        """Ordena as linhas pela data (nulas no fim), mantendo a ordem original nos empates"""
+        datas = df[col]
+        if not is_datetime64_any_dtype(datas):
+            return df
+        validas = int(datas.notna().sum())
+        if not datas.iloc[validas:].notna().any() and datas.iloc[:validas].is_monotonic_increasing:
+            return df
+        return df.sort_values(col, kind='stable', na_position='last', ignore_index=True)
+
+    def _numeric(self, serie: pd.Series, downcast: Optional[str]) -> pd.Series:
+        """Converte para número; colunas com texto não numérico ficam como estão"""
+        try:
+            convertida = serie if is_numeric_dtype(serie) else pd.to_numeric(serie)
+        except (ValueError, TypeError):
+            logger.debug(f"{self.name}.{serie.name}: valores não numéricos, coluna mantida")
+            return serie
+        if downcast:
+            return pd.to_numeric(convertida, downcast=downcast)
+        return convertida.astype('float64')
+
+
+class SchemaRegistry:
+    """Esquemas por nome de view"""
+
+    def __init__(self, schemas: Iterable[ViewSchema] = ()):
+        self._schemas: Dict[str, ViewSchema] = {}
+        for schema in schemas:
+            self.register(schema)
+
+    def register(self, schema: ViewSchema) -> None:
+        self._schemas[schema.name] = schema
+
+    def get(self, view: str) -> Optional[ViewSchema]:
+        return self._schemas.get(view)
+
+    def apply(self, view: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Aplica o esquema da view (views sem esquema passam sem alteração)"""
+        schema = self.get(view)
+        if schema is None:
+            return df
+        return schema.apply(df)
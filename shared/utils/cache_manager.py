@@ -1,29 +1,380 @@
-import streamlit as st
+"""
+Cache em memória compartilhado entre sessões para resultados de funções
+"""
+import os
+import sys
+import time
+import pickle
+import hashlib
+import inspect
+import logging
+import threading
+import weakref
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime
 from functools import wraps
-from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+import numpy as np
+import pandas as pd
+from shared.cache.dataset_store import dataset_store, frame_signature, lineage
+from shared.cache.stats import age_summary, hit_ratio, register_cache
 
-def cache_data(ttl_seconds=3600):
-    """Decorator para cache de dados com TTL"""
+logger = logging.getLogger(__name__)
+
+
+class UnhashableArgument(TypeError):
+    """Argumento sem representação estável para compor a chave do cache"""
+
+
+# Hash de conteúdo por DataFrame vivo (id -> referência fraca, assinatura, hash),
+# válido enquanto os buffers não mudarem; DataFrames não são hasheáveis
+_frame_hashes: Dict[int, tuple] = {}
+_frame_hashes_lock = threading.Lock()
+
+
+def _forget_frame(chave: int, referencia: weakref.ref) -> None:
+    with _frame_hashes_lock:
+        memo = _frame_hashes.get(chave)
+        if memo is not None and memo[0] is referencia:
+            del _frame_hashes[chave]
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Identificador estável do conteúdo de um DataFrame
+
+    Referências intactas a datasets do dataset_store usam a versão do dataset
+    (custo O(colunas)); os demais são identificados pelo hash do conteúdo,
+    calculado uma vez por objeto.
+    """
+    versao = dataset_store.fingerprint(df)
+    if versao is not None:
+        return f"dataset:{versao}"
+
+    assinatura = frame_signature(df)
+    if assinatura is not None:
+        with _frame_hashes_lock:
+            memo = _frame_hashes.get(id(df))
+        if memo is not None and memo[0]() is df and memo[1] == assinatura:
+            return memo[2]
+
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(repr((list(df.columns), [str(t) for t in df.dtypes])).encode())
+    hasher.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest = f"frame:{hasher.hexdigest()}"
+
+    if assinatura is not None:
+        chave = id(df)
+        referencia = weakref.ref(df, lambda ref: _forget_frame(chave, ref))
+        with _frame_hashes_lock:
+            _frame_hashes[chave] = (referencia, assinatura, digest)
+    return digest
+
+
+def stable_hash(value: Any) -> str:
+    """
+    Hash estável entre sessões e execuções para compor chaves de cache
+
+    Raises:
+        UnhashableArgument: Se o valor não tiver representação estável
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    _feed(hasher, value)
+    return hasher.hexdigest()
+
+
+def _feed(hasher, value: Any) -> None:
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        hasher.update(f"{type(value).__name__}:{value!r};".encode())
+    elif isinstance(value, pd.DataFrame):
+        hasher.update(f"df:{frame_fingerprint(value)};".encode())
+    elif isinstance(value, pd.Series):
+        hasher.update(f"series:{value.name!r}:{value.dtype};".encode())
+        hasher.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        hasher.update(f"nd:{value.dtype}:{value.shape};".encode())
+        hasher.update(np.ascontiguousarray(value).tobytes() if value.dtype != object else pickle.dumps(value))
+    elif isinstance(value, (datetime, date, pd.Timestamp)):
+        hasher.update(f"dt:{value.isoformat()};".encode())
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f"{type(value).__name__}[{len(value)}];".encode())
+        for item in value:
+            _feed(hasher, item)
+    elif isinstance(value, dict):
+        hasher.update(f"dict[{len(value)}];".encode())
+        for chave in sorted(value, key=stable_hash):
+            _feed(hasher, chave)
+            _feed(hasher, value[chave])
+    elif isinstance(value, (set, frozenset)):
+        hasher.update(f"set:{','.join(sorted(stable_hash(v) for v in value))};".encode())
+    else:
+        try:
+            hasher.update(f"obj:{type(value).__qualname__};".encode() + pickle.dumps(value, protocol=4))
+        except Exception as e:
+            raise UnhashableArgument(f"{type(value).__name__} não pode compor a chave do cache: {e}")
+
+
+def dependencies(value: Any) -> Dict[str, int]:
+    """
+    Datasets ('tenant/view' -> versão) de que os DataFrames e Series em
+    value derivam, segundo a linhagem em df.attrs
+
+    Se o mesmo dataset aparece em versões diferentes, vale a mais antiga.
+    """
+    deps: Dict[str, int] = {}
+
+    def visitar(item: Any) -> None:
+        if isinstance(item, (pd.DataFrame, pd.Series)):
+            for nome, versao in lineage(item).items():
+                deps[nome] = min(versao, deps.get(nome, versao))
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            for elemento in item:
+                visitar(elemento)
+        elif isinstance(item, dict):
+            for elemento in item.values():
+                visitar(elemento)
+
+    visitar(value)
+    return deps
+
+
+def estimate_size(value: Any) -> int:
+    """Memória aproximada ocupada por um resultado"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(getattr(value, 'nbytes', None), (int, np.integer)):
+        # Arrays numpy e estruturas que informam a própria ocupação (ex.: RollupCube)
+        return int(value.nbytes)
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    try:
+        return len(pickle.dumps(value, protocol=4))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'created', 'expires', 'namespace', 'deps')
+
+    def __init__(self, value: Any, size: int, expires: float, namespace: str, deps: Dict[str, int]):
+        self.value = value
+        self.created = time.time()
+        self.size = size
+        self.expires = expires
+        self.namespace = namespace
+        self.deps = deps
+
+
+class MemoryCache:
+    """
+    Cache LRU do processo, limitado por memória, com TTL e namespaces
+
+    Chamadas simultâneas com a mesma chave executam a função uma única vez.
+    Cada entrada guarda as versões dos datasets de que depende: quando um
+    dataset muda de versão (invalidate_dataset), só essas entradas saem.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        if max_bytes is None:
+            max_bytes = int(os.getenv('MEMORY_CACHE_MAX_BYTES', str(512 * 1024 ** 2)))
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._pending: Dict[str, threading.Event] = {}
+        self._bytes = 0
+        self._latest: Dict[str, int] = {}  # última versão conhecida de cada dataset
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'invalidated': 0}
+        # Os mesmos contadores por namespace, para calibrar o TTL de cada função
+        self._namespace_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(self.stats, 0))
+
+    def get_or_compute(self, key: str, namespace: str, ttl: float, compute: Callable[[], Any],
+                       deps: Optional[Dict[str, int]] = None) -> Any:
+        """
+        Retorna o valor em cache ou calcula, guarda e retorna
+
+        Args:
+            deps: Versões dos datasets usados no cálculo ('tenant/view' -> versão)
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    if entry.expires > time.time():
+                        self._entries.move_to_end(key)
+                        self._count('hits', namespace)
+                        return entry.value
+                    self._drop(key)
+                    self._count('expired', namespace)
+
+                evento = self._pending.get(key)
+                if evento is None:
+                    evento = self._pending[key] = threading.Event()
+                    self._count('misses', namespace)
+                    break
+            # Outra sessão está calculando a mesma chave
+            evento.wait()
+
+        try:
+            value = compute()
+            # None e DataFrame vazio são os retornos de erro do projeto: não ficam guardados
+            if value is not None and not (isinstance(value, pd.DataFrame) and value.empty):
+                self.set(key, value, namespace, ttl, deps)
+            return value
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            evento.set()
+
+    def set(self, key: str, value: Any, namespace: str, ttl: float,
+            deps: Optional[Dict[str, int]] = None) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            logger.debug(f"Resultado de {namespace} ({size} bytes) maior que o cache; não guardado")
+            return
+        deps = deps or {}
+        with self._lock:
+            # Calculado sobre uma versão já substituída enquanto rodava: não guarda
+            if any(versao < self._latest.get(nome, versao) for nome, versao in deps.items()):
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(value, size, time.time() + ttl, namespace, deps)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                antiga, descartada = next(iter(self._entries.items()))
+                self._drop(antiga)
+                self._count('evictions', descartada.namespace)
+
+    def invalidate(self, namespace: Optional[str] = None) -> int:
+        """Remove as entradas do namespace (todas, se None); retorna quantas"""
+        with self._lock:
+            chaves = [k for k, e in self._entries.items() if namespace is None or e.namespace == namespace]
+            for chave in chaves:
+                self._drop(chave)
+            return len(chaves)
+
+    def invalidate_dataset(self, dataset: str, version: Optional[int] = None) -> int:
+        """
+        Remove as entradas que dependem do dataset
+
+        Args:
+            dataset: Nome do dataset ('tenant/view')
+            version: Versão nova; entradas já nessa versão são mantidas.
+                None remove todas as dependentes (dataset descartado)
+
+        Returns:
+            int: Quantidade de entradas removidas
+        """
+        with self._lock:
+            if version is not None:
+                self._latest[dataset] = max(version, self._latest.get(dataset, version))
+            chaves = [
+                k for k, e in self._entries.items()
+                if dataset in e.deps and (version is None or e.deps[dataset] < version)
+            ]
+            for chave in chaves:
+                self._count('invalidated', self._entries[chave].namespace)
+                self._drop(chave)
+        if chaves:
+            logger.debug(f"{len(chaves)} resultados derivados de {dataset} descartados")
+        return len(chaves)
+
+    def info(self) -> Dict[str, Any]:
+        """Ocupação, contadores e idade das entradas"""
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                    'hit_ratio': hit_ratio(self.stats['hits'], self.stats['misses']), **self.stats,
+                    **age_summary(e.created for e in self._entries.values())}
+
+    def namespace_info(self) -> Dict[str, Dict[str, Any]]:
+        """info() separado por namespace (função decorada)"""
+        with self._lock:
+            entradas = defaultdict(list)
+            for entry in self._entries.values():
+                entradas[entry.namespace].append(entry)
+            return {
+                namespace: {
+                    'entries': len(entradas[namespace]),
+                    'bytes': sum(e.size for e in entradas[namespace]),
+                    'hit_ratio': hit_ratio(stats['hits'], stats['misses']),
+                    **stats,
+                    **age_summary(e.created for e in entradas[namespace]),
+                }
+                for namespace, stats in self._namespace_stats.items()
+            }
+
+    def _count(self, contador: str, namespace: str) -> None:
+        # Chamado com self._lock adquirido
+        self.stats[contador] += 1
+        self._namespace_stats[namespace][contador] += 1
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+
+# Instância global: resultados compartilhados por todas as sessões
+memory_cache = MemoryCache()
+dataset_store.subscribe(memory_cache.invalidate_dataset)
+register_cache('memory', memory_cache.info)
+
+
+def call_key(func: Callable, assinatura: inspect.Signature, args: tuple, kwargs: dict) -> str:
+    """
+    Chave estável de uma chamada: função e argumentos, exceto os iniciados por "_"
+
+    Raises:
+        UnhashableArgument: Se algum argumento não tiver representação estável
+    """
+    argumentos = assinatura.bind(*args, **kwargs)
+    argumentos.apply_defaults()
+    return stable_hash((
+        func.__module__, func.__qualname__,
+        [(k, v) for k, v in argumentos.arguments.items() if not k.startswith('_')]
+    ))
+
+
+def cache_data(ttl_seconds=3600, namespace: Optional[str] = None, cache: Optional[MemoryCache] = None):
+    """
+    Decorator para cache de dados com TTL, compartilhado entre sessões
+
+    A chave é um hash estável dos argumentos; DataFrames vindos do
+    dataset_store são identificados pela versão do dataset. Como no
+    st.cache_data, parâmetros iniciados por "_" não entram na chave. O
+    resultado é descartado quando sai nova versão de algum dataset de que
+    os DataFrames recebidos derivam.
+    DataFrames são devolvidos como cópias rasas: não altere valores no lugar.
+
+    Args:
+        ttl_seconds: Validade dos resultados
+        namespace: Grupo para invalidação (padrão: módulo.função)
+        cache: Cache a usar (padrão: memory_cache)
+    """
     def decorator(func):
+        nome = namespace or f"{func.__module__}.{func.__qualname__}"
+        assinatura = inspect.signature(func)
+        alvo = cache or memory_cache
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Criar chave única para o cache
-            cache_key = f"{func.__name__}_{str(args)}_{str(kwargs)}"
-            
-            # Verificar se dados estão em cache e ainda são válidos
-            if cache_key in st.session_state:
-                data, timestamp = st.session_state[cache_key]
-                if datetime.now() - timestamp < timedelta(seconds=ttl_seconds):
-                    return data
-            
-            # Se não estiver em cache ou expirou, executar função
-            result = func(*args, **kwargs)
-            st.session_state[cache_key] = (result, datetime.now())
+            try:
+                chave = call_key(func, assinatura, args, kwargs)
+            except UnhashableArgument as e:
+                logger.debug(f"{nome} executado sem cache: {str(e)}")
+                return func(*args, **kwargs)
+
+            result = alvo.get_or_compute(chave, nome, ttl_seconds, lambda: func(*args, **kwargs),
+                                         deps=dependencies((args, kwargs)))
+            if isinstance(result, pd.DataFrame):
+                return result.copy(deep=False)
             return result
+
+        wrapper.clear = lambda: alvo.invalidate(nome)
         return wrapper
     return decorator
 
-def clear_cache():
-    """Limpa todo o cache"""
-    for key in list(st.session_state.keys()):
-        del st.session_state[key] 
\ No newline at end of file
+def clear_cache(namespace: Optional[str] = None):
+    """Limpa o cache de resultados (apenas do namespace, se informado)"""
+    return memory_cache.invalidate(namespace)
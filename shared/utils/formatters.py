@@ -1,6 +1,7 @@
 import locale
 from typing import Union, Optional, Tuple
 from datetime import datetime
+import pandas as pd
 
 # Configurar locale para formatação de moeda
 locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
@@ -14,6 +15,16 @@ def format_currency(value: Union[float, int]) -> str:
     except:
         return f"R$ 0,00"
 
+def format_currency_series(values: pd.Series) -> pd.Series:
+    """Formata uma coluna inteira para moeda brasileira (mesmo resultado de format_currency)"""
+    numeros = pd.Series(values, dtype='float64').fillna(0).map('{:,.2f}'.format).astype(str)
+    return 'R$ ' + numeros.str.translate(str.maketrans({',': '.', '.': ','}))
+
+def format_percentage_series(values: pd.Series, decimals: int = 1) -> pd.Series:
+    """Formata uma coluna inteira de variações percentuais com sinal (ex.: +1.234,5%)"""
+    numeros = pd.Series(values, dtype='float64').map(f'{{:+,.{decimals}f}}%'.format).astype(str)
+    return numeros.str.translate(str.maketrans({',': '.', '.': ','}))
+
 def format_percentage(value: float, decimals: int = 1) -> str:
     """Formata valor para percentual"""
     if value is None:
@@ -0,0 +1,85 @@
+"""
+Nós de gráficos hierárquicos (treemap/sunburst)
+
+Monta ids, labels, parents e values de todos os níveis a partir de um único
+agrupamento pelas folhas; os níveis superiores são somas das folhas e os
+textos são formatados por coluna, sem percorrer os grupos em Python.
+
+    nos = build_hierarchy(df, ['regiao', 'uf', 'cidade'], 'valorfaturado',
+                          prefixes=['r', 'u', 'c'])
+    go.Treemap(ids=nos['ids'], labels=nos['labels'], parents=nos['parents'],
+               values=nos['values'], branchvalues='total')
+"""
+from typing import Callable, Optional, Sequence, Union
+import pandas as pd
+from shared.utils.formatters import format_currency_series
+
+NODE_COLUMNS = ['ids', 'labels', 'parents', 'values', 'level']
+
+
+def _caminho(chaves: Sequence[pd.Series], prefixo: str) -> pd.Series:
+    """Id do nó: prefixo do nível seguido das chaves do caminho (ex.: u_Sul_RS)"""
+    ids = prefixo + '_' + chaves[0]
+    for chave in chaves[1:]:
+        ids = ids + '_' + chave
+    return ids
+
+
+def build_hierarchy(df: pd.DataFrame,
+                    path: Sequence[str],
+                    value: str,
+                    agg: Union[str, Callable] = 'sum',
+                    prefixes: Optional[Sequence[str]] = None,
+                    formatter: Optional[Callable[[pd.Series], pd.Series]] = None,
+                    decimals: Optional[int] = 2) -> pd.DataFrame:
+    """
+    Nós de um treemap/sunburst com branchvalues='total'
+
+    Args:
+        df: Linhas de origem (ou já agregadas por path)
+        path: Colunas dos níveis, da raiz para as folhas
+        value: Coluna do valor
+        agg: Agregação das linhas em cada folha (ex.: 'sum', 'nunique')
+        prefixes: Prefixo dos ids de cada nível (padrão: nome da coluna)
+        formatter: Formata a coluna de valores para o label (padrão: moeda)
+        decimals: Arredondamento dos valores das folhas (None: sem arredondar)
+
+    Returns:
+        pd.DataFrame: Colunas ids, labels, parents, values e level, nível a
+        nível, com os grupos de cada nível ordenados pelas chaves. Linhas com
+        chave ou valor nulo são descartadas; o valor de cada nó acima das
+        folhas é a soma dos filhos.
+    """
+    path = list(path)
+    prefixes = list(prefixes) if prefixes else path
+    if len(prefixes) != len(path):
+        raise ValueError("prefixes deve ter um item por nível de path")
+    formatter = formatter or format_currency_series
+
+    dados = df.dropna(subset=path + [value])
+    folhas = dados.groupby(path, observed=True, sort=True)[value].agg(agg)
+    if decimals is not None:
+        folhas = folhas.round(decimals)
+    folhas = folhas.reset_index()
+
+    niveis = []
+    for profundidade in range(len(path)):
+        colunas = path[:profundidade + 1]
+        if profundidade == len(path) - 1:
+            nivel = folhas
+        else:
+            nivel = folhas.groupby(colunas, observed=True, sort=True)[value].sum().reset_index()
+
+        chaves = [nivel[coluna].astype(str).reset_index(drop=True) for coluna in colunas]
+        valores = nivel[value].reset_index(drop=True)
+        niveis.append(pd.DataFrame({
+            'ids': _caminho(chaves, prefixes[profundidade]),
+            'labels': chaves[-1] + '<br>' + formatter(valores),
+            'parents': _caminho(chaves[:-1], prefixes[profundidade - 1]) if profundidade else '',
+            'values': valores,
+            'level': profundidade,
+        }))
+
+    if not niveis:
+        return pd.DataFrame(columns=NODE_COLUMNS)
+    return pd.concat(niveis, ignore_index=True)
@@ -0,0 +1,125 @@
+"""
+Matriz ano × período para gráficos de linha do tempo
+
+Soma os valores por ano e período (mês, semana ou dia do ano) em uma única
+passada (np.bincount sobre a posição ano/período), sem agrupar ano a ano.
+As variantes acumulada e de variação sobre o ano anterior são operações
+sobre a matriz, e os textos de hover são formatados de uma vez.
+
+    matriz = timeline_matrix(df, 'data', 'valorfaturado', anos, grain='month')
+    acumulado = timeline_matrix(df, 'data', 'valorfaturado', anos, cumulative=True)
+    variacao = timeline_matrix(df, 'data', 'valorfaturado', anos, delta='pct')
+    hover = timeline_hover(matriz, 'Faturamento')
+"""
+from typing import Callable, Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from plotly.colors import qualitative
+from shared.cache.partitions import select_period
+from shared.utils.formatters import format_currency_series
+
+# Períodos por ano de cada granularidade e rótulo do período no hover
+GRAINS = {'month': 12, 'week': 53, 'day': 366}
+GRAIN_LABELS = {'month': 'Mês', 'week': 'Semana', 'day': 'Dia'}
+DELTAS = (None, 'abs', 'pct')
+
+YEAR_PALETTE = qualitative.D3
+
+
+def _periodo(datas: pd.Series, grain: str) -> np.ndarray:
+    """Período de 1 a GRAINS[grain] dentro do ano"""
+    if grain == 'month':
+        return datas.dt.month.to_numpy()
+    if grain == 'week':
+        return ((datas.dt.dayofyear - 1) // 7 + 1).to_numpy()
+    return datas.dt.dayofyear.to_numpy()
+
+
+def timeline_matrix(df: pd.DataFrame,
+                    date: str,
+                    value: str,
+                    years: Optional[Iterable[int]] = None,
+                    grain: str = 'month',
+                    cumulative: bool = False,
+                    delta: Optional[str] = None) -> pd.DataFrame:
+    """
+    Soma de value por ano (linhas) e período do ano (colunas 1..n)
+
+    Args:
+        df: Linhas de origem
+        date: Coluna de datas
+        value: Coluna somada
+        years: Anos das linhas (None: todos os anos com dados)
+        grain: 'month' (1-12), 'week' (1-53, blocos de 7 dias desde 1º de janeiro) ou 'day' (1-366)
+        cumulative: Acumula os valores ao longo do ano
+        delta: 'abs' (diferença) ou 'pct' (variação %) sobre o mesmo período do ano
+            anterior; NaN na variação % sem valor no ano anterior
+
+    Returns:
+        pd.DataFrame: Índice 'ano', colunas de período; períodos sem dados valem 0
+    """
+    if grain not in GRAINS:
+        raise ValueError(f"Granularidade inválida: {grain} (use {list(GRAINS)})")
+    if delta not in DELTAS:
+        raise ValueError(f"Variação inválida: {delta} (use {list(DELTAS[1:])})")
+
+    if years is None:
+        anos = sorted(pd.to_datetime(df[date], errors='coerce').dt.year.dropna().astype(int).unique())
+    else:
+        anos = sorted({int(ano) for ano in years})
+    # A variação precisa do ano anterior de cada ano pedido
+    calculados = sorted(set(anos) | {ano - 1 for ano in anos}) if delta else anos
+
+    linhas = select_period(df, date, anos=calculados)
+    datas = pd.to_datetime(linhas[date], errors='coerce')
+    posicao_ano = np.searchsorted(calculados, datas.dt.year.to_numpy())
+    n = GRAINS[grain]
+    soma = np.bincount(
+        posicao_ano * n + _periodo(datas, grain) - 1,
+        weights=pd.to_numeric(linhas[value], errors='coerce').fillna(0).to_numpy(dtype='float64'),
+        minlength=len(calculados) * n
+    )
+    matriz = pd.DataFrame(
+        soma.reshape(len(calculados), n),
+        index=pd.Index(calculados, name='ano'),
+        columns=pd.RangeIndex(1, n + 1, name=grain)
+    )
+
+    if cumulative:
+        matriz = matriz.cumsum(axis=1)
+    if delta:
+        anterior = matriz.reindex([ano - 1 for ano in anos]).to_numpy()
+        atual = matriz.loc[anos].to_numpy()
+        if delta == 'abs':
+            valores = atual - anterior
+        else:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                valores = np.where(anterior != 0, (atual / anterior - 1) * 100, np.nan)
+        return pd.DataFrame(valores, index=pd.Index(anos, name='ano'), columns=matriz.columns)
+    return matriz.loc[anos]
+
+
+def timeline_hover(matrix: pd.DataFrame,
+                   label: str = 'Faturamento',
+                   formatter: Optional[Callable[[pd.Series], pd.Series]] = None) -> np.ndarray:
+    """
+    Textos de hover da matriz (mesmo formato linhas × colunas)
+
+    Args:
+        matrix: Resultado de timeline_matrix
+        label: Nome do valor no hover
+        formatter: Formata uma coluna de valores (padrão: moeda)
+    """
+    formatter = formatter or format_currency_series
+    valores = pd.Series(matrix.to_numpy().ravel())
+    textos = formatter(valores).where(valores.notna(), '-')
+    periodo = GRAIN_LABELS.get(matrix.columns.name, 'Período')
+    colunas = pd.Series(np.tile(matrix.columns.astype(str), len(matrix)))
+    hover = periodo + ': ' + colunas + '<br>' + label + ': ' + textos
+    return hover.to_numpy().reshape(matrix.shape)
+
+
+def year_colors(years: Iterable[int]) -> Dict[int, str]:
+    """Cor de cada ano na ordem crescente, repetindo a paleta quando os anos excedem as cores"""
+    anos: List[int] = sorted({int(ano) for ano in years})
+    return {ano: YEAR_PALETTE[i % len(YEAR_PALETTE)] for i, ano in enumerate(anos)}
@@ -0,0 +1,109 @@
+"""
+Testes da invalidação dos caches derivados por versão de dataset
+"""
+import threading
+import unittest
+import plotly.graph_objects as go
+from shared.cache.dataset_store import dataset_store, lineage
+from shared.cache.figure_cache import cached_figure, figure_cache
+from shared.utils.cache_manager import MemoryCache, dependencies, memory_cache
+from modules.comercial.services.synthetic_data import SyntheticDataGenerator
+from modules.comercial.services.aggregates import resumo_territorial
+from modules.comercial.services.kpi_service import calcular_kpis_producao
+
+TENANT = 'TESTE_INVALIDACAO'
+
+class TestCacheInvalidation(unittest.TestCase):
+    """Testes para linhagem e invalidação por dependência"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.frames = SyntheticDataGenerator(seed=3).generate(2000)
+
+    def setUp(self):
+        dataset_store.invalidate(tenant=TENANT)
+        memory_cache.invalidate()
+        figure_cache.invalidate()
+
+    def tearDown(self):
+        dataset_store.invalidate(tenant=TENANT)
+
+    def _carregar(self, view, frame=None):
+        frame = self.frames[view].copy() if frame is None else frame
+        return dataset_store.get(TENANT, view, lambda: frame, force=True)
+
+    def _producao(self):
+        return {
+            'faturamento': self._carregar('CUBO_FATURAMENTO'),
+            'orcamento': self._carregar('ORCAMENTO'),
+            'os': self._carregar('OS'),
+        }
+
+    def test_linhagem_propagada(self):
+        """Testa que a versão acompanha o dataset e os DataFrames derivados"""
+        df = self._carregar('OS')
+        nome = f"{TENANT}/OS"
+        versao = dataset_store.version(TENANT, 'OS')
+        derivado = df[df['status'] == 4].copy()
+        derivado['ano'] = derivado['data'].dt.year
+
+        self.assertEqual(lineage(df), {nome: versao})
+        self.assertEqual(lineage(derivado), {nome: versao})
+
+        novo = self._carregar('OS')
+        self.assertEqual(lineage(novo), {nome: versao + 1})
+        self.assertEqual(dependencies([df, {'x': novo}]), {nome: versao})
+
+    def test_orcamento_invalida_so_kpis(self):
+        """Testa que nova versão do ORCAMENTO descarta os KPIs e mantém o territorial"""
+        producao = self._producao()
+        faturamento = producao['faturamento']
+        calcular_kpis_producao(producao)
+        resumo_territorial(faturamento)
+        entradas = memory_cache.info()['entries']  # índice dos KPIs, territorial e o cubo do faturamento
+
+        self._carregar('ORCAMENTO')  # nova versão do ORCAMENTO
+        self.assertEqual(memory_cache.info()['entries'], entradas - 1)
+
+        calculos = memory_cache.info()['misses']
+        resumo_territorial(faturamento)
+        self.assertEqual(memory_cache.info()['misses'], calculos)
+
+    def test_figura_invalidada(self):
+        """Testa que figuras saem do cache quando o dataset de origem muda"""
+        @cached_figure()
+        def grafico(df):
+            return go.Figure(go.Bar(y=df['valor']))
+
+        grafico(self._carregar('ORCAMENTO'))
+        self.assertEqual(figure_cache.info()['entries'], 1)
+        self._carregar('OS')
+        self.assertEqual(figure_cache.info()['entries'], 1)
+        self._carregar('ORCAMENTO')
+        self.assertEqual(figure_cache.info()['entries'], 0)
+
+    def test_resultado_de_versao_antiga_nao_guardado(self):
+        """Testa que um cálculo iniciado antes da nova versão não entra no cache"""
+        cache = MemoryCache()
+        iniciou, continuar = threading.Event(), threading.Event()
+
+        def calculo():
+            iniciou.set()
+            continuar.wait()
+            return 1
+
+        thread = threading.Thread(target=cache.get_or_compute,
+                                  args=('k', 'n', 60, calculo), kwargs={'deps': {'T/OS': 1}})
+        thread.start()
+        iniciou.wait()
+        cache.invalidate_dataset('T/OS', 2)
+        continuar.set()
+        thread.join()
+        self.assertEqual(cache.info()['entries'], 0)
+
+        cache.set('k', 1, 'n', 60, deps={'T/OS': 2})
+        cache.invalidate_dataset('T/OS', None)
+        self.assertEqual(cache.info()['entries'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
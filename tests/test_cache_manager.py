@@ -0,0 +1,86 @@
+"""
+Testes unitários para o cache em disco
+"""
+import os
+import time
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from shared.cache.cache_manager import CacheManager
+
+class TestCacheManager(unittest.TestCase):
+    """Testes para o CacheManager"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.df = pd.DataFrame({
+            'emissao': pd.date_range('2024-01-01', periods=1000, freq='h'),
+            'uf': pd.Categorical(['SP', 'MG'] * 500),
+            'valorfaturado': np.arange(1000, dtype=float)
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_dataframe_parquet_e_arrow(self):
+        """Testa ida e volta de DataFrames preservando os tipos"""
+        for formato in ('parquet', 'arrow'):
+            cache = CacheManager(cache_dir=os.path.join(self.dir, formato), frame_format=formato)
+            self.assertTrue(cache.set('faturamento', self.df))
+            pd.testing.assert_frame_equal(cache.get('faturamento'), self.df)
+
+    def test_conteudo_json(self):
+        """Testa conteúdo que não é DataFrame"""
+        cache = CacheManager(cache_dir=self.dir)
+        cache.set('kpis', {'taxa': 12.5})
+        self.assertEqual(cache.get('kpis'), {'taxa': 12.5})
+        self.assertIsNone(cache.get('inexistente'))
+
+    def test_ttl_por_chave(self):
+        """Testa validade individual de cada chave"""
+        cache = CacheManager(cache_dir=self.dir, default_ttl=60)
+        cache.set('curta', self.df, ttl=0)
+        cache.set('longa', self.df)
+        self.assertIsNone(cache.get('curta'))
+        self.assertIsNotNone(cache.get('longa'))
+        self.assertEqual(cache.info()['entries'], 1)
+
+    def test_orcamento_lru(self):
+        """Testa descarte do item usado há mais tempo ao exceder o limite"""
+        cache = CacheManager(cache_dir=self.dir)
+        cache.set('a', self.df)
+        tamanho = cache.info()['bytes']
+        cache.max_bytes = int(tamanho * 2.5)
+
+        cache.set('b', self.df)
+        time.sleep(0.01)
+        cache.get('a')  # 'a' passa a ser o mais recente
+        cache.set('c', self.df)
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+        self.assertEqual(cache.info()['evictions'], 1)
+        self.assertLessEqual(cache.info()['bytes'], cache.max_bytes)
+
+    def test_indice_persistente_e_gravacao_atomica(self):
+        """Testa que outra instância enxerga o índice e que não sobram temporários"""
+        cache = CacheManager(cache_dir=self.dir)
+        cache.set('faturamento', self.df)
+        cache.set('faturamento', self.df.head(10))
+
+        nova = CacheManager(cache_dir=self.dir)
+        self.assertEqual(len(nova.get('faturamento')), 10)
+        self.assertFalse([f for f in os.listdir(self.dir) if f.endswith('.tmp')])
+        self.assertEqual(len(os.listdir(self.dir)), 2)  # índice + um arquivo de dados
+
+    def test_item_maior_que_limite(self):
+        """Testa que um item maior que o orçamento não é gravado"""
+        cache = CacheManager(cache_dir=self.dir, max_bytes=100)
+        self.assertFalse(cache.set('grande', self.df))
+        self.assertIsNone(cache.get('grande'))
+
+if __name__ == '__main__':
+    unittest.main()
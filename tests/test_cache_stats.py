@@ -0,0 +1,129 @@
+"""
+Testes unitários para as estatísticas das camadas de cache
+"""
+import json
+import time
+import threading
+import unittest
+import pandas as pd
+from shared.cache import stats
+from shared.cache.dataset_store import DatasetStore
+from shared.services.fingerprint import FingerprintRegistry
+from shared.utils.cache_manager import MemoryCache
+
+
+class _Resposta:
+    """Resposta HTTP mínima para o FingerprintRegistry"""
+
+    def __init__(self, registros, status_code=200):
+        self.status_code = status_code
+        self.headers = {}
+        self._corpo = json.dumps(registros).encode()
+
+    def iter_content(self, chunk_size):
+        for inicio in range(0, len(self._corpo), chunk_size):
+            yield self._corpo[inicio:inicio + chunk_size]
+
+    def close(self):
+        pass
+
+
+class TestCacheStats(unittest.TestCase):
+    """Testes para os contadores de cada camada e o registro central"""
+
+    def setUp(self):
+        self._camadas = dict(stats._layers)
+
+    def tearDown(self):
+        stats._layers.clear()
+        stats._layers.update(self._camadas)
+
+    def test_formato_comum_das_camadas(self):
+        """Testa campos comuns, taxa de acerto calculada e contadores próprios"""
+        stats.register_cache('teste', lambda: {'entries': 2, 'hits': 3, 'misses': 1, 'writes': 5})
+        dados = stats.cache_stats()['teste']
+
+        self.assertEqual(list(dados)[:len(stats.LAYER_FIELDS)], list(stats.LAYER_FIELDS))
+        self.assertEqual(dados['hit_ratio'], 0.75)
+        self.assertIsNone(dados['max_bytes'])
+        self.assertEqual(dados['writes'], 5)
+        self.assertIn('teste', stats.stats_frame().index)
+
+    def test_camada_com_erro_nao_interrompe(self):
+        """Testa que uma camada com erro não impede a leitura das demais"""
+        def quebrada():
+            raise RuntimeError('indisponível')
+        stats.register_cache('quebrada', quebrada)
+        stats.register_cache('ok', lambda: {'hits': 1, 'misses': 0})
+
+        resultado = stats.cache_stats()
+        self.assertEqual(resultado['quebrada'], {'error': 'indisponível'})
+        self.assertEqual(resultado['ok']['hit_ratio'], 1.0)
+
+    def test_memoria_por_namespace(self):
+        """Testa acertos, falhas, descartes e idade por namespace"""
+        cache = MemoryCache(max_bytes=10_000)
+        cache.get_or_compute('a', 'vendas', 60, lambda: 'x' * 100)
+        cache.get_or_compute('a', 'vendas', 60, lambda: 'x' * 100)
+        cache.get_or_compute('b', 'metas', 60, lambda: 'y' * 100)
+        cache.get_or_compute('c', 'metas', 60, lambda: 'z' * 9_950)
+
+        info = cache.info()
+        self.assertEqual((info['hits'], info['misses']), (1, 3))
+        self.assertGreater(info['evictions'], 0)
+        self.assertGreaterEqual(info['oldest_age_seconds'], 0)
+
+        namespaces = cache.namespace_info()
+        self.assertEqual(namespaces['vendas']['hit_ratio'], 0.5)
+        self.assertEqual(namespaces['vendas']['evictions'], 1)
+        self.assertEqual(namespaces['metas']['misses'], 2)
+
+    def test_datasets_frescos_vencidos_e_aguardados(self):
+        """Testa a contagem de leituras do DatasetStore por tipo"""
+        store = DatasetStore(ttl_seconds=0.1)
+        liberar = threading.Event()
+
+        def loader():
+            liberar.wait(1)
+            return pd.DataFrame({'os': [1]})
+
+        primeira = threading.Thread(target=store.get, args=('T', 'OS', loader))
+        primeira.start()
+        time.sleep(0.05)
+        segunda = threading.Thread(target=store.get, args=('T', 'OS', loader))
+        segunda.start()
+        time.sleep(0.05)
+        liberar.set()
+        primeira.join()
+        segunda.join()
+
+        store.get('T', 'OS', loader)
+        time.sleep(0.15)
+        store.get('T', 'OS', loader)
+
+        resumo = store.summary()
+        self.assertEqual(resumo['misses'], 1)
+        self.assertEqual(resumo['waits'], 1)
+        self.assertEqual(resumo['hits'], 1)
+        self.assertEqual(resumo['stale'], 1)
+        self.assertEqual(resumo['refreshes'], 1)
+        self.assertEqual(resumo['entries'], 1)
+
+    def test_respostas_http_reaproveitadas(self):
+        """Testa a contagem de respostas 304, inalteradas e alteradas"""
+        registry = FingerprintRegistry()
+        registry.read_frame('OS', _Resposta([{'os': 1}]))
+        registry.read_frame('OS', _Resposta([{'os': 1}]))
+        registry.read_frame('OS', _Resposta([], status_code=304))
+        registry.read_frame('OS', _Resposta([{'os': 2}]))
+
+        info = registry.info()
+        self.assertEqual(info['changed'], 2)
+        self.assertEqual(info['unchanged'], 1)
+        self.assertEqual(info['not_modified'], 1)
+        self.assertEqual(info['hit_ratio'], 0.5)
+        self.assertEqual(info['entries'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
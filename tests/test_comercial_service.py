@@ -1,10 +1,13 @@
 """
 Testes unitários para o serviço comercial
 """
+import json
 import unittest
 from unittest.mock import patch, MagicMock
 import pandas as pd
-from modules.comercial.services.api_service import ComercialAPIService
+from modules.comercial.services.api_service import (
+    ComercialAPIService, powerbi_retry, powerbi_fingerprints
+)
 from shared.exceptions.api_exceptions import *
 
 class TestComercialService(unittest.TestCase):
@@ -43,4 +46,87 @@ class TestComercialService(unittest.TestCase):
         # Segundo acesso (deve usar cache)
         data2 = self.service.get_data()
         
-        self.assertTrue(data1.equals(data2)) 
\ No newline at end of file
+        self.assertTrue(data1.equals(data2))
+
+
+FATURAMENTO = [{'emissao': '2024-01-05', 'valorfaturado': 100.0, 'codcli': 1, 'uf': 'SP'}]
+
+class TestComercialGetDataRetry(unittest.TestCase):
+    """Testes para as retentativas de ComercialAPIService.get_data"""
+    
+    def setUp(self):
+        powerbi_retry.reset()
+        powerbi_fingerprints.invalidate()
+        self.service = ComercialAPIService()
+        self.service.session = MagicMock()
+        
+    def _response(self, status_code, payload=None, text='', headers=None):
+        response = MagicMock()
+        response.status_code = status_code
+        response.headers = headers or {}
+        response.text = text
+        response.iter_content.return_value = [json.dumps(payload).encode()] if payload else []
+        return response
+    
+    @patch.object(powerbi_retry, '_sleep')
+    def test_caminho_feliz_sem_limpeza_de_sessao(self, mock_sleep):
+        """Testa que uma requisição bem-sucedida não limpa a sessão nem espera"""
+        self.service.session.get.return_value = self._response(200, FATURAMENTO)
+        
+        result = self.service.get_data("CUBO_FATURAMENTO")
+        
+        self.assertEqual(len(result), 1)
+        self.assertEqual(self.service.session.get.call_count, 1)
+        mock_sleep.assert_not_called()
+    
+    @patch.object(powerbi_retry, '_sleep')
+    def test_limpa_sessao_apenas_no_erro_dm(self, mock_sleep):
+        """Testa que clear-session/refresh só são chamados após o erro de DM"""
+        self.service.session.get.side_effect = [
+            self._response(500, text='A component named DM already exists'),
+            self._response(200),  # clear-session
+            self._response(200),  # refresh
+            self._response(200, [{'os': 1, 'data': '2024-01-05', 'status': 4}])
+        ]
+        
+        result = self.service.get_data("OS")
+        
+        self.assertEqual(len(result), 1)
+        urls = [c.args[0] for c in self.service.session.get.call_args_list]
+        self.assertTrue(urls[1].endswith('/POWERBI/clear-session'))
+        self.assertTrue(urls[2].endswith('/POWERBI/refresh'))
+        self.assertEqual(self.service.get_retry_stats()['OS']['retries'], 1)
+    
+    @patch.object(powerbi_retry, '_sleep')
+    def test_resposta_inalterada_reaproveita_dataframe(self, mock_sleep):
+        """Testa ETag condicional e hash do conteúdo"""
+        self.service.session.get.side_effect = [
+            self._response(200, FATURAMENTO, headers={'ETag': '"v1"'}),
+            self._response(304),
+            self._response(200, FATURAMENTO)
+        ]
+        
+        primeiro = self.service.get_data("CUBO_FATURAMENTO")
+        segundo = self.service.get_data("CUBO_FATURAMENTO")
+        terceiro = self.service.get_data("CUBO_FATURAMENTO")
+        
+        chamadas = self.service.session.get.call_args_list
+        self.assertNotIn('&_=', chamadas[0].args[0])
+        self.assertEqual(chamadas[1].kwargs['headers'], {'If-None-Match': '"v1"'})
+        self.assertIs(segundo, primeiro)
+        self.assertIs(terceiro, primeiro)
+    
+    @patch.object(powerbi_retry, '_sleep')
+    def test_esquema_aplicado_na_ingestao(self, mock_sleep):
+        """Testa tipos convertidos na leitura e falha sem retentativa se faltar coluna"""
+        self.service.session.get.return_value = self._response(200, FATURAMENTO)
+        result = self.service.get_data("CUBO_FATURAMENTO")
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(result['emissao']))
+        
+        powerbi_fingerprints.invalidate()
+        self.service.session.get.reset_mock()
+        self.service.session.get.return_value = self._response(200, [{'valor': 100}])
+        result = self.service.get_data("CUBO_FATURAMENTO")
+        self.assertTrue(result.empty)
+        self.assertEqual(self.service.session.get.call_count, 1)
+
@@ -0,0 +1,159 @@
+"""
+Testes unitários para o armazenamento compartilhado de datasets
+"""
+import time
+import threading
+import unittest
+import pandas as pd
+from shared.cache.dataset_store import DatasetStore
+
+class TestDatasetStore(unittest.TestCase):
+    """Testes para o DatasetStore"""
+
+    def setUp(self):
+        self.store = DatasetStore(ttl_seconds=60)
+        self.chamadas = 0
+
+    def _loader(self, atraso=0.0):
+        def load():
+            self.chamadas += 1
+            time.sleep(atraso)
+            return pd.DataFrame({'codcli': [1, 2, 3], 'valorfaturado': [10.0, 20.0, 30.0]})
+        return load
+
+    def test_buscas_simultaneas_viram_uma(self):
+        """Testa que dez sessões simultâneas causam uma única busca"""
+        resultados = []
+        loader = self._loader(atraso=0.2)
+
+        def sessao():
+            resultados.append(self.store.get('TECNOLIFE', 'CUBO_FATURAMENTO', loader))
+
+        threads = [threading.Thread(target=sessao) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(self.chamadas, 1)
+        self.assertEqual(len(resultados), 10)
+        self.assertTrue(all(len(df) == 3 for df in resultados))
+
+    def test_referencias_isoladas_por_coluna(self):
+        """Testa que criar colunas em uma sessão não afeta as demais"""
+        df1 = self.store.get('TECNOLIFE', 'CUBO_FATURAMENTO', self._loader())
+        df1['ano'] = 2024
+        df2 = self.store.get('TECNOLIFE', 'CUBO_FATURAMENTO', self._loader())
+
+        self.assertEqual(self.chamadas, 1)
+        self.assertNotIn('ano', df2.columns)
+
+    def test_chave_por_tenant_e_view(self):
+        """Testa que tenants e views diferentes têm datasets separados"""
+        self.store.get('A', 'CUBO_FATURAMENTO', self._loader())
+        self.store.get('B', 'CUBO_FATURAMENTO', self._loader())
+        self.store.get('A', 'OS', self._loader())
+        self.assertEqual(self.chamadas, 3)
+
+    def test_vazio_nao_e_guardado(self):
+        """Testa que uma falha (DataFrame vazio) não fica em memória"""
+        self.store.get('TECNOLIFE', 'OS', lambda: pd.DataFrame())
+        self.store.get('TECNOLIFE', 'OS', self._loader())
+        self.assertEqual(self.chamadas, 1)
+
+    def test_erro_propagado_para_quem_aguarda(self):
+        """Testa que o erro da busca chega a todas as sessões que aguardavam"""
+        erros = []
+
+        def loader():
+            time.sleep(0.1)
+            raise RuntimeError('backend fora')
+
+        def sessao():
+            try:
+                self.store.get('TECNOLIFE', 'OS', loader)
+            except RuntimeError as e:
+                erros.append(e)
+
+        threads = [threading.Thread(target=sessao) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(erros), 3)
+
+    def test_expiracao_e_invalidacao(self):
+        """Testa TTL e invalidação explícita"""
+        store = DatasetStore(ttl_seconds=0, max_stale_seconds=0)
+        store.get('TECNOLIFE', 'OS', self._loader())
+        store.get('TECNOLIFE', 'OS', self._loader())
+        self.assertEqual(self.chamadas, 2)
+
+        self.store.get('TECNOLIFE', 'OS', self._loader())
+        self.store.invalidate(view='OS')
+        self.store.get('TECNOLIFE', 'OS', self._loader())
+        self.assertEqual(self.chamadas, 4)
+
+    def test_versao_mantida_para_mesmo_objeto(self):
+        """Testa que a versão só muda quando o loader devolve um DataFrame novo"""
+        store = DatasetStore(ttl_seconds=0, max_stale_seconds=0)
+        frame = pd.DataFrame({'a': [1]})
+        store.get('TECNOLIFE', 'OS', lambda: frame)
+        store.get('TECNOLIFE', 'OS', lambda: frame)
+        self.assertEqual(store.version('TECNOLIFE', 'OS'), 1)
+
+        store.get('TECNOLIFE', 'OS', lambda: pd.DataFrame({'a': [2]}))
+        self.assertEqual(store.version('TECNOLIFE', 'OS'), 2)
+
+        store.invalidate()
+        store.get('TECNOLIFE', 'OS', lambda: frame)
+        self.assertEqual(store.version('TECNOLIFE', 'OS'), 3)
+
+    def test_dataset_antigo_servido_durante_atualizacao(self):
+        """Testa que, vencido o intervalo, a leitura não espera pelo backend"""
+        store = DatasetStore(ttl_seconds=0)
+        store.get('TECNOLIFE', 'OS', self._loader())
+
+        inicio = time.time()
+        df = store.get('TECNOLIFE', 'OS', self._loader(atraso=0.3))
+        self.assertLess(time.time() - inicio, 0.2)
+        self.assertEqual(len(df), 3)
+        self.assertTrue(store.freshness('TECNOLIFE', 'OS')['refreshing'])
+
+        time.sleep(0.5)
+        self.assertEqual(self.chamadas, 2)
+        self.assertEqual(store.version('TECNOLIFE', 'OS'), 2)
+        self.assertFalse(store.freshness('TECNOLIFE', 'OS')['refreshing'])
+
+    def test_falha_na_atualizacao_mantem_dataset(self):
+        """Testa que uma falha em segundo plano mantém o último dataset válido"""
+        store = DatasetStore(ttl_seconds=0, retry_seconds=60)
+        store.get('TECNOLIFE', 'OS', self._loader())
+
+        def falha():
+            self.chamadas += 1
+            raise RuntimeError('backend fora')
+
+        store.get('TECNOLIFE', 'OS', falha)
+        time.sleep(0.1)
+        df = store.get('TECNOLIFE', 'OS', falha)  # dentro da espera após a falha: sem nova busca
+
+        self.assertEqual(len(df), 3)
+        self.assertEqual(self.chamadas, 2)
+        situacao = store.freshness('TECNOLIFE', 'OS')
+        self.assertEqual(situacao['last_error'], 'backend fora')
+        self.assertEqual(situacao['version'], 1)
+
+    def test_intervalo_por_view(self):
+        """Testa intervalos de atualização diferentes por view"""
+        store = DatasetStore(ttl_seconds=60)
+        store.set_refresh_interval('OS', 0)
+        store.get('TECNOLIFE', 'OS', self._loader())
+        store.get('TECNOLIFE', 'ORCAMENTO', self._loader())
+
+        self.assertTrue(store.freshness('TECNOLIFE', 'OS')['stale'])
+        self.assertFalse(store.freshness('TECNOLIFE', 'ORCAMENTO')['stale'])
+        self.assertIsNone(store.freshness('TECNOLIFE', 'CLIENTE')['loaded_at'])
+
+if __name__ == '__main__':
+    unittest.main()
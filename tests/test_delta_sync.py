@@ -0,0 +1,154 @@
+"""
+Testes unitários para a sincronização incremental
+"""
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+import pandas as pd
+from unittest.mock import patch
+from modules.comercial.services.delta_sync import DELTA_ATTR, DeltaSync
+
+class TestDeltaSync(unittest.TestCase):
+    """Testes para o DeltaSync"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.full = pd.DataFrame({
+            'nota': [1, 2, 3, 4],
+            'codcli': [10, 10, 20, 30],
+            'item': [1, 1, 1, 1],
+            'emissao': ['2023-01-10', '2024-05-01', '2024-06-01', '2024-06-10'],
+            'valorfaturado': [100.0, 200.0, 300.0, 400.0]
+        })
+        self.chamadas_full = 0
+        self.cortes = []
+        self.delta = pd.DataFrame()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _fetch_full(self):
+        self.chamadas_full += 1
+        return self.full
+
+    def _fetch_since(self, corte):
+        self.cortes.append(corte)
+        if isinstance(self.delta, Exception):
+            raise self.delta
+        return self.delta
+
+    def _sync(self, **kwargs):
+        return DeltaSync('TESTE_CUBO', self._fetch_full, kwargs.pop('fetch_since', self._fetch_since),
+                         storage_dir=self.dir, recheck_days=7, **kwargs)
+
+    def test_primeira_carga_completa_depois_delta(self):
+        """Testa que a primeira carga é completa e a seguinte busca só a janela"""
+        sync = self._sync()
+        df = sync.sync()
+        self.assertEqual(len(df), 4)
+        self.assertEqual(sync.last_sync_stats['mode'], 'full')
+
+        # Nota 4 alterada, nota 5 nova
+        self.delta = pd.DataFrame({
+            'nota': [4, 5], 'codcli': [30, 40], 'item': [1, 1],
+            'emissao': ['2024-06-10', '2024-06-15'], 'valorfaturado': [450.0, 500.0]
+        })
+        df = sync.sync()
+
+        self.assertEqual(self.chamadas_full, 1)
+        self.assertEqual(self.cortes, [datetime(2024, 6, 3)])
+        self.assertEqual(sync.last_sync_stats['mode'], 'delta')
+        self.assertEqual(sync.last_sync_stats['changed_rows'], 2)
+        self.assertEqual(sorted(df['nota']), [1, 2, 3, 4, 5])
+        self.assertEqual(df.loc[df['nota'] == 4, 'valorfaturado'].iloc[0], 450.0)
+
+    def test_janela_remove_linhas_excluidas(self):
+        """Testa que linhas da janela ausentes no delta são removidas"""
+        sync = self._sync()
+        sync.sync()
+        self.delta = self.full.iloc[0:0]
+        df = sync.sync()
+        self.assertEqual(sorted(df['nota']), [1, 2, 3])
+
+    def test_chave_substitui_linha_antiga(self):
+        """Testa que uma linha antes do corte com a mesma chave é substituída"""
+        sync = self._sync()
+        sync.sync()
+        self.delta = pd.DataFrame({
+            'nota': [1], 'codcli': [10], 'item': [1],
+            'emissao': ['2024-06-12'], 'valorfaturado': [999.0]
+        })
+        df = sync.sync()
+        self.assertEqual((df['nota'] == 1).sum(), 1)
+        self.assertEqual(df.loc[df['nota'] == 1, 'valorfaturado'].iloc[0], 999.0)
+
+    def test_chaves_alteradas_marcadas(self):
+        """Testa a marcação das chaves substituídas, removidas e novas"""
+        sync = self._sync()
+        df = sync.sync()
+        self.assertNotIn(DELTA_ATTR, df.attrs)
+
+        # Nota 4 (na janela) removida, nota 5 nova; notas antes do corte ficam de fora
+        self.delta = pd.DataFrame({
+            'nota': [5], 'codcli': [40], 'item': [1],
+            'emissao': ['2024-06-15'], 'valorfaturado': [500.0]
+        })
+        df = sync.sync()
+        self.assertEqual(df.attrs[DELTA_ATTR]['codcli'], frozenset({30, 40}))
+        self.assertEqual(df.attrs[DELTA_ATTR]['nota'], frozenset({4, 5}))
+
+    def test_falha_no_delta_mantem_copia_local(self):
+        """Testa que um erro no delta não apaga a janela"""
+        sync = self._sync()
+        sync.sync()
+        self.delta = RuntimeError('timeout')
+        df = sync.sync()
+        self.assertEqual(len(df), 4)
+        self.assertEqual(sync.last_sync_stats['mode'], 'local')
+
+    def test_backend_sem_filtro(self):
+        """Testa que sem filtro a cópia local é servida até a reconciliação"""
+        sync = self._sync(fetch_since=None)
+        sync.sync()
+        sync.sync()
+        self.assertEqual(self.chamadas_full, 1)
+
+        sync = self._sync(fetch_since=None, reconcile_hours=0)
+        sync.sync()
+        self.assertEqual(self.chamadas_full, 2)
+
+    def test_sem_alteracao_retorna_mesmo_objeto(self):
+        """Testa que sem alteração o resultado anterior é retornado sem reler a cópia local"""
+        transformados = []
+
+        def transform(df):
+            transformados.append(len(df))
+            return df.copy(deep=False)
+
+        sync = self._sync(transform=transform)
+        df = sync.sync()
+        # Delta com as mesmas linhas da janela, em outra ordem: nada mudou
+        self.delta = self.full.iloc[[3, 2, 1]].reset_index(drop=True)
+        sync.recheck = timedelta(days=60)
+        with patch('pandas.read_parquet') as leitura:
+            self.assertIs(sync.sync(), df)
+            leitura.assert_not_called()
+        self.assertEqual(transformados, [4])
+        self.assertEqual(sync.last_sync_stats['changed_rows'], 0)
+
+        # Backend sem filtro: cópia local servida, mesmo objeto
+        sync.fetch_since = None
+        self.assertIs(sync.sync(), df)
+        self.assertEqual(sync.last_sync_stats['mode'], 'local')
+
+        # Delta com linha nova: novo objeto
+        sync.fetch_since = self._fetch_since
+        self.delta = pd.DataFrame({
+            'nota': [5], 'codcli': [40], 'item': [1],
+            'emissao': ['2024-06-15'], 'valorfaturado': [500.0]
+        })
+        self.assertIsNot(sync.sync(), df)
+
+if __name__ == '__main__':
+    unittest.main()
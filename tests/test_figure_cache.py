@@ -0,0 +1,73 @@
+"""
+Testes unitários para o cache de figuras Plotly
+"""
+import unittest
+import pandas as pd
+import plotly.graph_objects as go
+from shared.cache.dataset_store import dataset_store
+from shared.cache.figure_cache import cached_figure
+from shared.utils.cache_manager import MemoryCache
+
+class TestFigureCache(unittest.TestCase):
+    """Testes para cached_figure"""
+
+    def setUp(self):
+        self.cache = MemoryCache(max_bytes=10 * 1024 ** 2)
+        self.chamadas = 0
+        dataset_store.invalidate(view='TESTE_FIGURA')
+        self.df = dataset_store.get('T', 'TESTE_FIGURA', lambda: pd.DataFrame({
+            'emissao': pd.to_datetime(['2023-01-10', '2024-02-10', '2024-03-10']),
+            'valorfaturado': [10.0, 20.0, 30.0]
+        }))
+
+        @cached_figure(cache=self.cache)
+        def grafico(df, anos):
+            self.chamadas += 1
+            if anos:
+                df = df[df['emissao'].dt.year.isin(anos)]
+            return go.Figure(go.Bar(x=df['emissao'], y=df['valorfaturado']))
+        self.grafico = grafico
+
+    def tearDown(self):
+        dataset_store.invalidate(view='TESTE_FIGURA')
+
+    def test_reaproveita_figura(self):
+        """Testa que um rerun com as mesmas entradas não refaz o gráfico"""
+        primeira = self.grafico(self.df, [2024])
+        outra_sessao = dataset_store.get('T', 'TESTE_FIGURA', lambda: pd.DataFrame())
+        segunda = self.grafico(outra_sessao, [2024])
+
+        self.assertEqual(self.chamadas, 1)
+        self.assertIsInstance(segunda, go.Figure)
+        self.assertEqual(list(segunda.data[0].y), [20.0, 30.0])
+        self.assertEqual(primeira.to_json(), segunda.to_json())
+
+    def test_refaz_quando_entradas_mudam(self):
+        """Testa que filtros e nova versão do dataset geram nova figura"""
+        self.grafico(self.df, [2024])
+        self.grafico(self.df, [2023])
+        self.assertEqual(self.chamadas, 2)
+
+        dataset_store.invalidate(view='TESTE_FIGURA')
+        novo = dataset_store.get('T', 'TESTE_FIGURA', lambda: self.df.iloc[:1].copy())
+        self.assertEqual(len(self.grafico(novo, []).data[0].y), 1)
+        self.assertEqual(self.chamadas, 3)
+
+    def test_figuras_independentes(self):
+        """Testa que alterar uma figura devolvida não afeta o cache"""
+        fig = self.grafico(self.df, [])
+        fig.update_layout(title='Alterada')
+        self.assertIsNone(self.grafico(self.df, []).layout.title.text)
+
+    def test_erro_nao_guardado(self):
+        """Testa que retornos None são recalculados"""
+        @cached_figure(cache=self.cache)
+        def falha(df):
+            self.chamadas += 1
+            return None
+        self.assertIsNone(falha(self.df))
+        self.assertIsNone(falha(self.df))
+        self.assertEqual(self.chamadas, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+Testes unitários para o montador de nós hierárquicos (treemap/sunburst)
+"""
+import unittest
+import pandas as pd
+from shared.utils.formatters import format_currency, format_currency_series
+from shared.utils.hierarchy import build_hierarchy
+
+
+class TestHierarchy(unittest.TestCase):
+    """Testes para ids, pais, valores e labels de cada nível"""
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'regiao': ['Sul', 'Sul', 'Sul', 'Norte', 'Norte', None],
+            'uf': ['RS', 'RS', 'SC', 'AM', 'AM', 'SP'],
+            'cidade': ['Porto Alegre', 'Canoas', 'Joinville', 'Manaus', 'Manaus', 'Campinas'],
+            'cliente': [1, 2, 3, 4, 4, 5],
+            'valor': [10.004, 5.0, 7.5, 1.0, 2.0, 99.0],
+        })
+
+    def test_niveis_e_somas(self):
+        """Testa ids com caminho completo, pais e somas das folhas"""
+        nos = build_hierarchy(self.df, ['regiao', 'uf', 'cidade'], 'valor', prefixes=['r', 'u', 'c'])
+        valores = dict(zip(nos['ids'], nos['values']))
+        pais = dict(zip(nos['ids'], nos['parents']))
+
+        self.assertEqual(valores['r_Sul'], 22.5)
+        self.assertEqual(valores['u_Sul_RS'], 15.0)
+        self.assertEqual(valores['c_Norte_AM_Manaus'], 3.0)
+        self.assertEqual(pais['c_Sul_RS_Canoas'], 'u_Sul_RS')
+        self.assertEqual(pais['u_Norte_AM'], 'r_Norte')
+        self.assertEqual(pais['r_Norte'], '')
+        # Região nula descartada
+        self.assertFalse(nos['ids'].str.contains('SP').any())
+        self.assertEqual(nos['level'].tolist(), [0, 0, 1, 1, 1, 2, 2, 2, 2])
+
+    def test_labels_formatados(self):
+        """Testa o label padrão em moeda e um formatador próprio"""
+        nos = build_hierarchy(self.df, ['uf'], 'valor')
+        self.assertEqual(nos['labels'].iloc[0], f"AM<br>{format_currency(3.0)}")
+
+        clientes = build_hierarchy(
+            self.df, ['uf', 'cidade'], 'cliente', agg='nunique',
+            formatter=lambda v: v.astype('int64').astype(str) + ' clientes'
+        )
+        self.assertIn('Manaus<br>1 clientes', clientes['labels'].tolist())
+
+    def test_moeda_por_coluna(self):
+        """Testa que a formatação por coluna coincide com format_currency"""
+        valores = pd.Series([0, 1234567.891, -15.5, None])
+        esperado = [format_currency(v) for v in [0, 1234567.891, -15.5, 0]]
+        self.assertEqual(format_currency_series(valores).tolist(), esperado)
+        self.assertTrue(format_currency_series(pd.Series([], dtype=float)).empty)
+
+    def test_sem_dados(self):
+        """Testa o retorno vazio quando não há linhas válidas"""
+        nos = build_hierarchy(self.df.iloc[0:0], ['regiao', 'uf'], 'valor')
+        self.assertTrue(nos.empty)
+        self.assertEqual(list(nos.columns), ['ids', 'labels', 'parents', 'values', 'level'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+"""
+Testes unitários para o cliente HTTP compartilhado
+"""
+import unittest
+from unittest.mock import patch
+import requests
+from shared.services.http_client import HTTPClient, http_client
+
+class TestHTTPClient(unittest.TestCase):
+    """Testes para o HTTPClient"""
+
+    def setUp(self):
+        self.client = HTTPClient(pool_connections=2, pool_maxsize=3, pool_timeout=4,
+                                 connect_timeout=1, read_timeout=7)
+
+    def test_pool_por_host(self):
+        """Testa limites do pool e ausência de retentativas no adaptador"""
+        adapter = self.client.get_adapter('http://tecnolife.empresamix.info:8077')
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual(adapter.poolmanager.connection_from_url('http://exemplo').pool_timeout, 4)
+        self.assertEqual(adapter.max_retries.total, 0)
+
+    def test_headers_padrao(self):
+        """Testa keep-alive e compressão negociada"""
+        self.assertEqual(self.client.headers['Connection'], 'keep-alive')
+        self.assertIn('gzip', self.client.headers['Accept-Encoding'])
+
+    def test_timeout_padrao(self):
+        """Testa que o timeout padrão é aplicado e o informado é respeitado"""
+        with patch.object(requests.Session, 'request') as request:
+            self.client.get('http://exemplo/POWERBI')
+            self.assertEqual(request.call_args.kwargs['timeout'], (1, 7))
+
+            self.client.get('http://exemplo/POWERBI', timeout=5)
+            self.assertEqual(request.call_args.kwargs['timeout'], 5)
+
+    def test_instancia_compartilhada(self):
+        """Testa que os serviços usam a mesma session"""
+        from core.services.api_client import api_client
+        self.assertIs(api_client.session, http_client)
+
+if __name__ == '__main__':
+    unittest.main()
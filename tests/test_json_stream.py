@@ -0,0 +1,77 @@
+"""
+Testes unitários para a leitura incremental de JSON
+"""
+import json
+import unittest
+import pandas as pd
+from shared.services.json_stream import read_json_frame, iter_json_records
+
+def _chunks(body: bytes, size: int):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+class TestJsonStream(unittest.TestCase):
+    """Testes para iter_json_records e read_json_frame"""
+
+    def setUp(self):
+        self.rows = [
+            {'nota': i, 'codcli': i % 7, 'valorfaturado': i * 1.5,
+             'uf': 'EX' if i % 5 == 0 else 'SP', 'cidade': 'São José', 'data': '2024-03-01'}
+            for i in range(500)
+        ]
+        self.rows[10]['observacao'] = 'ação'
+        self.body = json.dumps(self.rows, ensure_ascii=False).encode('utf-8')
+
+    def test_equivalente_ao_dataframe_completo(self):
+        """Testa que o resultado é igual a pd.DataFrame(json.loads(...)), com qualquer tamanho de pedaço"""
+        esperado = pd.DataFrame(self.rows)
+        for tamanho in (1, 13, 4096):
+            df = read_json_frame(_chunks(self.body, tamanho), batch_size=64)
+            pd.testing.assert_frame_equal(df, esperado, check_dtype=False)
+        self.assertEqual(df['nota'].dtype, 'int64')
+
+    def test_primeiras_linhas_antes_do_fim(self):
+        """Testa que os registros saem antes de todos os pedaços serem lidos"""
+        lidos = []
+
+        def chunks():
+            for chunk in _chunks(self.body, 100):
+                lidos.append(chunk)
+                yield chunk
+
+        primeiro = next(iter_json_records(chunks()))
+        self.assertEqual(primeiro['nota'], 0)
+        self.assertLess(len(lidos), 5)
+
+    def test_callback_por_lote(self):
+        """Testa que on_batch recebe todos os lotes"""
+        lotes = []
+        df = read_json_frame(_chunks(self.body, 512), batch_size=100, on_batch=lotes.append)
+        self.assertEqual(len(lotes), 5)
+        self.assertEqual(sum(len(lote) for lote in lotes), len(df))
+
+    def test_tipos_misturados_e_formatos_alternativos(self):
+        """Testa coluna com tipos misturados, objeto no nível superior e corpo vazio"""
+        df = read_json_frame([b'[{"a": 1}, {"a": "x"}]'])
+        self.assertEqual(df['a'].tolist(), ['1', 'x'])
+
+        df = read_json_frame([b'{"a": [1, 2]}'])
+        self.assertEqual(df['a'].tolist(), [1, 2])
+
+        self.assertTrue(read_json_frame([]).empty)
+        self.assertTrue(read_json_frame([b'[]']).empty)
+
+    def test_tipos_diferentes_entre_lotes(self):
+        """Testa coluna numérica em um lote e texto em outro"""
+        linhas = [{'a': i, 'b': i} for i in range(5)] + [{'a': 'x', 'b': 1.5}]
+        df = read_json_frame([json.dumps(linhas).encode('utf-8')], batch_size=3)
+        self.assertEqual(df['a'].tolist(), ['0', '1', '2', '3', '4', 'x'])
+        # Tipos compatíveis (int64 e double) continuam numéricos
+        self.assertEqual(df['b'].tolist(), [0, 1, 2, 3, 4, 1.5])
+
+    def test_json_truncado(self):
+        """Testa que uma resposta cortada gera erro"""
+        with self.assertRaises(ValueError):
+            read_json_frame([self.body[:-20]])
+
+if __name__ == '__main__':
+    unittest.main()
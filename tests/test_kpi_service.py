@@ -0,0 +1,84 @@
+"""
+Testes unitários para o índice de KPIs de produção
+"""
+import unittest
+import pandas as pd
+from shared.utils.cache_manager import estimate_size, memory_cache
+from modules.comercial.services.kpi_service import (
+    KPIS, ProducaoIndex, calcular_kpis_producao, kpis_producao_por_ano
+)
+
+
+def _datas(*valores):
+    return pd.to_datetime(list(valores))
+
+
+class TestKPIService(unittest.TestCase):
+    """Testes para os KPIs por conjunto de anos e por ano"""
+
+    def setUp(self):
+        memory_cache.invalidate()
+        self.dataframes = {
+            'orcamento': pd.DataFrame({
+                'data': _datas('2023-01-01', '2023-12-20', '2024-03-01', '2024-04-01', '2024-05-01'),
+                'os': [10, 11, 0, 12, 0],
+                'status': [1, 1, 5, 1, 0],
+                'valor': [100.0, 300.0, 50.0, 200.0, 70.0],
+            }),
+            'os': pd.DataFrame({
+                'data': _datas('2023-01-11', '2024-01-09', '2024-04-05'),
+                'os': [10, 11, 12],
+                'status': [4, 4, 2],
+            }),
+            'faturamento': pd.DataFrame({
+                'data': _datas('2023-01-31', '2023-01-31', '2024-01-19', '2024-06-01'),
+                'os': [10, 10, 11, 0],
+                'valorfaturado': [60.0, 40.0, 300.0, 100.0],
+            }),
+        }
+
+    def test_kpis_de_todos_os_anos(self):
+        """Testa os cinco KPIs com os dois anos"""
+        kpis = ProducaoIndex.build(self.dataframes).kpis()
+
+        self.assertAlmostEqual(kpis['taxa_conversao'], 3 / 4 * 100)
+        self.assertAlmostEqual(kpis['tempo_medio_orc_os'], (10 + 20 + 4) / 3)
+        # OS 10: duas linhas de faturamento; OS 12 não faturada
+        self.assertAlmostEqual(kpis['tempo_medio_os_fat'], (20 + 20 + 10) / 3)
+        self.assertAlmostEqual(kpis['valor_medio_aprovados'], 200.0)
+        self.assertAlmostEqual(kpis['perc_faturamento_os'], 400 / 500 * 100)
+
+    def test_pares_entre_anos(self):
+        """Testa que um par só entra quando os dois anos estão selecionados"""
+        indice = ProducaoIndex.build(self.dataframes)
+
+        # Orçamento de 2023 com OS de 2024 fica fora de cada ano isolado
+        self.assertAlmostEqual(indice.kpis([2023])['tempo_medio_orc_os'], 10.0)
+        self.assertAlmostEqual(indice.kpis([2024])['tempo_medio_orc_os'], 4.0)
+
+        por_ano = indice.kpis_by_year()
+        self.assertEqual(list(por_ano.columns), KPIS)
+        self.assertEqual(por_ano.index.tolist(), [2023, 2024])
+        for ano in (2023, 2024):
+            self.assertEqual(por_ano.loc[ano].to_dict(), indice.kpis([ano]))
+
+    def test_sem_dados_no_recorte(self):
+        """Testa KPIs zerados para anos sem registros"""
+        kpis = ProducaoIndex.build(self.dataframes).kpis([2030])
+        self.assertEqual(kpis, {kpi: 0.0 for kpi in KPIS})
+
+    def test_indice_em_cache(self):
+        """Testa que o índice é calculado uma vez e reaproveitado entre recortes"""
+        antes = memory_cache.info()
+        calcular_kpis_producao(self.dataframes, [2023])
+        calcular_kpis_producao(self.dataframes, [2024])
+        kpis_producao_por_ano(self.dataframes)
+
+        info = memory_cache.info()
+        self.assertEqual((info['misses'] - antes['misses'], info['hits'] - antes['hits']), (1, 2))
+        indice = ProducaoIndex.build(self.dataframes)
+        self.assertEqual(estimate_size(indice), indice.nbytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Testes unitários para o cache de resultados em memória
+"""
+import time
+import threading
+import unittest
+import pandas as pd
+from shared.cache.dataset_store import dataset_store
+from shared.utils.cache_manager import (
+    MemoryCache, cache_data, clear_cache, frame_fingerprint, stable_hash
+)
+
+class TestMemoryCache(unittest.TestCase):
+    """Testes para cache_data, MemoryCache e as chaves estáveis"""
+
+    def setUp(self):
+        self.cache = MemoryCache(max_bytes=10 * 1024 ** 2)
+        self.chamadas = 0
+        self.df = pd.DataFrame({'uf': ['SP', 'MG', 'SP'], 'valorfaturado': [10.0, 20.0, 30.0]})
+
+    def _total_por_uf(self, ttl=60, namespace=None):
+        @cache_data(ttl_seconds=ttl, namespace=namespace, cache=self.cache)
+        def total_por_uf(df, uf, _sessao=None):
+            self.chamadas += 1
+            time.sleep(0.05)
+            return df.loc[df['uf'] == uf, 'valorfaturado'].sum()
+        return total_por_uf
+
+    def test_chave_pelo_conteudo(self):
+        """Testa que DataFrames iguais compartilham a chave e diferentes não"""
+        func = self._total_por_uf()
+        self.assertEqual(func(self.df, 'SP', _sessao='a'), 40.0)
+        self.assertEqual(func(self.df.copy(), 'SP', _sessao='b'), 40.0)
+        self.assertEqual(self.chamadas, 1)
+
+        alterado = self.df.copy()
+        alterado.loc[0, 'valorfaturado'] = 99.0
+        self.assertEqual(func(alterado, 'SP'), 129.0)
+        self.assertEqual(self.chamadas, 2)
+
+    def test_versao_do_dataset(self):
+        """Testa que referências ao dataset compartilhado usam a versão como chave"""
+        dataset_store.invalidate(view='TESTE_CACHE')
+        df = dataset_store.get('T', 'TESTE_CACHE', lambda: self.df.copy())
+        outra = dataset_store.get('T', 'TESTE_CACHE', lambda: self.df.copy())
+        versao = dataset_store.version('T', 'TESTE_CACHE')
+        self.assertEqual(frame_fingerprint(df), f"dataset:T/TESTE_CACHE@v{versao}")
+        self.assertEqual(frame_fingerprint(df), frame_fingerprint(outra))
+
+        df['ano'] = 2024  # coluna nova: deixa de ser a referência intacta
+        self.assertTrue(frame_fingerprint(df).startswith('frame:'))
+        dataset_store.invalidate(view='TESTE_CACHE')
+
+    def test_ttl_e_namespace(self):
+        """Testa expiração e invalidação por namespace"""
+        func = self._total_por_uf(ttl=0)
+        func(self.df, 'SP')
+        func(self.df, 'SP')
+        self.assertEqual(self.chamadas, 2)
+
+        func = self._total_por_uf(namespace='comercial')
+        func(self.df, 'SP')
+        self.assertEqual(self.cache.invalidate('outro'), 0)
+        self.assertEqual(self.cache.invalidate('comercial'), 1)
+        func(self.df, 'SP')
+        self.assertEqual(self.chamadas, 4)
+
+    def test_lru_por_memoria(self):
+        """Testa descarte do menos usado ao exceder o orçamento"""
+        cache = MemoryCache(max_bytes=2500)
+        for chave in ('a', 'b'):
+            cache.set(chave, b'x' * 1000, 'n', 60)
+        cache.get_or_compute('a', 'n', 60, lambda: None)  # 'a' passa a ser o mais recente
+        cache.set('c', b'x' * 1000, 'n', 60)
+        self.assertEqual(cache.info()['evictions'], 1)
+        self.assertEqual(cache.get_or_compute('b', 'n', 60, lambda: 'novo'), 'novo')
+
+    def test_calculo_unico_entre_sessoes(self):
+        """Testa que sessões simultâneas compartilham um único cálculo"""
+        func = self._total_por_uf()
+        threads = [threading.Thread(target=func, args=(self.df, 'MG')) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.chamadas, 1)
+
+    def test_hash_estavel(self):
+        """Testa hashes independentes da ordem de dicionários e do tipo"""
+        self.assertEqual(stable_hash({'a': 1, 'b': [1, 2]}), stable_hash({'b': [1, 2], 'a': 1}))
+        self.assertNotEqual(stable_hash(1), stable_hash('1'))
+        self.assertNotEqual(stable_hash([2024]), stable_hash([2025]))
+
+    def test_clear_cache_nao_apaga_sessao(self):
+        """Testa que clear_cache limpa apenas o cache de resultados"""
+        self.assertIsInstance(clear_cache('inexistente'), int)
+
+if __name__ == '__main__':
+    unittest.main()
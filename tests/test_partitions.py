@@ -0,0 +1,110 @@
+"""
+Testes unitários para as partições por ano e mês
+"""
+import unittest
+import numpy as np
+import pandas as pd
+from shared.cache.dataset_store import dataset_store
+from shared.cache.partitions import (
+    PartitionIndex, available_years, has_null_dates, is_partitioned, partitions, select_period
+)
+from modules.comercial.schemas import view_schemas
+
+TENANT = 'TESTE_PARTICOES'
+
+
+class TestPartitions(unittest.TestCase):
+    """Testes para seleção de períodos por fatias do dataset ordenado"""
+
+    def setUp(self):
+        partitions.clear()
+        dataset_store.invalidate(tenant=TENANT)
+        rng = np.random.default_rng(3)
+        n = 5000
+        datas = pd.Timestamp('2021-03-01') + pd.to_timedelta(rng.integers(0, 4 * 365, n), unit='D')
+        datas = datas + pd.to_timedelta(rng.integers(0, 86400, n), unit='s')
+        self.bruto = pd.DataFrame({
+            'emissao': datas.strftime('%Y-%m-%d %H:%M:%S'),
+            'valorfaturado': rng.random(n) * 1000,
+            'codcli': rng.integers(1, 300, n),
+        })
+        self.bruto.loc[rng.choice(n, 50, replace=False), 'emissao'] = None
+        self.df = view_schemas.apply('CUBO_FATURAMENTO', self.bruto)
+
+    def tearDown(self):
+        dataset_store.invalidate(tenant=TENANT)
+
+    def _esperado(self, mascara):
+        return self.df[mascara.to_numpy()]
+
+    def test_esquema_ordena_por_data(self):
+        """Testa a ordenação na ingestão, com datas nulas no fim"""
+        self.assertTrue(is_partitioned(self.df['emissao']))
+        self.assertTrue(self.df['emissao'].iloc[-50:].isna().all())
+        self.assertEqual(sorted(self.df['valorfaturado']), sorted(self.bruto['valorfaturado']))
+        self.assertIsInstance(self.df.index, pd.RangeIndex)
+        self.assertFalse(is_partitioned(self.bruto['emissao']))
+
+    def test_anos_e_meses(self):
+        """Testa anos disponíveis e seleção por anos e meses contra o filtro por máscara"""
+        datas = self.df['emissao']
+        self.assertEqual(available_years(self.df, 'emissao'), [2021, 2022, 2023, 2024, 2025])
+        self.assertTrue(has_null_dates(self.df, 'emissao'))
+        self.assertFalse(has_null_dates(self.df.iloc[:100], 'emissao'))
+
+        for anos, meses in (([2022], None), ([2021, 2023], None), ([2024], [1, 2, 12]), (None, [6])):
+            mascara = datas.notna()
+            if anos is not None:
+                mascara &= datas.dt.year.isin(anos)
+            if meses is not None:
+                mascara &= datas.dt.month.isin(meses)
+            pd.testing.assert_frame_equal(
+                select_period(self.df, 'emissao', anos=anos, meses=meses), self._esperado(mascara)
+            )
+        self.assertTrue(select_period(self.df, 'emissao', anos=[2030]).empty)
+        self.assertTrue(select_period(self.df, 'emissao', anos=[]).empty)
+
+    def test_intervalo_de_datas(self):
+        """Testa intervalos de datas, com a data final incluindo o dia inteiro"""
+        datas = self.df['emissao']
+        resultado = select_period(self.df, 'emissao', inicio='2022-03-10', fim='2023-04-20')
+        mascara = (datas >= '2022-03-10') & (datas < '2023-04-21')
+        pd.testing.assert_frame_equal(resultado, self._esperado(mascara))
+
+        resultado = select_period(self.df, 'emissao', anos=[2022, 2023], fim=pd.Timestamp('2023-01-15 12:00'))
+        mascara = (datas >= '2022-01-01') & (datas <= pd.Timestamp('2023-01-15 12:00'))
+        pd.testing.assert_frame_equal(resultado, self._esperado(mascara))
+
+    def test_periodo_continuo_sem_copia(self):
+        """Testa que anos seguidos resultam em uma única fatia do dataset"""
+        indice = PartitionIndex(self.df['emissao'])
+        self.assertEqual(len(indice.ranges(anos=[2022, 2023])), 1)
+        self.assertEqual(len(indice.ranges(anos=[2021, 2023])), 2)
+        self.assertEqual(indice.ranges(), [(0, len(self.df) - 50)])
+
+        fatia = select_period(self.df, 'emissao', anos=[2022, 2023])
+        self.assertTrue(np.shares_memory(fatia['valorfaturado'].to_numpy(), self.df['valorfaturado'].to_numpy()))
+
+    def test_fora_de_ordem_usa_mascara(self):
+        """Testa o mesmo resultado para um DataFrame fora de ordem"""
+        embaralhado = self.df.sample(frac=1, random_state=1)
+        datas = embaralhado['emissao']
+        resultado = select_period(embaralhado, 'emissao', anos=[2023], meses=[3])
+        pd.testing.assert_frame_equal(
+            resultado, embaralhado[((datas.dt.year == 2023) & (datas.dt.month == 3)).to_numpy()]
+        )
+        self.assertEqual(available_years(embaralhado, 'emissao'), available_years(self.df, 'emissao'))
+
+    def test_indice_por_versao(self):
+        """Testa o índice reaproveitado na versão e descartado na versão seguinte"""
+        df = dataset_store.get(TENANT, 'CUBO_FATURAMENTO', lambda: self.df, force=True)
+        indice = partitions.get(df, 'emissao')
+        self.assertIs(partitions.get(df, 'emissao'), indice)
+
+        novo = dataset_store.get(TENANT, 'CUBO_FATURAMENTO', lambda: self.df.iloc[:1000].copy(), force=True)
+        self.assertIsNot(partitions.get(novo, 'emissao'), indice)
+        self.assertEqual(partitions.get(novo, 'emissao').rows, 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
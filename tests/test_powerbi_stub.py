@@ -0,0 +1,121 @@
+"""
+Testes do cliente do POWERBI contra o servidor local
+"""
+import unittest
+from unittest.mock import patch
+from tools.powerbi_stub import PowerBIStub, sample_fixtures
+from urllib3.exceptions import EmptyPoolError
+from shared.services.http_client import HTTPClient, http_client
+from modules.comercial.services.api_service import (
+    ComercialAPIService, powerbi_retry, powerbi_fingerprints
+)
+
+class TestPowerBIStub(unittest.TestCase):
+    """Testes de ponta a ponta com o POWERBI local"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fixtures = sample_fixtures(rows=300, seed=1)
+        cls.stub = PowerBIStub(fixtures=cls.fixtures, cliente='TECNOLIFE', etag=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+
+    def setUp(self):
+        powerbi_retry.reset()
+        powerbi_fingerprints.invalidate()
+        self.stub.clear_session()
+        self.stub.scale = 1
+        self.stub.refresh()
+        self.stub.stats.clear()
+        self.service = ComercialAPIService()
+        self.service.base_url = self.stub.url[:-len('/POWERBI')]
+        self.service.session = http_client
+
+    def test_consulta_view(self):
+        """Testa que o cliente lê a view com o esquema aplicado"""
+        df = self.service.get_data('CUBO_FATURAMENTO')
+        self.assertEqual(len(df), 300)
+        self.assertTrue(df['emissao'].notna().all())
+
+    @patch.object(powerbi_retry, '_sleep')
+    def test_recupera_do_erro_dm(self, mock_sleep):
+        """Testa clear-session e refresh após o conflito de DM"""
+        self.stub.inject_dm_conflict()
+        df = self.service.get_data('OS')
+
+        self.assertFalse(df.empty)
+        self.assertEqual(self.stub.stats['erros_dm'], 1)
+        self.assertEqual(self.stub.stats['clear-session'], 1)
+        self.assertEqual(self.stub.stats['refresh'], 1)
+
+    def test_etag_e_payload_grande(self):
+        """Testa 304 com ETag e a repetição das linhas da fixture"""
+        primeiro = self.service.get_data('CLIENTE')
+        segundo = self.service.get_data('CLIENTE')
+        self.assertIs(segundo, primeiro)
+        self.assertEqual(self.stub.stats['nao_modificadas'], 1)
+
+        self.stub.scale = 5
+        self.stub.refresh()
+        self.assertEqual(len(self.service.get_data('CLIENTE')), 5 * len(self.fixtures['CLIENTE']))
+
+    def test_api_service_reaproveita_resposta_inalterada(self):
+        """Testa que o APIService (dataset e refresh) mantém o DataFrame de respostas inalteradas"""
+        from modules.comercial.services.api_service import APIService
+        api = APIService()
+        api.base_url = self.service.base_url
+        api.cliente = 'TECNOLIFE'
+        primeiro = api.get_data('ORCAMENTO')
+        self.assertFalse(primeiro.empty)
+        self.assertIs(api.get_data('ORCAMENTO'), primeiro)
+        self.assertEqual(self.stub.stats['nao_modificadas'], 1)
+
+        self.stub.scale = 2
+        self.stub.refresh()
+        self.assertEqual(len(api.get_data('ORCAMENTO')), 2 * len(primeiro))
+
+    def test_delta_substitui_entrada_da_data_anterior(self):
+        """Testa uma entrada por view nas buscas com filtro de data, qualquer que seja a data"""
+        for dia in range(1, 6):
+            self.service._fetch('OS', {'DATA_INICIAL': f"2024-06-0{dia}"}, allow_empty=True)
+        self.assertEqual(powerbi_fingerprints.info()['entries'], 1)
+
+        # A view completa tem entrada própria e não é confundida com o delta
+        self.service.get_data('OS')
+        self.assertEqual(powerbi_fingerprints.info()['entries'], 2)
+
+    def test_view_inexistente(self):
+        """Testa que views sem fixture retornam DataFrame vazio"""
+        self.assertTrue(self.service.get_data('NAO_EXISTE').empty)
+
+    def test_erros_devolvem_conexao_ao_pool(self):
+        """Testa mais respostas de erro que o tamanho do pool seguidas de uma consulta válida"""
+        self.service.session = HTTPClient(pool_maxsize=2, pool_timeout=2)
+        for _ in range(5):
+            self.assertTrue(self.service.get_data('NAO_EXISTE').empty)
+        self.assertFalse(self.service.get_data('OS').empty)
+
+        # Caminho do APIService (dataset e refresh em segundo plano)
+        from modules.comercial.services.api_service import APIService
+        api = APIService()
+        api.base_url = self.service.base_url
+        api.cliente = 'TECNOLIFE'
+        with patch('modules.comercial.services.api_service.http_client', HTTPClient(pool_maxsize=2, pool_timeout=2)):
+            for _ in range(5):
+                self.assertTrue(api.get_data('NAO_EXISTE').empty)
+            self.assertFalse(api.get_data('OS').empty)
+
+    def test_pool_esgotado_falha_sem_travar(self):
+        """Testa que, com o pool esgotado, a requisição falha após o pool_timeout"""
+        cliente = HTTPClient(pool_maxsize=1, pool_timeout=0.2)
+        url = f"{self.stub.url}/?CLIENTE=TECNOLIFE&ID=1&VIEW=OS"
+        with cliente.get(url, stream=True):
+            with self.assertRaises(EmptyPoolError):
+                cliente.get(url, stream=True)
+        with cliente.get(url, stream=True) as response:
+            self.assertEqual(response.status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
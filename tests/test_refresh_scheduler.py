@@ -0,0 +1,58 @@
+"""
+Testes unitários para o agendador de atualização em segundo plano
+"""
+import time
+import unittest
+import pandas as pd
+from shared.cache.dataset_store import DatasetStore
+from shared.cache.refresh_scheduler import RefreshScheduler
+from shared.components.freshness import freshness_text
+
+class TestRefreshScheduler(unittest.TestCase):
+    """Testes para o RefreshScheduler e o indicador de atualização"""
+
+    def setUp(self):
+        self.store = DatasetStore(ttl_seconds=60)
+        self.scheduler = RefreshScheduler(store=self.store, tick_seconds=0.05, lead_ratio=0.5)
+        self.chamadas = 0
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def _loader(self):
+        self.chamadas += 1
+        return pd.DataFrame({'os': [self.chamadas]})
+
+    def test_atualiza_antes_de_expirar(self):
+        """Testa que a view é recarregada ao atingir a fração do intervalo"""
+        self.store.get('TECNOLIFE', 'OS', self._loader)
+        self.scheduler.register('TECNOLIFE', 'OS', self._loader, interval=0.2)
+
+        time.sleep(0.5)
+        self.assertGreaterEqual(self.chamadas, 2)
+        self.assertGreaterEqual(self.store.version('TECNOLIFE', 'OS'), 2)
+        # A leitura continua imediata: o dataset nunca chega a vencer
+        self.assertFalse(self.store.freshness('TECNOLIFE', 'OS')['stale'])
+
+    def test_nao_atualiza_dataset_recente(self):
+        """Testa que datasets dentro do intervalo não são buscados de novo"""
+        self.store.get('TECNOLIFE', 'OS', self._loader)
+        self.scheduler.register('TECNOLIFE', 'OS', self._loader, interval=60)
+        self.assertEqual(self.scheduler.run_pending(), [])
+        self.scheduler.unregister('TECNOLIFE', 'OS')
+        self.assertEqual(self.chamadas, 1)
+
+    def test_indicador(self):
+        """Testa o texto do indicador de atualização"""
+        self.assertIn('não carregados', freshness_text([self.store.freshness('TECNOLIFE', 'OS')]))
+
+        self.store.get('TECNOLIFE', 'OS', self._loader)
+        situacao = self.store.freshness('TECNOLIFE', 'OS')
+        self.assertTrue(freshness_text([situacao]).startswith('🟢'))
+
+        situacao = dict(situacao, age_seconds=7200, stale=True)
+        self.assertEqual(freshness_text([situacao]), '🟡 Dados atualizados há 2,0 h · atualização pendente')
+        self.assertTrue(freshness_text([dict(situacao, last_error='timeout')]).startswith('🔴'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Testes unitários para o motor de retentativas
+"""
+import unittest
+from shared.services.retry import RetryEngine, RetryPolicy, CircuitBreaker
+from shared.exceptions.api_exceptions import APICircuitOpenError
+
+class TestRetryEngine(unittest.TestCase):
+    """Testes para RetryPolicy, CircuitBreaker e RetryEngine"""
+
+    def setUp(self):
+        self.esperas = []
+        self.engine = RetryEngine(
+            policy=RetryPolicy(max_attempts=3, base_delay=1, max_delay=4),
+            failure_threshold=2,
+            reset_timeout=60,
+            sleep=self.esperas.append
+        )
+
+    def test_backoff_limitado(self):
+        """Testa que a espera respeita o teto exponencial e o máximo"""
+        policy = RetryPolicy(base_delay=1, max_delay=4)
+        for _ in range(50):
+            self.assertLessEqual(policy.compute_delay(1), 1)
+            self.assertLessEqual(policy.compute_delay(2), 2)
+            self.assertLessEqual(policy.compute_delay(10), 4)
+
+    def test_sucesso_sem_espera(self):
+        """Testa que o caminho feliz não espera nada"""
+        self.assertEqual(self.engine.call('CUBO', lambda: 42), 42)
+        self.assertEqual(self.esperas, [])
+        stats = self.engine.stats()['CUBO']
+        self.assertEqual(stats['successes'], 1)
+        self.assertEqual(stats['retries'], 0)
+
+    def test_retenta_e_chama_callback(self):
+        """Testa retentativas com callback antes de cada nova tentativa"""
+        tentativas = []
+        callbacks = []
+
+        def func():
+            tentativas.append(1)
+            if len(tentativas) < 3:
+                raise ValueError('erro temporário')
+            return 'ok'
+
+        result = self.engine.call('OS', func, on_retry=lambda k, e, n: callbacks.append(n))
+        self.assertEqual(result, 'ok')
+        self.assertEqual(callbacks, [1, 2])
+        self.assertEqual(len(self.esperas), 2)
+        self.assertEqual(self.engine.stats()['OS']['retries'], 2)
+
+    def test_erro_nao_retentavel(self):
+        """Testa que erros não retentáveis falham na primeira tentativa"""
+        def func():
+            raise KeyError('x')
+
+        with self.assertRaises(KeyError):
+            self.engine.call('OS', func, retryable=lambda e: False)
+        self.assertEqual(self.esperas, [])
+
+    def test_circuito_abre_apos_falhas(self):
+        """Testa que o circuito abre e barra chamadas seguintes"""
+        def func():
+            raise ValueError('fora do ar')
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.engine.call('ORCAMENTO', func, retryable=lambda e: False)
+
+        with self.assertRaises(APICircuitOpenError):
+            self.engine.call('ORCAMENTO', lambda: 1)
+
+        stats = self.engine.stats()['ORCAMENTO']
+        self.assertEqual(stats['circuit_state'], CircuitBreaker.OPEN)
+        self.assertEqual(stats['rejected'], 1)
+
+        # Outras views não são afetadas
+        self.assertEqual(self.engine.call('CUBO', lambda: 1), 1)
+
+    def test_half_open_fecha_apos_sucesso(self):
+        """Testa a chamada de teste após o tempo de espera"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(breaker.allow_request())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_orcamento_de_retentativas(self):
+        """Testa que o orçamento esgotado interrompe as retentativas"""
+        engine = RetryEngine(policy=RetryPolicy(max_attempts=10), failure_threshold=100,
+                             budget_ratio=0, sleep=lambda s: None)
+
+        def func():
+            raise ValueError('erro')
+
+        with self.assertRaises(ValueError):
+            engine.call('CUBO', func)
+        stats = engine.stats()['CUBO']
+        self.assertEqual(stats['retries'], 3)
+        self.assertEqual(stats['budget_exhausted'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Testes unitários para o motor RFV
+"""
+import unittest
+import numpy as np
+import pandas as pd
+from shared.cache.dataset_store import dataset_store
+from modules.comercial.services.delta_sync import DELTA_ATTR
+from modules.comercial.services.rfv import (
+    RFVState, SEGMENTOS, calcular_rfv, rfv_state, rfv_states, score_rfv
+)
+from modules.comercial.services.synthetic_data import SyntheticDataGenerator
+
+TENANT = 'TESTE_RFV'
+REFERENCIA = pd.Timestamp('2026-01-01')
+
+
+class TestRFV(unittest.TestCase):
+    """Testes para métricas, notas, segmentos e atualização incremental"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.df = SyntheticDataGenerator(seed=5).generate(20000)['CUBO_FATURAMENTO']
+
+    def setUp(self):
+        rfv_states.clear()
+        dataset_store.invalidate(tenant=TENANT)
+
+    def tearDown(self):
+        dataset_store.invalidate(tenant=TENANT)
+
+    def _por_cliente(self, estado, anos=None):
+        return calcular_rfv(estado, anos, REFERENCIA).set_index('cliente_id').sort_index()
+
+    def test_metricas_iguais_as_notas(self):
+        """Testa recência, frequência e valor contra o agrupamento das notas"""
+        anos = sorted(self.df['data'].dt.year.unique())[-2:]
+        rfv = self._por_cliente(RFVState.build(self.df), anos)
+
+        linhas = self.df[self.df['data'].dt.year.isin(anos)]
+        esperado = linhas.groupby('codcli').agg(
+            ultima=('data', 'max'), frequencia=('nota', 'nunique'), valor=('valorfaturado', 'sum')
+        )
+        np.testing.assert_array_equal(rfv.index, esperado.index)
+        np.testing.assert_array_equal(rfv['recencia'], (REFERENCIA - esperado['ultima']).dt.days)
+        np.testing.assert_array_equal(rfv['frequencia'], esperado['frequencia'])
+        np.testing.assert_allclose(rfv['valor'], esperado['valor'])
+
+        # Anos do filtro do dashboard, sem percorrer as notas
+        self.assertEqual(RFVState.build(self.df).years,
+                         sorted(int(ano) for ano in self.df['data'].dt.year.dropna().unique()))
+
+    def test_notas_e_segmentos(self):
+        """Testa quintis, direção das notas e segmentos dos extremos"""
+        metricas = pd.DataFrame({
+            'cliente_id': range(10),
+            'recencia': [1, 2, 3, 4, 5, 100, 200, 300, 400, 500],
+            'frequencia': [50, 40, 30, 20, 10, 9, 8, 7, 6, 5],
+            'valor': [1000, 900, 800, 700, 600, 500, 400, 300, 200, 100],
+        })
+        rfv = score_rfv(metricas)
+
+        self.assertEqual(rfv['r_score'].tolist(), [5, 5, 4, 4, 3, 3, 2, 2, 1, 1])
+        self.assertEqual(rfv['f_score'].tolist(), [5, 5, 4, 4, 3, 3, 2, 2, 1, 1])
+        self.assertEqual(rfv['rfv'].iloc[0], 555)
+        self.assertEqual(rfv['segmento'].iloc[0], 'Campeões')
+        self.assertEqual(rfv['segmento'].iloc[-1], 'Hibernando')
+        self.assertEqual(list(rfv['segmento'].cat.categories), SEGMENTOS)
+
+    def test_notas_novas_atualizam_clientes(self):
+        """Testa que acrescentar notas novas equivale a recalcular tudo"""
+        corte = self.df['nota'].quantile(0.9)
+        antigas = self.df[self.df['nota'] <= corte]
+        novas = self.df[self.df['nota'] > corte]
+
+        incremental = RFVState.build(antigas).update(novas)
+        pd.testing.assert_frame_equal(
+            self._por_cliente(incremental), self._por_cliente(RFVState.build(self.df))
+        )
+
+    def test_versao_incremental_recalcula_so_alterados(self):
+        """Testa o reaproveitamento por versão e a atualização pelos clientes alterados"""
+        df = dataset_store.get(TENANT, 'CUBO_FATURAMENTO', lambda: self.df.copy(), force=True)
+        estado = rfv_state(df)
+        self.assertIs(rfv_state(df), estado)
+
+        # Nova versão: as notas de um cliente passam a valer o dobro
+        cliente = df['codcli'].iloc[0]
+        alterado = df.copy()
+        linhas = alterado['codcli'] == cliente
+        alterado.loc[linhas, 'valorfaturado'] = alterado.loc[linhas, 'valorfaturado'] * 2
+        alterado.attrs[DELTA_ATTR] = {'codcli': frozenset({cliente}), 'nota': frozenset()}
+        novo = dataset_store.get(TENANT, 'CUBO_FATURAMENTO', lambda: alterado, force=True)
+
+        atualizado = rfv_state(novo)
+        self.assertIsNot(atualizado, estado)
+        pd.testing.assert_frame_equal(
+            self._por_cliente(atualizado), self._por_cliente(RFVState.build(alterado))
+        )
+
+    def test_derivado_nao_reaproveita(self):
+        """Testa que um DataFrame filtrado não usa nem substitui o estado do dataset"""
+        df = dataset_store.get(TENANT, 'CUBO_FATURAMENTO', lambda: self.df.copy(), force=True)
+        completo = rfv_state(df)
+        filtrado = rfv_state(df[df['codcli'] == df['codcli'].iloc[0]])
+
+        self.assertEqual(filtrado.clients, 1)
+        self.assertIs(rfv_state(df), completo)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Testes unitários para o cubo de agregados (RollupSpec/RollupCube)
+"""
+import unittest
+import numpy as np
+import pandas as pd
+from shared.cache.dataset_store import LINEAGE_ATTR, lineage
+from shared.services.rollup import RollupMiss, RollupSpec
+from shared.utils.cache_manager import estimate_size, memory_cache
+from modules.comercial.services.rollups import FATURAMENTO_ROLLUP, consultar_faturamento
+from modules.comercial.services.synthetic_data import SyntheticDataGenerator
+
+
+class TestRollup(unittest.TestCase):
+    """Testes para a construção e as consultas do cubo"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.df = SyntheticDataGenerator(seed=11).generate(3000)['CUBO_FATURAMENTO']
+        # Algumas notas sem UF, para conferir o grupo de nulos
+        cls.df.loc[cls.df.index[:25], 'uf'] = None
+        # E algumas sem data de emissão (o esquema converte datas inválidas em NaT)
+        cls.df.loc[cls.df.index[25:35], 'emissao'] = pd.NaT
+        cls.cubo = FATURAMENTO_ROLLUP.build(cls.df)
+
+    def setUp(self):
+        memory_cache.invalidate()
+
+    def _comparar(self, by, where=None, measures=None):
+        esperado = FATURAMENTO_ROLLUP.aggregate(self.df, by, where, measures)
+        obtido = self.cubo.query(by, where, measures)
+        pd.testing.assert_frame_equal(
+            obtido.reset_index(drop=True), esperado.reset_index(drop=True),
+            check_dtype=False, check_categorical=False
+        )
+
+    def test_combinacoes_iguais_as_notas(self):
+        """Testa cada combinação materializada contra a agregação das linhas"""
+        for conjunto in self.cubo.grouping_sets:
+            with self.subTest(conjunto=conjunto):
+                self._comparar(list(conjunto))
+
+    def test_subconjunto_com_filtro(self):
+        """Testa consulta por parte de uma combinação, com filtro de valor único"""
+        ano = int(self.df['emissao'].dt.year.max())
+        self._comparar(['uf'], where={'ano': ano})
+        self._comparar(['mes'], where={'ano': ano}, measures=['valorfaturado', 'clientes'])
+
+    def test_distintos_em_varios_valores(self):
+        """Testa que distintos somados em vários anos não saem do cubo"""
+        anos = sorted(self.df['emissao'].dt.year.unique().tolist())
+        with self.assertRaises(RollupMiss):
+            self.cubo.query(['vendedor'], where={'ano': anos}, measures=['clientes'])
+
+        # Medidas aditivas podem ser somadas entre anos
+        self._comparar(['vendedor'], where={'ano': anos}, measures=['valorfaturado', 'itens'])
+
+    def test_consulta_com_fallback(self):
+        """Testa que consultar_faturamento agrega as linhas quando o cubo não responde"""
+        anos = sorted(self.df['emissao'].dt.year.dropna().astype(int).unique().tolist())
+        obtido = consultar_faturamento(self.df, ['vendedor'], where={'ano': anos}, measures=['clientes'])
+        com_data = self.df[self.df['emissao'].notna()]
+        esperado = com_data.groupby('vendedor', observed=True)['codcli'].nunique()
+        np.testing.assert_array_equal(
+            obtido.dropna(subset=['vendedor'])['clientes'].to_numpy(), esperado.to_numpy()
+        )
+
+    def test_emissao_nula(self):
+        """Testa o grupo de ano nulo no cubo e os agregados dos cards com datas nulas"""
+        por_ano = self.cubo.query(['ano'], measures=['valorfaturado'])
+        self.assertEqual(por_ano['ano'].isna().sum(), 1)
+        self.assertAlmostEqual(por_ano['valorfaturado'].sum(), self.df['valorfaturado'].sum())
+
+        from modules.comercial.services.aggregates import resumo_vendas, totais_por_ano
+        totais = totais_por_ano(self.df)
+        self.assertFalse(totais.empty)
+        self.assertFalse(totais['ano'].isna().any())
+        self.assertAlmostEqual(resumo_vendas(self.df)['faturamento_total'], self.df['valorfaturado'].sum())
+
+    def test_linhagem_e_tamanho(self):
+        """Testa que o resultado herda a linhagem e que o cubo informa a ocupação"""
+        df = self.df.copy()
+        df.attrs[LINEAGE_ATTR] = {'T/CUBO_FATURAMENTO': 3}
+        cubo = FATURAMENTO_ROLLUP.build(df)
+
+        self.assertEqual(lineage(cubo.query(['ano'])), {'T/CUBO_FATURAMENTO': 3})
+        self.assertGreater(cubo.nbytes, 0)
+        self.assertEqual(estimate_size(cubo), cubo.nbytes)
+        self.assertLess(cubo.nbytes, int(df.memory_usage(deep=True).sum()))
+
+    def test_especificacao_generica(self):
+        """Testa um cubo mínimo, fora do módulo comercial"""
+        df = pd.DataFrame({
+            'loja': ['A', 'A', 'B', None],
+            'cliente': [1, 1, 2, 3],
+            'valor': [10.0, 5.0, 7.0, 1.0],
+        })
+        spec = RollupSpec(
+            measures={'valor': ('valor', 'sum'), 'clientes': ('cliente', 'nunique')},
+            grouping_sets=[(), ('loja',)]
+        )
+        cubo = spec.build(df)
+
+        total = cubo.query()
+        self.assertEqual(total['valor'].iloc[0], 23.0)
+        self.assertEqual(total['clientes'].iloc[0], 3)
+        por_loja = cubo.query(['loja'])
+        self.assertEqual(por_loja['valor'].tolist(), [15.0, 7.0, 1.0])
+        self.assertTrue(pd.isna(por_loja['loja'].iloc[-1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
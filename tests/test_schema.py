@@ -0,0 +1,70 @@
+"""
+Testes unitários para os esquemas das views
+"""
+import unittest
+import numpy as np
+import pandas as pd
+from shared.services.schema import ViewSchema, SchemaRegistry
+from shared.exceptions.api_exceptions import APISchemaError
+from modules.comercial.schemas import view_schemas
+
+class TestViewSchema(unittest.TestCase):
+    """Testes para ViewSchema e SchemaRegistry"""
+
+    def setUp(self):
+        n = 1000
+        self.df = pd.DataFrame({
+            'emissao': ['2024-01-05', '2024-02-10', 'invalida', None] * (n // 4),
+            'data': ['2024-01-05'] * n,
+            'valorfaturado': np.arange(n) * 10.5,
+            'codcli': np.arange(n) % 50,
+            'nota': [str(i) for i in range(n)],
+            'quant': np.ones(n),
+            'uf': ['SP', 'MG', 'EX', 'RS'] * (n // 4),
+            'cidade': [f'Cidade {i}' for i in range(n)],
+            'obs': ['x'] * n
+        })
+
+    def test_tipos_do_faturamento(self):
+        """Testa datas, categorias e downcast no CUBO_FATURAMENTO"""
+        df = view_schemas.apply('CUBO_FATURAMENTO', self.df)
+
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['emissao']))
+        self.assertEqual(df['emissao'].isna().sum(), 500)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['data']))
+        self.assertIsInstance(df['uf'].dtype, pd.CategoricalDtype)
+        self.assertEqual(df['codcli'].dtype, np.int8)
+        self.assertEqual(df['nota'].dtype, np.int16)
+        self.assertEqual(df['valorfaturado'].dtype, np.float64)
+        self.assertEqual(df['quant'].dtype, np.float32)
+        # Alta cardinalidade e colunas não declaradas ficam como texto
+        self.assertEqual(df['cidade'].dtype, object)
+        self.assertEqual(df['obs'].dtype, object)
+        self.assertLess(df.memory_usage(deep=True).sum(), self.df.memory_usage(deep=True).sum() / 2)
+
+    def test_nao_altera_original_e_idempotente(self):
+        """Testa que o original fica intacto e reaplicar não muda nada"""
+        df = view_schemas.apply('CUBO_FATURAMENTO', self.df)
+        self.assertEqual(self.df['uf'].dtype, object)
+        pd.testing.assert_frame_equal(view_schemas.apply('CUBO_FATURAMENTO', df), df)
+
+    def test_coluna_obrigatoria_ausente(self):
+        """Testa a validação das colunas obrigatórias"""
+        with self.assertRaises(APISchemaError):
+            view_schemas.apply('CUBO_FATURAMENTO', self.df.drop(columns=['valorfaturado']))
+
+    def test_texto_nao_numerico_mantido(self):
+        """Testa que uma coluna inteira com texto não é convertida"""
+        schema = ViewSchema(name='X', integers=('nota',))
+        df = schema.apply(pd.DataFrame({'nota': ['1', 'A2']}))
+        self.assertEqual(df['nota'].tolist(), ['1', 'A2'])
+
+    def test_view_sem_esquema_e_vazio(self):
+        """Testa views sem esquema e DataFrames vazios"""
+        registry = SchemaRegistry()
+        self.assertIs(registry.apply('QUALQUER', self.df), self.df)
+        vazio = pd.DataFrame()
+        self.assertIs(view_schemas.apply('CUBO_FATURAMENTO', vazio), vazio)
+
+if __name__ == '__main__':
+    unittest.main()
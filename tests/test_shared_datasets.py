@@ -0,0 +1,136 @@
+"""
+Testes unitários para os datasets compartilhados entre processos
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from shared.cache.shared_datasets import SharedDatasets
+
+
+def _ler_em_outro_processo(diretorio, fila):
+    mapeado = SharedDatasets(directory=diretorio).load('TECNOLIFE', 'OS')
+    fila.put(None if mapeado is None else float(mapeado[0]['valor'].sum()))
+
+
+class TestSharedDatasets(unittest.TestCase):
+    """Testes para publicação, mapeamento e loader compartilhado"""
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.shared = SharedDatasets(directory=self.diretorio, grace_seconds=0)
+        self.df = pd.DataFrame({
+            'os': np.arange(1000),
+            'valor': np.linspace(0, 1, 1000),
+            'uf': pd.Categorical(['SP', 'MG'] * 500),
+            'emissao': pd.date_range('2024-01-01', periods=1000, freq='h'),
+        })
+        self.chamadas = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    def _loader(self):
+        self.chamadas += 1
+        return self.df
+
+    def _arquivos(self):
+        return [nome for nome in os.listdir(self.diretorio) if nome.endswith('.arrow')]
+
+    def test_publica_e_mapeia(self):
+        """Testa que o dataset mapeado tem os mesmos dados e é somente leitura"""
+        self.shared.publish('TECNOLIFE', 'OS', self.df)
+        frame, _ = SharedDatasets(directory=self.diretorio).load('TECNOLIFE', 'OS')
+
+        pd.testing.assert_frame_equal(frame, self.df)
+        self.assertFalse(frame['valor'].to_numpy().flags.writeable)
+
+    def test_mesmo_objeto_enquanto_publicacao_nao_muda(self):
+        """Testa que leituras repetidas não mapeiam o arquivo de novo"""
+        self.shared.publish('TECNOLIFE', 'OS', self.df)
+        primeiro, _ = self.shared.load('TECNOLIFE', 'OS')
+        segundo, _ = self.shared.load('TECNOLIFE', 'OS')
+        self.assertIs(primeiro, segundo)
+
+    def test_nova_publicacao_substitui_anterior(self):
+        """Testa a troca de versão e a remoção do arquivo substituído"""
+        self.shared.publish('TECNOLIFE', 'OS', self.df)
+        antigo, _ = self.shared.load('TECNOLIFE', 'OS')
+
+        self.shared.publish('TECNOLIFE', 'OS', self.df.head(10))
+        novo, _ = self.shared.load('TECNOLIFE', 'OS')
+
+        self.assertEqual(len(novo), 10)
+        self.assertEqual(len(self._arquivos()), 1)
+        # Quem ainda tinha a versão anterior mapeada continua lendo normalmente
+        self.assertEqual(len(antigo), 1000)
+        self.assertAlmostEqual(antigo['valor'].sum(), self.df['valor'].sum())
+
+    def test_loader_usa_publicacao_recente(self):
+        """Testa que outro processo mapeia a publicação em vez de buscar"""
+        self.shared.shared_loader('TECNOLIFE', 'OS', self._loader, max_age=60)()
+        self.assertEqual(self.chamadas, 1)
+
+        outro = SharedDatasets(directory=self.diretorio)
+        frame = outro.shared_loader('TECNOLIFE', 'OS', self._loader, max_age=60)()
+        self.assertEqual(self.chamadas, 1)
+        self.assertEqual(len(frame), 1000)
+
+    def test_loader_busca_publicacao_vencida(self):
+        """Testa que a publicação mais antiga que max_age é buscada de novo"""
+        loader = self.shared.shared_loader('TECNOLIFE', 'OS', self._loader, max_age=0)
+        loader()
+        loader()
+        self.assertEqual(self.chamadas, 2)
+        # Resposta inalterada (mesmo objeto): só o manifesto é renovado
+        self.assertEqual(len(self._arquivos()), 1)
+
+    def test_loader_nao_publica_vazio(self):
+        """Testa que respostas vazias não substituem a publicação"""
+        frame = self.shared.shared_loader('TECNOLIFE', 'OS', lambda: pd.DataFrame(), max_age=60)()
+        self.assertTrue(frame.empty)
+        self.assertIsNone(self.shared.load('TECNOLIFE', 'OS'))
+
+    def test_diretorio_criado_na_primeira_gravacao(self):
+        """Testa que criar a instância (import do módulo) não cria o diretório"""
+        diretorio = os.path.join(self.diretorio, 'novo')
+        shared = SharedDatasets(directory=diretorio)
+        self.assertFalse(os.path.exists(diretorio))
+        self.assertIsNone(shared.load('TECNOLIFE', 'OS'))
+        shared.shared_loader('TECNOLIFE', 'OS', self._loader, max_age=60)()
+        self.assertTrue(os.path.isdir(diretorio))
+
+    def test_manifesto_removido_apos_renovacao(self):
+        """Testa a publicação removida entre a renovação e o mapeamento"""
+        loader = self.shared.shared_loader('TECNOLIFE', 'OS', self._loader, max_age=0)
+        loader()
+
+        def renovar_e_remover(tenant, view):
+            for nome in os.listdir(self.diretorio):
+                if nome.endswith('.json'):
+                    os.remove(os.path.join(self.diretorio, nome))
+            return True
+
+        with patch.object(self.shared, '_touch', side_effect=renovar_e_remover):
+            frame = loader()
+        self.assertEqual(len(frame), 1000)
+        self.assertIsNotNone(self.shared.load('TECNOLIFE', 'OS'))
+
+    def test_outro_processo_mapeia(self):
+        """Testa a leitura da publicação por um processo separado"""
+        self.shared.publish('TECNOLIFE', 'OS', self.df)
+        contexto = multiprocessing.get_context('spawn')
+        fila = contexto.Queue()
+        processo = contexto.Process(target=_ler_em_outro_processo, args=(self.diretorio, fila))
+        processo.start()
+        resultado = fila.get(timeout=60)
+        processo.join(timeout=60)
+        self.assertAlmostEqual(resultado, float(self.df['valor'].sum()))
+
+
+if __name__ == '__main__':
+    unittest.main()
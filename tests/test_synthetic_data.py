@@ -0,0 +1,69 @@
+"""
+Testes unitários para o gerador de dados sintéticos
+"""
+import tempfile
+import unittest
+import pandas as pd
+from modules.comercial.services.synthetic_data import (
+    SyntheticDataGenerator, write_parquet, OS_FATURADA, ORC_APROVADO
+)
+from modules.comercial.schemas import view_schemas
+
+class TestSyntheticData(unittest.TestCase):
+    """Testes para o SyntheticDataGenerator"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.frames = SyntheticDataGenerator(seed=7, end='2024-12-31').generate(20_000)
+
+    def test_tamanho_e_semente(self):
+        """Testa o número de linhas e a reprodutibilidade pela semente"""
+        fat = self.frames['CUBO_FATURAMENTO']
+        self.assertEqual(len(fat), 20_000)
+        outra = SyntheticDataGenerator(seed=7, end='2024-12-31').generate(20_000)['CUBO_FATURAMENTO']
+        pd.testing.assert_frame_equal(fat, outra)
+        self.assertEqual(fat['emissao'].max(), pd.Timestamp('2024-12-31'))
+
+    def test_consistencia_referencial(self):
+        """Testa cliente, OS e orçamento ligados às notas com datas em ordem"""
+        fat = self.frames['CUBO_FATURAMENTO']
+        os_view = self.frames['OS']
+        orc = self.frames['ORCAMENTO']
+
+        self.assertTrue(fat['codcli'].isin(self.frames['CLIENTE']['codcli']).all())
+        self.assertTrue(os_view['os'].is_unique)
+
+        notas = fat[fat['os'] != 0].drop_duplicates('sequencial')
+        m = notas.merge(os_view, on='os', suffixes=('_nota', '_os'))
+        self.assertEqual(len(m), len(notas))
+        self.assertTrue((m['status'] == OS_FATURADA).all())
+        self.assertTrue((m['data_os'] <= m['emissao']).all())
+        self.assertTrue((m['codcli_nota'] == m['codcli_os']).all())
+
+        aprovados = orc[orc['os'] != 0].merge(os_view, on='os', suffixes=('_orc', '_os'))
+        self.assertTrue((aprovados['status_orc'] == ORC_APROVADO).all())
+        self.assertTrue((aprovados['data_orc'] <= aprovados['data_os']).all())
+
+    def test_distribuicoes(self):
+        """Testa exportação com país, itens por nota e concentração de clientes"""
+        fat = self.frames['CUBO_FATURAMENTO']
+        ex = fat[fat['uf'] == 'EX']
+        self.assertGreater(len(ex), 0)
+        self.assertTrue((ex['pais'] != 'BRASIL').all())
+        self.assertTrue((fat.loc[fat['uf'] != 'EX', 'pais'] == 'BRASIL').all())
+        self.assertTrue(fat.groupby('sequencial')['item'].apply(lambda s: s.tolist() == list(range(1, len(s) + 1))).all())
+
+        por_cliente = fat.groupby('codcli')['valorfaturado'].sum().sort_values(ascending=False)
+        top20 = por_cliente.iloc[:len(por_cliente) // 5].sum() / por_cliente.sum()
+        self.assertGreater(top20, 0.5)
+
+    def test_esquemas_e_parquet(self):
+        """Testa que as views passam pelos esquemas e sobrevivem ao Parquet"""
+        with tempfile.TemporaryDirectory() as destino:
+            caminhos = write_parquet(self.frames, destino)
+            for view, df in self.frames.items():
+                view_schemas.apply(view, df)
+                self.assertEqual(len(pd.read_parquet(caminhos[view])), len(df))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Testes unitários para o agregado territorial
+"""
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from shared.cache.dataset_store import dataset_store
+from shared.utils.cache_manager import memory_cache
+from modules.comercial.schemas import view_schemas
+from modules.comercial.services.aggregates import resumo_territorial
+from modules.comercial.services.synthetic_data import SyntheticDataGenerator
+from modules.comercial.services.territorial import (
+    COORDENADAS_UF, EXTERNO, INTERNO, LOCATION_COLUMNS, agregado_territorial, get_country_coordinates
+)
+
+TENANT = 'TESTE_TERRITORIAL'
+
+
+class TestTerritorial(unittest.TestCase):
+    """Testes para os locais, totais e cache por versão e período"""
+
+    @classmethod
+    def setUpClass(cls):
+        bruto = SyntheticDataGenerator(seed=13).generate(20000)['CUBO_FATURAMENTO']
+        cls.base = view_schemas.apply('CUBO_FATURAMENTO', bruto)
+
+    def setUp(self):
+        memory_cache.invalidate()
+        self.df = dataset_store.get(TENANT, 'CUBO_FATURAMENTO', lambda: self.base, force=True)
+
+    def tearDown(self):
+        dataset_store.invalidate(tenant=TENANT)
+
+    def _conferir(self, anos):
+        """Compara os locais com o agrupamento das linhas do período"""
+        locais = agregado_territorial(self.df, anos).locations.set_index('local')
+        linhas = self.base if anos is None else self.base[self.base['emissao'].dt.year.isin(anos)]
+        exterior = (linhas['uf'] == 'EX').to_numpy()
+        for chave, parte, tipo in (('uf', linhas[~exterior], INTERNO), ('pais', linhas[exterior], EXTERNO)):
+            esperado = parte.groupby(chave, observed=True).agg(
+                valorfaturado=('valorfaturado', 'sum'), clientes=('codcli', 'nunique'), notas=('nota', 'nunique')
+            )
+            obtido = locais.loc[esperado.index.astype(str)]
+            self.assertTrue((obtido['tipo_venda'] == tipo).all())
+            np.testing.assert_allclose(obtido['valorfaturado'], esperado['valorfaturado'])
+            np.testing.assert_array_equal(obtido['clientes'], esperado['clientes'])
+            np.testing.assert_array_equal(obtido['notas'], esperado['notas'])
+        self.assertEqual(len(locais), linhas.loc[~exterior, 'uf'].nunique() + linhas.loc[exterior, 'pais'].nunique())
+
+    def test_locais_por_periodo(self):
+        """Testa os locais de todos os anos, de um ano e de anos não contínuos"""
+        anos = sorted(self.base['emissao'].dt.year.dropna().unique())
+        for periodo in (None, [anos[-1]], [anos[0], anos[-1]]):
+            self._conferir(periodo)
+
+    def test_colunas_e_coordenadas(self):
+        """Testa colunas, ordem por faturamento e coordenadas sem consulta externa"""
+        with patch('requests.get') as consulta:
+            locais = agregado_territorial(self.df).locations
+        consulta.assert_not_called()
+
+        self.assertEqual(list(locais.columns), LOCATION_COLUMNS)
+        self.assertTrue(locais['valorfaturado'].is_monotonic_decreasing)
+        self.assertFalse(locais[['lat', 'lon']].isna().any(axis=None))
+        sp = locais.set_index('local').loc['SP']
+        self.assertEqual((sp['lat'], sp['lon']), (COORDENADAS_UF['SP']['lat'], COORDENADAS_UF['SP']['lon']))
+        self.assertEqual(get_country_coordinates('México'), get_country_coordinates('MEXICO'))
+
+    def test_coordenadas_sem_resultado_nao_repetem_consulta(self):
+        """Testa que um país sem coordenadas não é consultado de novo a cada agregado"""
+        with patch('requests.get', side_effect=OSError('sem rede')) as consulta, patch('time.sleep'):
+            self.assertIsNone(get_country_coordinates('PAIS DESCONHECIDO'))
+            self.assertIsNone(get_country_coordinates('PAIS DESCONHECIDO'))
+        self.assertEqual(consulta.call_count, 1)
+
+    def test_cubo_com_erro_agrega_as_notas(self):
+        """Testa o fallback para as notas quando o cubo falha"""
+        esperado = agregado_territorial(self.df).locations
+        memory_cache.invalidate()
+        with patch('modules.comercial.services.territorial.cubo_faturamento', side_effect=ValueError('cubo')):
+            obtido = agregado_territorial(self.df).locations
+        pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False)
+
+    def test_emissao_nula(self):
+        """Testa o agregado e os cards com datas de emissão nulas"""
+        com_nulas = self.base.copy()
+        com_nulas.loc[com_nulas.index[:20], 'emissao'] = pd.NaT
+        df = dataset_store.get(TENANT, 'CUBO_FATURAMENTO', lambda: com_nulas, force=True)
+        resumo = resumo_territorial(df)
+        self.assertEqual(resumo['total_clientes'], self.base['codcli'].nunique())
+        self.assertFalse(agregado_territorial(df, [2024]).locations.empty)
+
+        # Todos os anos selecionados: sem as emissões nulas, como a soma dos anos
+        anos = sorted(com_nulas['emissao'].dt.year.dropna().astype(int).unique())
+        todos = agregado_territorial(df, anos).locations['valorfaturado'].sum()
+        por_ano = sum(agregado_territorial(df, [ano]).locations['valorfaturado'].sum() for ano in anos)
+        self.assertAlmostEqual(todos, por_ano, places=2)
+        self.assertAlmostEqual(todos, com_nulas.loc[com_nulas['emissao'].notna(), 'valorfaturado'].sum(), places=2)
+
+    def test_resumo_dos_cards(self):
+        """Testa os cards a partir do agregado"""
+        resumo = resumo_territorial(self.df)
+        exterior = self.base[self.base['uf'] == 'EX']
+        self.assertEqual(resumo, {
+            'total_clientes': self.base['codcli'].nunique(),
+            'estados_atendidos': self.base.loc[self.base['uf'] != 'EX', 'uf'].nunique(),
+            'paises_atendidos': exterior['pais'].nunique(),
+            'clientes_externos': exterior['codcli'].nunique(),
+        })
+
+    def test_cache_por_periodo(self):
+        """Testa que "todos os anos" reaproveita o agregado sem filtro"""
+        anos = sorted(self.base['emissao'].dt.year.dropna().unique())
+        completo = agregado_territorial(self.df)
+        self.assertIs(agregado_territorial(self.df, anos).locations, completo.locations)
+        self.assertIsNot(agregado_territorial(self.df, anos[:1]).locations, completo.locations)
+
+        # Nova versão do dataset: agregado recalculado
+        novo = dataset_store.get(TENANT, 'CUBO_FATURAMENTO', lambda: self.base.copy(), force=True)
+        self.assertIsNot(agregado_territorial(novo).locations, completo.locations)
+
+
+if __name__ == '__main__':
+    unittest.main()
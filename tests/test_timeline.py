@@ -0,0 +1,77 @@
+"""
+Testes unitários para a matriz ano × período da linha do tempo
+"""
+import unittest
+import numpy as np
+import pandas as pd
+from shared.utils.formatters import format_currency, format_percentage_series
+from shared.utils.timeline import YEAR_PALETTE, timeline_hover, timeline_matrix, year_colors
+
+
+class TestTimeline(unittest.TestCase):
+    """Testes para somas por período, variantes, hover e cores"""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        n = 3000
+        self.df = pd.DataFrame({
+            'data': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 5 * 365, n), unit='D'),
+            'valorfaturado': rng.random(n) * 1000,
+        })
+
+    def test_matriz_igual_ao_agrupamento(self):
+        """Testa mês, semana e dia contra o agrupamento ano a ano"""
+        datas = self.df['data']
+        periodos = {
+            'month': datas.dt.month,
+            'week': (datas.dt.dayofyear - 1) // 7 + 1,
+            'day': datas.dt.dayofyear,
+        }
+        for grain, periodo in periodos.items():
+            matriz = timeline_matrix(self.df, 'data', 'valorfaturado', [2021, 2023], grain=grain)
+            self.assertEqual(matriz.index.tolist(), [2021, 2023])
+            for ano in (2021, 2023):
+                linhas = datas.dt.year == ano
+                esperado = self.df['valorfaturado'][linhas].groupby(periodo[linhas]).sum()
+                esperado = esperado.reindex(matriz.columns, fill_value=0)
+                np.testing.assert_allclose(matriz.loc[ano].to_numpy(), esperado.to_numpy())
+
+    def test_acumulado_e_variacao(self):
+        """Testa as variantes acumulada e de variação sobre o ano anterior"""
+        mensal = timeline_matrix(self.df, 'data', 'valorfaturado', [2021, 2022, 2023])
+        acumulado = timeline_matrix(self.df, 'data', 'valorfaturado', [2022], cumulative=True)
+        np.testing.assert_allclose(acumulado.loc[2022], mensal.loc[2022].cumsum())
+
+        # O ano anterior entra no cálculo mesmo fora da seleção
+        diferenca = timeline_matrix(self.df, 'data', 'valorfaturado', [2022], delta='abs')
+        np.testing.assert_allclose(diferenca.loc[2022], mensal.loc[2022] - mensal.loc[2021])
+        percentual = timeline_matrix(self.df, 'data', 'valorfaturado', [2023], delta='pct')
+        np.testing.assert_allclose(percentual.loc[2023], (mensal.loc[2023] / mensal.loc[2022] - 1) * 100)
+
+        # Sem o ano anterior nos dados: variação % indefinida
+        self.assertTrue(timeline_matrix(self.df, 'data', 'valorfaturado', [2020], delta='pct').isna().all(axis=None))
+        with self.assertRaises(ValueError):
+            timeline_matrix(self.df, 'data', 'valorfaturado', grain='quarter')
+
+    def test_hover(self):
+        """Testa os textos de hover em moeda e em percentual"""
+        matriz = timeline_matrix(self.df, 'data', 'valorfaturado', [2021, 2022])
+        hover = timeline_hover(matriz)
+        self.assertEqual(hover.shape, matriz.shape)
+        self.assertEqual(hover[1, 2], f"Mês: 3<br>Faturamento: {format_currency(matriz.loc[2022, 3])}")
+
+        variacao = pd.DataFrame([[12.345, np.nan]], index=pd.Index([2022], name='ano'),
+                                columns=pd.RangeIndex(1, 3, name='week'))
+        hover = timeline_hover(variacao, 'Variação', format_percentage_series)
+        self.assertEqual(hover[0].tolist(), ['Semana: 1<br>Variação: +12,3%', 'Semana: 2<br>Variação: -'])
+
+    def test_cores_para_qualquer_numero_de_anos(self):
+        """Testa uma cor por ano, sem anos fixos"""
+        cores = year_colors(range(2001, 2001 + len(YEAR_PALETTE) + 2))
+        self.assertEqual(cores[2001], YEAR_PALETTE[0])
+        self.assertEqual(cores[2001 + len(YEAR_PALETTE)], YEAR_PALETTE[0])
+        self.assertEqual(len(cores), len(YEAR_PALETTE) + 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
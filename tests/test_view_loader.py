@@ -0,0 +1,71 @@
+"""
+Testes unitários para o carregamento concorrente de views
+"""
+import time
+import threading
+import unittest
+import pandas as pd
+from modules.comercial.services.view_loader import ConcurrentViewLoader
+
+class TestConcurrentViewLoader(unittest.TestCase):
+    """Testes para o ConcurrentViewLoader"""
+
+    def test_views_carregadas_em_paralelo(self):
+        """Testa que o tempo total é próximo ao da view mais lenta"""
+        def fetch(view, timeout):
+            time.sleep(0.2)
+            return pd.DataFrame({'view': [view]})
+
+        loader = ConcurrentViewLoader(fetch, max_workers=3, timeout=5)
+        inicio = time.perf_counter()
+        results = loader.load({'a': 'A', 'b': 'B', 'c': 'C'})
+        total = time.perf_counter() - inicio
+
+        self.assertLess(total, 0.5)
+        self.assertEqual(list(results), ['a', 'b', 'c'])
+        self.assertTrue(all(r.ok for r in results.values()))
+        self.assertEqual(results['b'].data['view'].iloc[0], 'B')
+        self.assertGreaterEqual(results['a'].elapsed, 0.2)
+
+    def test_limite_de_concorrencia(self):
+        """Testa que nunca há mais views simultâneas que max_workers"""
+        ativos = []
+        maximo = []
+        lock = threading.Lock()
+
+        def fetch(view, timeout):
+            with lock:
+                ativos.append(view)
+                maximo.append(len(ativos))
+            time.sleep(0.05)
+            with lock:
+                ativos.remove(view)
+            return pd.DataFrame()
+
+        ConcurrentViewLoader(fetch, max_workers=2, timeout=5).load(['A', 'B', 'C', 'D', 'E'])
+        self.assertLessEqual(max(maximo), 2)
+
+    def test_resultado_parcial_com_erro_e_timeout(self):
+        """Testa que erro e timeout em uma view não bloqueiam as demais"""
+        def fetch(view, timeout):
+            if view == 'ERRO':
+                raise ValueError('falha no backend')
+            if view == 'LENTA':
+                time.sleep(2)
+            return pd.DataFrame({'x': [1]})
+
+        loader = ConcurrentViewLoader(fetch, max_workers=1, timeout=0.3, poll_interval=0.02)
+        inicio = time.perf_counter()
+        results = loader.load(['LENTA', 'ERRO', 'OK'])
+        total = time.perf_counter() - inicio
+
+        self.assertLess(total, 1.5)
+        self.assertEqual(results['LENTA'].status, 'timeout')
+        self.assertTrue(results['LENTA'].data.empty)
+        self.assertEqual(results['ERRO'].status, 'error')
+        self.assertIn('falha no backend', results['ERRO'].error)
+        self.assertTrue(results['OK'].ok)
+        self.assertEqual(loader.last_report, results)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Testes do aquecimento dos caches contra o POWERBI local
+"""
+import unittest
+from tools.powerbi_stub import PowerBIStub, sample_fixtures
+from shared.cache.dataset_store import dataset_store
+from shared.cache.refresh_scheduler import refresh_scheduler
+from shared.utils.cache_manager import memory_cache
+from modules.comercial.services.api_service import ComercialAPIService, powerbi_retry, powerbi_fingerprints
+from modules.comercial.services.aggregates import NAMESPACE, resumo_vendas, totais_por_ano
+from modules.comercial.services.warmup import warm_up
+
+VIEWS = ['CUBO_FATURAMENTO', 'ORCAMENTO', 'OS', 'CLIENTE']
+
+class TestWarmup(unittest.TestCase):
+    """Testes para warm_up"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = PowerBIStub(fixtures=sample_fixtures(rows=300, seed=1), cliente='TECNOLIFE').start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+
+    def setUp(self):
+        powerbi_retry.reset()
+        powerbi_fingerprints.invalidate()
+        dataset_store.invalidate(tenant='TECNOLIFE')
+        memory_cache.invalidate(NAMESPACE)
+        self.stub.stats.clear()
+        self.service = ComercialAPIService()
+        self.service.base_url = self.stub.url[:-len('/POWERBI')]
+
+    def tearDown(self):
+        for view in VIEWS:
+            refresh_scheduler.unregister('TECNOLIFE', view)
+        dataset_store.invalidate(tenant='TECNOLIFE')
+
+    def test_aquece_views_e_agregados(self):
+        """Testa que após o aquecimento as leituras não vão ao backend"""
+        report = warm_up(VIEWS, service=self.service)
+
+        self.assertTrue(report.ok, report.summary())
+        self.assertEqual(list(report.views), VIEWS)
+        self.assertIn('totais_por_ano', report.aggregates)
+        self.assertGreater(report.total, 0)
+        self.assertIn('Aquecimento concluído', report.summary())
+
+        requisicoes = self.stub.stats['consultas']
+        df = self.service.get_dataset('CUBO_FATURAMENTO')
+        self.assertEqual(self.stub.stats['consultas'], requisicoes)
+
+        calculos = memory_cache.info()['misses']
+        resumo_vendas(df)
+        totais_por_ano(df)
+        self.assertEqual(memory_cache.info()['misses'], calculos)
+
+    def test_relata_falha(self):
+        """Testa que uma view inexistente aparece no relatório sem interromper as demais"""
+        report = warm_up(['OS', 'VIEW_INEXISTENTE'], service=self.service)
+        self.assertFalse(report.ok)
+        self.assertFalse(report.views['OS'].data.empty)
+        self.assertTrue(report.views['VIEW_INEXISTENTE'].data.empty)
+        self.assertEqual(report.aggregates, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,350 @@
+"""
+Servidor local que substitui o POWERBI do ERP para benchmarks e testes
+
+Reproduz o protocolo /POWERBI/?CLIENTE=&ID=&VIEW=, além de /POWERBI/clear-session
+e /POWERBI/refresh, a partir de fixtures gravadas (JSON ou Parquet) ou de dados
+de exemplo. Permite injetar latência, o erro 500 "A component named DM already
+exists" e respostas grandes (fixture repetida N vezes).
+
+Uso:
+    python -m tools.powerbi_stub --port 8077 --fixtures .cache/fixtures --latency 0.5
+    VITE_API_URL=http://127.0.0.1:8077/POWERBI streamlit run Home.py
+
+Gravação de fixtures a partir do servidor real:
+    python -m tools.powerbi_stub record --dest .cache/fixtures CUBO_FATURAMENTO OS
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import random
+import hashlib
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional, Union
+from urllib.parse import urlsplit, parse_qs
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DM_SESSION_ERROR = "A component named DM already exists"
+WRITE_CHUNK_SIZE = 256 * 1024
+
+Fixture = Union[pd.DataFrame, list]
+
+
+class PowerBIStub:
+    """
+    Servidor POWERBI local
+
+    O erro de DM é modelado como no servidor real: quando ocorre, a sessão
+    fica em conflito e todas as consultas falham até uma chamada a
+    clear-session.
+    """
+
+    def __init__(self,
+                 fixtures: Union[str, Dict[str, Fixture], None] = None,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 cliente: Optional[str] = None,
+                 api_id: Optional[str] = None,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 dm_error_rate: float = 0.0,
+                 scale: int = 1,
+                 etag: bool = False,
+                 compress: bool = True,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            fixtures: Diretório com <VIEW>.json/<VIEW>.parquet ou dicionário {view: dados}.
+                Sem fixtures, usa dados de exemplo
+            host, port: Endereço do servidor (porta 0: escolhida pelo sistema)
+            cliente, api_id: Se informados, outros valores de CLIENTE/ID recebem 403
+            latency: Atraso fixo (s) antes da resposta de cada consulta
+            jitter: Atraso aleatório adicional máximo (s)
+            dm_error_rate: Probabilidade de uma consulta entrar em conflito de DM
+            scale: Quantas vezes as linhas da fixture são repetidas na resposta
+            etag: Envia ETag e responde 304 a If-None-Match
+            compress: Aceita gzip quando o cliente pede
+            seed: Semente para latência e erros injetados
+        """
+        self.fixtures = fixtures if fixtures is not None else sample_fixtures()
+        self.cliente = cliente
+        self.api_id = api_id
+        self.latency = latency
+        self.jitter = jitter
+        self.dm_error_rate = dm_error_rate
+        self.scale = max(1, int(scale))
+        self.etag = etag
+        self.compress = compress
+
+        self.random = random.Random(seed)
+        self.conflict = False
+        self.stats: Dict[str, int] = {}
+        self._bodies: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL no formato de VITE_API_URL"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/POWERBI"
+
+    def start(self) -> 'PowerBIStub':
+        """Inicia o servidor em uma thread de fundo"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"POWERBI local em {self.url}")
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> 'PowerBIStub':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def count(self, evento: str) -> None:
+        with self._lock:
+            self.stats[evento] = self.stats.get(evento, 0) + 1
+
+    def delay(self) -> float:
+        with self._lock:
+            return self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def enter_conflict(self) -> bool:
+        """Sorteia o erro de DM; o conflito persiste até clear-session"""
+        with self._lock:
+            if not self.conflict and self.dm_error_rate and self.random.random() < self.dm_error_rate:
+                self.conflict = True
+            return self.conflict
+
+    def inject_dm_conflict(self) -> None:
+        """Coloca a sessão em conflito de DM imediatamente"""
+        with self._lock:
+            self.conflict = True
+
+    def clear_session(self) -> None:
+        with self._lock:
+            self.conflict = False
+
+    def refresh(self) -> None:
+        """Descarta as respostas já codificadas (fixtures em disco são relidas)"""
+        with self._lock:
+            self._bodies.clear()
+
+    def body(self, view: str) -> Optional[bytes]:
+        """Corpo JSON da view (None se não houver fixture)"""
+        with self._lock:
+            body = self._bodies.get(view)
+        if body is not None:
+            return body
+
+        records = self._load_records(view)
+        if records is None:
+            return None
+        body = _repeat_array(records, self.scale)
+        with self._lock:
+            self._bodies[view] = body
+        return body
+
+    def _load_records(self, view: str) -> Optional[bytes]:
+        """Registros da fixture como JSON, sem os colchetes do array"""
+        if isinstance(self.fixtures, dict):
+            dados = self.fixtures.get(view)
+        else:
+            dados = _read_fixture_file(self.fixtures, view)
+        if dados is None:
+            return None
+        if isinstance(dados, pd.DataFrame):
+            return _frame_to_json(dados)
+        return json.dumps(dados, ensure_ascii=False).encode('utf-8')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, como o servidor real
+
+    @property
+    def stub(self) -> PowerBIStub:
+        return self.server.stub
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        caminho = partes.path.rstrip('/')
+
+        if caminho == '/POWERBI/clear-session':
+            self.stub.count('clear-session')
+            self.stub.clear_session()
+            return self._send(200, b'{"status": "ok"}')
+        if caminho == '/POWERBI/refresh':
+            self.stub.count('refresh')
+            self.stub.refresh()
+            return self._send(200, b'{"status": "ok"}')
+        if caminho == '/POWERBI/_stats':
+            return self._send(200, json.dumps(self.stub.stats).encode())
+        if caminho != '/POWERBI':
+            return self._send(404, b'{"erro": "rota inexistente"}')
+
+        query = {k: v[0] for k, v in parse_qs(partes.query).items()}
+        view = query.get('VIEW')
+        self.stub.count('consultas')
+        if not view:
+            return self._send(400, b'{"erro": "VIEW obrigatoria"}')
+        if (self.stub.cliente and query.get('CLIENTE') != self.stub.cliente) or \
+                (self.stub.api_id and query.get('ID') != self.stub.api_id):
+            return self._send(403, b'{"erro": "CLIENTE ou ID invalido"}')
+
+        atraso = self.stub.delay()
+        if atraso:
+            time.sleep(atraso)
+
+        if self.stub.enter_conflict():
+            self.stub.count('erros_dm')
+            return self._send(500, DM_SESSION_ERROR.encode())
+
+        body = self.stub.body(view)
+        if body is None:
+            return self._send(404, f'{{"erro": "view {view} sem fixture"}}'.encode())
+
+        headers = {}
+        if self.stub.etag:
+            etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.stub.count('nao_modificadas')
+                return self._send(304, b'', {'ETag': etag})
+            headers['ETag'] = etag
+
+        self.stub.count(f'view:{view}')
+        self._send(200, body, headers)
+
+    def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None):
+        if self.stub.compress and body and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=1)
+            headers = {**(headers or {}), 'Content-Encoding': 'gzip'}
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for nome, valor in (headers or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        for inicio in range(0, len(body), WRITE_CHUNK_SIZE):
+            self.wfile.write(body[inicio:inicio + WRITE_CHUNK_SIZE])
+
+
+def _frame_to_json(df: pd.DataFrame) -> bytes:
+    """Serializa como o POWERBI: registros, datas em AAAA-MM-DD"""
+    df = df.copy(deep=False)
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime('%Y-%m-%d')
+        elif isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+    return df.to_json(orient='records', force_ascii=False).encode('utf-8')
+
+
+def _repeat_array(array_json: bytes, vezes: int) -> bytes:
+    """Repete os elementos de um array JSON sem decodificá-lo"""
+    interno = array_json.strip()[1:-1].strip()
+    if vezes == 1 or not interno:
+        return b'[' + interno + b']'
+    return b'[' + b','.join([interno] * vezes) + b']'
+
+
+def _read_fixture_file(diretorio: str, view: str) -> Optional[Fixture]:
+    for extensao in ('.parquet', '.json'):
+        caminho = os.path.join(diretorio, f"{view}{extensao}")
+        if os.path.exists(caminho):
+            if extensao == '.parquet':
+                return pd.read_parquet(caminho)
+            with open(caminho, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    return None
+
+
+def sample_fixtures(rows: int = 1000, seed: int = 42) -> Dict[str, pd.DataFrame]:
+    """Dados sintéticos das views CUBO_FATURAMENTO, ORCAMENTO, OS e CLIENTE"""
+    from modules.comercial.services.synthetic_data import SyntheticDataGenerator
+    return SyntheticDataGenerator(seed=seed).generate(rows)
+
+
+def record_fixtures(views: Iterable[str], dest: str, base_url: str, cliente: str, api_id: str) -> None:
+    """Grava as respostas do servidor real como fixtures JSON"""
+    from shared.services.http_client import http_client
+
+    os.makedirs(dest, exist_ok=True)
+    for view in views:
+        inicio = time.perf_counter()
+        response = http_client.get(base_url, params={'CLIENTE': cliente, 'ID': api_id, 'VIEW': view}, stream=True)
+        caminho = os.path.join(dest, f"{view}.json")
+        with response:
+            response.raise_for_status()
+            with open(f"{caminho}.tmp", 'wb') as f:
+                for chunk in response.iter_content(chunk_size=WRITE_CHUNK_SIZE):
+                    f.write(chunk)
+        os.replace(f"{caminho}.tmp", caminho)
+        print(f"{view}: {os.path.getsize(caminho) / 1e6:.1f} MB em {time.perf_counter() - inicio:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='POWERBI local para benchmarks e testes')
+    sub = parser.add_subparsers(dest='comando')
+
+    gravar = sub.add_parser('record', help='Grava fixtures a partir do servidor real')
+    gravar.add_argument('views', nargs='+')
+    gravar.add_argument('--dest', default='.cache/fixtures')
+
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8077)
+    parser.add_argument('--fixtures', help='Diretório com <VIEW>.json ou <VIEW>.parquet')
+    parser.add_argument('--sample-rows', type=int, default=1000, help='Linhas dos dados de exemplo')
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--dm-error-rate', type=float, default=0.0)
+    parser.add_argument('--scale', type=int, default=1)
+    parser.add_argument('--etag', action='store_true')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.comando == 'record':
+        from modules.comercial.config import API_CONFIG
+        record_fixtures(args.views, args.dest, API_CONFIG['BASE_URL'],
+                        API_CONFIG['PARAMS']['CLIENTE'], API_CONFIG['PARAMS']['ID'])
+        return 0
+
+    stub = PowerBIStub(
+        fixtures=args.fixtures or sample_fixtures(args.sample_rows),
+        host=args.host, port=args.port,
+        latency=args.latency, jitter=args.jitter,
+        dm_error_rate=args.dm_error_rate, scale=args.scale,
+        etag=args.etag, seed=args.seed
+    )
+    print(f"POWERBI local em {stub.url} (VITE_API_URL={stub.url})")
+    try:
+        stub.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.httpd.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
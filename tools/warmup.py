@@ -0,0 +1,39 @@
+"""
+Aquecimento dos caches pela linha de comando
+
+Busca as views configuradas, calcula os agregados comuns e relata o tempo de
+cada etapa. Os caches em memória valem para o processo que os preencheu: no
+app, o aquecimento roda na inicialização (WARMUP_ON_START); por aqui, o
+comando serve para medir a carga fria e preencher a cópia local da
+sincronização incremental (API_DELTA_SYNC=1) ou publicar as views para os
+processos do app (SHARED_DATASETS=1).
+
+Uso:
+    python -m tools.warmup
+    python -m tools.warmup CUBO_FATURAMENTO OS --repeat 2
+"""
+import sys
+import logging
+import argparse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Aquece os caches do módulo comercial e relata os tempos')
+    parser.add_argument('views', nargs='*', help='Views a buscar (padrão: WARMUP_VIEWS)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Repetições; a partir da segunda, mede a leitura já aquecida')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    from modules.comercial.services.warmup import warm_up
+
+    ok = True
+    for rodada in range(1, max(1, args.repeat) + 1):
+        report = warm_up(args.views or None)
+        print(f"[{rodada}] {report.summary()}")
+        ok = ok and report.ok
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())